@@ -17,6 +17,7 @@ interface Announcement {
   municipality_name?: string
   creator_name?: string
   images?: string[]
+  thumbnails?: string[]
 }
 
 interface AnnouncementManagerProps {
@@ -201,7 +202,7 @@ export default function AnnouncementManager({ onAnnouncementUpdated }: Announcem
             {/* Image banner with fixed aspect to avoid stretching on wide screens */}
             {Array.isArray(announcement.images) && announcement.images.length > 0 ? (
               <div className="aspect-[16/9] bg-neutral-100">
-                <img src={mediaUrl(announcement.images[0])} alt="Announcement" loading="lazy" className="w-full h-full object-cover" />
+                <img src={mediaUrl(announcement.thumbnails?.[0] || announcement.images[0])} alt="Announcement" loading="lazy" className="w-full h-full object-cover" />
               </div>
             ) : (
               <div className="aspect-[16/9] bg-neutral-100" />
@@ -19,6 +19,7 @@ interface MarketplaceItem {
     email: string
   }
   images?: string[]
+  thumbnails?: string[]
   created_at: string
   municipality_name?: string
 }
@@ -159,7 +160,7 @@ export default function MarketplaceModeration({ onItemProcessed }: MarketplaceMo
                 <div className="flex-shrink-0">
                   {item.images && item.images.length > 0 ? (
                     <img
-                      src={item.images[0]}
+                      src={item.thumbnails?.[0] || item.images[0]}
                       alt={item.title}
                       className="w-16 h-16 rounded-lg object-cover"
                     />
@@ -163,8 +163,8 @@ export const userApi = {
     apiClient.get('/api/admin/users/pending').then(res => res.data),
 
   // Get verified users with pagination
-  getVerifiedUsers: (page = 1, perPage = 20): Promise<PaginatedResponse<any>> =>
-    apiClient.get(`/api/admin/users/verified?page=${page}&per_page=${perPage}`).then(res => res.data),
+  getVerifiedUsers: (page = 1, perPage = 20, q?: string): Promise<PaginatedResponse<any>> =>
+    apiClient.get('/api/admin/users/verified', { params: { page, per_page: perPage, ...(q ? { q } : {}) } }).then(res => res.data),
 
   // Verify a user
   verifyUser: (userId: number): Promise<ApiResponse> =>
@@ -470,13 +470,51 @@ export const showToast = (message: string, _type: 'success' | 'error' | 'info' =
 export default apiClient
 
 // Admin Reports supplemental APIs
+export interface DocumentJob {
+  id: number
+  request_id: number
+  kind: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  attempts: number
+  max_attempts: number
+  error?: string | null
+  result_file?: string | null
+  url?: string | null
+  created_at?: string | null
+  started_at?: string | null
+  finished_at?: string | null
+}
+
 export const documentsAdminApi = {
   getStats: (range: string = 'last_30_days'): Promise<ApiResponse<{ total_requests: number; top_requested: Array<{ name: string; count: number }> }>> =>
     apiClient.get('/api/admin/documents/stats', { params: { range } }).then(res => res.data),
   listRequests: (params: Record<string, any> = {}): Promise<ApiResponse<{ requests: any[]; pagination?: any }>> =>
     apiClient.get('/api/admin/documents/requests', { params }).then(res => res.data),
-  generatePdf: (id: number): Promise<ApiResponse<{ url: string; request: any }>> =>
+  // Queues generation and returns the job right away (202); poll getJob or use generatePdfAndWait
+  generatePdf: (id: number): Promise<ApiResponse<{ job: DocumentJob; url?: string; request?: any }>> =>
     apiClient.post(`/api/admin/documents/requests/${id}/generate-pdf`).then(res => res.data),
+  // Batch generation: ids (print order) or a filter such as { status: 'processing', document_type_id }
+  generateBatch: (body: { request_ids?: number[]; filter?: { status?: string; document_type_id?: number }; merge?: boolean }): Promise<ApiResponse<any>> =>
+    apiClient.post('/api/admin/documents/requests/generate-batch', body).then(res => res.data),
+  getBatch: (batchId: number): Promise<ApiResponse<any>> =>
+    apiClient.get(`/api/admin/documents/batches/${batchId}`).then(res => res.data),
+  // One PDF of ready requests (document + claim ticket each), in the given order
+  printBatch: (request_ids: number[]): Promise<Blob> =>
+    apiClient.post('/api/admin/documents/requests/print-batch', { request_ids }, { responseType: 'blob' }).then(res => res.data),
+  getJob: (jobId: number): Promise<ApiResponse<{ job: DocumentJob; url?: string; request?: any }>> =>
+    apiClient.get(`/api/admin/documents/jobs/${jobId}`).then(res => res.data),
+  generatePdfAndWait: async (id: number, opts: { intervalMs?: number; timeoutMs?: number } = {}): Promise<{ job: DocumentJob; url?: string; request?: any }> => {
+    const intervalMs = opts.intervalMs ?? 1000
+    const deadline = Date.now() + (opts.timeoutMs ?? 120000)
+    let res: any = await documentsAdminApi.generatePdf(id)
+    while (res?.job && (res.job.status === 'queued' || res.job.status === 'running')) {
+      if (Date.now() > deadline) throw new Error('Document generation is taking longer than expected. Please check again shortly.')
+      await new Promise(resolve => setTimeout(resolve, intervalMs))
+      res = await documentsAdminApi.getJob(res.job.id)
+    }
+    if (res?.job?.status === 'failed') throw new Error(res.job.error || 'Document generation failed')
+    return res
+  },
   downloadPdf: (id: number): Promise<ApiResponse<{ url: string }>> =>
     apiClient.get(`/api/admin/documents/requests/${id}/download`).then(res => res.data),
   updateStatus: (id: number, status: string, admin_notes?: string, rejection_reason?: string): Promise<ApiResponse<{ request: any }>> =>
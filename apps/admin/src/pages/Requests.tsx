@@ -670,7 +670,7 @@ export default function Requests() {
                   try {
                     setSavingEdit(true)
                     await documentsAdminApi.updateContent(editFor.id, { purpose: editFor.purpose || undefined, remarks: editFor.remarks || undefined, civil_status: editFor.civil_status || undefined, age: (editFor.age && !Number.isNaN(Number(editFor.age))) ? Number(editFor.age) : undefined })
-                    const res = await documentsAdminApi.generatePdf(editFor.id)
+                    const res = await documentsAdminApi.generatePdfAndWait(editFor.id)
                     await refresh()
                     const url = (res as any)?.url || (res as any)?.data?.url
                     if (url) {
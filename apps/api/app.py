@@ -13,7 +13,7 @@ load_dotenv(os.path.join(project_root, '.env'))
 # Add parent directory to path for absolute imports
 sys.path.insert(0, project_root)
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 
 # Import config - try absolute first, then relative
@@ -51,6 +51,7 @@ def create_app(config_class=Config):
             ],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"],
+            "expose_headers": ["Content-Disposition", "X-Skipped-Requests"],
             "supports_credentials": True
         }
     })
@@ -67,10 +68,10 @@ def create_app(config_class=Config):
     
     # Register blueprints
     try:
-        from apps.api.routes import auth_bp, municipalities_bp, marketplace_bp, announcements_bp, documents_bp, issues_bp, benefits_bp
+        from apps.api.routes import auth_bp, municipalities_bp, marketplace_bp, announcements_bp, documents_bp, issues_bp, benefits_bp, search_bp, locations_bp
         from apps.api.routes.admin import admin_bp
     except ImportError:
-        from routes import auth_bp, municipalities_bp, marketplace_bp, announcements_bp, documents_bp, issues_bp, benefits_bp
+        from routes import auth_bp, municipalities_bp, marketplace_bp, announcements_bp, documents_bp, issues_bp, benefits_bp, search_bp, locations_bp
         from routes.admin import admin_bp
     
     app.register_blueprint(auth_bp)
@@ -80,8 +81,18 @@ def create_app(config_class=Config):
     app.register_blueprint(documents_bp)
     app.register_blueprint(issues_bp)
     app.register_blueprint(benefits_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(locations_bp)
     app.register_blueprint(admin_bp)
     
+    # Warm the in-process reference registry so the first requests skip the DB
+    if app.config.get('REFERENCE_REGISTRY_WARM'):
+        try:
+            from apps.api.utils.reference_registry import warm_registry
+        except ImportError:
+            from utils.reference_registry import warm_registry
+        warm_registry(app)
+    
     # Health check endpoint
     @app.route('/health', methods=['GET'])
     def health_check():
@@ -107,13 +118,28 @@ def create_app(config_class=Config):
     # Serve uploaded files
     @app.route('/uploads/<path:filename>')
     def serve_uploaded_file(filename):
-        """Serve uploaded files from the uploads directory"""
+        """Serve uploaded files from the uploads directory (or hand them to the front proxy)"""
+        try:
+            from apps.api.utils.upload_serving import upload_response
+        except ImportError:
+            from utils.upload_serving import upload_response
+        try:
+            return upload_response(filename)
+        except FileNotFoundError:
+            return jsonify({'error': 'File not found'}), 404
+    
+    # Serve resized images (uploads, logos, landmarks) from the derivative cache
+    @app.route('/media/<path:filename>')
+    def serve_media(filename):
+        """Serve an image scaled to an allowed size: /media/<path>?w=&h=&fmt="""
+        try:
+            from apps.api.utils.media_cache import MediaRequestError, media_response
+        except ImportError:
+            from utils.media_cache import MediaRequestError, media_response
         try:
-            # Get the upload directory from config
-            upload_dir = app.config.get('UPLOAD_FOLDER', 'uploads')
-            # Ensure string path for Flask static serving
-            directory = str(upload_dir)
-            return send_from_directory(directory, filename)
+            return media_response(filename, request.args)
+        except MediaRequestError as e:
+            return jsonify({'error': 'Invalid media request', 'details': str(e)}), 400
         except FileNotFoundError:
             return jsonify({'error': 'File not found'}), 404
     
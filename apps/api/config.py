@@ -50,10 +50,26 @@ class Config:
     # File Uploads
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_FILE_SIZE', 10 * 1024 * 1024))  # 10MB
     UPLOAD_FOLDER = BASE_DIR / os.getenv('UPLOAD_FOLDER', 'uploads/zambales')
+    # /uploads transfers (utils.upload_serving): python | x-accel (nginx) | x-sendfile (Apache, lighttpd)
+    UPLOAD_SERVE_MODE = os.getenv('UPLOAD_SERVE_MODE', 'python')
+    UPLOAD_ACCEL_PREFIX = os.getenv('UPLOAD_ACCEL_PREFIX', '/_uploads/')  # nginx internal location aliased to UPLOAD_FOLDER
+    UPLOAD_CACHE_MAX_AGE = int(os.getenv('UPLOAD_CACHE_MAX_AGE', 300))  # seconds, for files rewritten in place (generated PDFs)
     ALLOWED_EXTENSIONS = set(
         os.getenv('ALLOWED_EXTENSIONS', 'pdf,jpg,jpeg,png,doc,docx').split(',')
     )
-    
+
+    # Upload storage (utils.storage): local (UPLOAD_FOLDER) | s3 (any S3-compatible bucket)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+    S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL')  # e.g. http://minio:9000; AWS regional endpoint when unset
+    S3_BUCKET = os.getenv('S3_BUCKET')
+    S3_REGION = os.getenv('S3_REGION', 'us-east-1')
+    S3_ACCESS_KEY_ID = os.getenv('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY = os.getenv('S3_SECRET_ACCESS_KEY')
+    S3_PREFIX = os.getenv('S3_PREFIX', '')  # key prefix inside the bucket
+    S3_ADDRESSING_STYLE = os.getenv('S3_ADDRESSING_STYLE', 'path')  # path | virtual
+    S3_PRESIGN_EXPIRES = int(os.getenv('S3_PRESIGN_EXPIRES', 3600))  # seconds a download link stays valid
+    S3_TIMEOUT = float(os.getenv('S3_TIMEOUT', 30))
+
     # Email (SMTP)
     SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
     SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
@@ -74,11 +90,57 @@ class Config:
     
     # Location Data
     LOCATION_DATA_FILE = BASE_DIR / 'data' / 'locations' / 'philippines_full_locations.json'
+    # Compiled SQLite index of LOCATION_DATA_FILE (rebuilt automatically when the JSON changes)
+    LOCATION_INDEX_FILE = Path(os.getenv('LOCATION_INDEX_FILE', BASE_DIR / 'data' / 'locations' / 'philippines_full_locations.sqlite'))
+    
+    # Reference data registry (municipalities, barangays, document types, issue categories)
+    REFERENCE_REGISTRY_TTL = int(os.getenv('REFERENCE_REGISTRY_TTL', 30))  # seconds between cross-worker freshness checks
+    REFERENCE_REGISTRY_WARM = os.getenv('REFERENCE_REGISTRY_WARM', 'False') == 'True'  # load at worker start
+    
+    # Reference numbers (REQ/ISS/APP-<municipality>-<year>-<seq>): 1 = gapless, allocated in the request
+    # transaction; N > 1 = each worker reserves N numbers at a time (no row-lock waits, may leave gaps)
+    REFERENCE_BLOCK_SIZE = int(os.getenv('REFERENCE_BLOCK_SIZE', 1))
+    
+    # Background document generation (utils.document_jobs): process | thread | inline
+    DOCUMENT_JOB_EXECUTOR = os.getenv('DOCUMENT_JOB_EXECUTOR', 'process')
+    DOCUMENT_JOB_WORKERS = int(os.getenv('DOCUMENT_JOB_WORKERS', 2))  # per gunicorn worker
+    DOCUMENT_JOB_MAX_TASKS_PER_CHILD = int(os.getenv('DOCUMENT_JOB_MAX_TASKS_PER_CHILD', 100))  # pool is replaced after workers x this many jobs
+    DOCUMENT_JOB_MAX_ATTEMPTS = int(os.getenv('DOCUMENT_JOB_MAX_ATTEMPTS', 3))
+    DOCUMENT_JOB_RETRY_DELAY = float(os.getenv('DOCUMENT_JOB_RETRY_DELAY', 2))  # seconds, times the attempt number
+    DOCUMENT_JOB_TIMEOUT = int(os.getenv('DOCUMENT_JOB_TIMEOUT', 300))  # queued/running longer than this is resubmitted
+    DOCUMENT_BATCH_MAX_SIZE = int(os.getenv('DOCUMENT_BATCH_MAX_SIZE', 200))  # requests per generate-batch call
+    
+    # LibreOffice DOCX -> PDF converter pool (utils.doc_to_pdf), per process
+    SOFFICE_POOL_SIZE = int(os.getenv('SOFFICE_POOL_SIZE', 2))
+    SOFFICE_MAX_CONVERSIONS = int(os.getenv('SOFFICE_MAX_CONVERSIONS', 50))  # restart an office process after this many
+    SOFFICE_BATCH_SIZE = int(os.getenv('SOFFICE_BATCH_SIZE', 8))  # queued files converted per invocation
+    SOFFICE_TIMEOUT = float(os.getenv('SOFFICE_TIMEOUT', 60))  # seconds per conversion
+    SOFFICE_PROFILE_DIR = os.getenv('SOFFICE_PROFILE_DIR')  # root for per-process profiles (default: temp dir)
+    DOCX_TEMPLATE_CACHE_SIZE = int(os.getenv('DOCX_TEMPLATE_CACHE_SIZE', 64))  # compiled DOCX templates kept per worker
+    
+    # Marketplace/announcement photo variants (utils.image_variants): thread | inline
+    IMAGE_VARIANT_EXECUTOR = os.getenv('IMAGE_VARIANT_EXECUTOR', 'thread')
+    IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', 1))  # per gunicorn worker
+    
+    # Near-duplicate issue reports (same category, nearby, similar text) are linked to one canonical issue
+    ISSUE_DUPLICATE_DETECTION = os.getenv('ISSUE_DUPLICATE_DETECTION', 'True') == 'True'
+    ISSUE_DUPLICATE_RADIUS_M = float(os.getenv('ISSUE_DUPLICATE_RADIUS_M', 100))
+    ISSUE_DUPLICATE_THRESHOLD = float(os.getenv('ISSUE_DUPLICATE_THRESHOLD', 0.35))  # estimated Jaccard of text shingles
+    ISSUE_DUPLICATE_WINDOW_DAYS = int(os.getenv('ISSUE_DUPLICATE_WINDOW_DAYS', 30))
     
     # Asset Paths
     MUNICIPAL_LOGOS_DIR = BASE_DIR / 'public' / 'logos' / 'municipalities'
     PROVINCE_LOGO_DIR = BASE_DIR / 'public' / 'logos' / 'zambales'
     LANDMARKS_DIR = BASE_DIR / 'public' / 'landmarks'
+    # Pre-faded watermark PNGs derived from the municipal seals (safe to delete)
+    WATERMARK_CACHE_DIR = Path(os.getenv('WATERMARK_CACHE_DIR', BASE_DIR / 'data' / 'cache' / 'watermarks'))
+    
+    # Resized images served at /media/<path>?w=&h=&fmt= (utils.media_cache)
+    MEDIA_SIZES = tuple(sorted({int(s) for s in os.getenv(
+        'MEDIA_SIZES', '32,48,64,96,128,160,240,320,480,640,800,1080,1280,1600').split(',') if s.strip()}))
+    MEDIA_PUBLIC_DIRS = {'logos': BASE_DIR / 'public' / 'logos', 'landmarks': LANDMARKS_DIR}  # /media/<name>/...
+    MEDIA_CACHE_DIR = Path(os.getenv('MEDIA_CACHE_DIR', BASE_DIR / 'data' / 'cache' / 'media'))  # safe to delete
+    MEDIA_CACHE_MAX_BYTES = int(os.getenv('MEDIA_CACHE_MAX_BYTES', 512 * 1024 * 1024))
     
     @staticmethod
     def init_app(app):
@@ -121,6 +183,8 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    DOCUMENT_JOB_EXECUTOR = 'inline'
+    IMAGE_VARIANT_EXECUTOR = 'inline'
 
 
 # Config dictionary
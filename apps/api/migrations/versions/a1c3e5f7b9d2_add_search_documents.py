@@ -0,0 +1,71 @@
+"""add search_documents full-text index
+
+Revision ID: a1c3e5f7b9d2
+Revises: 7e00b3f22e71
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b9d2'
+down_revision = '7e00b3f22e71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'search_documents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(length=30), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('municipality_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('entity_type', 'entity_id', name='uq_search_document_entity'),
+    )
+    op.create_index('idx_search_document_municipality', 'search_documents', ['municipality_id'], unique=False)
+
+    # Dialect specific text index (mirrors the DDL hooks in models/search.py)
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+            "title, body, content='search_documents', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+            "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+            "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+            "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+            "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END"
+        )
+    elif bind.dialect.name == 'postgresql':
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_document_tsv ON search_documents USING gin (("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(body, '')), 'B')))"
+        )
+    # Populate with: python apps/api/scripts/rebuild_search_index.py
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS search_fts')
+    elif bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS idx_search_document_tsv')
+    op.drop_index('idx_search_document_municipality', table_name='search_documents')
+    op.drop_table('search_documents')
@@ -0,0 +1,50 @@
+"""add document_jobs for background document generation
+
+Revision ID: a3c5e7f9b1d4
+Revises: f1b3d5e7a9c4
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f9b1d4'
+down_revision = 'f1b3d5e7a9c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'document_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('request_id', sa.Integer(), nullable=False),
+        sa.Column('municipality_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('requested_by', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('result_file', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['request_id'], ['document_requests.id']),
+        sa.ForeignKeyConstraint(['municipality_id'], ['municipalities.id']),
+        sa.ForeignKeyConstraint(['requested_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    with op.batch_alter_table('document_jobs', schema=None) as batch_op:
+        batch_op.create_index('idx_document_job_request', ['request_id', 'status'], unique=False)
+        batch_op.create_index('idx_document_job_status', ['status', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('document_jobs', schema=None) as batch_op:
+        batch_op.drop_index('idx_document_job_status')
+        batch_op.drop_index('idx_document_job_request')
+    op.drop_table('document_jobs')
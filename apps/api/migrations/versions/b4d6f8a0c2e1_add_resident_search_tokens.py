@@ -0,0 +1,39 @@
+"""add resident_search_tokens trigram index
+
+Revision ID: b4d6f8a0c2e1
+Revises: a1c3e5f7b9d2
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d6f8a0c2e1'
+down_revision = 'a1c3e5f7b9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'resident_search_tokens',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(length=8), nullable=False),
+        sa.Column('municipality_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'token'),
+    )
+    op.create_index(
+        'idx_resident_token_lookup', 'resident_search_tokens',
+        ['municipality_id', 'token', 'user_id'], unique=False,
+    )
+    op.create_index('idx_resident_token', 'resident_search_tokens', ['token', 'user_id'], unique=False)
+    # Populate with: python apps/api/scripts/rebuild_search_index.py --target residents
+
+
+def downgrade():
+    op.drop_index('idx_resident_token', table_name='resident_search_tokens')
+    op.drop_index('idx_resident_token_lookup', table_name='resident_search_tokens')
+    op.drop_table('resident_search_tokens')
@@ -0,0 +1,51 @@
+"""add document_batches and batch jobs
+
+Revision ID: b4d6f8a0c2e5
+Revises: a3c5e7f9b1d4
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d6f8a0c2e5'
+down_revision = 'a3c5e7f9b1d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'document_batches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('municipality_id', sa.Integer(), nullable=False),
+        sa.Column('requested_by', sa.Integer(), nullable=True),
+        sa.Column('request_ids', sa.JSON(), nullable=False),
+        sa.Column('skipped', sa.JSON(), nullable=True),
+        sa.Column('merge', sa.Boolean(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('merged_file', sa.String(length=255), nullable=True),
+        sa.Column('manifest_file', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['municipality_id'], ['municipalities.id']),
+        sa.ForeignKeyConstraint(['requested_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    with op.batch_alter_table('document_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('batch_id', sa.Integer(), nullable=True))
+        batch_op.alter_column('request_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.create_foreign_key('fk_document_jobs_batch_id', 'document_batches', ['batch_id'], ['id'])
+        batch_op.create_index('idx_document_job_batch', ['batch_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.execute('DELETE FROM document_jobs WHERE request_id IS NULL')
+    with op.batch_alter_table('document_jobs', schema=None) as batch_op:
+        batch_op.drop_index('idx_document_job_batch')
+        batch_op.drop_constraint('fk_document_jobs_batch_id', type_='foreignkey')
+        batch_op.alter_column('request_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('batch_id')
+    op.drop_table('document_batches')
@@ -0,0 +1,26 @@
+"""add document_requests.document_input_hash
+
+Revision ID: c6e8a0b2d4f7
+Revises: b4d6f8a0c2e5
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e8a0b2d4f7'
+down_revision = 'b4d6f8a0c2e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('document_requests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('document_input_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('document_requests', schema=None) as batch_op:
+        batch_op.drop_column('document_input_hash')
@@ -0,0 +1,26 @@
+"""add composite marketplace browse index on items
+
+Revision ID: c7e9a1b3d5f0
+Revises: b4d6f8a0c2e1
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e9a1b3d5f0'
+down_revision = 'b4d6f8a0c2e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_item_browse', 'items',
+        ['municipality_id', 'status', 'is_active', 'category'], unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('idx_item_browse', table_name='items')
@@ -0,0 +1,29 @@
+"""add geohash column and index to issues
+
+Revision ID: d2f4b6c8e0a3
+Revises: c7e9a1b3d5f0
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f4b6c8e0a3'
+down_revision = 'c7e9a1b3d5f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.create_index('idx_issue_geohash', ['geohash', 'latitude', 'longitude', 'is_public'], unique=False)
+    # Backfill existing rows with: python apps/api/scripts/backfill_issue_geohash.py
+
+
+def downgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.drop_index('idx_issue_geohash')
+        batch_op.drop_column('geohash')
@@ -0,0 +1,32 @@
+"""add stored_blobs for content-addressed uploads
+
+Revision ID: d8f0b2c4e6a9
+Revises: c6e8a0b2d4f7
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f0b2c4e6a9'
+down_revision = 'c6e8a0b2d4f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stored_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+
+
+def downgrade():
+    op.drop_table('stored_blobs')
@@ -0,0 +1,33 @@
+"""add near-duplicate link and text signature to issues
+
+Revision ID: e5a7c9b1d3f2
+Revises: d2f4b6c8e0a3
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9b1d3f2'
+down_revision = 'd2f4b6c8e0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('text_signature', sa.JSON(), nullable=True))
+        batch_op.create_foreign_key('fk_issues_duplicate_of_id', 'issues', ['duplicate_of_id'], ['id'])
+        batch_op.create_index('idx_issue_duplicate_of', ['duplicate_of_id'], unique=False)
+    # Existing rows get signatures lazily (computed on comparison or on the next text edit)
+
+
+def downgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.drop_index('idx_issue_duplicate_of')
+        batch_op.drop_constraint('fk_issues_duplicate_of_id', type_='foreignkey')
+        batch_op.drop_column('text_signature')
+        batch_op.drop_column('duplicate_of_id')
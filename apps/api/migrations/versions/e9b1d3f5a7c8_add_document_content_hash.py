@@ -0,0 +1,26 @@
+"""add document_requests.document_content_hash
+
+Revision ID: e9b1d3f5a7c8
+Revises: d8f0b2c4e6a9
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b1d3f5a7c8'
+down_revision = 'd8f0b2c4e6a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('document_requests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('document_content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('document_requests', schema=None) as batch_op:
+        batch_op.drop_column('document_content_hash')
@@ -0,0 +1,31 @@
+"""add sequence_counters for reference numbers
+
+Revision ID: f1b3d5e7a9c4
+Revises: e5a7c9b1d3f2
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b3d5e7a9c4'
+down_revision = 'e5a7c9b1d3f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sequence_counters',
+        sa.Column('prefix', sa.String(length=10), nullable=False),
+        sa.Column('municipality_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('prefix', 'municipality_id', 'year'),
+    )
+
+
+def downgrade():
+    op.drop_table('sequence_counters')
@@ -15,20 +15,26 @@ try:
     from apps.api.models.user import User
     from apps.api.models.municipality import Municipality, Barangay
     from apps.api.models.marketplace import Item, Transaction, Message
-    from apps.api.models.document import DocumentType, DocumentRequest
+    from apps.api.models.document import DocumentType, DocumentRequest, DocumentJob, DocumentBatch
     from apps.api.models.issue import IssueCategory, Issue, IssueUpdate
     from apps.api.models.benefit import BenefitProgram, BenefitApplication
     from apps.api.models.token_blacklist import TokenBlacklist
     from apps.api.models.audit import AuditLog
+    from apps.api.models.search import SearchDocument, ResidentSearchToken
+    from apps.api.models.sequence import SequenceCounter
+    from apps.api.models.blob import StoredBlob
 except ImportError:
     from .user import User
     from .municipality import Municipality, Barangay
     from .marketplace import Item, Transaction, Message
-    from .document import DocumentType, DocumentRequest
+    from .document import DocumentType, DocumentRequest, DocumentJob, DocumentBatch
     from .issue import IssueCategory, Issue, IssueUpdate
     from .benefit import BenefitProgram, BenefitApplication
     from .token_blacklist import TokenBlacklist
     from .audit import AuditLog
+    from .search import SearchDocument, ResidentSearchToken
+    from .sequence import SequenceCounter
+    from .blob import StoredBlob
 
 __all__ = [
     'User',
@@ -39,6 +45,8 @@ __all__ = [
     'Message',
     'DocumentType',
     'DocumentRequest',
+    'DocumentJob',
+    'DocumentBatch',
     'IssueCategory',
     'Issue',
     'IssueUpdate',
@@ -46,5 +54,9 @@ __all__ = [
     'BenefitApplication',
     'TokenBlacklist',
     'AuditLog',
+    'SearchDocument',
+    'ResidentSearchToken',
+    'SequenceCounter',
+    'StoredBlob',
 ]
 
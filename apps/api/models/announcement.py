@@ -41,8 +41,12 @@ class Announcement(db.Model):
     def __repr__(self):
         return f'<Announcement {self.title}>'
     
-    def to_dict(self):
-        """Convert announcement to dictionary."""
+    def to_dict(self, include_originals=False):
+        """Convert announcement to dictionary (``include_originals``: admin view of the uploads)."""
+        try:
+            from apps.api.utils.image_variants import image_fields
+        except ImportError:
+            from utils.image_variants import image_fields
         return {
             'id': self.id,
             'title': self.title,
@@ -52,7 +56,7 @@ class Announcement(db.Model):
             'created_by': self.created_by,
             'creator_name': f"{self.creator.first_name} {self.creator.last_name}" if self.creator else None,
             'priority': self.priority,
-            'images': self.images or [],
+            **image_fields(self.images, include_originals),
             'external_url': self.external_url,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
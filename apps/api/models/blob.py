@@ -0,0 +1,25 @@
+"""Reference counts for content-addressed uploads.
+
+One row per stored file (``uploads/blobs/ab/cd/<sha256>.<ext>``); ``ref_count``
+is the number of saved uploads that point at it. Maintained by
+``utils.blob_store``: saving identical bytes again only increments the count,
+and the file is removed once the last reference is deleted.
+"""
+from datetime import datetime
+try:
+    from apps.api import db
+except ImportError:
+    from __init__ import db
+
+
+class StoredBlob(db.Model):
+    __tablename__ = 'stored_blobs'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(255), nullable=False)  # relative to UPLOAD_FOLDER
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<StoredBlob {self.sha256[:12]} refs={self.ref_count}>'
@@ -106,6 +106,8 @@ class DocumentRequest(db.Model):
     
     # Generated Document
     document_file = db.Column(db.String(255), nullable=True)
+    document_input_hash = db.Column(db.String(64), nullable=True)  # pdf_generator.document_input_hash at generation
+    document_content_hash = db.Column(db.String(64), nullable=True)  # pdf_generator.document_content_hash, for verify
     
     # Audit trail (stored as JSON/TEXT for SQLite compatibility)
     resident_input = db.Column(db.JSON, nullable=True)
@@ -153,6 +155,8 @@ class DocumentRequest(db.Model):
             'rejection_reason': self.rejection_reason,
             'qr_code': self.qr_code,
             'document_file': self.document_file,
+            'document_input_hash': self.document_input_hash,
+            'document_content_hash': self.document_content_hash,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'approved_at': self.approved_at.isoformat() if self.approved_at else None,
@@ -179,3 +183,108 @@ class DocumentRequest(db.Model):
         
         return data
 
+
+
+class DocumentJob(db.Model):
+    """Background generation of a request's document (see utils.document_jobs)."""
+    __tablename__ = 'document_jobs'
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Target
+    request_id = db.Column(db.Integer, db.ForeignKey('document_requests.id'), nullable=True)  # null for batch merges
+    batch_id = db.Column(db.Integer, db.ForeignKey('document_batches.id'), nullable=True)
+    municipality_id = db.Column(db.Integer, db.ForeignKey('municipalities.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False, default='pdf')  # pdf, merge
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    
+    # Progress
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    error = db.Column(db.Text, nullable=True)
+    result_file = db.Column(db.String(255), nullable=True)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    request = db.relationship('DocumentRequest', backref=db.backref('jobs', lazy='dynamic'))
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_document_job_request', 'request_id', 'status'),
+        Index('idx_document_job_status', 'status', 'updated_at'),
+        Index('idx_document_job_batch', 'batch_id', 'status'),
+    )
+    
+    def __repr__(self):
+        return f'<DocumentJob {self.id} {self.kind} {self.status}>'
+    
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'request_id': self.request_id,
+            'batch_id': self.batch_id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'result_file': self.result_file,
+            'url': f"/uploads/{self.result_file}" if self.result_file else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class DocumentBatch(db.Model):
+    """A set of document jobs started together, e.g. the morning print run."""
+    __tablename__ = 'document_batches'
+    
+    # Primary Key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    municipality_id = db.Column(db.Integer, db.ForeignKey('municipalities.id'), nullable=False)
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    request_ids = db.Column(db.JSON, nullable=False)  # print order
+    skipped = db.Column(db.JSON, nullable=True)  # [{request_id, reason}]
+    merge = db.Column(db.Boolean, nullable=False, default=False)
+    
+    # Progress
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, merging, completed, failed
+    merged_file = db.Column(db.String(255), nullable=True)
+    manifest_file = db.Column(db.String(255), nullable=True)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationships
+    jobs = db.relationship('DocumentJob', backref='batch', lazy='dynamic')
+    
+    def __repr__(self):
+        return f'<DocumentBatch {self.id} {self.status}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'merge': bool(self.merge),
+            'request_ids': self.request_ids or [],
+            'skipped': self.skipped or [],
+            'merged_file': self.merged_file,
+            'merged_url': f"/uploads/{self.merged_file}" if self.merged_file else None,
+            'manifest_url': f"/uploads/{self.manifest_file}" if self.manifest_file else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
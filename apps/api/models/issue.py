@@ -4,7 +4,7 @@ try:
     from apps.api import db
 except ImportError:
     from __init__ import db
-from sqlalchemy import Index
+from sqlalchemy import Index, event, inspect as sa_inspect
 
 class IssueCategory(db.Model):
     __tablename__ = 'issue_categories'
@@ -65,6 +65,7 @@ class Issue(db.Model):
     specific_location = db.Column(db.String(200), nullable=True)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True)  # derived from latitude/longitude on write
     
     # Evidence (photos/videos)
     attachments = db.Column(db.JSON, nullable=True)  # Array of file paths
@@ -91,6 +92,10 @@ class Issue(db.Model):
     # Upvotes/Support
     upvote_count = db.Column(db.Integer, default=0)
     
+    # Near-duplicate detection (see utils.issue_dedup)
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('issues.id'), nullable=True)  # canonical report
+    text_signature = db.Column(db.JSON, nullable=True)  # MinHash of title + description
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -103,6 +108,7 @@ class Issue(db.Model):
     municipality = db.relationship('Municipality', backref='issues')
     barangay = db.relationship('Barangay', backref='issues')
     updates = db.relationship('IssueUpdate', backref='issue', lazy='dynamic', cascade='all, delete-orphan')
+    duplicate_of = db.relationship('Issue', remote_side=[id], backref=db.backref('duplicates', lazy='dynamic'))
     
     # Indexes
     __table_args__ = (
@@ -111,6 +117,9 @@ class Issue(db.Model):
         Index('idx_issue_status', 'status'),
         Index('idx_issue_priority', 'priority'),
         Index('idx_issue_number', 'issue_number'),
+        # Covering index for map queries: prefix range scan + bbox refine without table lookups
+        Index('idx_issue_geohash', 'geohash', 'latitude', 'longitude', 'is_public'),
+        Index('idx_issue_duplicate_of', 'duplicate_of_id'),
     )
     
     def __repr__(self):
@@ -143,6 +152,7 @@ class Issue(db.Model):
             'status_updated_at': self.status_updated_at.isoformat() if self.status_updated_at else None,
             'is_public': self.is_public,
             'upvote_count': self.upvote_count,
+            'duplicate_of_id': self.duplicate_of_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
@@ -161,6 +171,39 @@ class Issue(db.Model):
         return data
 
 
+@event.listens_for(Issue, 'before_insert')
+@event.listens_for(Issue, 'before_update')
+def _set_issue_geohash(mapper, connection, target):
+    """Keep ``geohash`` in step with latitude/longitude for map queries."""
+    try:
+        from apps.api.utils.geo import encode_or_none
+    except ImportError:
+        from utils.geo import encode_or_none
+    target.geohash = encode_or_none(target.latitude, target.longitude)
+
+
+def _compute_signature(target):
+    try:
+        from apps.api.utils.issue_dedup import issue_signature
+    except ImportError:
+        from utils.issue_dedup import issue_signature
+    target.text_signature = issue_signature(target)
+
+
+@event.listens_for(Issue, 'before_insert')
+def _set_issue_signature(mapper, connection, target):
+    """MinHash of title + description for duplicate detection (kept if already computed)."""
+    if target.text_signature is None:
+        _compute_signature(target)
+
+
+@event.listens_for(Issue, 'before_update')
+def _refresh_issue_signature(mapper, connection, target):
+    state = sa_inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ('title', 'description')):
+        _compute_signature(target)
+
+
 class IssueUpdate(db.Model):
     __tablename__ = 'issue_updates'
     
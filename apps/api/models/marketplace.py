@@ -36,7 +36,7 @@ class Item(db.Model):
     barangay_id = db.Column(db.Integer, db.ForeignKey('barangays.id'), nullable=True)
     pickup_location = db.Column(db.String(200), nullable=True)
     
-    # Images (stored as JSON array of paths)
+    # Images (JSON array: upload paths, replaced by variant entries once processed - see utils.image_variants)
     images = db.Column(db.JSON, nullable=True)
     
     # Status
@@ -71,13 +71,19 @@ class Item(db.Model):
         Index('idx_item_transaction_type', 'transaction_type'),
         Index('idx_item_status', 'status'),
         Index('idx_item_created_at', 'created_at'),
+        # Marketplace browsing: municipality/status scope + category facet/filter
+        Index('idx_item_browse', 'municipality_id', 'status', 'is_active', 'category'),
     )
     
     def __repr__(self):
         return f'<Item {self.title}>'
     
-    def to_dict(self, include_user=False):
-        """Convert item to dictionary."""
+    def to_dict(self, include_user=False, include_originals=False):
+        """Convert item to dictionary (``include_originals``: owner/admin view of the uploads)."""
+        try:
+            from apps.api.utils.image_variants import image_fields
+        except ImportError:
+            from utils.image_variants import image_fields
         data = {
             'id': self.id,
             'user_id': self.user_id,
@@ -92,7 +98,7 @@ class Item(db.Model):
             'municipality_id': self.municipality_id,
             'barangay_id': self.barangay_id,
             'pickup_location': self.pickup_location,
-            'images': self.images,
+            **image_fields(self.images, include_originals),
             'status': self.status,
             'is_active': self.is_active,
             'approved_by': self.approved_by,
@@ -0,0 +1,97 @@
+"""Unified full-text search document model.
+
+One row per searchable public entity (announcement, marketplace item, public
+issue, benefit program). The text index itself is dialect specific:
+
+- SQLite: external-content FTS5 table ``search_fts`` kept in sync with
+  ``search_documents`` by triggers (BM25 ranking via ``bm25()``).
+- PostgreSQL: GIN index over a weighted ``tsvector`` expression
+  (``SEARCH_TSVECTOR_SQL``), ranked with ``ts_rank_cd``.
+
+Rows are maintained by ``utils.search_index`` from ORM flush events.
+
+``ResidentSearchToken`` is the admin resident directory index: one row per
+(user, trigram) over name, username, email and phone, maintained by
+``utils.resident_index``.
+"""
+from datetime import datetime
+
+try:
+    from apps.api import db
+except ImportError:
+    from __init__ import db
+
+from sqlalchemy import DDL, Index, event
+
+
+# Must match the expression used by the GIN index exactly for the planner to use it
+SEARCH_TSVECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(body, '')), 'B')"
+)
+
+
+class SearchDocument(db.Model):
+    __tablename__ = 'search_documents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(30), nullable=False)  # announcement, item, issue, benefit_program
+    entity_id = db.Column(db.Integer, nullable=False)
+    municipality_id = db.Column(db.Integer, nullable=True)  # NULL = province-wide
+    title = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'entity_id', name='uq_search_document_entity'),
+        Index('idx_search_document_municipality', 'municipality_id'),
+    )
+
+    def __repr__(self):
+        return f'<SearchDocument {self.entity_type}:{self.entity_id}>'
+
+
+class ResidentSearchToken(db.Model):
+    __tablename__ = 'resident_search_tokens'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    token = db.Column(db.String(8), primary_key=True)
+    municipality_id = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        # Covering indexes for "tokens (of this municipality) -> users"
+        Index('idx_resident_token_lookup', 'municipality_id', 'token', 'user_id'),
+        Index('idx_resident_token', 'token', 'user_id'),
+    )
+
+    def __repr__(self):
+        return f'<ResidentSearchToken {self.user_id}:{self.token!r}>'
+
+
+# --- Dialect specific text index (also created by db.create_all in dev/tests) ---
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+    "title, body, content='search_documents', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+)
+
+POSTGRES_FTS_DDL = (
+    f"CREATE INDEX IF NOT EXISTS idx_search_document_tsv ON search_documents USING gin (({SEARCH_TSVECTOR_SQL}))",
+)
+
+for _stmt in SQLITE_FTS_DDL:
+    event.listen(SearchDocument.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+for _stmt in POSTGRES_FTS_DDL:
+    event.listen(SearchDocument.__table__, 'after_create', DDL(_stmt).execute_if(dialect='postgresql'))
+event.listen(
+    SearchDocument.__table__, 'before_drop',
+    DDL('DROP TABLE IF EXISTS search_fts').execute_if(dialect='sqlite'),
+)
@@ -0,0 +1,22 @@
+"""Counters behind human-readable reference numbers.
+
+One row per (prefix, municipality, year), e.g. ``('ISS', 3, 2026)``; ``value``
+is the last number handed out. Rows are advanced with a single locking
+``UPDATE`` by ``utils.sequences``.
+"""
+try:
+    from apps.api import db
+except ImportError:
+    from __init__ import db
+
+
+class SequenceCounter(db.Model):
+    __tablename__ = 'sequence_counters'
+
+    prefix = db.Column(db.String(10), primary_key=True)  # REQ, ISS, APP
+    municipality_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 0 = province-wide
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SequenceCounter {self.prefix}-{self.municipality_id}-{self.year}={self.value}>'
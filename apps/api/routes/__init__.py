@@ -8,6 +8,8 @@ try:
     from apps.api.routes.documents import documents_bp
     from apps.api.routes.issues import issues_bp
     from apps.api.routes.benefits import benefits_bp
+    from apps.api.routes.search import search_bp
+    from apps.api.routes.locations import locations_bp
 except ImportError:
     from .auth import auth_bp
     from .municipalities import municipalities_bp
@@ -16,6 +18,8 @@ except ImportError:
     from .documents import documents_bp
     from .issues import issues_bp
     from .benefits import benefits_bp
+    from .search import search_bp
+    from .locations import locations_bp
 
 __all__ = [
     'auth_bp',
@@ -25,4 +29,6 @@ __all__ = [
     'documents_bp',
     'issues_bp',
     'benefits_bp',
+    'search_bp',
+    'locations_bp',
 ]
@@ -2,11 +2,10 @@
 MunLink Zambales - Admin Routes
 Admin-specific operations with municipality scoping
 """
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
 from sqlalchemy import func, and_, or_
 from datetime import datetime, timedelta
-import os
 import jwt
 from apps.api import db
 from apps.api.models.user import User
@@ -17,20 +16,35 @@ from apps.api.models.marketplace import Transaction as MarketplaceTransaction
 from apps.api.models.marketplace import TransactionAuditLog as MarketplaceTransactionAuditLog
 from apps.api.models.benefit import BenefitProgram
 from apps.api.models.benefit import BenefitApplication
-from apps.api.models.document import DocumentRequest, DocumentType
+from apps.api.models.document import DocumentJob, DocumentRequest, DocumentType
 from apps.api.models.announcement import Announcement
 from apps.api.models.transfer import TransferRequest
-from apps.api.utils.file_handler import save_announcement_image
+from apps.api.utils.file_handler import delete_file, save_announcement_image
+from apps.api.utils.image_variants import dropped_images, retain_images, schedule_image_variants
+from apps.api.utils.pdf_generator import warm_document_assets
+from apps.api.utils.print_batch import stream_print_batch
 from apps.api.utils.validators import ValidationError
 from apps.api.utils.email_sender import send_user_status_email, send_document_request_status_email
 from apps.api.models.audit import AuditLog
 from apps.api.utils.audit import log_action as log_generic_action
+from apps.api.utils.reference_registry import get_registry
+from apps.api.utils.resident_index import search_residents
+from apps.api.utils.storage import get_storage
+from apps.api.utils.issue_dedup import canonical_of
+from apps.api.utils.document_jobs import (
+    batch_manifest,
+    enqueue_document_batch,
+    enqueue_document_job,
+    get_document_batch,
+    get_document_job,
+)
 from apps.api.utils.qr_utils import (
     generate_pickup_code,
     hash_code,
     verify_code,
     sign_claim_token,
     build_qr_png,
+    claim_ticket_link,
     masked,
     encrypt_code,
     get_municipality_slug,
@@ -266,7 +280,12 @@ def suspend_user(user_id: int):
 @admin_bp.route('/users/verified', methods=['GET'])
 @jwt_required()
 def get_verified_users():
-    """Get verified users list."""
+    """Get verified users list.
+
+    Query params:
+      - q: optional name/username/email/phone search (ranked, typo tolerant)
+      - page, per_page
+    """
     try:
         municipality_id = require_admin_municipality()
         if isinstance(municipality_id, tuple):  # Error response
@@ -274,20 +293,34 @@ def get_verified_users():
         
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        q = (request.args.get('q') or '').strip()
         
-        verified_users = User.query.filter(
-            and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident',
-                User.admin_verified == True,
-                User.is_active == True
+        verified_filters = [
+            User.role == 'resident',
+            User.admin_verified == True,
+            User.is_active == True
+        ]
+        
+        if q:
+            page, per_page = max(1, page), max(1, min(per_page, 100))
+            items, total = search_residents(
+                q,
+                municipality_id=municipality_id,
+                filters=verified_filters,
+                limit=per_page,
+                offset=(page - 1) * per_page,
             )
-        ).order_by(User.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+            pages = (total + per_page - 1) // per_page
+        else:
+            verified_users = User.query.filter(
+                and_(User.municipality_id == municipality_id, *verified_filters)
+            ).order_by(User.created_at.desc()).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            items, total, pages = verified_users.items, verified_users.total, verified_users.pages
         
         users_data = []
-        for user in verified_users.items:
+        for user in items:
             # Include municipality info so the admin UI can client-side scope by municipality
             user_data = user.to_dict(include_sensitive=True, include_municipality=True)
             users_data.append(user_data)
@@ -297,8 +330,8 @@ def get_verified_users():
             'pagination': {
                 'page': page,
                 'per_page': per_page,
-                'total': verified_users.total,
-                'pages': verified_users.pages
+                'total': total,
+                'pages': pages
             }
         }), 200
         
@@ -417,9 +450,13 @@ def get_issues():
             category = request.args.get('category')
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 20, type=int)
+            include_duplicates = (request.args.get('include_duplicates') or '').lower() in ('1', 'true', 'yes')
             
             # Build query
             query = Issue.query.filter(Issue.municipality_id == municipality_id)
+            if not include_duplicates:
+                # Linked duplicates are triaged through their canonical issue
+                query = query.filter(Issue.duplicate_of_id.is_(None))
             
             if status:
                 # Map UI aliases to model statuses
@@ -444,9 +481,18 @@ def get_issues():
                 page=page, per_page=per_page, error_out=False
             )
             
+            page_ids = [i.id for i in issues.items]
+            duplicate_counts = dict(
+                db.session.query(Issue.duplicate_of_id, func.count(Issue.id))
+                .filter(Issue.duplicate_of_id.in_(page_ids))
+                .group_by(Issue.duplicate_of_id)
+                .all()
+            ) if page_ids else {}
+            
             issues_data = []
             for issue in issues.items:
                 issue_data = issue.to_dict(include_user=True)
+                issue_data['duplicate_count'] = duplicate_counts.get(issue.id, 0)
                 try:
                     issue_data['municipality_name'] = issue.municipality.name if issue.municipality else None
                 except Exception:
@@ -495,6 +541,11 @@ def get_issue(issue_id):
             return jsonify({'error': 'Issue not in your municipality'}), 403
         
         data = issue.to_dict(include_user=True)
+        data['duplicates'] = [
+            {'id': d.id, 'issue_number': d.issue_number, 'user_id': d.user_id, 'title': d.title,
+             'created_at': d.created_at.isoformat() if d.created_at else None}
+            for d in issue.duplicates.order_by(Issue.created_at.asc()).all()
+        ]
         try:
             data['municipality_name'] = issue.municipality.name if issue.municipality else None
         except Exception:
@@ -550,6 +601,16 @@ def update_issue_status(issue_id):
             issue.reviewed_at = now
         if new_status == 'resolved' and not issue.resolved_at:
             issue.resolved_at = now
+        # Linked duplicates follow their canonical issue
+        for duplicate in issue.duplicates.all():
+            duplicate.status = new_status
+            duplicate.status_updated_by = issue.status_updated_by
+            duplicate.status_updated_at = now
+            duplicate.updated_at = now
+            if issue.reviewed_at and not duplicate.reviewed_at:
+                duplicate.reviewed_at = issue.reviewed_at
+            if issue.resolved_at and not duplicate.resolved_at:
+                duplicate.resolved_at = issue.resolved_at
         
         db.session.commit()
         
@@ -562,6 +623,56 @@ def update_issue_status(issue_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to update issue status', 'details': str(e)}), 500
 
+@admin_bp.route('/issues/<int:issue_id>/duplicate', methods=['PUT'])
+@jwt_required()
+def set_issue_duplicate(issue_id):
+    """Link an issue to a canonical issue (``duplicate_of``) or unlink it (``null``)."""
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):  # Error response
+            return municipality_id
+        
+        issue = Issue.query.get(issue_id)
+        if not issue:
+            return jsonify({'error': 'Issue not found'}), 404
+        if issue.municipality_id != municipality_id:
+            return jsonify({'error': 'Issue not in your municipality'}), 403
+        
+        data = request.get_json() or {}
+        previous = issue.duplicate_of_id
+        target_id = data.get('duplicate_of')
+        target = None
+        if target_id is not None:
+            target = Issue.query.get(int(target_id))
+            if not target:
+                return jsonify({'error': 'Canonical issue not found'}), 404
+            if target.municipality_id != municipality_id:
+                return jsonify({'error': 'Canonical issue not in your municipality'}), 403
+            target = canonical_of(target)
+            if target.id == issue.id:
+                return jsonify({'error': 'An issue cannot be a duplicate of itself'}), 400
+            # Keep links one level deep: this issue's own duplicates move along with it
+            for duplicate in issue.duplicates.all():
+                duplicate.duplicate_of = target
+        issue.duplicate_of = target
+        
+        log_generic_action(
+            user_id=get_jwt_identity(),
+            municipality_id=municipality_id,
+            entity_type='issue',
+            entity_id=issue.id,
+            action='duplicate_link' if target else 'duplicate_unlink',
+            old_values={'duplicate_of_id': previous},
+            new_values={'duplicate_of_id': target.id if target else None},
+        )
+        db.session.commit()
+        return jsonify({'message': 'Issue link updated', 'issue': issue.to_dict()}), 200
+    except (TypeError, ValueError):
+        return jsonify({'error': 'duplicate_of must be an issue id or null'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update issue link', 'details': str(e)}), 500
+
 @admin_bp.route('/issues/<int:issue_id>/response', methods=['POST'])
 @jwt_required()
 def add_issue_response(issue_id):
@@ -666,7 +777,7 @@ def get_pending_marketplace_items():
             
             items_data = []
             for item in pending_items:
-                item_data = item.to_dict(include_user=True)
+                item_data = item.to_dict(include_user=True, include_originals=True)
                 items_data.append(item_data)
             
             return jsonify({
@@ -710,7 +821,7 @@ def approve_marketplace_item(item_id):
         
         return jsonify({
             'message': 'Marketplace item approved successfully',
-            'item': item.to_dict()
+            'item': item.to_dict(include_originals=True)
         }), 200
         
     except Exception as e:
@@ -823,7 +934,7 @@ def get_announcements():
             
             announcements_data = []
             for announcement in announcements:
-                announcement_data = announcement.to_dict()
+                announcement_data = announcement.to_dict(include_originals=True)
                 announcements_data.append(announcement_data)
             
             return jsonify({
@@ -887,7 +998,7 @@ def create_announcement():
         
         return jsonify({
             'message': 'Announcement created successfully',
-            'announcement': announcement.to_dict()
+            'announcement': announcement.to_dict(include_originals=True)
         }), 201
         
     except Exception as e:
@@ -935,14 +1046,17 @@ def update_announcement(announcement_id):
                 # Ignore when column isn't present yet
                 pass
         if 'images' in data and isinstance(data['images'], list):
-            announcement.images = data['images']
+            images = retain_images(announcement.images, data['images'])
+            for path in dropped_images(announcement.images, images):
+                delete_file(path)
+            announcement.images = images
         
         announcement.updated_at = datetime.utcnow()
         db.session.commit()
         
         return jsonify({
             'message': 'Announcement updated successfully',
-            'announcement': announcement.to_dict()
+            'announcement': announcement.to_dict(include_originals=True)
         }), 200
         
     except Exception as e:
@@ -969,20 +1083,21 @@ def upload_announcement_image(announcement_id):
         file = request.files['file']
 
         # Enforce max 5 images
-        images = announcement.images or []
+        images = list(announcement.images or [])
         if len(images) >= 5:
             return jsonify({'error': 'Maximum images reached (5)'}), 400
 
         # Municipality slug
-        municipality = Municipality.query.get(municipality_id)
+        municipality = get_registry().municipality(municipality_id)
         municipality_slug = municipality.slug if municipality else 'unknown'
 
         rel_path = save_announcement_image(file, announcement_id, municipality_slug)
         images.append(rel_path)
         announcement.images = images
         db.session.commit()
+        schedule_image_variants('announcement', announcement_id)
 
-        return jsonify({'message': 'Image uploaded', 'path': rel_path, 'announcement': announcement.to_dict()}), 200
+        return jsonify({'message': 'Image uploaded', 'path': rel_path, 'announcement': announcement.to_dict(include_originals=True)}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload image', 'details': str(e)}), 500
@@ -1007,10 +1122,10 @@ def upload_announcement_images(announcement_id):
             return jsonify({'error': 'No files uploaded'}), 400
 
         # Municipality slug
-        municipality = Municipality.query.get(municipality_id)
+        municipality = get_registry().municipality(municipality_id)
         municipality_slug = municipality.slug if municipality else 'unknown'
 
-        images = announcement.images or []
+        images = list(announcement.images or [])
         saved_paths = []
 
         # Accept multiple 'file' fields; each key may be single or list
@@ -1027,8 +1142,10 @@ def upload_announcement_images(announcement_id):
 
         announcement.images = images
         db.session.commit()
+        if saved_paths:
+            schedule_image_variants('announcement', announcement_id)
 
-        return jsonify({'message': 'Images uploaded', 'paths': saved_paths, 'announcement': announcement.to_dict()}), 200
+        return jsonify({'message': 'Images uploaded', 'paths': saved_paths, 'announcement': announcement.to_dict(include_originals=True)}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload images', 'details': str(e)}), 500
@@ -1049,6 +1166,8 @@ def delete_announcement(announcement_id):
         if announcement.municipality_id != municipality_id:
             return jsonify({'error': 'Announcement not in your municipality'}), 403
         
+        for path in dropped_images(announcement.images, []):
+            delete_file(path)
         db.session.delete(announcement)
         db.session.commit()
         
@@ -1784,10 +1903,12 @@ def get_document_requests():
 @admin_bp.route('/documents/requests/<int:request_id>/generate-pdf', methods=['POST'])
 @jwt_required()
 def generate_document_request_pdf(request_id: int):
-    """Generate PDF for a digital document request using dynamic ReportLab generator."""
-    try:
-        from apps.api.utils.pdf_generator import generate_document_pdf
+    """Queue PDF generation for a digital document request.
 
+    Returns ``202`` with the job; poll ``GET /documents/jobs/<job_id>`` until
+    its status is ``succeeded`` (``url`` set) or ``failed``.
+    """
+    try:
         municipality_id = require_admin_municipality()
         if isinstance(municipality_id, tuple):
             return municipality_id
@@ -1801,46 +1922,227 @@ def generate_document_request_pdf(request_id: int):
         if (req.delivery_method or '').lower() not in ('digital',):
             return jsonify({'error': 'PDF generation is only available for digital requests'}), 400
 
-        user = User.query.get(req.user_id)
-        doc_type = DocumentType.query.get(req.document_type_id)
+        doc_type = get_registry().document_type(req.document_type_id)
         if not doc_type:
             return jsonify({'error': 'Document type not found'}), 404
 
-        # Current admin for BY line
+        job = enqueue_document_job(req, requested_by=get_jwt_identity())
+        payload = {'message': 'Document generation queued', 'job': job.to_dict()}
+        if job.status == 'succeeded':
+            payload.update(message='Document generated', url=f"/uploads/{job.result_file}", request=req.to_dict())
+        return jsonify(payload), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to generate PDF', 'details': str(e)}), 500
+
+
+@admin_bp.route('/documents/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_document_job_status(job_id: int):
+    """Poll a document generation job."""
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+
+        job = get_document_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.municipality_id != municipality_id:
+            return jsonify({'error': 'Job not in your municipality'}), 403
+
+        payload = {'job': job.to_dict()}
+        if job.status == 'succeeded':
+            payload['url'] = f"/uploads/{job.result_file}"
+            payload['request'] = job.request.to_dict() if job.request else None
+        return jsonify(payload), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get job', 'details': str(e)}), 500
+
+
+@admin_bp.route('/documents/requests/generate-batch', methods=['POST'])
+@jwt_required()
+def generate_document_requests_batch():
+    """Queue PDF generation for many digital requests at once.
+
+    Body: ``request_ids`` (print order) or ``filter`` (``status``,
+    ``document_type_id``; defaults to ``processing``), plus ``merge`` to also
+    produce one print-ready PDF. Returns ``202`` with the batch manifest; poll
+    ``GET /documents/batches/<batch_id>``.
+    """
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+
+        data = request.get_json(silent=True) or {}
+        limit = int(current_app.config.get('DOCUMENT_BATCH_MAX_SIZE', 200))
+        request_ids = data.get('request_ids')
+        criteria = data.get('filter')
+        if request_ids is None and not isinstance(criteria, dict):
+            return jsonify({'error': 'Provide request_ids or filter'}), 400
+
+        if request_ids is not None:
+            try:
+                if not isinstance(request_ids, list):
+                    raise TypeError(request_ids)
+                request_ids = list(dict.fromkeys(int(i) for i in request_ids))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'request_ids must be a list of integers'}), 400
+            if len(request_ids) > limit:
+                return jsonify({'error': f'At most {limit} requests per batch'}), 400
+            found = {
+                r.id: r for r in DocumentRequest.query.filter(
+                    DocumentRequest.id.in_(request_ids),
+                    DocumentRequest.municipality_id == municipality_id,
+                ).all()
+            } if request_ids else {}
+            candidates = [found.get(i) for i in request_ids]
+        else:
+            status = criteria.get('status') or 'processing'
+            if not isinstance(status, str):
+                return jsonify({'error': 'filter.status must be a string'}), 400
+            query = DocumentRequest.query.filter(
+                DocumentRequest.municipality_id == municipality_id,
+                DocumentRequest.status == status,
+            )
+            if criteria.get('document_type_id'):
+                try:
+                    document_type_id = int(criteria['document_type_id'])
+                except (TypeError, ValueError):
+                    return jsonify({'error': 'filter.document_type_id must be an integer'}), 400
+                query = query.filter(DocumentRequest.document_type_id == document_type_id)
+            candidates = query.order_by(DocumentRequest.created_at.asc(), DocumentRequest.id.asc()).limit(limit + 1).all()
+            if len(candidates) > limit:
+                return jsonify({'error': f'More than {limit} requests match; narrow the filter'}), 400
+            request_ids = [r.id for r in candidates]
+
+        registry = get_registry()
+        in_flight = {
+            rid for (rid,) in db.session.query(DocumentJob.request_id).filter(
+                DocumentJob.request_id.in_(request_ids),
+                DocumentJob.status.in_(('queued', 'running')),
+            )
+        } if request_ids else set()
+        eligible, skipped = [], []
+        for rid, req in zip(request_ids, candidates):
+            if req is None:
+                reason = 'Request not found in your municipality'
+            elif (req.delivery_method or '').lower() != 'digital':
+                reason = 'PDF generation is only available for digital requests'
+            elif not registry.document_type(req.document_type_id):
+                reason = 'Document type not found'
+            elif rid in in_flight:
+                reason = 'Generation already in progress'
+            else:
+                eligible.append(req)
+                continue
+            skipped.append({'request_id': rid, 'reason': reason})
+
+        # Build the seal watermark once here so pool children load it from disk
+        municipality = db.session.get(Municipality, municipality_id)
         try:
-            admin_user = User.query.get(get_jwt_identity())
+            warm_document_assets([municipality.name] if municipality else [])
         except Exception:
-            admin_user = None
+            pass
 
-        abs_path, rel_path = generate_document_pdf(req, doc_type, user, admin_user=admin_user)
+        batch = enqueue_document_batch(
+            eligible, municipality_id, requested_by=get_jwt_identity(),
+            merge=bool(data.get('merge')), skipped=skipped,
+        )
+        return jsonify({'message': f'Queued {len(eligible)} documents', **batch_manifest(batch)}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to queue batch generation', 'details': str(e)}), 500
 
-        req.document_file = rel_path
-        # Retain existing behavior for digital requests: set ready after generation,
-        # but defer final completion to an explicit action.
-        req.status = 'ready'
-        req.ready_at = datetime.utcnow()
-        req.updated_at = datetime.utcnow()
-        # Audit (best-effort)
+
+@admin_bp.route('/documents/batches/<int:batch_id>', methods=['GET'])
+@jwt_required()
+def get_document_batch_status(batch_id: int):
+    """Poll a batch: per-request status, file URLs and the merged PDF when done."""
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+
+        batch = get_document_batch(batch_id)
+        if not batch:
+            return jsonify({'error': 'Batch not found'}), 404
+        if batch.municipality_id != municipality_id:
+            return jsonify({'error': 'Batch not in your municipality'}), 403
+        return jsonify(batch_manifest(batch)), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get batch', 'details': str(e)}), 500
+
+
+@admin_bp.route('/documents/requests/print-batch', methods=['POST'])
+@jwt_required()
+def print_document_requests_batch():
+    """Stream one print-ready PDF of ready requests, each followed by its claim ticket.
+
+    Body: ``request_ids`` in print order. Stored PDFs are reused; only missing
+    or outdated documents are rendered. Requests that are not ``ready`` or not
+    in the admin's municipality are left out and listed in the
+    ``X-Skipped-Requests`` header.
+    """
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+
+        data = request.get_json(silent=True) or {}
+        limit = int(current_app.config.get('DOCUMENT_BATCH_MAX_SIZE', 200))
         try:
-            log_generic_action(
-                user_id=get_jwt_identity(),
-                municipality_id=req.municipality_id,
-                entity_type='document_request',
-                entity_id=req.id,
-                action='generate_pdf',
-                actor_role='admin',
-                old_values=None,
-                new_values={'document_file': rel_path},
-                notes=None,
-            )
+            request_ids = data.get('request_ids') or []
+            if not isinstance(request_ids, list):
+                raise TypeError(request_ids)
+            request_ids = list(dict.fromkeys(int(i) for i in request_ids))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'request_ids must be a list of integers'}), 400
+        if not request_ids:
+            return jsonify({'error': 'Provide request_ids'}), 400
+        if len(request_ids) > limit:
+            return jsonify({'error': f'At most {limit} requests per batch'}), 400
+
+        found = {
+            r.id: r for r in DocumentRequest.query.filter(
+                DocumentRequest.id.in_(request_ids),
+                DocumentRequest.municipality_id == municipality_id,
+            ).all()
+        }
+        eligible, skipped = [], []
+        for rid in request_ids:
+            req = found.get(rid)
+            if req is None:
+                skipped.append({'request_id': rid, 'reason': 'Request not found in your municipality'})
+            elif req.status != 'ready':
+                skipped.append({'request_id': rid, 'reason': 'Request is not ready'})
+            else:
+                eligible.append(req)
+        if not eligible:
+            return jsonify({'error': 'No ready requests to print', 'skipped': skipped}), 400
+
+        municipality = db.session.get(Municipality, municipality_id)
+        try:
+            warm_document_assets([municipality.name] if municipality else [])
         except Exception:
             pass
-        db.session.commit()
 
-        return jsonify({'message': 'Document generated', 'url': f"/uploads/{rel_path}", 'request': req.to_dict()}), 200
+        admin_user = db.session.get(User, int(get_jwt_identity()))
+        headers = {
+            'Content-Disposition': f'attachment; filename="print-batch-{datetime.utcnow():%Y%m%d-%H%M%S}.pdf"',
+            'Cache-Control': 'no-store',
+        }
+        if skipped:
+            headers['X-Skipped-Requests'] = ','.join(str(s['request_id']) for s in skipped)
+        return Response(
+            stream_with_context(stream_print_batch(eligible, admin_user=admin_user)),
+            mimetype='application/pdf',
+            headers=headers,
+        )
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': 'Failed to generate PDF', 'details': str(e)}), 500
+        return jsonify({'error': 'Failed to print batch', 'details': str(e)}), 500
 
 
 @admin_bp.route('/documents/requests/<int:request_id>/download', methods=['GET'])
@@ -1953,7 +2255,7 @@ def update_document_request_status(request_id: int):
         # Email notifications (best-effort)
         try:
             user = User.query.get(req.user_id)
-            doc_type = DocumentType.query.get(req.document_type_id)
+            doc_type = get_registry().document_type(req.document_type_id)
             if user and user.email and doc_type:
                 if new_status == 'processing' and prev_status == 'pending':
                     send_document_request_status_email(
@@ -2025,7 +2327,7 @@ def admin_ready_for_pickup(request_id: int):
             db.session.rollback()
         try:
             user = User.query.get(req.user_id)
-            doc_type = DocumentType.query.get(req.document_type_id)
+            doc_type = get_registry().document_type(req.document_type_id)
             if user and getattr(user, 'email', None):
                 # Reuse existing email helper with a simple message
                 send_user_status_email(user.email, approved=True)
@@ -2075,12 +2377,7 @@ def admin_generate_claim_token(request_id: int):
         token_info = sign_claim_token(req)
 
         # Build QR deep link to admin portal verify page with token param
-        base = (
-            current_app.config.get('ADMIN_WEB_BASE_URL')
-            or os.getenv('ADMIN_WEB_BASE_URL')
-            or 'http://localhost:3001'
-        )
-        deep_link = f"{base}/verify-ticket?token={token_info['token']}"
+        deep_link = claim_ticket_link(token_info['token'])
 
         # Build QR image file
         muni_name = getattr(getattr(req, 'municipality', None), 'name', str(req.municipality_id))
@@ -2199,8 +2496,8 @@ def admin_verify_claim():
             return jsonify({'ok': False, 'error': f'Request not ready (status={status})'}), 400
 
         user = User.query.get(req.user_id)
-        doc_type = DocumentType.query.get(req.document_type_id)
-        muni = Municipality.query.get(req.municipality_id)
+        doc_type = get_registry().document_type(req.document_type_id)
+        muni = get_registry().municipality(req.municipality_id)
         return jsonify({
             'ok': True,
             'request': {
@@ -2301,7 +2598,8 @@ def admin_municipality_performance():
                 disputes_opened = MarketplaceTransaction.query.filter(and_(MarketplaceTransaction.status == 'disputed', MarketplaceTransaction.created_at >= start, MarketplaceTransaction.created_at <= end)).count()
             except Exception:
                 pass
-            name = (Municipality.query.get(m_id).name if Municipality.query.get(m_id) else f"Municipality {m_id}")
+            muni = get_registry().municipality(m_id)
+            name = muni.name if muni else f"Municipality {m_id}"
             return {'id': m_id, 'name': name, 'users': users, 'listings': listings, 'documents': docs, 'benefits_active': benefits_active, 'disputes': disputes_opened}
 
         if role == 'admin':
@@ -2435,7 +2733,7 @@ def admin_export_entity(entity: str, fmt: str):
         if isinstance(municipality_id, tuple):
             return municipality_id
         # Resolve municipality name/slug
-        muni = Municipality.query.get(municipality_id)
+        muni = get_registry().municipality(municipality_id)
         municipality_name = getattr(muni, 'name', 'Municipality')
         muni_slug = getattr(muni, 'slug', str(municipality_id))
 
@@ -2484,21 +2782,18 @@ def admin_export_entity(entity: str, fmt: str):
         else:
             return jsonify({'error': 'Unknown export entity'}), 400
 
-        from pathlib import Path
-        base = Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
-        out_dir = base / 'exports' / str(muni_slug)
-        out_dir.mkdir(parents=True, exist_ok=True)
-        filename_base = f"{et}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+        storage = get_storage()
+        filename_base = f"exports/{muni_slug}/{et}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
 
         if fmt.lower() == 'pdf':
             from apps.api.utils.pdf_table_report import generate_table_pdf
-            out_path = out_dir / f"{filename_base}.pdf"
-            generate_table_pdf(out_path=out_path, title=f"{municipality_name} – {et.title()} Report", municipality_name=municipality_name, headers=headers, rows=rows)
-            rel = str(out_path.relative_to(base)).replace('\\','/')
+            rel = f"{filename_base}.pdf"
+            with storage.writer(rel) as out_path:
+                generate_table_pdf(out_path=out_path, title=f"{municipality_name} – {et.title()} Report", municipality_name=municipality_name, headers=headers, rows=rows)
             return jsonify({'url': rel, 'summary': {'rows': len(rows)}}), 200
         if fmt.lower() in ('xlsx','excel'):
             from apps.api.utils.excel_generator import generate_workbook, save_workbook
-            out_path = out_dir / f"{filename_base}.xlsx"
+            rel = f"{filename_base}.xlsx"
             gov_lines = [
                 'Republic of the Philippines',
                 'Province of Zambales',
@@ -2514,8 +2809,8 @@ def admin_export_entity(entity: str, fmt: str):
                     'gov_lines': gov_lines,
                 }
             })
-            save_workbook(wb, out_path)
-            rel = str(out_path.relative_to(base)).replace('\\','/')
+            with storage.writer(rel) as out_path:
+                save_workbook(wb, out_path)
             return jsonify({'url': rel, 'summary': {'rows': len(rows)}}), 200
 
         return jsonify({'error': 'Unsupported format'}), 400
@@ -2548,14 +2843,9 @@ def admin_cleanup():
         deleted = 0
         archived_url = None
 
-        from pathlib import Path
-        base = Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
-        out_dir = base / 'archives'
-        out_dir.mkdir(parents=True, exist_ok=True)
-
         def _write_json(path, items):
             import json
-            path.write_text(json.dumps(items, default=str, ensure_ascii=False, indent=2), encoding='utf-8')
+            return get_storage().save(path, json.dumps(items, default=str, ensure_ascii=False, indent=2).encode('utf-8'))
 
         if entity == 'announcements':
             q = Announcement.query.filter(Announcement.municipality_id == municipality_id)
@@ -2563,10 +2853,11 @@ def admin_cleanup():
                 q = q.filter(Announcement.created_at <= cutoff)
             items = q.all()
             if archive and items:
-                zpath = out_dir / f"announcements-{municipality_id}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
-                _write_json(zpath, [getattr(i,'to_dict',lambda: {})() if hasattr(i,'to_dict') else {'id': i.id, 'title': i.title} for i in items])
-                archived_url = str(zpath.relative_to(base)).replace('\\','/')
+                zpath = f"archives/announcements-{municipality_id}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+                archived_url = _write_json(zpath, [getattr(i,'to_dict',lambda: {})() if hasattr(i,'to_dict') else {'id': i.id, 'title': i.title} for i in items])
             for i in items:
+                for path in dropped_images(i.images, []):
+                    delete_file(path)
                 db.session.delete(i)
             deleted = len(items)
         elif entity == 'requests':
@@ -2575,9 +2866,8 @@ def admin_cleanup():
                 q = q.filter(DocumentRequest.created_at <= cutoff)
             items = q.all()
             if archive and items:
-                zpath = out_dir / f"requests-{municipality_id}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
-                _write_json(zpath, [r.to_dict() for r in items])
-                archived_url = str(zpath.relative_to(base)).replace('\\','/')
+                zpath = f"archives/requests-{municipality_id}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+                archived_url = _write_json(zpath, [r.to_dict() for r in items])
             for i in items:
                 db.session.delete(i)
             deleted = len(items)
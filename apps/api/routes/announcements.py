@@ -7,15 +7,18 @@ import sqlite3
 try:
     from apps.api import db
     from apps.api.models.announcement import Announcement
+    from apps.api.utils.http_cache import conditional_get, table_fingerprint
 except ImportError:
     from __init__ import db
     from models.announcement import Announcement
+    from utils.http_cache import conditional_get, table_fingerprint
 
 
 announcements_bp = Blueprint('announcements', __name__, url_prefix='/api/announcements')
 
 
 @announcements_bp.route('', methods=['GET'])
+@conditional_get(lambda: table_fingerprint(Announcement))
 def list_announcements():
     """List active announcements with optional filters and pagination.
 
@@ -27,9 +27,9 @@ try:
 except ImportError:
     from models.user import User
 try:
-    from apps.api.models.municipality import Municipality
+    from apps.api.utils.reference_registry import get_registry
 except ImportError:
-    from models.municipality import Municipality
+    from utils.reference_registry import get_registry
 try:
     from apps.api.models.transfer import TransferRequest
 except ImportError:
@@ -50,6 +50,7 @@ try:
         generate_verification_token,
         save_profile_picture,
         save_verification_document,
+        replace_file,
     )
 except ImportError:
     from utils import (
@@ -63,6 +64,7 @@ except ImportError:
         generate_verification_token,
         save_profile_picture,
         save_verification_document,
+        replace_file,
     )
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -102,22 +104,18 @@ def register():
         # Get municipality ID from slug
         municipality_id = None
         if municipality_slug:
-            municipality = Municipality.query.filter_by(slug=municipality_slug).first()
+            municipality = get_registry().municipality_by_slug(municipality_slug)
             if municipality:
                 municipality_id = municipality.id
         # Validate optional barangay_id belongs to municipality if both provided
         barangay_id = None
         if barangay_id_raw is not None and str(barangay_id_raw).strip() != '':
-            try:
-                from apps.api.models.municipality import Barangay
-            except ImportError:
-                from models.municipality import Barangay
             try:
                 bid = int(barangay_id_raw)
             except Exception:
                 bid = None
             if bid:
-                b = Barangay.query.get(bid)
+                b = get_registry().barangay(bid)
                 if b and (not municipality_id or b.municipality_id == municipality_id):
                     barangay_id = bid
         
@@ -156,19 +154,19 @@ def register():
             profile = request.files.get('profile_picture')
             if profile and getattr(profile, 'filename', ''):
                 path = save_profile_picture(profile, user.id, municipality_slug_safe, user_type='residents')
-                user.profile_picture = path
+                user.profile_picture = replace_file(user.profile_picture, path)
 
             id_front = request.files.get('valid_id_front')
             if id_front and getattr(id_front, 'filename', ''):
-                user.valid_id_front = save_verification_document(id_front, user.id, municipality_slug_safe, 'valid_id_front', user_type='residents')
+                user.valid_id_front = replace_file(user.valid_id_front, save_verification_document(id_front, user.id, municipality_slug_safe, 'valid_id_front', user_type='residents'))
 
             id_back = request.files.get('valid_id_back')
             if id_back and getattr(id_back, 'filename', ''):
-                user.valid_id_back = save_verification_document(id_back, user.id, municipality_slug_safe, 'valid_id_back', user_type='residents')
+                user.valid_id_back = replace_file(user.valid_id_back, save_verification_document(id_back, user.id, municipality_slug_safe, 'valid_id_back', user_type='residents'))
 
             selfie = request.files.get('selfie_with_id')
             if selfie and getattr(selfie, 'filename', ''):
-                user.selfie_with_id = save_verification_document(selfie, user.id, municipality_slug_safe, 'selfie_with_id', user_type='residents')
+                user.selfie_with_id = replace_file(user.selfie_with_id, save_verification_document(selfie, user.id, municipality_slug_safe, 'selfie_with_id', user_type='residents'))
 
         db.session.commit()
 
@@ -350,7 +348,7 @@ def admin_register():
         admin_municipality_slug = data.get('admin_municipality_slug')
 
         if admin_municipality_slug and not admin_municipality_id:
-            mun = Municipality.query.filter_by(slug=admin_municipality_slug).first()
+            mun = get_registry().municipality_by_slug(admin_municipality_slug)
             if not mun:
                 return jsonify({'error': 'Invalid municipality slug'}), 400
             admin_municipality_id = mun.id
@@ -398,10 +396,10 @@ def admin_register():
             # Optional profile
             profile = request.files.get('profile_picture')
             if profile and getattr(profile, 'filename', ''):
-                user.profile_picture = save_profile_picture(profile, user.id, municipality_slug, user_type='admins')
+                user.profile_picture = replace_file(user.profile_picture, save_profile_picture(profile, user.id, municipality_slug, user_type='admins'))
 
-            user.valid_id_front = save_verification_document(id_front, user.id, municipality_slug, 'valid_id_front', user_type='admins')
-            user.valid_id_back = save_verification_document(id_back, user.id, municipality_slug, 'valid_id_back', user_type='admins')
+            user.valid_id_front = replace_file(user.valid_id_front, save_verification_document(id_front, user.id, municipality_slug, 'valid_id_front', user_type='admins'))
+            user.valid_id_back = replace_file(user.valid_id_back, save_verification_document(id_back, user.id, municipality_slug, 'valid_id_back', user_type='admins'))
 
         db.session.commit()
 
@@ -587,10 +585,6 @@ def update_profile():
         
         # Location updates
         if 'barangay_id' in data:
-            try:
-                from apps.api.models.municipality import Barangay
-            except ImportError:
-                from models.municipality import Barangay
             bid = data.get('barangay_id')
             try:
                 bid_int = int(bid) if bid is not None else None
@@ -598,7 +592,7 @@ def update_profile():
                 bid_int = None
             if bid_int is not None:
                 # Only allow barangay within user's municipality
-                b = Barangay.query.get(bid_int)
+                b = get_registry().barangay(bid_int)
                 if not b or (user.municipality_id and b.municipality_id != user.municipality_id):
                     return jsonify({'error': 'Invalid barangay for your municipality'}), 400
                 user.barangay_id = bid_int
@@ -647,17 +641,17 @@ def upload_profile_photo():
         municipality_slug = None
         try:
             if getattr(user, 'admin_municipality_id', None):
-                mun = Municipality.query.get(user.admin_municipality_id)
+                mun = get_registry().municipality(user.admin_municipality_id)
                 municipality_slug = getattr(mun, 'slug', None)
             if not municipality_slug and getattr(user, 'municipality_id', None):
-                mun = Municipality.query.get(user.municipality_id)
+                mun = get_registry().municipality(user.municipality_id)
                 municipality_slug = getattr(mun, 'slug', None)
         except Exception:
             municipality_slug = None
 
         category = 'admins' if str(getattr(user, 'role', '')).startswith('admin') or getattr(user, 'role', '') == 'municipal_admin' else 'residents'
         rel_path = save_profile_picture(f, user.id, municipality_slug or 'general', user_type=category)
-        user.profile_picture = rel_path
+        user.profile_picture = replace_file(user.profile_picture, rel_path)
         user.updated_at = datetime.utcnow()
         db.session.commit()
 
@@ -670,7 +664,7 @@ def upload_profile_photo():
 @auth_bp.route('/profile/photo', methods=['DELETE'])
 @jwt_required()
 def delete_profile_photo():
-    """Remove current user's profile photo reference (does not delete file)."""
+    """Remove current user's profile photo (the file goes once nothing else uses it)."""
     try:
         user_id = get_jwt_identity()
         try:
@@ -680,7 +674,7 @@ def delete_profile_photo():
         user = User.query.get(uid)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        user.profile_picture = None
+        user.profile_picture = replace_file(user.profile_picture, None)
         user.updated_at = datetime.utcnow()
         db.session.commit()
         return jsonify({'message': 'Profile photo removed', 'user': user.to_dict(include_sensitive=True, include_municipality=True)}), 200
@@ -722,17 +716,17 @@ def upload_verification_docs():
 
         id_front = request.files.get('valid_id_front')
         if id_front and getattr(id_front, 'filename', ''):
-            user.valid_id_front = save_verification_document(id_front, user.id, municipality_slug, 'valid_id_front', user_type='residents')
+            user.valid_id_front = replace_file(user.valid_id_front, save_verification_document(id_front, user.id, municipality_slug, 'valid_id_front', user_type='residents'))
             saved_any = True
 
         id_back = request.files.get('valid_id_back')
         if id_back and getattr(id_back, 'filename', ''):
-            user.valid_id_back = save_verification_document(id_back, user.id, municipality_slug, 'valid_id_back', user_type='residents')
+            user.valid_id_back = replace_file(user.valid_id_back, save_verification_document(id_back, user.id, municipality_slug, 'valid_id_back', user_type='residents'))
             saved_any = True
 
         selfie = request.files.get('selfie_with_id')
         if selfie and getattr(selfie, 'filename', ''):
-            user.selfie_with_id = save_verification_document(selfie, user.id, municipality_slug, 'selfie_with_id', user_type='residents')
+            user.selfie_with_id = replace_file(user.selfie_with_id, save_verification_document(selfie, user.id, municipality_slug, 'selfie_with_id', user_type='residents'))
             saved_any = True
 
         if not saved_any:
@@ -818,9 +812,9 @@ def request_transfer():
         if int(user.municipality_id) == to_municipality_id:
             return jsonify({'error': 'You are already in this municipality'}), 400
         # Validate both current and target municipalities exist
-        if not Municipality.query.get(user.municipality_id):
+        if not get_registry().municipality(user.municipality_id):
             return jsonify({'error': 'Your current municipality record no longer exists'}), 400
-        if not Municipality.query.get(to_municipality_id):
+        if not get_registry().municipality(to_municipality_id):
             return jsonify({'error': 'Target municipality not found'}), 404
         # Prevent duplicate open requests
         existing = TransferRequest.query.filter(
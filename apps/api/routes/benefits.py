@@ -7,30 +7,56 @@ try:
     from apps.api import db
     from apps.api.models.benefit import BenefitProgram, BenefitApplication
     from apps.api.models.user import User
-    from apps.api.models.municipality import Municipality
     from apps.api.utils import (
         validate_required_fields,
         ValidationError,
         fully_verified_required,
         save_benefit_document,
     )
+    from apps.api.utils.http_cache import conditional_get, table_fingerprint
+    from apps.api.utils.reference_registry import get_registry
+    from apps.api.utils.sequences import next_reference
 except ImportError:
     from __init__ import db
     from models.benefit import BenefitProgram, BenefitApplication
     from models.user import User
-    from models.municipality import Municipality
     from utils import (
         validate_required_fields,
         ValidationError,
         fully_verified_required,
         save_benefit_document,
     )
+    from utils.http_cache import conditional_get, table_fingerprint
+    from utils.reference_registry import get_registry
+    from utils.sequences import next_reference
 
 
 benefits_bp = Blueprint('benefits', __name__, url_prefix='/api/benefits')
 
 
+def _programs_version():
+    """Validator for the public program list.
+
+    Returns None while any active program is past its duration so the view
+    runs and auto-completes it instead of answering 304.
+    """
+    now = datetime.utcnow()
+    durations = (
+        db.session.query(BenefitProgram.created_at, BenefitProgram.duration_days)
+        .filter(BenefitProgram.is_active == True, BenefitProgram.duration_days.isnot(None))
+        .all()
+    )
+    for created_at, days in durations:
+        if created_at and created_at + timedelta(days=int(days)) <= now:
+            return None
+    return (
+        table_fingerprint(BenefitProgram),
+        table_fingerprint(BenefitApplication, BenefitApplication.status == 'approved'),
+    )
+
+
 @benefits_bp.route('/programs', methods=['GET'])
+@conditional_get(_programs_version, cache_control='public, max-age=60')
 def list_programs():
     """Public list of active benefit programs."""
     try:
@@ -126,12 +152,8 @@ def create_application():
         if program.municipality_id and user.municipality_id != program.municipality_id:
             return jsonify({'error': 'Program not available for your municipality'}), 403
 
-        # Generate application number
-        count = BenefitApplication.query.count() + 1
-        app_number = f"APP-{user.municipality_id}-{user_id}-{count}"
-
         app = BenefitApplication(
-            application_number=app_number,
+            application_number=next_reference('APP', user.municipality_id),
             user_id=user_id,
             program_id=program.id,
             application_data=data.get('application_data') or {},
@@ -177,7 +199,7 @@ def upload_application_doc(application_id: int):
             return jsonify({'error': 'No file uploaded'}), 400
         file = request.files['file']
 
-        municipality = Municipality.query.get(user.municipality_id)
+        municipality = get_registry().municipality(user.municipality_id)
         municipality_slug = municipality.slug if municipality else 'unknown'
 
         rel_path = save_benefit_document(file, app.id, municipality_slug)
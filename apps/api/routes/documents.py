@@ -12,6 +12,12 @@ try:
         save_document_request_file,
         fully_verified_required,
     )
+    from apps.api.utils.http_cache import conditional_get, table_fingerprint, REFERENCE_CACHE_CONTROL
+    from apps.api.utils.reference_registry import get_registry
+    from apps.api.utils.sequences import next_reference
+    from apps.api.utils.pdf_generator import document_content_hash
+    from apps.api.utils.qr_service import qr_svg
+    from apps.api.utils.qr_utils import claim_ticket_link
 except ImportError:
     from __init__ import db
     from models.document import DocumentType, DocumentRequest
@@ -22,12 +28,19 @@ except ImportError:
         save_document_request_file,
         fully_verified_required,
     )
+    from utils.http_cache import conditional_get, table_fingerprint, REFERENCE_CACHE_CONTROL
+    from utils.reference_registry import get_registry
+    from utils.sequences import next_reference
+    from utils.pdf_generator import document_content_hash
+    from utils.qr_service import qr_svg
+    from utils.qr_utils import claim_ticket_link
 
 
 documents_bp = Blueprint('documents', __name__, url_prefix='/api/documents')
 
 
 @documents_bp.route('/types', methods=['GET'])
+@conditional_get(lambda: table_fingerprint(DocumentType), cache_control=REFERENCE_CACHE_CONTROL)
 def list_document_types():
     """Public list of active document types."""
     try:
@@ -60,7 +73,7 @@ def create_document_request():
             return jsonify({'error': 'You can only request documents in your registered municipality'}), 403
 
         # Validate delivery rules against selected document type
-        dt = DocumentType.query.get(int(data['document_type_id']))
+        dt = get_registry().document_type(int(data['document_type_id']))
         if not dt or not dt.is_active:
             return jsonify({'error': 'Selected document type is not available'}), 400
 
@@ -112,7 +125,7 @@ def create_document_request():
             resident_input = None
 
         req = DocumentRequest(
-            request_number=f"REQ-{user_id}-{User.query.count()}-{DocumentRequest.query.count()+1}",
+            request_number=next_reference('REQ', data['municipality_id']),
             user_id=user_id,
             document_type_id=data['document_type_id'],
             municipality_id=data['municipality_id'],
@@ -212,6 +225,8 @@ def get_claim_ticket(request_id: int):
         qr_url = None
         if r.qr_code:
             qr_url = f"/uploads/{str(r.qr_code).replace('\\', '/')}"
+        # Inline SVG of the same QR: crisp at any size, no image request
+        qr_svg_markup = qr_svg(claim_ticket_link(data['token'])) if data.get('token') else None
         # Resolve names
         muni_name = getattr(getattr(r, 'municipality', None), 'name', None)
         doc_name = getattr(getattr(r, 'document_type', None), 'name', None)
@@ -219,6 +234,7 @@ def get_claim_ticket(request_id: int):
             'request_id': r.id,
             'request_number': r.request_number,
             'qr_url': qr_url,
+            'qr_svg': qr_svg_markup,
             'code_masked': data.get('code_masked'),
             'code_plain': code_plain,
             'window_start': data.get('window_start'),
@@ -234,7 +250,11 @@ def get_claim_ticket(request_id: int):
 def public_verify_document(request_number: str):
     """Public verification endpoint for digital documents via request_number.
 
-    Returns validity and limited non-sensitive details.
+    Returns validity and limited non-sensitive details. ``integrity`` is
+    ``intact`` when the request and resident fields still match what the
+    document was issued with (``document_content_hash``), ``changed`` when
+    they do not, and ``unknown`` for documents issued before content hashes
+    were recorded. Layout, officials and seal changes do not count.
     """
     try:
         r = DocumentRequest.query.filter_by(request_number=request_number).first()
@@ -250,6 +270,13 @@ def public_verify_document(request_number: str):
         muni_name = getattr(getattr(r, 'municipality', None), 'name', None)
         doc_name = getattr(getattr(r, 'document_type', None), 'name', None)
         issued_at = r.ready_at.isoformat() if getattr(r, 'ready_at', None) else None
+        integrity = 'unknown'
+        if r.document_content_hash:
+            try:
+                current = document_content_hash(r, get_registry().document_type(r.document_type_id), r.user)
+                integrity = 'intact' if current == r.document_content_hash else 'changed'
+            except Exception:
+                integrity = 'unknown'
         return jsonify({
             'valid': True,
             'request_number': r.request_number,
@@ -257,6 +284,7 @@ def public_verify_document(request_number: str):
             'muni_name': muni_name,
             'doc_name': doc_name,
             'issued_at': issued_at,
+            'integrity': integrity,
             'url': f"/uploads/{str(r.document_file).replace('\\', '/')}"
         }), 200
     except Exception as e:
@@ -1,36 +1,50 @@
 """Public/resident Issue reporting routes."""
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_
+from sqlalchemy import and_, func, or_
 
 try:
     from apps.api import db
     from apps.api.models.issue import Issue, IssueCategory
     from apps.api.models.user import User
-    from apps.api.models.municipality import Municipality
     from apps.api.utils import (
         validate_required_fields,
         ValidationError,
         fully_verified_required,
         save_issue_attachment,
     )
+    from apps.api.utils.http_cache import conditional_get, content_fingerprint, REFERENCE_CACHE_CONTROL
+    from apps.api.utils.reference_registry import get_registry
+    from apps.api.utils.geo import cover_bbox, cluster_precision, decode_bounds, PREFIX_END
+    from apps.api.utils.issue_dedup import link_duplicate
+    from apps.api.utils.sequences import next_reference
 except ImportError:
     from __init__ import db
     from models.issue import Issue, IssueCategory
     from models.user import User
-    from models.municipality import Municipality
     from utils import (
         validate_required_fields,
         ValidationError,
         fully_verified_required,
         save_issue_attachment,
     )
+    from utils.http_cache import conditional_get, content_fingerprint, REFERENCE_CACHE_CONTROL
+    from utils.reference_registry import get_registry
+    from utils.geo import cover_bbox, cluster_precision, decode_bounds, PREFIX_END
+    from utils.issue_dedup import link_duplicate
+    from utils.sequences import next_reference
 
 
 issues_bp = Blueprint('issues', __name__, url_prefix='/api/issues')
 
 
+def _categories_version():
+    # issue_categories has no updated_at; hash the rows so renames and toggles count too
+    return content_fingerprint(IssueCategory)
+
+
 @issues_bp.route('/categories', methods=['GET'])
+@conditional_get(_categories_version, cache_control=REFERENCE_CACHE_CONTROL)
 def list_categories():
     """Public list of active issue categories."""
     try:
@@ -86,6 +100,108 @@ def list_issues():
         return jsonify({'error': 'Failed to get issues', 'details': str(e)}), 500
 
 
+MAX_MAP_POINTS = 2000
+
+
+def _parse_bbox(raw):
+    """Parse ``west,south,east,north`` (Leaflet ``toBBoxString`` order)."""
+    try:
+        west, south, east, north = (float(v) for v in (raw or '').split(','))
+    except ValueError:
+        raise ValidationError('bbox', 'Must be "west,south,east,north"')
+    if not (-90 <= south < north <= 90 and -180 <= west < east <= 180):
+        raise ValidationError('bbox', 'Out of range or crosses the antimeridian')
+    return south, west, north, east
+
+
+@issues_bp.route('/map', methods=['GET'])
+def issues_map():
+    """Public geotagged issues inside a bounding box.
+
+    Query params:
+      - bbox: west,south,east,north (required)
+      - zoom: int map zoom (default 10); below ``CLUSTER_MAX_ZOOM`` results are
+        clustered per geohash cell, otherwise individual pins are returned
+      - municipality_id, status, category_id: optional filters
+    """
+    try:
+        south, west, north, east = _parse_bbox(request.args.get('bbox'))
+        zoom = request.args.get('zoom', 10, type=int)
+
+        prefixes = [p for p in cover_bbox(south, west, north, east) if p]
+        filters = [
+            Issue.is_public == True,
+            Issue.geohash.isnot(None),
+            Issue.latitude.between(south, north),
+            Issue.longitude.between(west, east),
+        ]
+        if prefixes:
+            # Each prefix is an index range scan on idx_issue_geohash
+            filters.append(or_(*[and_(Issue.geohash >= p, Issue.geohash < p + PREFIX_END) for p in prefixes]))
+        municipality_id = request.args.get('municipality_id', type=int)
+        if municipality_id:
+            filters.append(Issue.municipality_id == municipality_id)
+        status = request.args.get('status')
+        if status:
+            filters.append(Issue.status == status)
+        category_id = request.args.get('category_id', type=int)
+        if category_id:
+            filters.append(Issue.category_id == category_id)
+
+        precision = cluster_precision(zoom)
+        if precision is not None:
+            cell = func.substr(Issue.geohash, 1, precision)
+            rows = (
+                db.session.query(cell, func.count(Issue.id), func.avg(Issue.latitude), func.avg(Issue.longitude))
+                .filter(*filters)
+                .group_by(cell)
+                .all()
+            )
+            clusters = []
+            for gh, count, lat, lng in rows:
+                s_, w_, n_, e_ = decode_bounds(gh)
+                clusters.append({
+                    'geohash': gh,
+                    'count': int(count),
+                    'latitude': float(lat),
+                    'longitude': float(lng),
+                    'bounds': [s_, w_, n_, e_],
+                })
+            return jsonify({
+                'mode': 'clusters',
+                'precision': precision,
+                'clusters': clusters,
+                'total': sum(c['count'] for c in clusters),
+            }), 200
+
+        rows = (
+            db.session.query(
+                Issue.id, Issue.title, Issue.status, Issue.priority, Issue.category_id,
+                Issue.municipality_id, Issue.latitude, Issue.longitude,
+            )
+            .filter(*filters)
+            .order_by(Issue.created_at.desc())
+            .limit(MAX_MAP_POINTS + 1)
+            .all()
+        )
+        return jsonify({
+            'mode': 'points',
+            'issues': [
+                {
+                    'id': r.id, 'title': r.title, 'status': r.status, 'priority': r.priority,
+                    'category_id': r.category_id, 'municipality_id': r.municipality_id,
+                    'latitude': r.latitude, 'longitude': r.longitude,
+                }
+                for r in rows[:MAX_MAP_POINTS]
+            ],
+            'truncated': len(rows) > MAX_MAP_POINTS,
+        }), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to get issue map', 'details': str(e)}), 500
+
+
 @issues_bp.route('/<int:issue_id>', methods=['GET'])
 def get_issue(issue_id: int):
     """Public issue detail if issue is public; otherwise 404."""
@@ -119,21 +235,17 @@ def create_issue():
             return jsonify({'error': 'User has no registered municipality'}), 400
 
         # Validate category
-        category = IssueCategory.query.get(int(data['category_id']))
+        category = get_registry().issue_category(int(data['category_id']))
         if not category:
             return jsonify({'error': 'Invalid category'}), 400
 
-        # Generate issue number (simple and unique enough)
-        count = Issue.query.count() + 1
-        issue_number = f"ISS-{municipality_id}-{user_id}-{count}"
-
         # Require a specific location (address) for actionable triage
         specific_location = (data.get('specific_location') or '').strip()
         if not specific_location:
             return jsonify({'error': 'specific_location is required'}), 400
 
         issue = Issue(
-            issue_number=issue_number,
+            issue_number=next_reference('ISS', municipality_id),
             user_id=user_id,
             category_id=category.id,
             title=data['title'],
@@ -148,10 +260,20 @@ def create_issue():
             status='submitted',
             is_public=True,
         )
+        # Link to an open nearby report of the same problem so admins triage it once
+        canonical = link_duplicate(issue)
         db.session.add(issue)
         db.session.commit()
 
-        return jsonify({'message': 'Issue created successfully', 'issue': issue.to_dict()}), 201
+        response = {'message': 'Issue created successfully', 'issue': issue.to_dict()}
+        if canonical:
+            response['duplicate_of'] = {
+                'id': canonical.id,
+                'issue_number': canonical.issue_number,
+                'title': canonical.title,
+                'status': canonical.status,
+            }
+        return jsonify(response), 201
     except ValidationError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -190,7 +312,7 @@ def upload_issue_file(issue_id: int):
         file = request.files['file']
 
         # Determine municipality slug
-        municipality = Municipality.query.get(user.municipality_id)
+        municipality = get_registry().municipality(user.municipality_id)
         municipality_slug = municipality.slug if municipality else 'unknown'
 
         # Enforce max 5 attachments per issue
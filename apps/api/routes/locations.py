@@ -0,0 +1,91 @@
+"""Philippine location lookups (province -> municipality -> barangay) and autocomplete."""
+from flask import Blueprint, jsonify, request
+
+try:
+    from apps.api.utils.http_cache import conditional_get, REFERENCE_CACHE_CONTROL
+    from apps.api.utils.location_index import KINDS, get_location_index
+except ImportError:
+    from utils.http_cache import conditional_get, REFERENCE_CACHE_CONTROL
+    from utils.location_index import KINDS, get_location_index
+
+
+locations_bp = Blueprint('locations', __name__, url_prefix='/api/locations')
+
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+
+def _locations_version(*args, **kwargs):
+    return get_location_index().source_stamp()
+
+
+@locations_bp.route('/provinces', methods=['GET'])
+@conditional_get(_locations_version, cache_control=REFERENCE_CACHE_CONTROL)
+def list_provinces():
+    """Get list of all provinces."""
+    try:
+        provinces = get_location_index().provinces()
+        return jsonify({'count': len(provinces), 'provinces': provinces}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get provinces', 'details': str(e)}), 500
+
+
+@locations_bp.route('/provinces/<province>/municipalities', methods=['GET'])
+@conditional_get(_locations_version, cache_control=REFERENCE_CACHE_CONTROL)
+def list_municipalities(province):
+    """Get list of municipalities in a province (names match case/accent-insensitively)."""
+    try:
+        municipalities = get_location_index().municipalities(province)
+        if not municipalities:
+            return jsonify({'error': 'Province not found'}), 404
+        return jsonify({'province': province, 'count': len(municipalities), 'municipalities': municipalities}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get municipalities', 'details': str(e)}), 500
+
+
+@locations_bp.route('/provinces/<province>/municipalities/<municipality>/barangays', methods=['GET'])
+@conditional_get(_locations_version, cache_control=REFERENCE_CACHE_CONTROL)
+def list_barangays(province, municipality):
+    """Get list of barangays in a municipality."""
+    try:
+        barangays = get_location_index().barangays(province, municipality)
+        if not barangays:
+            return jsonify({'error': 'Municipality not found'}), 404
+        return jsonify({
+            'province': province,
+            'municipality': municipality,
+            'count': len(barangays),
+            'barangays': barangays,
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get barangays', 'details': str(e)}), 500
+
+
+@locations_bp.route('/autocomplete', methods=['GET'])
+@conditional_get(_locations_version, cache_control=REFERENCE_CACHE_CONTROL)
+def autocomplete():
+    """Prefix search over location names.
+
+    Query params:
+      - q: str (required)
+      - type: province, municipality or barangay (optional)
+      - province / municipality: parent scope (optional)
+      - limit: int (default 10, max 50)
+    """
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({'error': 'Query is required'}), 400
+    kind = request.args.get('type') or None
+    if kind and kind not in KINDS:
+        return jsonify({'error': f'Unknown type: {kind}', 'allowed': list(KINDS)}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int) or 10, MAX_AUTOCOMPLETE_LIMIT))
+    try:
+        results = get_location_index().autocomplete(
+            q,
+            kind=kind,
+            province=request.args.get('province') or None,
+            municipality=request.args.get('municipality') or None,
+            limit=limit,
+        )
+        return jsonify({'query': q, 'count': len(results), 'results': results}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to search locations', 'details': str(e)}), 500
@@ -3,11 +3,11 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timezone, timedelta
 import sqlite3
+from sqlalchemy import case, func, literal, select, tuple_, union_all
 from sqlalchemy.exc import OperationalError as SAOperationalError, ProgrammingError as SAProgrammingError
 from apps.api import db
 from apps.api.models.user import User
 from apps.api.models.marketplace import Item, Transaction, Message
-from apps.api.models.municipality import Municipality
 from apps.api.utils import (
     verified_resident_required,
     fully_verified_required,
@@ -22,28 +22,73 @@ from apps.api.utils import (
     assert_status,
     TransitionError,
 )
-from apps.api.utils.file_handler import save_marketplace_image
+from apps.api.utils.file_handler import delete_file, save_marketplace_image
+from apps.api.utils.image_variants import dropped_images, retain_images, schedule_image_variants
+from apps.api.utils.reference_registry import get_registry
 
 marketplace_bp = Blueprint('marketplace', __name__, url_prefix='/api/marketplace')
 
 
+FACET_COLUMNS = ('category', 'transaction_type', 'condition')
+
+
+def _item_facets(base_filters):
+    """Counts per category, transaction_type and condition in one grouped query.
+
+    Postgres uses GROUPING SETS; other dialects (SQLite) get a UNION ALL of
+    per-column GROUP BYs, which still runs as a single statement.
+    """
+    facets = {name: {} for name in FACET_COLUMNS}
+    columns = [getattr(Item, name) for name in FACET_COLUMNS]
+    if db.engine.dialect.name == 'postgresql':
+        facet = case(
+            *[(func.grouping(col) == 0, literal(name)) for name, col in zip(FACET_COLUMNS, columns)],
+        )
+        stmt = (
+            select(facet.label('facet'), func.coalesce(*columns).label('value'), func.count().label('n'))
+            .where(*base_filters)
+            .group_by(func.grouping_sets(*[tuple_(col) for col in columns]))
+        )
+    else:
+        stmt = union_all(*[
+            select(literal(name).label('facet'), col.label('value'), func.count().label('n'))
+            .where(*base_filters)
+            .group_by(col)
+            for name, col in zip(FACET_COLUMNS, columns)
+        ])
+    for facet_name, value, n in db.session.execute(stmt):
+        if facet_name in facets and value is not None:
+            facets[facet_name][value] = int(n)
+    return facets
+
+
 @marketplace_bp.route('/items', methods=['GET'])
 def list_items():
-    """Get list of marketplace items with optional filters."""
+    """Get list of marketplace items with optional filters.
+
+    Pass ``facets=true`` to also get counts per category, transaction_type and
+    condition for the current municipality/status filter.
+    """
     try:
         # Get query parameters
         municipality_id = request.args.get('municipality_id', type=int)
         category = request.args.get('category')
         transaction_type = request.args.get('transaction_type')
+        condition = request.args.get('condition')
         status = request.args.get('status', 'available')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        include_facets = (request.args.get('facets') or '').lower() in ('1', 'true', 'yes')
         
-        # Build query
-        query = Item.query.filter_by(is_active=True)
-        
+        # Municipality/status scope (matches the composite idx_item_browse index)
+        base_filters = [Item.is_active == True]
         if municipality_id:
-            query = query.filter_by(municipality_id=municipality_id)
+            base_filters.append(Item.municipality_id == municipality_id)
+        if status:
+            base_filters.append(Item.status == status)
+        
+        # Build query
+        query = Item.query.filter(*base_filters)
         
         if category:
             query = query.filter_by(category=category)
@@ -51,8 +96,8 @@ def list_items():
         if transaction_type:
             query = query.filter_by(transaction_type=transaction_type)
         
-        if status:
-            query = query.filter_by(status=status)
+        if condition:
+            query = query.filter_by(condition=condition)
         
         # Order by most recent
         query = query.order_by(Item.created_at.desc())
@@ -70,13 +115,16 @@ def list_items():
                 d['municipality_name'] = None
             items_data.append(d)
 
-        return jsonify({
+        result = {
             'items': items_data,
             'total': paginated.total,
             'page': page,
             'per_page': per_page,
             'pages': paginated.pages
-        }), 200
+        }
+        if include_facets:
+            result['facets'] = _item_facets(base_filters)
+        return jsonify(result), 200
     
     except (sqlite3.OperationalError, SAOperationalError, SAProgrammingError):
         # SQLite missing table/column; return empty consistent shape
@@ -171,7 +219,7 @@ def create_item():
         
         return jsonify({
             'message': 'Item created successfully',
-            'item': item.to_dict()
+            'item': item.to_dict(include_originals=True)
         }), 201
     
     except ValidationError as e:
@@ -223,14 +271,17 @@ def update_item(item_id):
             item.pickup_location = data['pickup_location']
 
         if 'images' in data and isinstance(data['images'], list):
-            item.images = data['images']
+            images = retain_images(item.images, data['images'])
+            for path in dropped_images(item.images, images):
+                delete_file(path)
+            item.images = images
         
         item.updated_at = datetime.utcnow()
         db.session.commit()
         
         return jsonify({
             'message': 'Item updated successfully',
-            'item': item.to_dict()
+            'item': item.to_dict(include_originals=True)
         }), 200
     
     except ValidationError as e:
@@ -293,7 +344,7 @@ def get_my_items():
         
         return jsonify({
             'count': len(items),
-            'items': [item.to_dict() for item in items]
+            'items': [item.to_dict(include_originals=True) for item in items]
         }), 200
     except (sqlite3.OperationalError, SAOperationalError, SAProgrammingError):
         # Missing table/column during early setups: return empty consistent shape
@@ -324,19 +375,20 @@ def upload_item_image(item_id):
             return jsonify({'error': 'No file uploaded'}), 400
         file = request.files['file']
 
-        images = item.images or []
+        images = list(item.images or [])
         if len(images) >= 5:
             return jsonify({'error': 'Maximum images reached (5)'}), 400
 
-        municipality = Municipality.query.get(item.municipality_id)
+        municipality = get_registry().municipality(item.municipality_id)
         municipality_slug = municipality.slug if municipality else 'unknown'
 
         rel_path = save_marketplace_image(file, item_id, municipality_slug)
         images.append(rel_path)
         item.images = images
         db.session.commit()
+        schedule_image_variants('item', item_id)
 
-        return jsonify({'message': 'Image uploaded', 'path': rel_path, 'item': item.to_dict()}), 200
+        return jsonify({'message': 'Image uploaded', 'path': rel_path, 'item': item.to_dict(include_originals=True)}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload image', 'details': str(e)}), 500
@@ -2,15 +2,29 @@
 from flask import Blueprint, jsonify, request
 from apps.api.models.municipality import Municipality, Barangay
 from apps.api import db
+from apps.api.utils.http_cache import conditional_get, table_fingerprint, REFERENCE_CACHE_CONTROL
+from apps.api.utils.reference_registry import get_registry
 
 municipalities_bp = Blueprint('municipalities', __name__, url_prefix='/api/municipalities')
 
 
+def _municipalities_version():
+    return table_fingerprint(Municipality)
+
+
+def _barangays_version(municipality_id):
+    return (
+        table_fingerprint(Municipality, Municipality.id == municipality_id),
+        table_fingerprint(Barangay, Barangay.municipality_id == municipality_id),
+    )
+
+
 @municipalities_bp.route('', methods=['GET'])
+@conditional_get(_municipalities_version, cache_control=REFERENCE_CACHE_CONTROL)
 def list_municipalities():
     """Get list of all municipalities in Zambales."""
     try:
-        municipalities = Municipality.query.filter_by(is_active=True).all()
+        municipalities = get_registry().municipalities()
         
         return jsonify({
             'count': len(municipalities),
@@ -25,7 +39,7 @@ def list_municipalities():
 def get_municipality(municipality_id):
     """Get details of a specific municipality."""
     try:
-        municipality = Municipality.query.get(municipality_id)
+        municipality = get_registry().municipality(municipality_id)
         
         if not municipality:
             return jsonify({'error': 'Municipality not found'}), 404
@@ -42,7 +56,7 @@ def get_municipality(municipality_id):
 def get_municipality_by_slug(slug):
     """Get municipality by slug."""
     try:
-        municipality = Municipality.query.filter_by(slug=slug).first()
+        municipality = get_registry().municipality_by_slug(slug)
         
         if not municipality:
             return jsonify({'error': 'Municipality not found'}), 404
@@ -56,18 +70,17 @@ def get_municipality_by_slug(slug):
 
 
 @municipalities_bp.route('/<int:municipality_id>/barangays', methods=['GET'])
+@conditional_get(_barangays_version, cache_control=REFERENCE_CACHE_CONTROL)
 def list_barangays(municipality_id):
     """Get list of barangays in a municipality."""
     try:
-        municipality = Municipality.query.get(municipality_id)
+        registry = get_registry()
+        municipality = registry.municipality(municipality_id)
         
         if not municipality:
             return jsonify({'error': 'Municipality not found'}), 404
         
-        barangays = Barangay.query.filter_by(
-            municipality_id=municipality_id,
-            is_active=True
-        ).all()
+        barangays = registry.barangays_of(municipality_id)
         
         return jsonify({
             'municipality': municipality.name,
@@ -83,7 +96,7 @@ def list_barangays(municipality_id):
 def get_barangay(barangay_id):
     """Get details of a specific barangay."""
     try:
-        barangay = Barangay.query.get(barangay_id)
+        barangay = get_registry().barangay(barangay_id)
         
         if not barangay:
             return jsonify({'error': 'Barangay not found'}), 404
@@ -0,0 +1,52 @@
+"""Unified public search route."""
+from flask import Blueprint, jsonify, request
+from sqlalchemy.exc import OperationalError as SAOperationalError, ProgrammingError as SAProgrammingError
+
+try:
+    from apps.api import db
+    from apps.api.utils.search_index import search, ENTITY_TYPES
+except ImportError:
+    from __init__ import db
+    from utils.search_index import search, ENTITY_TYPES
+
+
+search_bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+
+@search_bp.route('', methods=['GET'])
+def search_all():
+    """Full-text search across announcements, marketplace items, public issues and benefit programs.
+
+    Query params:
+      - q: str (required, at least 2 characters)
+      - type: comma separated subset of announcement,item,issue,benefit_program (optional)
+      - municipality_id: int (optional; province-wide entries are always included)
+      - page: int (default 1)
+      - per_page: int (default 20, max 100)
+    """
+    q = (request.args.get('q') or '').strip()
+    if len(q) < 2:
+        return jsonify({'error': 'Query must be at least 2 characters'}), 400
+
+    types = [t.strip() for t in (request.args.get('type') or '').split(',') if t.strip()]
+    unknown = [t for t in types if t not in ENTITY_TYPES]
+    if unknown:
+        return jsonify({'error': f"Unknown type(s): {', '.join(unknown)}", 'allowed': list(ENTITY_TYPES)}), 400
+
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    try:
+        result = search(
+            q,
+            types=types,
+            municipality_id=request.args.get('municipality_id', type=int),
+            page=page,
+            per_page=per_page,
+        )
+        return jsonify({'query': q, 'page': max(1, page), **result}), 200
+    except (SAOperationalError, SAProgrammingError) as e:
+        db.session.rollback()
+        return jsonify({'error': 'Search index unavailable', 'details': str(e)}), 503
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Search failed', 'details': str(e)}), 500
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Build thumbnail/card/full variants for marketplace item and announcement
+photos that are still stored as plain upload paths (uploaded before variants
+existed, or whose background job was lost to a restart).
+
+Usage:
+  python apps/api/scripts/backfill_image_variants.py [--kind item|announcement] [--batch-size 200]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+
+from apps.api.app import create_app
+from apps.api import db
+from apps.api.models.announcement import Announcement
+from apps.api.models.marketplace import Item
+from apps.api.utils.image_variants import process_images
+
+MODELS = {'item': Item, 'announcement': Announcement}
+
+
+def backfill(kind: str, batch_size: int = 200) -> int:
+    model = MODELS[kind]
+    converted = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.session.query(model.id, model.images)
+            .filter(model.id > last_id, model.images.isnot(None))
+            .order_by(model.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            if any(isinstance(entry, str) for entry in row.images or []):
+                converted += process_images(kind, row.id)
+        db.session.expunge_all()
+        last_id = rows[-1].id
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill image variants for items and announcements')
+    parser.add_argument('--kind', choices=sorted(MODELS), action='append',
+                        help='Only this kind (repeatable; default: all)')
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        for kind in args.kind or sorted(MODELS):
+            print(f'{kind}: converted {backfill(kind, args.batch_size)} images')
+        print('DONE.')
+
+
+if __name__ == '__main__':
+    main()
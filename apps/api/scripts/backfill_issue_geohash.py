@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Fill issues.geohash for rows that have coordinates but no geohash yet
+(rows written before the column existed or via bulk SQL).
+
+Usage:
+  python apps/api/scripts/backfill_issue_geohash.py [--batch-size 1000]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+
+from apps.api.app import create_app
+from apps.api import db
+from apps.api.models.issue import Issue
+from apps.api.utils.geo import encode_or_none
+
+
+def backfill(batch_size: int = 1000) -> int:
+    updated = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.session.query(Issue.id, Issue.latitude, Issue.longitude)
+            .filter(Issue.id > last_id, Issue.geohash.is_(None),
+                    Issue.latitude.isnot(None), Issue.longitude.isnot(None))
+            .order_by(Issue.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        mappings = [{'id': r.id, 'geohash': encode_or_none(r.latitude, r.longitude)} for r in rows]
+        db.session.bulk_update_mappings(Issue, [m for m in mappings if m['geohash']])
+        db.session.commit()
+        updated += sum(1 for m in mappings if m['geohash'])
+        last_id = rows[-1].id
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill issues.geohash')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print(f'DONE. Updated {backfill(args.batch_size)} issues')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch document generation throughput against pool size.
+
+Creates a throwaway SQLite database with --count digital requests, then runs
+one generate-batch (optionally merged) per worker count and reports documents
+per second once the batch has completed.
+
+Usage:
+  python apps/api/scripts/bench_document_batch.py [--count 120] [--workers 1 2 4] [--merge]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from apps.api import db
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def _seed(app, count):
+    from apps.api.models.document import DocumentRequest, DocumentType
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+
+    with app.app_context():
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        dt = DocumentType(name='Certificate of Residency', code='residency', authority_level='municipal',
+                          supports_digital=True, fee=0)
+        db.session.add_all([iba, dt])
+        db.session.flush()
+        resident = User(username='res', email='r@example.com', password_hash='x', first_name='Juan',
+                        last_name='Dela Cruz', municipality_id=iba.id)
+        db.session.add(resident)
+        db.session.flush()
+        reqs = [
+            DocumentRequest(request_number=f'REQ-{iba.id}-2026-{i:06d}', user_id=resident.id, document_type_id=dt.id,
+                            municipality_id=iba.id, delivery_method='digital', purpose='Employment',
+                            status='processing')
+            for i in range(1, count + 1)
+        ]
+        db.session.add_all(reqs)
+        db.session.commit()
+        return iba.id, [r.id for r in reqs]
+
+
+def run(count, workers, merge):
+    from apps.api.models.document import DocumentRequest
+    from apps.api.utils.document_jobs import (
+        _executor, enqueue_document_batch, get_document_batch, shutdown_document_jobs,
+    )
+    from apps.api.utils.pdf_generator import warm_document_assets
+
+    tmp = Path(tempfile.mkdtemp(prefix='bench_batch_'))
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp / "bench.db"}'
+        UPLOAD_FOLDER = tmp / 'uploads'
+        WATERMARK_CACHE_DIR = tmp / 'watermarks'
+        DOCUMENT_JOB_EXECUTOR = 'process'
+        DOCUMENT_JOB_WORKERS = workers
+
+    app = create_app(BenchConfig)
+    municipality_id, ids = _seed(app, count)
+    try:
+        with app.app_context():
+            warm_document_assets(['Iba'])
+            # Spawn the children before timing
+            pool = _executor(app)
+            for f in [pool.submit(os.getpid) for _ in range(workers * 2)]:
+                f.result()
+            requests = DocumentRequest.query.filter(DocumentRequest.id.in_(ids)).all()
+            t0 = time.perf_counter()
+            batch = enqueue_document_batch(requests, municipality_id, merge=merge)
+            while True:
+                batch = get_document_batch(batch.id)
+                if batch.status in ('completed', 'failed'):
+                    break
+                db.session.remove()
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - t0
+            return elapsed, batch.status
+    finally:
+        shutdown_document_jobs(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=120)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--merge', action='store_true')
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'seconds':>8} {'docs/s':>7} {'speedup':>8}")
+    base = None
+    for workers in args.workers:
+        elapsed, status = run(args.count, workers, args.merge)
+        rate = args.count / elapsed
+        base = base or rate
+        print(f'{workers:>7} {elapsed:>8.2f} {rate:>7.1f} {rate / base:>7.2f}x  ({status})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
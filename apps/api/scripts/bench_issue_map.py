@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/issues/map with 100k synthetic geotagged issues.
+
+Issues are scattered over Zambales (denser around town centres) in a
+scratch database; the script times cluster responses at province/town zoom
+and pin responses at street zoom, through the Flask test client.
+
+Usage:
+  python apps/api/scripts/bench_issue_map.py [--issues 100000] [--database-url postgresql://...]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.utils.geo import encode
+
+# Rough town centres (lat, lng)
+TOWNS = [
+    (15.2896, 120.0188), (15.1574, 120.0467), (15.6296, 119.9305), (14.9316, 120.2000),
+    (15.3275, 119.9783), (15.5367, 119.9497), (15.4350, 119.9064), (14.9446, 120.0845),
+    (15.0600, 120.0700), (14.9480, 120.1000), (15.0743, 120.0426), (15.7640, 119.9126), (14.8800, 120.2340),
+]
+VIEWS = [
+    ('province z9', '119.70,14.70,120.50,15.90', 9),
+    ('town z12', '119.93,15.29,120.03,15.37', 12),
+    ('street z16', '119.975,15.325,119.982,15.330', 16),
+]
+
+
+def _fill(n: int, batch: int = 5000):
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+    from apps.api.models.issue import Issue, IssueCategory
+    muni = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+    cat = IssueCategory(name='Roads', slug='roads')
+    db.session.add_all([muni, cat])
+    db.session.flush()
+    user = User(username='bench', email='bench@example.com', password_hash='x', first_name='B', last_name='U')
+    db.session.add(user)
+    db.session.commit()
+
+    rng = random.Random(3)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(n):
+        lat0, lng0 = rng.choice(TOWNS)
+        lat, lng = rng.gauss(lat0, 0.03), rng.gauss(lng0, 0.03)
+        rows.append({
+            'issue_number': f'BENCH-{i}', 'user_id': user.id, 'category_id': cat.id, 'title': f'Issue {i}',
+            'description': 'synthetic', 'municipality_id': muni.id, 'latitude': lat, 'longitude': lng,
+            'geohash': encode(lat, lng), 'status': 'submitted', 'is_public': True,
+            'created_at': now, 'updated_at': now,
+        })
+        if len(rows) >= batch:
+            db.session.execute(insert(Issue.__table__), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Issue.__table__), rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark issue map viewport queries')
+    parser.add_argument('--issues', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database-url', help='Scratch database URL (tables are dropped!)')
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='munlink-map-bench-'), 'bench.db')}"
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = url
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        _fill(args.issues)
+        print(f'Inserted {args.issues} issues in {time.perf_counter() - started:.1f}s ({db.engine.dialect.name})')
+
+    client = app.test_client()
+    for label, bbox, zoom in VIEWS:
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            resp = client.get(f'/api/issues/map?bbox={bbox}&zoom={zoom}')
+            timings.append((time.perf_counter() - t0) * 1000)
+        data = resp.get_json()
+        size = len(data.get('clusters') or data.get('issues') or [])
+        total = data.get('total', size)
+        print(f'{label:>12}: mode={data["mode"]:<8} features={size:>5} issues={total:>6} '
+              f'bytes={len(resp.data):>7} p50={statistics.median(timings):7.2f} ms max={max(timings):7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
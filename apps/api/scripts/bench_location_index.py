@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled location index against loading the raw JSON.
+
+Each variant runs in a fresh subprocess (like a gunicorn worker) and reports
+load time, RSS growth and per-lookup latency.
+
+Usage:
+  python apps/api/scripts/bench_location_index.py [--iterations 2000]
+"""
+import os
+import sys
+import json
+import subprocess
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import time
+from pathlib import Path
+
+SOURCE = Path(PROJECT_ROOT) / 'data' / 'locations' / 'philippines_full_locations.json'
+TARGET = Path(PROJECT_ROOT) / 'data' / 'locations' / 'philippines_full_locations.sqlite'
+
+
+def _rss_kb() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * (os.sysconf('SC_PAGE_SIZE') // 1024)
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _worker(variant: str, iterations: int) -> dict:
+    # Import outside the measured window; a worker has these loaded anyway
+    from apps.api.utils.location_index import LocationIndex
+    rss0 = _rss_kb()
+    t0 = time.perf_counter()
+    if variant == 'json':
+        with open(SOURCE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        load_s = time.perf_counter() - t0
+
+        def lookup():
+            return data['Zambales']['Iba']
+
+        def complete():
+            return [m for m in data['Zambales'] if m.lower().startswith('san')]
+    else:
+        idx = LocationIndex(TARGET)
+        idx.provinces()  # open connection, touch first page
+        load_s = time.perf_counter() - t0
+
+        def lookup():
+            return idx.barangays('Zambales', 'Iba')
+
+        def complete():
+            return idx.autocomplete('san', kind='municipality', province='Zambales')
+    rss1 = _rss_kb()
+
+    t1 = time.perf_counter()
+    for _ in range(iterations):
+        lookup()
+    lookup_us = (time.perf_counter() - t1) / iterations * 1e6
+    t2 = time.perf_counter()
+    for _ in range(iterations):
+        complete()
+    complete_us = (time.perf_counter() - t2) / iterations * 1e6
+
+    return {
+        'variant': variant,
+        'load_ms': round(load_s * 1000, 2),
+        'rss_delta_kb': rss1 - rss0,
+        'barangay_lookup_us': round(lookup_us, 1),
+        'autocomplete_us': round(complete_us, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark location index vs raw JSON')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--worker', choices=['json', 'index'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_worker(args.worker, args.iterations)))
+        return
+
+    from apps.api.utils.location_index import compile_location_index
+    t0 = time.perf_counter()
+    compile_location_index(SOURCE, TARGET)
+    print(f'Compiled {SOURCE.name} ({SOURCE.stat().st_size // 1024} KB) -> '
+          f'{TARGET.name} ({TARGET.stat().st_size // 1024} KB) in {(time.perf_counter() - t0) * 1000:.0f} ms')
+
+    for variant in ('json', 'index'):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', variant, '--iterations', str(args.iterations)],
+            capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout)
+        print(f"{r['variant']:>6}: load {r['load_ms']:>8} ms | RSS +{r['rss_delta_kb']:>6} KB | "
+              f"barangays {r['barangay_lookup_us']:>7} us | autocomplete {r['autocomplete_us']:>7} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the admin resident directory index.
+
+Creates N synthetic residents (default 200k, spread over the 13 Zambales
+municipalities) in a scratch database, builds the trigram index and reports
+p50/p95 latency for name, typo, email and phone queries, municipality-scoped
+and province-wide.
+
+Usage:
+  python apps/api/scripts/bench_resident_search.py [--users 200000] [--database-url postgresql://...]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+FIRST = ('Juan Maria Jose Ana Mark Angel Christian Joy Michael Grace Paolo Kristine Ramon Liza '
+         'Carlo Jasmine Rafael Andrea Noel Camille Dennis Aileen Rodel Maricel Jerome Princess').split()
+LAST = ('Santos Reyes Cruz Bautista Ocampo Garcia Mendoza Torres Tomas Andrada Castillo Flores '
+        'Villanueva Ramos Castro Rivera Aquino Navarro Salazar Mercado Dela_Cruz Manalo Pascual '
+        'Soriano Ebuen Deocampo Farinas Ablao Ecalnir Fontanilla').replace('_', ' ').split()
+QUERIES = ('santos', 'juan santos', 'santso', 'maricel ecalnir', 'jrome', 'user12345', '0917 555', 'zzzqqq')
+
+
+def _fill(n: int, batch: int = 5000):
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+    rng = random.Random(7)
+    munis = [Municipality(name=f'Town {i}', slug=f'town-{i}', psgc_code=f'0371{i:02d}000') for i in range(1, 14)]
+    db.session.add_all(munis)
+    db.session.commit()
+    muni_ids = [m.id for m in munis]
+    now = datetime.utcnow()
+    rows = []
+    for i in range(n):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        rows.append({
+            'username': f'user{i}', 'email': f'{first.lower()}.{last.lower().replace(" ", "")}{i}@example.com',
+            'password_hash': 'x', 'first_name': first, 'last_name': last,
+            'phone_number': f'0917{rng.randrange(10**7):07d}', 'municipality_id': rng.choice(muni_ids),
+            'role': 'resident', 'admin_verified': True, 'is_active': True, 'created_at': now, 'updated_at': now,
+        })
+        if len(rows) >= batch:
+            db.session.execute(insert(User.__table__), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(User.__table__), rows)
+    db.session.commit()
+    return muni_ids[0]
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark resident directory search')
+    parser.add_argument('--users', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database-url', help='Scratch database URL (tables are dropped!)')
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='munlink-resident-bench-'), 'bench.db')}"
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = url
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        from apps.api.utils.resident_index import rebuild_resident_index, search_residents
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        muni_id = _fill(args.users)
+        print(f'Inserted {args.users} residents in {time.perf_counter() - started:.1f}s')
+        started = time.perf_counter()
+        rebuild_resident_index()
+        print(f'Built trigram index in {time.perf_counter() - started:.1f}s ({db.engine.dialect.name})')
+
+        for q in QUERIES:
+            for label, scope in (('municipality', muni_id), ('province', None)):
+                timings = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    users, total = search_residents(q, municipality_id=scope)
+                    timings.append((time.perf_counter() - t0) * 1000)
+                top = f'{users[0].first_name} {users[0].last_name}' if users else '-'
+                print(f'{q!r:>18} [{label:>12}] matches={total:>4} top={top:<22} '
+                      f'p50={statistics.median(timings):7.2f} ms p95={_percentile(timings, 95):7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for /api/search at ~100k documents.
+
+Fills ``search_documents`` with synthetic announcements/items/issues/benefit
+programs in a scratch database (SQLite temp file by default, or any URL via
+--database-url, e.g. a disposable Postgres) and reports p50/p95 latency of
+``search()`` for queries of varying selectivity.
+
+Usage:
+  python apps/api/scripts/bench_search.py [--docs 100000] [--database-url postgresql://...]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+WORDS = (
+    'road flood drainage barangay clearance rice seeds scholarship fishing boat bicycle '
+    'laptop repair streetlight garbage collection health center vaccine senior citizen '
+    'livelihood training water supply bridge typhoon relief market stall tricycle permit '
+    'beach cleanup festival mango harvest school supplies medical assistance cash aid'
+).split()
+# Long tail of rarer tokens so hit rates resemble real text rather than every doc matching
+FILLER = [f'{w}{n}' for w in ('kal', 'bar', 'tin', 'mos', 'pan') for n in range(1000)]
+TYPES = ('announcement', 'item', 'issue', 'benefit_program')
+QUERIES = ('flood', 'rice seeds', 'scholarship senior', 'street', 'typhoon relief bridge', 'zzzz')
+
+
+def _fill(n: int, batch: int = 5000):
+    from apps.api.models.search import SearchDocument
+    rng = random.Random(42)
+    table = SearchDocument.__table__
+    now = datetime.utcnow()
+    ids = {t: 0 for t in TYPES}
+    rows = []
+    for _ in range(n):
+        t = rng.choice(TYPES)
+        ids[t] += 1
+        rows.append({
+            'entity_type': t,
+            'entity_id': ids[t],
+            'municipality_id': rng.choice([None] + list(range(1, 14))),
+            'title': ' '.join(rng.choices(WORDS, k=2) + rng.choices(FILLER, k=4)).capitalize(),
+            'body': ' '.join(rng.choices(WORDS, k=6) + rng.choices(FILLER, k=40)),
+            'updated_at': now,
+        })
+        if len(rows) >= batch:
+            db.session.execute(insert(table), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(table), rows)
+    db.session.commit()
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark unified search latency')
+    parser.add_argument('--docs', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--database-url', help='Scratch database URL (tables are dropped!)')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='munlink-search-bench-')
+    url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = url
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        from apps.api.utils.search_index import search
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        _fill(args.docs)
+        print(f'Indexed {args.docs} documents in {time.perf_counter() - started:.1f}s ({db.engine.dialect.name})')
+
+        for q in QUERIES:
+            for label, kwargs in (('all', {}), ('muni+type', {'municipality_id': 5, 'types': ['item']})):
+                timings = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    result = search(q, **kwargs)
+                    timings.append((time.perf_counter() - t0) * 1000)
+                print(f'{q!r:>24} [{label:>9}] hits={result["total"]:>6} '
+                      f'p50={statistics.median(timings):7.2f} ms p95={_percentile(timings, 95):7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
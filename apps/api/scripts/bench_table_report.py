@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark tabular PDF exports (generate_table_pdf) by row count.
+
+Builds synthetic rows shaped like the requests export (ID, request number,
+resident, document type, status, created) with a share of long values that
+must be truncated, and reports wall time, rows per second, pages and file
+size for each size. Rows are passed as a generator, as a streaming export
+would.
+
+Also times the text-fitting step alone: ReportLab stringWidth (binary search
+per cell, the previous approach) against the cached FontMetrics tables.
+
+Usage:
+  python apps/api/scripts/bench_table_report.py [--rows 1000 10000 50000]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+HEADERS = ['ID', 'Req No', 'User', 'Type', 'Status', 'Created']
+TYPES = ['Barangay Clearance', 'Certificate of Residency', 'Certificate of Indigency (for Scholarship and Medical Assistance)']
+NAMES = ['Juan Dela Cruz', 'Maria Clara Santos-Villanueva de los Reyes', 'Jose Rizal', 'Ana']
+STATUSES = ['pending', 'processing', 'ready', 'completed']
+
+
+def _rows(count):
+    for i in range(count):
+        yield [i + 1, f'REQ-1-2026-{i + 1:06d}', NAMES[i % len(NAMES)], TYPES[i % len(TYPES)],
+               STATUSES[i % len(STATUSES)], f'2026-10-{1 + i % 28:02d} 09:{i % 60:02d}:00']
+
+
+def _fit_stringwidth(text, max_width, font_name='Helvetica', font_size=9):
+    if stringWidth(text, font_name, font_size) <= max_width:
+        return text
+    low, high, best = 0, len(text), ''
+    while low <= high:
+        mid = (low + high) // 2
+        if stringWidth(text[:mid] + '…', font_name, font_size) <= max_width:
+            best, low = text[:mid] + '…', mid + 1
+        else:
+            high = mid - 1
+    return best or '…'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix='bench_table_report_'))
+
+    class BenchConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp / 'uploads'
+        WATERMARK_CACHE_DIR = tmp / 'watermarks'
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        from apps.api.utils.pdf_table_report import generate_table_pdf
+        from apps.api.utils.text_metrics import font_metrics
+
+        cells = [str(v) for row in _rows(2000) for v in row]
+        metrics = font_metrics('Helvetica')
+        for label, fit in (('stringWidth', _fit_stringwidth),
+                           ('FontMetrics', lambda t, w: metrics.fit(t, w, 9))):
+            t0 = time.perf_counter()
+            for cell in cells:
+                fit(cell, 30 * 2.83465)
+            print(f'fit {label:<12} {(time.perf_counter() - t0) / len(cells) * 1e6:8.2f} us/cell')
+
+        # Warm logo lookup and watermark so the first size is not penalized
+        generate_table_pdf(out_path=tmp / 'warm.pdf', title='Warm-up', municipality_name='Iba',
+                           headers=HEADERS, rows=_rows(10))
+
+        print(f"{'rows':>7} {'seconds':>8} {'rows/s':>9} {'pages':>6} {'MB':>6}")
+        for count in args.rows:
+            out = tmp / f'report-{count}.pdf'
+            t0 = time.perf_counter()
+            generate_table_pdf(out_path=out, title='Requests Report', municipality_name='Iba',
+                               headers=HEADERS, rows=_rows(count))
+            elapsed = time.perf_counter() - t0
+            data = out.read_bytes()
+            pages = data.count(b'/Type /Page\n') + data.count(b'/Type /Page ')
+            print(f'{count:>7} {elapsed:>8.2f} {count / elapsed:>9.0f} {pages:>6} {len(data) / 1e6:>6.2f}')
+            out.unlink()
+    shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the watermark cache used by document PDFs.
+
+Measures the watermark step alone and a full generate_document_pdf() call in
+three states:
+  cold   - memory and disk caches cleared before every PDF (the old behaviour:
+           seal decoded and processed each time)
+  disk   - memory cache cleared, pre-faded PNG on disk (fresh worker)
+  warm   - ready ImageReader in memory
+
+Usage:
+  python apps/api/scripts/bench_watermark.py [--municipality Iba] [--iterations 50]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import io
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def _median_ms(samples):
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--municipality', default='Iba')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix='bench_watermark_'))
+
+    class BenchConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp / 'uploads'
+        WATERMARK_CACHE_DIR = tmp / 'watermarks'
+
+    app = create_app(BenchConfig)
+    municipality = SimpleNamespace(name=args.municipality, id=1)
+    user = SimpleNamespace(first_name='Juan', last_name='Dela Cruz', username='juan')
+    document_type = SimpleNamespace(code='residency', name='Certificate of Residency')
+
+    with app.app_context():
+        from apps.api.utils.pdf_generator import (
+            _draw_watermark, _resolve_logo_paths, clear_watermark_cache, generate_document_pdf,
+        )
+
+        mun_logo, _ = _resolve_logo_paths(args.municipality)
+        if not mun_logo:
+            print(f'No seal found for {args.municipality}')
+            return 1
+        print(f'Seal: {mun_logo}')
+
+        def reset(state):
+            if state == 'cold':
+                clear_watermark_cache(disk=True)
+            elif state == 'disk':
+                clear_watermark_cache()
+
+        def watermark_only():
+            c = canvas.Canvas(io.BytesIO(), pagesize=A4)
+            _draw_watermark(c, mun_logo)
+            c.showPage()
+            c.save()
+
+        def full_pdf(i):
+            req = SimpleNamespace(id=i, municipality=municipality, municipality_id=1,
+                                  delivery_address='Iba, Zambales', purpose='Scholarship',
+                                  created_at=datetime.utcnow())
+            generate_document_pdf(req, document_type, user)
+
+        print(f"{'state':<6} {'watermark page ms':>18} {'full PDF ms':>12}")
+        for state in ('cold', 'disk', 'warm'):
+            clear_watermark_cache(disk=True)
+            watermark_only()  # prime disk + memory, then reset per state below
+            wm, pdf = [], []
+            for i in range(args.iterations):
+                reset(state)
+                t0 = time.perf_counter()
+                watermark_only()
+                wm.append(time.perf_counter() - t0)
+                reset(state)
+                t0 = time.perf_counter()
+                full_pdf(i)
+                pdf.append(time.perf_counter() - t0)
+            print(f'{state:<6} {_median_ms(wm):>18.2f} {_median_ms(pdf):>12.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
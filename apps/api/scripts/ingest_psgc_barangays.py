@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Sync the barangays table with a PSGC publication datafile.
+
+Streams the ``PSGC`` sheet of the PSA datafile in openpyxl read-only mode,
+keeps only the rows of one province (Zambales by default), diffs them against
+the ``barangays`` table and applies the differences as batched bulk
+inserts/updates. Without ``--apply`` nothing is written and a dry-run report
+is printed.
+
+Matching, per municipality (municipalities are matched by name):
+  1. by PSGC code (rows already synced by a previous run)
+  2. by normalized name, ignoring case, accents and "(Pob.)"-style suffixes
+
+Barangays that are no longer in the publication are reported; pass
+``--deactivate-missing`` to set ``is_active = False`` on them (never deleted,
+residents and requests reference them).
+
+Usage:
+  python apps/api/scripts/ingest_psgc_barangays.py                  # dry-run
+  python apps/api/scripts/ingest_psgc_barangays.py --apply
+  python apps/api/scripts/ingest_psgc_barangays.py --file data/PSGC-July-2025-Publication-Datafile.xlsx --province Zambales --apply
+"""
+import os
+import sys
+import re
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from apps.api import db
+from apps.api.models.municipality import Municipality, Barangay
+from apps.api.utils.location_index import normalize_name
+from apps.api.utils.reference_registry import bump_version
+
+
+DEFAULT_FILE = os.path.join(PROJECT_ROOT, 'data', 'PSGC-July-2025-Publication-Datafile.xlsx')
+DEFAULT_SHEET = 'PSGC'
+MUNICIPAL_LEVELS = {'Mun', 'City'}
+COMPARED_FIELDS = ('name', 'psgc_code', 'population', 'is_active')
+
+
+@dataclass
+class PsgcBarangay:
+    psgc_code: str
+    name: str
+    municipality: str
+    population: Optional[int]
+
+
+@dataclass
+class SyncPlan:
+    inserts: List[dict] = field(default_factory=list)
+    updates: List[dict] = field(default_factory=list)
+    deactivations: List[dict] = field(default_factory=list)
+    unchanged: int = 0
+    unknown_municipalities: List[str] = field(default_factory=list)
+    # Human readable lines for the report
+    changes: List[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deactivations)
+
+
+def _clean(value) -> str:
+    return ' '.join(str(value).split()) if value is not None else ''
+
+
+def _match_key(name: str) -> str:
+    """Name key that ignores parenthetical suffixes such as ``(Pob.)``."""
+    return normalize_name(re.sub(r'\([^)]*\)', ' ', name))
+
+
+def make_slug(name: str) -> str:
+    """Same slug convention as ``seed_data.seed_municipalities``."""
+    return name.lower().replace(' ', '-').replace('(', '').replace(')', '').replace('.', '')
+
+
+def iter_province_barangays(path: str, province: str, sheet: str = DEFAULT_SHEET) -> Iterator[PsgcBarangay]:
+    """Stream barangay rows of ``province`` from the PSGC sheet.
+
+    Rows are ordered by code, so reading stops once the province block ends.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet]
+        province_key = normalize_name(province)
+        prefix = None
+        municipality = None
+        rows = ws.iter_rows(min_row=2, values_only=True)
+        for row in rows:
+            if not row or not row[0]:
+                continue
+            code = _clean(row[0]).zfill(10)
+            level = _clean(row[3]) if len(row) > 3 else ''
+            if prefix is None:
+                if level == 'Prov' and normalize_name(_clean(row[1])) == province_key:
+                    prefix = code[:5]
+                continue
+            if not code.startswith(prefix):
+                break
+            name = _clean(row[1])
+            if level in MUNICIPAL_LEVELS:
+                municipality = name
+            elif level == 'Bgy' and municipality:
+                status = _clean(row[10]) if len(row) > 10 else ''
+                if status == 'Pob.' and '(pob' not in name.lower():
+                    name = f'{name} (Pob.)'
+                population = row[8] if len(row) > 8 and isinstance(row[8], (int, float)) else None
+                yield PsgcBarangay(
+                    psgc_code=code,
+                    name=name,
+                    municipality=municipality,
+                    population=int(population) if population is not None else None,
+                )
+    finally:
+        wb.close()
+
+
+def build_plan(records: List[PsgcBarangay], deactivate_missing: bool = False) -> SyncPlan:
+    """Diff ``records`` against the barangays table (read-only)."""
+    plan = SyncPlan()
+    municipalities = {_match_key(m.name): m for m in Municipality.query.all()}
+
+    existing: Dict[int, Dict[str, Barangay]] = {}
+    for b in Barangay.query.all():
+        existing.setdefault(b.municipality_id, {})[b.psgc_code] = b
+
+    seen_ids = set()
+    touched_municipalities = set()
+    by_municipality: Dict[str, List[PsgcBarangay]] = {}
+    for rec in records:
+        by_municipality.setdefault(rec.municipality, []).append(rec)
+
+    for mun_name, recs in by_municipality.items():
+        muni = municipalities.get(_match_key(mun_name))
+        if muni is None:
+            plan.unknown_municipalities.append(mun_name)
+            continue
+        touched_municipalities.add(muni.id)
+        current = existing.get(muni.id, {})
+        by_name = {}
+        for b in current.values():
+            by_name.setdefault(_match_key(b.name), b)
+
+        for rec in recs:
+            row = current.get(rec.psgc_code) or by_name.get(_match_key(rec.name))
+            if row is not None and row.id in seen_ids:
+                row = None  # two PSGC rows with the same name: keep the second as new
+            if row is None:
+                plan.inserts.append({
+                    'name': rec.name,
+                    'slug': make_slug(rec.name),
+                    'municipality_id': muni.id,
+                    'psgc_code': rec.psgc_code,
+                    'population': rec.population,
+                    'is_active': True,
+                })
+                plan.changes.append(f'  + {muni.name}: {rec.name} [{rec.psgc_code}]')
+                continue
+
+            seen_ids.add(row.id)
+            wanted = {
+                'name': rec.name,
+                'psgc_code': rec.psgc_code,
+                'population': rec.population if rec.population is not None else row.population,
+                'is_active': True,
+            }
+            diff = {k: v for k, v in wanted.items() if getattr(row, k) != v}
+            if not diff:
+                plan.unchanged += 1
+                continue
+            if 'name' in diff:
+                diff['slug'] = make_slug(rec.name)
+            plan.updates.append({'id': row.id, **diff})
+            desc = ', '.join(f'{k}: {getattr(row, k)!r} -> {diff[k]!r}' for k in COMPARED_FIELDS if k in diff)
+            plan.changes.append(f'  ~ {muni.name}: {row.name} ({desc})')
+
+    for mid in touched_municipalities:
+        for b in existing.get(mid, {}).values():
+            if b.id in seen_ids or not b.is_active:
+                continue
+            if deactivate_missing:
+                plan.deactivations.append({'id': b.id, 'is_active': False})
+            plan.changes.append(f'  - {b.municipality.name}: {b.name} [{b.psgc_code}] not in publication'
+                                + ('' if deactivate_missing else ' (kept)'))
+    return plan
+
+
+def apply_plan(plan: SyncPlan, batch_size: int = 500) -> None:
+    """Write ``plan`` with bulk statements, committing once per batch."""
+    def batches(items):
+        for i in range(0, len(items), batch_size):
+            yield items[i:i + batch_size]
+
+    try:
+        for chunk in batches(plan.updates + plan.deactivations):
+            db.session.bulk_update_mappings(Barangay, chunk)
+            db.session.commit()
+        for chunk in batches(plan.inserts):
+            db.session.bulk_insert_mappings(Barangay, chunk)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        # Bulk statements bypass the session events that refresh the registry
+        bump_version()
+
+
+def print_report(plan: SyncPlan, total: int, applied: bool, elapsed: float) -> None:
+    mode = 'APPLIED' if applied else 'DRY-RUN'
+    print(f'[{mode}] PSGC rows: {total} | insert: {len(plan.inserts)} | update: {len(plan.updates)} | '
+          f'deactivate: {len(plan.deactivations)} | unchanged: {plan.unchanged} | {elapsed:.2f}s')
+    if plan.unknown_municipalities:
+        print('Municipalities not in database (skipped): ' + ', '.join(sorted(set(plan.unknown_municipalities))))
+    for line in plan.changes:
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync barangays from a PSGC publication datafile')
+    parser.add_argument('--file', default=DEFAULT_FILE, help='Path to the PSGC XLSX datafile')
+    parser.add_argument('--sheet', default=DEFAULT_SHEET, help='Worksheet holding the code list')
+    parser.add_argument('--province', default='Zambales', help='Province to ingest')
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk statement/commit')
+    parser.add_argument('--deactivate-missing', action='store_true',
+                        help='Deactivate barangays that are not in the publication')
+    parser.add_argument('--apply', action='store_true', help='Write changes (default is a dry-run report)')
+    args = parser.parse_args()
+
+    from apps.api.app import create_app
+
+    started = time.perf_counter()
+    records = list(iter_province_barangays(args.file, args.province, sheet=args.sheet))
+    if not records:
+        print(f'ERROR: no barangays found for province {args.province!r} in {args.file}')
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        plan = build_plan(records, deactivate_missing=args.deactivate_missing)
+        if args.apply and not plan.is_empty:
+            apply_plan(plan, batch_size=args.batch_size)
+        print_report(plan, len(records), args.apply, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
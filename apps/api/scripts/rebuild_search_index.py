@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Rebuild the search indexes:
+  - content: unified full-text index (search_documents) over announcements,
+    marketplace items, public issues and benefit programs
+  - residents: admin resident directory trigram index (resident_search_tokens)
+
+Usage:
+  python apps/api/scripts/rebuild_search_index.py [--target all|content|residents] [--batch-size 1000]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import time
+
+from apps.api.app import create_app
+from apps.api.utils.search_index import rebuild_search_index
+from apps.api.utils.resident_index import rebuild_resident_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the search indexes')
+    parser.add_argument('--target', choices=['all', 'content', 'residents'], default='all')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per insert batch')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.target in ('all', 'content'):
+            started = time.perf_counter()
+            counts = rebuild_search_index(batch_size=args.batch_size)
+            summary = ', '.join(f'{k}: {v}' for k, v in counts.items())
+            print(f'Content index rebuilt in {time.perf_counter() - started:.2f}s. '
+                  f'Indexed {sum(counts.values())} documents ({summary})')
+        if args.target in ('all', 'residents'):
+            started = time.perf_counter()
+            users = rebuild_resident_index(batch_size=args.batch_size)
+            print(f'Resident index rebuilt in {time.perf_counter() - started:.2f}s. Indexed {users} users')
+
+
+if __name__ == '__main__':
+    main()
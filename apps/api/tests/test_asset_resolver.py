@@ -0,0 +1,52 @@
+import json
+import os
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils.asset_resolver import AssetResolver, get_asset_resolver
+
+
+def test_json_and_memo_invalidation(tmp_path):
+    resolver = AssetResolver()
+    cfg = tmp_path / 'types.json'
+    assert resolver.json(cfg) == {}
+    cfg.write_text(json.dumps({'a': 1}))
+    first = resolver.json(cfg)
+    assert first == {'a': 1}
+    assert resolver.json(cfg) is first  # parsed once
+    cfg.write_text(json.dumps({'a': 1, 'b': 2}))
+    assert resolver.json(cfg) == {'a': 1, 'b': 2}
+
+    folder = tmp_path / 'seals'
+    folder.mkdir()
+    calls = []
+
+    def scan():
+        calls.append(1)
+        return sorted(p.name for p in folder.glob('*.png'))
+
+    assert resolver.memo('seals', [folder], scan) == []
+    assert resolver.memo('seals', [folder], scan) == []
+    (folder / 'seal.png').write_bytes(b'x')
+    os.utime(folder, ns=(0, os.stat(folder).st_mtime_ns + 10**9))  # coarse-mtime filesystems
+    assert resolver.memo('seals', [folder], scan) == ['seal.png']
+    assert len(calls) == 2
+    assert resolver.first_existing([folder / 'missing.png', folder / 'seal.png']) == folder / 'seal.png'
+
+
+def test_pdf_generator_uses_shared_resolver():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        from apps.api.utils.pdf_generator import (
+            _load_document_types, _resolve_logo_paths, _scan_logo_paths,
+        )
+        from pathlib import Path
+
+        repo_root = Path(app.root_path).parents[1]
+        for name in ('Iba', 'San Felipe', 'Candelaria', 'Nowhere'):
+            expected = _scan_logo_paths(repo_root / 'public' / 'logos' / 'municipalities',
+                                        repo_root / 'public' / 'logos' / 'zambales', name)
+            assert _resolve_logo_paths(name) == expected
+            assert _resolve_logo_paths(name) == expected
+        assert _load_document_types() is _load_document_types()
+        assert get_asset_resolver() is get_asset_resolver(app)
@@ -0,0 +1,192 @@
+import hashlib
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.blob import StoredBlob
+from apps.api.utils.blob_store import CHUNK_SIZE
+from apps.api.utils.file_handler import delete_file, save_issue_attachment, save_marketplace_image
+from apps.api.utils.validators import ValidationError
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 100
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+@pytest.fixture
+def app(tmp_path):
+    class BlobConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+        WATERMARK_CACHE_DIR = tmp_path / 'watermarks'
+
+    app = create_app(BlobConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _upload(data, name='photo.png'):
+    return FileStorage(stream=CountingStream(data), filename=name)
+
+
+def test_identical_uploads_share_one_file(app, tmp_path):
+    first = save_marketplace_image(_upload(PNG), 1, 'iba')
+    second = save_marketplace_image(_upload(PNG, 'copy.png'), 2, 'iba')
+    db.session.commit()
+
+    digest = hashlib.sha256(PNG).hexdigest()
+    assert first == second == f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.png'
+    assert (tmp_path / 'uploads' / first).read_bytes() == PNG
+    assert db.session.get(StoredBlob, digest).ref_count == 2
+    assert not list((tmp_path / 'uploads' / 'blobs' / 'tmp').iterdir())
+
+
+def test_limits_are_enforced_while_streaming(app, tmp_path):
+    big = _upload(b'%PDF-1.4\n' + b'0' * (12 * 1024 * 1024))
+    with pytest.raises(ValidationError):
+        save_issue_attachment(big, 1, 'iba')  # 10 MB limit
+    assert big.stream.bytes_read <= 10 * 1024 * 1024 + CHUNK_SIZE
+
+    disguised = _upload(b'MZ\x90\x00' + b'\x00' * (1024 * 1024), 'photo.png')
+    with pytest.raises(ValidationError):
+        save_marketplace_image(disguised, 1, 'iba')
+    assert disguised.stream.bytes_read == CHUNK_SIZE
+
+    assert not list((tmp_path / 'uploads' / 'blobs' / 'tmp').iterdir())
+    assert db.session.query(StoredBlob).count() == 0
+
+
+def test_last_reference_removes_blob_and_variants_after_commit(app, tmp_path):
+    path = save_marketplace_image(_upload(PNG), 1, 'iba')
+    save_marketplace_image(_upload(PNG), 2, 'iba')
+    db.session.commit()
+    blob = tmp_path / 'uploads' / path
+    variant = blob.with_name(blob.stem + '.thumb.webp')
+    variant.write_bytes(b'RIFF')
+
+    assert delete_file(path)
+    db.session.commit()
+    assert blob.exists()
+
+    assert delete_file(path)
+    db.session.rollback()  # the reference is back, so is nothing deleted
+    assert blob.exists() and db.session.get(StoredBlob, blob.stem).ref_count == 1
+
+    assert delete_file(path)
+    assert blob.exists()  # not before commit
+    db.session.commit()
+    assert not blob.exists() and not variant.exists()
+    assert db.session.get(StoredBlob, blob.stem) is None
+
+    legacy = tmp_path / 'uploads' / 'marketplace' / 'residents' / 'iba' / 'item_1' / '20250101_000000_abcdef12.png'
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(PNG)
+    assert delete_file('marketplace/residents/iba/item_1/20250101_000000_abcdef12.png')
+    assert not legacy.exists()
+
+
+def test_unlinker_and_reupload_of_same_bytes_do_not_lose_the_file(app, tmp_path):
+    from apps.api.utils.blob_store import _unlink_blob
+
+    path = save_marketplace_image(_upload(PNG), 1, 'iba')
+    db.session.commit()
+    blob = tmp_path / 'uploads' / path
+    digest = blob.stem
+
+    # The last reference is dropped, but the unlinker has not run yet (a tombstone row)
+    assert delete_file(path)
+    db.session.info.pop('blob_unlinks')
+    db.session.commit()
+    assert db.session.get(StoredBlob, digest).ref_count == 0
+
+    # Re-uploaded first: the row is revived and the late unlinker leaves the file alone
+    assert save_marketplace_image(_upload(PNG), 2, 'iba') == path
+    db.session.commit()
+    _unlink_blob(digest)
+    assert blob.exists() and db.session.get(StoredBlob, digest).ref_count == 1
+
+    # Unlinked first: the next upload creates the row and stores the file again
+    assert delete_file(path)
+    db.session.info.pop('blob_unlinks')
+    db.session.commit()
+    _unlink_blob(digest)
+    db.session.expire_all()
+    assert not blob.exists() and db.session.get(StoredBlob, digest) is None
+    assert save_marketplace_image(_upload(PNG), 3, 'iba') == path
+    db.session.commit()
+    assert blob.read_bytes() == PNG
+
+
+def test_replaced_and_account_files_are_released(app, tmp_path):
+    from apps.api.models.user import User
+    from apps.api.utils.file_handler import cleanup_user_files, replace_file, save_profile_picture
+
+    user = User(username='res', email='r@example.com', password_hash='x', first_name='R', last_name='S')
+    db.session.add(user)
+    db.session.flush()
+    user.profile_picture = replace_file(user.profile_picture, save_profile_picture(_upload(PNG), user.id, 'iba'))
+    db.session.commit()
+    first = tmp_path / 'uploads' / user.profile_picture
+
+    # Same photo again: still one reference
+    user.profile_picture = replace_file(user.profile_picture, save_profile_picture(_upload(PNG), user.id, 'iba'))
+    db.session.commit()
+    assert db.session.get(StoredBlob, first.stem).ref_count == 1
+
+    # A new photo releases the old one
+    other = PNG + b'\x00'
+    user.profile_picture = replace_file(user.profile_picture, save_profile_picture(_upload(other), user.id, 'iba'))
+    user.valid_id_front = save_issue_attachment(_upload(b'%PDF-1.4 id', 'id.pdf'), 1, 'iba')
+    db.session.commit()
+    assert not first.exists()
+
+    kept = [tmp_path / 'uploads' / user.profile_picture, tmp_path / 'uploads' / user.valid_id_front]
+    cleanup_user_files(user, 'iba')
+    db.session.commit()
+    assert user.profile_picture is None and user.valid_id_front is None
+    assert not any(p.exists() for p in kept)
+    assert db.session.query(StoredBlob).count() == 0
+
+
+def test_bulk_announcement_cleanup_releases_images(app, tmp_path):
+    from flask_jwt_extended import create_access_token
+    from apps.api.models.announcement import Announcement
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+    from apps.api.utils.file_handler import save_announcement_image
+
+    iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+    db.session.add(iba)
+    db.session.flush()
+    admin = User(username='admin', email='a@example.com', password_hash='x', first_name='A', last_name='D',
+                 role='municipal_admin', admin_municipality_id=iba.id)
+    db.session.add(admin)
+    db.session.flush()
+    for n in range(2):
+        ann = Announcement(title=f'Notice {n}', content='x', municipality_id=iba.id, created_by=admin.id)
+        db.session.add(ann)
+        db.session.flush()
+        ann.images = [save_announcement_image(_upload(PNG + bytes([n])), ann.id, 'iba')]
+    db.session.commit()
+    files = [tmp_path / 'uploads' / a.images[0] for a in Announcement.query.all()]
+    assert all(p.exists() for p in files)
+    token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+
+    resp = app.test_client().post('/api/admin/cleanup', headers={'Authorization': f'Bearer {token}'},
+                                  json={'entity': 'announcements', 'confirm': 'DELETE'})
+    assert resp.status_code == 200 and resp.get_json()['deleted_count'] == 2
+    assert not any(p.exists() for p in files)
+    assert db.session.query(StoredBlob).count() == 0
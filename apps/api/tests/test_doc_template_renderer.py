@@ -0,0 +1,71 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip('docxtpl')
+
+import jinja2
+from docx import Document
+from docxtpl import DocxTemplate
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils.doc_template_renderer import get_docx_template
+
+
+def _render(compiled, context):
+    doc = compiled.new_document()
+    doc.render(context)
+    out = io.BytesIO()
+    doc.save(out)
+    return '\n'.join(p.text for p in Document(io.BytesIO(out.getvalue())).paragraphs)
+
+
+def test_docx_template_is_compiled_once_and_revalidated(tmp_path, monkeypatch):
+    template = tmp_path / 'residency.docx'
+    source = Document()
+    source.add_paragraph('Issued to {{ name|upper }} [{{ nickname|upper }}] on {{ day|date_long }}')
+    source.add_paragraph('Fee: {{ fee|currency }}')
+    source.save(template)
+
+    calls = {'patch': 0, 'compile': 0}
+    real_patch, real_compile = DocxTemplate.patch_xml, jinja2.Environment.from_string
+
+    def counting_patch(self, src_xml):
+        calls['patch'] += 1
+        return real_patch(self, src_xml)
+
+    def counting_compile(self, *args, **kwargs):
+        calls['compile'] += 1
+        return real_compile(self, *args, **kwargs)
+
+    monkeypatch.setattr(DocxTemplate, 'patch_xml', counting_patch)
+    monkeypatch.setattr(jinja2.Environment, 'from_string', counting_compile)
+    context = {'name': 'Juan', 'nickname': None, 'day': '2026-10-19', 'fee': 1250}
+
+    class TemplateConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+
+    app = create_app(TemplateConfig)
+    with app.app_context():
+        compiled = get_docx_template(template)
+        text = _render(compiled, context)
+        # The module's filters reach the template (built-in upper would print "NONE")
+        assert 'Issued to JUAN [] on October 19, 2026' in text
+        assert 'Fee: ₱1,250.00' in text
+        first = dict(calls)
+        assert first['patch'] and first['compile']
+
+        # Second render: same entry, no patching or compilation
+        assert get_docx_template(template) is compiled
+        assert _render(compiled, dict(context, name='Maria')).startswith('Issued to MARIA')
+        assert calls == first
+
+        # Touching the file invalidates the entry
+        stat = template.stat()
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        fresh = get_docx_template(template)
+        assert fresh is not compiled
+        _render(fresh, context)
+        assert calls['patch'] > first['patch'] and calls['compile'] > first['compile']
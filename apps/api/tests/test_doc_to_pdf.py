@@ -0,0 +1,108 @@
+import sys
+import textwrap
+import time
+
+import pytest
+
+from apps.api.utils.doc_to_pdf import ConverterPool, DEFAULTS
+
+
+# Stands in for `soffice --convert-to pdf --outdir DIR FILE...`: logs each
+# invocation, writes one PDF per input and hangs on inputs containing HANG.
+FAKE_SOFFICE = textwrap.dedent('''\
+    #!{python}
+    import pathlib, sys, time
+    args = sys.argv[1:]
+    out = pathlib.Path(args[args.index('--outdir') + 1])
+    inputs = [a for a in args if a.endswith('.docx')]
+    with open({log!r}, 'a') as log:
+        log.write(' '.join(pathlib.Path(i).name for i in inputs) + '\\n')
+    out.mkdir(parents=True, exist_ok=True)
+    time.sleep(0.2)
+    for i in inputs:
+        if b'HANG' in pathlib.Path(i).read_bytes():
+            time.sleep(60)
+        (out / (pathlib.Path(i).stem + '.pdf')).write_bytes(b'%PDF-1.4 fake')
+''')
+
+
+@pytest.fixture
+def fake_soffice(tmp_path, monkeypatch):
+    monkeypatch.setattr('apps.api.utils.doc_to_pdf._uno_available', lambda: False)
+    log = tmp_path / 'calls.log'
+    script = tmp_path / 'soffice'
+    script.write_text(FAKE_SOFFICE.format(python=sys.executable, log=str(log)))
+    script.chmod(0o755)
+    return str(script), log
+
+
+def _pool(binary, tmp_path, **overrides):
+    settings = dict(DEFAULTS, SOFFICE_PROFILE_DIR=str(tmp_path / 'profiles'), **overrides)
+    return ConverterPool(binary, settings)
+
+
+def test_queued_files_are_converted_in_batches(tmp_path, fake_soffice):
+    binary, log = fake_soffice
+    pool = _pool(binary, tmp_path, SOFFICE_POOL_SIZE=1, SOFFICE_BATCH_SIZE=4)
+    try:
+        inputs = []
+        for i in range(6):
+            # Same file name in different folders must not collide
+            src = tmp_path / f'in{i}' / 'request.docx'
+            src.parent.mkdir()
+            src.write_bytes(b'docx')
+            inputs.append(src)
+        futures = [pool.submit(src, tmp_path / 'out' / f'{i}.pdf') for i, src in enumerate(inputs)]
+        results = [f.result(timeout=30) for f in futures]
+    finally:
+        pool.shutdown()
+    assert all(p.read_bytes().startswith(b'%PDF') for p in results)
+    calls = log.read_text().splitlines()
+    assert len(calls) < 6 and max(len(c.split()) for c in calls) > 1
+
+
+def test_hung_conversion_times_out_without_failing_the_batch(tmp_path, fake_soffice):
+    binary, _log = fake_soffice
+    pool = _pool(binary, tmp_path, SOFFICE_POOL_SIZE=1, SOFFICE_BATCH_SIZE=8, SOFFICE_TIMEOUT=1)
+    try:
+        (tmp_path / 'slow.docx').write_bytes(b'docx')  # occupies the slot while the batch queues up
+        (tmp_path / 'hang.docx').write_bytes(b'HANG')
+        for name in ('a', 'b'):
+            (tmp_path / f'{name}.docx').write_bytes(b'docx')
+        first = pool.submit(tmp_path / 'slow.docx', tmp_path / 'out' / 'slow.pdf')
+        hang = pool.submit(tmp_path / 'hang.docx', tmp_path / 'out' / 'hang.pdf')
+        a = pool.submit(tmp_path / 'a.docx', tmp_path / 'out' / 'a.pdf')
+        b = pool.submit(tmp_path / 'b.docx', tmp_path / 'out' / 'b.pdf')
+        started = time.monotonic()
+        assert first.result(timeout=30).exists()
+        assert a.result(timeout=30).exists() and b.result(timeout=30).exists()
+        with pytest.raises(TimeoutError):
+            hang.result(timeout=30)
+        assert time.monotonic() - started < 15
+    finally:
+        pool.shutdown()
+
+
+def test_convert_withdraws_a_file_still_queued_at_timeout(tmp_path, fake_soffice):
+    import os
+
+    binary, _log = fake_soffice
+    pool = _pool(binary, tmp_path, SOFFICE_POOL_SIZE=1, SOFFICE_BATCH_SIZE=1, SOFFICE_TIMEOUT=0.5,
+                 SOFFICE_STARTUP_TIMEOUT=0)
+    # Each gunicorn worker gets its own profiles under the configured root
+    assert pool.profile_root == tmp_path / 'profiles' / f'munlink-soffice-{os.getpid()}'
+    try:
+        busy = []
+        for i in range(4):  # each holds the only slot until its timeout
+            (tmp_path / f'hang{i}.docx').write_bytes(b'HANG')
+            busy.append(pool.submit(tmp_path / f'hang{i}.docx', tmp_path / 'out' / f'hang{i}.pdf'))
+        (tmp_path / 'late.docx').write_bytes(b'docx')
+        with pytest.raises(TimeoutError):
+            pool.convert(tmp_path / 'late.docx', tmp_path / 'out' / 'late.pdf')
+        for f in busy:
+            with pytest.raises(TimeoutError):
+                f.result(timeout=30)
+        time.sleep(0.5)
+    finally:
+        pool.shutdown()
+    assert not (tmp_path / 'out' / 'late.pdf').exists()
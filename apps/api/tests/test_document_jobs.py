@@ -0,0 +1,323 @@
+import time
+
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _setup(app):
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+    from apps.api.models.document import DocumentType, DocumentRequest
+
+    with app.app_context():
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        dt = DocumentType(name='Certificate of Residency', code='residency', authority_level='municipal',
+                          supports_digital=True, fee=0)
+        db.session.add_all([iba, dt])
+        db.session.flush()
+        resident = User(username='res', email='r@example.com', password_hash='x', first_name='Juan',
+                        last_name='Dela Cruz', municipality_id=iba.id)
+        admin = User(username='admin', email='a@example.com', password_hash='x', first_name='A', last_name='D',
+                     role='municipal_admin', admin_municipality_id=iba.id)
+        db.session.add_all([resident, admin])
+        db.session.flush()
+        req = DocumentRequest(request_number='REQ-1-2026-000001', user_id=resident.id, document_type_id=dt.id,
+                              municipality_id=iba.id, delivery_method='digital', purpose='Scholarship',
+                              status='processing')
+        db.session.add(req)
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+        return req.id, {'Authorization': f'Bearer {token}'}
+
+
+def _poll(client, headers, job_id, timeout=90):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        body = client.get(f'/api/admin/documents/jobs/{job_id}', headers=headers).get_json()
+        if body['job']['status'] in ('succeeded', 'failed'):
+            return body
+        time.sleep(0.1)
+    raise AssertionError('job did not finish')
+
+
+def _file_config(tmp_path, executor):
+    class JobConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "jobs.db"}'
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+        WATERMARK_CACHE_DIR = tmp_path / 'watermarks'
+        DOCUMENT_JOB_EXECUTOR = executor
+        DOCUMENT_JOB_RETRY_DELAY = 0.05
+    return JobConfig
+
+
+def test_generate_pdf_inline_job_sets_document_and_audit(tmp_path):
+    class InlineConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+        WATERMARK_CACHE_DIR = tmp_path / 'watermarks'
+
+    app = create_app(InlineConfig)
+    client = app.test_client()
+    request_id, headers = _setup(app)
+
+    resp = client.post(f'/api/admin/documents/requests/{request_id}/generate-pdf', headers=headers)
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert body['job']['status'] == 'succeeded'
+    assert body['url'].endswith('.pdf')
+
+    with app.app_context():
+        from apps.api.models.audit import AuditLog
+        from apps.api.models.document import DocumentRequest
+        req = db.session.get(DocumentRequest, request_id)
+        assert req.status == 'ready' and req.document_file == body['job']['result_file']
+        assert AuditLog.query.filter_by(entity_id=request_id, action='generate_pdf').count() == 1
+    assert _poll(client, headers, body['job']['id'])['url'] == body['url']
+
+
+def test_thread_pool_job_retries_after_failure(tmp_path, monkeypatch):
+    from apps.api.utils import pdf_generator
+
+    real = pdf_generator.generate_document_pdf
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError('disk hiccup')
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_generator, 'generate_document_pdf', flaky)
+    app = create_app(_file_config(tmp_path, 'thread'))
+    client = app.test_client()
+    request_id, headers = _setup(app)
+
+    resp = client.post(f'/api/admin/documents/requests/{request_id}/generate-pdf', headers=headers)
+    assert resp.status_code == 202
+    job_id = resp.get_json()['job']['id']
+    done = _poll(client, headers, job_id)
+    assert done['job']['status'] == 'succeeded'
+    assert done['job']['attempts'] == 2
+    assert done['request']['document_file'] == done['job']['result_file']
+
+
+def test_process_pool_job(tmp_path):
+    from apps.api.utils.document_jobs import shutdown_document_jobs
+
+    app = create_app(_file_config(tmp_path, 'process'))
+    client = app.test_client()
+    request_id, headers = _setup(app)
+    try:
+        job = client.post(f'/api/admin/documents/requests/{request_id}/generate-pdf', headers=headers).get_json()['job']
+        assert job['status'] in ('queued', 'running')
+        # A second click while in flight returns the same job
+        again = client.post(f'/api/admin/documents/requests/{request_id}/generate-pdf', headers=headers).get_json()
+        assert again['job']['id'] == job['id']
+        done = _poll(client, headers, job['id'])
+        assert done['job']['status'] == 'succeeded'
+        assert (tmp_path / 'uploads' / done['job']['result_file']).exists()
+    finally:
+        shutdown_document_jobs(app)
+
+
+def _add_requests(app, count, **overrides):
+    from apps.api.models.document import DocumentRequest
+
+    with app.app_context():
+        first = db.session.get(DocumentRequest, 1)
+        base = DocumentRequest.query.count() + 1
+        ids = []
+        for i in range(count):
+            fields = dict(user_id=first.user_id, document_type_id=first.document_type_id,
+                          municipality_id=first.municipality_id, delivery_method='digital',
+                          purpose='Employment', status='processing')
+            fields.update(overrides)
+            req = DocumentRequest(request_number=f'REQ-1-2026-{base + i:06d}', **fields)
+            db.session.add(req)
+            db.session.flush()
+            ids.append(req.id)
+        db.session.commit()
+        return ids
+
+
+def test_generate_batch_inline_with_merge(tmp_path):
+    class InlineConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+        WATERMARK_CACHE_DIR = tmp_path / 'watermarks'
+
+    app = create_app(InlineConfig)
+    client = app.test_client()
+    first_id, headers = _setup(app)
+    more = _add_requests(app, 3)
+    pickup = _add_requests(app, 1, delivery_method='physical')
+
+    order = [more[2], first_id, more[0], pickup[0], 9999, more[1]]
+    resp = client.post('/api/admin/documents/requests/generate-batch', headers=headers,
+                       json={'request_ids': order, 'merge': True})
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert body['batch']['status'] == 'completed'
+    assert [d['request_id'] for d in body['documents']] == [more[2], first_id, more[0], more[1]]
+    assert [d['page'] for d in body['documents']] == [1, 2, 3, 4]
+    assert body['counts'] == {'succeeded': 4}
+    assert {s['request_id'] for s in body['batch']['skipped']} == {pickup[0], 9999}
+
+    # The merged PDF is the manifest's files concatenated, not a second rendering
+    from apps.api.utils.pdf_merge import concat_pdfs
+    merged = (tmp_path / 'uploads' / body['batch']['merged_file']).read_bytes()
+    stored = [(tmp_path / 'uploads' / d['file']).read_bytes() for d in body['documents']]
+    assert merged == b''.join(concat_pdfs(stored))
+    assert merged.count(b'/Type /Page\n') == 4
+    manifest = client.get(f"/api/admin/documents/batches/{body['batch']['id']}", headers=headers).get_json()
+    assert manifest['documents'] == body['documents']
+    assert manifest['batch']['manifest_url'].endswith('.json')
+
+    # Filter form: nothing is left in "processing" after generation
+    resp = client.post('/api/admin/documents/requests/generate-batch', headers=headers,
+                       json={'filter': {'status': 'processing'}})
+    assert resp.get_json()['documents'] == []
+
+    # Malformed input is a 400, and a string is not iterated digit by digit
+    for payload in ({'request_ids': str(first_id)}, {'request_ids': ['x']},
+                    {'filter': {'document_type_id': 'abc'}}, {'filter': {'status': ['processing']}}):
+        resp = client.post('/api/admin/documents/requests/generate-batch', headers=headers, json=payload)
+        assert resp.status_code == 400, payload
+
+
+def test_generate_batch_process_pool(tmp_path):
+    from apps.api.utils.document_jobs import shutdown_document_jobs
+
+    app = create_app(_file_config(tmp_path, 'process'))
+    client = app.test_client()
+    first_id, headers = _setup(app)
+    ids = [first_id] + _add_requests(app, 5)
+    try:
+        resp = client.post('/api/admin/documents/requests/generate-batch', headers=headers,
+                           json={'filter': {'status': 'processing'}, 'merge': True})
+        assert resp.status_code == 202
+        batch_id = resp.get_json()['batch']['id']
+        deadline = time.time() + 90
+        while True:
+            body = client.get(f'/api/admin/documents/batches/{batch_id}', headers=headers).get_json()
+            if body['batch']['status'] in ('completed', 'failed') or time.time() > deadline:
+                break
+            time.sleep(0.1)
+        assert body['batch']['status'] == 'completed'
+        assert [d['request_id'] for d in body['documents']] == ids
+        assert all(d['status'] == 'succeeded' for d in body['documents'])
+        assert (tmp_path / 'uploads' / body['batch']['merged_file']).exists()
+    finally:
+        shutdown_document_jobs(app)
+
+
+def test_unchanged_request_reuses_pdf_and_verify_checks_hash(tmp_path):
+    class InlineConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+        WATERMARK_CACHE_DIR = tmp_path / 'watermarks'
+
+    app = create_app(InlineConfig)
+    client = app.test_client()
+    request_id, headers = _setup(app)
+    url = f'/api/admin/documents/requests/{request_id}/generate-pdf'
+
+    first = client.post(url, headers=headers).get_json()
+    pdf = tmp_path / 'uploads' / first['job']['result_file']
+    stamp = pdf.stat().st_mtime_ns
+    second = client.post(url, headers=headers).get_json()
+    assert second['job']['status'] == 'succeeded' and second['job']['attempts'] == 0
+    assert pdf.stat().st_mtime_ns == stamp
+    stored_hash = second['request']['document_input_hash']
+    assert len(stored_hash) == 64
+
+    verify = client.get('/api/documents/verify/REQ-1-2026-000001').get_json()
+    assert verify['valid'] and verify['integrity'] == 'intact'
+
+    # A layout bump re-renders on the next generate, but issued documents stay intact
+    from apps.api.utils import pdf_generator
+    layout = pdf_generator.PDF_LAYOUT_VERSION
+    pdf_generator.PDF_LAYOUT_VERSION = layout + 1
+    try:
+        assert client.get('/api/documents/verify/REQ-1-2026-000001').get_json()['integrity'] == 'intact'
+    finally:
+        pdf_generator.PDF_LAYOUT_VERSION = layout
+
+    # Editing the content changes the hash: verify reports it, and generate renders again
+    with app.app_context():
+        from apps.api.models.document import DocumentRequest
+        req = db.session.get(DocumentRequest, request_id)
+        req.admin_edited_content = {'purpose': 'Travel abroad'}
+        db.session.commit()
+    assert client.get('/api/documents/verify/REQ-1-2026-000001').get_json()['integrity'] == 'changed'
+    third = client.post(url, headers=headers).get_json()
+    assert third['job']['attempts'] == 1
+    assert third['request']['document_input_hash'] != stored_hash
+    assert client.get('/api/documents/verify/REQ-1-2026-000001').get_json()['integrity'] == 'intact'
+
+
+def test_stale_job_is_recovered_once_and_rendered_once(tmp_path, monkeypatch):
+    from concurrent.futures import Future
+    from datetime import datetime, timedelta
+    from apps.api.models.audit import AuditLog
+    from apps.api.models.document import DocumentJob
+    from apps.api.utils import document_jobs, pdf_generator
+
+    app = create_app(_file_config(tmp_path, 'inline'))
+    request_id, _headers = _setup(app)
+    created = datetime(2026, 10, 1, 8, 0)
+    with app.app_context():
+        job = DocumentJob(request_id=request_id, municipality_id=1, kind='pdf', status='queued',
+                          created_at=created, updated_at=datetime.utcnow() - timedelta(hours=1))
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    # Two workers poll the stale job and both read it before either acts
+    real_submit = document_jobs._submit
+    submitted = []
+    monkeypatch.setattr(document_jobs, '_submit', lambda app, job_id, attempts=0: submitted.append(attempts))
+    with app.app_context():
+        seen_by_other_worker = db.session.get(DocumentJob, job_id)
+        with app.app_context():
+            document_jobs.get_document_job(job_id)
+        document_jobs._recover_if_stale(app, seen_by_other_worker)
+    assert submitted == [0]
+
+    # The first submission was only waiting in a busy pool: it runs after the resubmitted one
+    renders = []
+    real_generate = pdf_generator.generate_document_pdf
+    monkeypatch.setattr(pdf_generator, 'generate_document_pdf',
+                        lambda *args, **kwargs: renders.append(1) or real_generate(*args, **kwargs))
+    with app.app_context():
+        real_submit(app, job_id, 0)
+        real_submit(app, job_id, 0)
+        job = db.session.get(DocumentJob, job_id)
+        assert (job.status, job.attempts, job.created_at) == ('succeeded', 1, created)
+        assert len(renders) == 1
+
+        # A late result of an attempt that is no longer current is dropped
+        late = Future()
+        late.set_result((job.result_file, None, None))
+        document_jobs._on_done(app, job_id, 1, late)
+        assert AuditLog.query.filter_by(entity_id=request_id, action='generate_pdf').count() == 1
+
+
+def test_audit_failure_does_not_undo_completion(tmp_path, monkeypatch):
+    from apps.api.models.document import DocumentJob, DocumentRequest
+    from apps.api.utils import document_jobs
+
+    def broken_audit(**kwargs):
+        raise RuntimeError('audit insert failed')
+
+    monkeypatch.setattr(document_jobs, 'log_action', broken_audit)
+    app = create_app(_file_config(tmp_path, 'inline'))
+    client = app.test_client()
+    request_id, headers = _setup(app)
+
+    job = client.post(f'/api/admin/documents/requests/{request_id}/generate-pdf', headers=headers).get_json()['job']
+    with app.app_context():
+        assert db.session.get(DocumentJob, job['id']).status == 'succeeded'
+        req = db.session.get(DocumentRequest, request_id)
+        assert req.status == 'ready' and req.document_file == job['result_file']
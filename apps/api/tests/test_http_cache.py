@@ -0,0 +1,52 @@
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _make_app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_document_types_conditional_get():
+    app = _make_app()
+    client = app.test_client()
+
+    first = client.get('/api/documents/types')
+    assert first.status_code == 200
+    etag = first.headers.get('ETag')
+    assert etag
+    assert 'max-age' in first.headers.get('Cache-Control', '')
+
+    again = client.get('/api/documents/types', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers.get('ETag') == etag
+
+
+def test_etag_changes_when_data_changes():
+    app = _make_app()
+    client = app.test_client()
+
+    etag = client.get('/api/issues/categories').headers.get('ETag')
+
+    with app.app_context():
+        from apps.api.models.issue import IssueCategory
+        db.session.add(IssueCategory(name='Roads', slug='roads'))
+        db.session.commit()
+
+    resp = client.get('/api/issues/categories', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers.get('ETag') != etag
+    assert resp.get_json()['count'] == 1
+
+    # In-place edits invalidate too (the table has no updated_at)
+    etag = resp.headers.get('ETag')
+    with app.app_context():
+        from apps.api.models.issue import IssueCategory
+        IssueCategory.query.filter_by(slug='roads').update({'name': 'Roads & Bridges'})
+        db.session.commit()
+    resp = client.get('/api/issues/categories', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.get_json()['categories'][0]['name'] == 'Roads & Bridges'
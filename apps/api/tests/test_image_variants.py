@@ -0,0 +1,107 @@
+import io
+
+from flask_jwt_extended import create_access_token
+from PIL import Image
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.utils.image_variants import build_variants, dropped_images, image_fields, retain_images
+
+
+def _photo(size=(2400, 1200), orientation=6):
+    """A camera-style JPEG: landscape pixels, EXIF says rotate 90 degrees, with make/GPS tags."""
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010F] = 'PhoneMaker'
+    exif[0x8825] = {1: 'N', 2: (15.0, 20.0, 0.0)}
+    out = io.BytesIO()
+    Image.new('RGB', size, (200, 120, 40)).save(out, 'JPEG', exif=exif)
+    return out.getvalue()
+
+
+def _config(tmp_path):
+    class ImageConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+        WATERMARK_CACHE_DIR = tmp_path / 'watermarks'
+    return ImageConfig
+
+
+def test_build_variants_orients_resizes_and_strips_metadata(tmp_path):
+    app = create_app(_config(tmp_path))
+    src = tmp_path / 'uploads' / 'marketplace' / 'iba' / 'item_1' / 'photo.jpg'
+    src.parent.mkdir(parents=True)
+    src.write_bytes(_photo())
+
+    with app.app_context():
+        entry = build_variants('marketplace/iba/item_1/photo.jpg')
+
+    assert (entry['width'], entry['height']) == (1200, 2400)  # EXIF rotation applied
+    sizes = {name: (v['width'], v['height']) for name, v in entry['variants'].items()}
+    assert sizes == {'full': (800, 1600), 'card': (400, 800), 'thumb': (160, 320)}
+    for v in entry['variants'].values():
+        for key, fmt in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            with Image.open(tmp_path / 'uploads' / v[key]) as im:
+                assert im.format == fmt and im.size == (v['width'], v['height'])
+                assert not im.getexif() and 'exif' not in im.info
+
+    fields = image_fields([entry, 'marketplace/iba/item_1/old.png'], include_originals=True)
+    assert fields['images'] == [entry['variants']['full']['webp'], 'marketplace/iba/item_1/old.png']
+    assert fields['thumbnails'] == [entry['variants']['thumb']['webp'], 'marketplace/iba/item_1/old.png']
+    assert [v['path'] for v in fields['image_variants']] == [entry['path'], 'marketplace/iba/item_1/old.png']
+
+    # Public payloads never point at an original (EXIF/GPS intact)
+    fields = image_fields([entry, 'marketplace/iba/item_1/old.png'])
+    assert fields['images'] == [entry['variants']['full']['webp']]
+    assert fields['image_variants'] == [{k: v for k, v in entry.items() if k != 'path'}]
+
+    # Clients send back the paths they were shown; entries survive edits and reordering,
+    # paths that were never uploaded to this row are ignored
+    stored = [entry, 'a.png', 'a.png']
+    kept = retain_images(stored, ['b.png', 'a.png', entry['variants']['full']['webp'], entry['path']])
+    assert kept == ['a.png', entry]
+    assert dropped_images(stored, kept) == ['a.png']
+
+
+def test_upload_records_variants_and_lists_thumbnails(tmp_path):
+    from apps.api.models.announcement import Announcement
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+
+    app = create_app(_config(tmp_path))
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        db.session.add(iba)
+        db.session.flush()
+        admin = User(username='admin', email='a@example.com', password_hash='x', first_name='A', last_name='D',
+                     role='municipal_admin', admin_municipality_id=iba.id)
+        db.session.add(admin)
+        db.session.flush()
+        ann = Announcement(title='Clean-up drive', content='Saturday', municipality_id=iba.id,
+                           created_by=admin.id, images=[])
+        db.session.add(ann)
+        db.session.commit()
+        ann_id = ann.id
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    resp = client.post(f'/api/admin/announcements/{ann_id}/upload', headers=headers,
+                       data={'file': (io.BytesIO(_photo()), 'photo.jpg')}, content_type='multipart/form-data')
+    assert resp.status_code == 200
+    original = resp.get_json()['path']
+
+    listed = client.get('/api/announcements').get_json()['announcements'][0]
+    assert listed['thumbnails'][0].endswith('.thumb.webp')
+    assert listed['images'][0].endswith('.full.webp')
+    assert 'path' not in listed['image_variants'][0] and original not in str(listed)
+    admin_view = client.get('/api/admin/announcements', headers=headers).get_json()['announcements'][0]
+    assert admin_view['image_variants'][0]['path'] == original
+
+    # Saving the list the client was shown keeps the variant entry
+    resp = client.put(f'/api/admin/announcements/{ann_id}', headers=headers, json={'images': listed['images']})
+    assert resp.status_code == 200
+    with app.app_context():
+        stored = db.session.get(Announcement, ann_id).images
+    assert stored[0]['path'] == original and stored[0]['variants']['thumb']['width'] == 160
@@ -0,0 +1,88 @@
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.utils.geo import haversine_m, neighbors, precision_for_radius
+from apps.api.utils.issue_dedup import estimate_jaccard, signature
+
+
+def test_signature_similarity_and_geo_helpers():
+    a = signature('Malaking pothole sa Rizal Street malapit sa school')
+    b = signature('Pothole sa Rizal St malapit sa school, malaki')
+    c = signature('Walang kuryente sa buong purok 3 simula kagabi')
+    assert estimate_jaccard(a, a) == 1.0
+    assert estimate_jaccard(a, b) > estimate_jaccard(a, c)
+    assert estimate_jaccard(a, c) < 0.2
+
+    precision = precision_for_radius(100, 15.33)
+    assert 5 <= precision <= 7
+    assert len(neighbors('wdw5yq')) == 9
+    assert 100 < haversine_m(15.3275, 119.9783, 15.3285, 119.9783) < 120
+
+
+def test_duplicate_reports_link_to_canonical_issue():
+    app = create_app(TestingConfig)
+    client = app.test_client()
+    with app.app_context():
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        from apps.api.models.issue import IssueCategory
+
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        roads = IssueCategory(name='Roads', slug='roads')
+        power = IssueCategory(name='Power', slug='power')
+        db.session.add_all([iba, roads, power])
+        db.session.flush()
+        residents = [
+            User(username=f'res{i}', email=f'r{i}@example.com', password_hash='x', first_name='R',
+                 last_name=f'S{i}', role='resident', admin_verified=True, municipality_id=iba.id)
+            for i in range(4)
+        ]
+        admin = User(username='admin', email='a@example.com', password_hash='x', first_name='A', last_name='D',
+                     role='municipal_admin', admin_municipality_id=iba.id)
+        db.session.add_all(residents + [admin])
+        db.session.commit()
+        tokens = [create_access_token(identity=str(u.id), additional_claims={'role': 'resident'}) for u in residents]
+        admin_token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+        roads_id, power_id = roads.id, power.id
+
+    def report(token, category_id, title, lat, lng, description='Malalim na butas sa kalsada malapit sa school'):
+        return client.post('/api/issues', headers={'Authorization': f'Bearer {token}'}, json={
+            'category_id': category_id, 'title': title, 'description': description,
+            'specific_location': 'Rizal St', 'latitude': lat, 'longitude': lng,
+        }).get_json()
+
+    first = report(tokens[0], roads_id, 'Pothole sa Rizal Street', 15.32750, 119.97830)
+    assert 'duplicate_of' not in first
+    canonical_id = first['issue']['id']
+
+    # ~40 m away, reworded: linked to the first report
+    second = report(tokens[1], roads_id, 'Malaking pothole Rizal St', 15.32785, 119.97840)
+    assert second['duplicate_of']['id'] == canonical_id
+    # Same text but another category, and same category but ~1 km away: not duplicates
+    assert 'duplicate_of' not in report(tokens[2], power_id, 'Pothole sa Rizal Street', 15.32750, 119.97830)
+    assert 'duplicate_of' not in report(tokens[3], roads_id, 'Pothole sa Rizal Street', 15.33650, 119.97830)
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    listing = client.get('/api/admin/issues', headers=headers).get_json()
+    ids = {i['id']: i for i in listing['issues']}
+    assert second['issue']['id'] not in ids
+    assert ids[canonical_id]['duplicate_count'] == 1
+    everything = client.get('/api/admin/issues?include_duplicates=true', headers=headers).get_json()
+    assert len(everything['issues']) == 4
+
+    # Triage once: the duplicate follows the canonical issue's status
+    resp = client.put(f'/api/admin/issues/{canonical_id}/status', headers=headers, json={'status': 'under_review'})
+    assert resp.status_code == 200
+    detail = client.get(f'/api/admin/issues/{canonical_id}', headers=headers).get_json()
+    assert [d['id'] for d in detail['duplicates']] == [second['issue']['id']]
+    dup = client.get(f'/api/admin/issues/{second["issue"]["id"]}', headers=headers).get_json()
+    assert dup['status'] == 'under_review'
+
+    # Manual unlink
+    resp = client.put(f'/api/admin/issues/{second["issue"]["id"]}/duplicate', headers=headers,
+                      json={'duplicate_of': None})
+    assert resp.status_code == 200
+    assert resp.get_json()['issue']['duplicate_of_id'] is None
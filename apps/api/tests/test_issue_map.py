@@ -0,0 +1,54 @@
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.utils.geo import encode, decode_bounds, cover_bbox
+
+
+def test_geohash_roundtrip_and_cover():
+    gh = encode(15.3275, 119.9783)  # Iba
+    s, w, n, e = decode_bounds(gh)
+    assert s <= 15.3275 <= n and w <= 119.9783 <= e
+    cover = cover_bbox(14.8, 119.8, 15.8, 120.4)
+    assert 0 < len(cover) <= 32
+    assert any(gh.startswith(p) for p in cover)
+
+
+def test_issues_map_clusters_and_points():
+    app = create_app(TestingConfig)
+    client = app.test_client()
+    with app.app_context():
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        from apps.api.models.issue import Issue, IssueCategory
+
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        cat = IssueCategory(name='Roads', slug='roads')
+        db.session.add_all([iba, cat])
+        db.session.flush()
+        user = User(username='res', email='r@example.com', password_hash='x', first_name='R', last_name='S',
+                    municipality_id=iba.id)
+        db.session.add(user)
+        db.session.flush()
+        coords = [(15.3275, 119.9783), (15.3280, 119.9790), (15.2000, 120.0500), (16.5000, 121.0000), (None, None)]
+        for i, (lat, lng) in enumerate(coords):
+            db.session.add(Issue(issue_number=f'ISS-{i}', user_id=user.id, category_id=cat.id, title=f'Pothole {i}',
+                                 description='d', municipality_id=iba.id, latitude=lat, longitude=lng))
+        db.session.commit()
+        assert Issue.query.filter(Issue.geohash.isnot(None)).count() == 4
+
+        moved = Issue.query.filter_by(issue_number='ISS-2').one()
+        moved.latitude = 15.3277
+        db.session.commit()
+        assert moved.geohash == encode(15.3277, 120.05)
+
+    bbox = '119.8,14.8,120.4,15.8'
+    clusters = client.get(f'/api/issues/map?bbox={bbox}&zoom=9').get_json()
+    assert clusters['mode'] == 'clusters'
+    assert clusters['total'] == 3  # the Isabela-area point is outside the box
+
+    points = client.get('/api/issues/map?bbox=119.97,15.32,119.98,15.33&zoom=16').get_json()
+    assert points['mode'] == 'points'
+    assert sorted(p['title'] for p in points['issues']) == ['Pothole 0', 'Pothole 1']
+
+    assert client.get('/api/issues/map?bbox=1,2,3').status_code == 400
@@ -0,0 +1,69 @@
+import json
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils.location_index import compile_location_index, open_location_index
+
+LOCATIONS = {
+    'Zambales': {
+        'Iba': ['Zone 1 Pob.', 'Bangantalinga'],
+        'San Marcelino': ['Aglao'],
+        'San Narciso': ['Alusiis'],
+    },
+    'Abra': {'Bangued': ['Bañacao']},
+}
+
+
+def test_location_index_lookups_and_autocomplete(tmp_path):
+    source = tmp_path / 'locations.json'
+    source.write_text(json.dumps(LOCATIONS), encoding='utf-8')
+    target = tmp_path / 'locations.sqlite'
+
+    idx = open_location_index(source, target)
+    assert idx.provinces() == ['Abra', 'Zambales']
+    assert idx.municipalities('zambales') == ['Iba', 'San Marcelino', 'San Narciso']
+    assert idx.barangays('Zambales', 'IBA') == ['Bangantalinga', 'Zone 1 Pob.']
+    assert idx.barangays('Zambales', 'Nowhere') == []
+    assert idx.has_barangay('Abra', 'Bangued', 'banacao')
+
+    towns = idx.autocomplete('san ', kind='municipality', province='Zambales')
+    assert [t['name'] for t in towns] == ['San Marcelino', 'San Narciso']
+    hits = idx.autocomplete('ban')
+    assert {(h['type'], h['name']) for h in hits} == {
+        ('municipality', 'Bangued'), ('barangay', 'Bangantalinga'), ('barangay', 'Bañacao'),
+    }
+
+    # Unchanged source does not trigger a rebuild
+    mtime = target.stat().st_mtime_ns
+    open_location_index(source, target)
+    assert target.stat().st_mtime_ns == mtime
+    compile_location_index(source, target)
+    assert target.exists()
+
+
+def test_location_endpoints_use_the_index(tmp_path):
+    source = tmp_path / 'locations.json'
+    source.write_text(json.dumps(LOCATIONS), encoding='utf-8')
+
+    class LocationConfig(TestingConfig):
+        LOCATION_DATA_FILE = source
+        LOCATION_INDEX_FILE = tmp_path / 'locations.sqlite'
+
+    client = create_app(LocationConfig).test_client()
+
+    assert client.get('/api/locations/provinces').get_json()['provinces'] == ['Abra', 'Zambales']
+    resp = client.get('/api/locations/provinces/zambales/municipalities')
+    assert resp.get_json()['municipalities'] == ['Iba', 'San Marcelino', 'San Narciso']
+    assert client.get('/api/locations/provinces/zambales/municipalities', headers={
+        'If-None-Match': resp.headers['ETag']}).status_code == 304
+    assert (tmp_path / 'locations.sqlite').exists()
+
+    resp = client.get('/api/locations/provinces/Zambales/municipalities/iba/barangays')
+    assert resp.get_json()['barangays'] == ['Bangantalinga', 'Zone 1 Pob.']
+    assert client.get('/api/locations/provinces/Zambales/municipalities/Nowhere/barangays').status_code == 404
+
+    resp = client.get('/api/locations/autocomplete?q=san&type=municipality&province=Zambales&limit=1')
+    assert resp.get_json()['results'] == [
+        {'type': 'municipality', 'name': 'San Marcelino', 'province': 'Zambales', 'municipality': None}]
+    assert client.get('/api/locations/autocomplete?q=ban&type=street').status_code == 400
+    assert client.get('/api/locations/autocomplete').status_code == 400
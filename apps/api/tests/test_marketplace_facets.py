@@ -0,0 +1,44 @@
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def test_item_list_with_facets():
+    app = create_app(TestingConfig)
+    client = app.test_client()
+    with app.app_context():
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        from apps.api.models.marketplace import Item
+
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        db.session.add(iba)
+        db.session.flush()
+        seller = User(username='seller', email='s@example.com', password_hash='x', first_name='S', last_name='T',
+                      municipality_id=iba.id)
+        db.session.add(seller)
+        db.session.flush()
+        specs = [
+            ('electronics', 'sell', 'good', 'available'),
+            ('electronics', 'lend', 'new', 'available'),
+            ('furniture', 'donate', 'good', 'available'),
+            ('furniture', 'sell', 'fair', 'pending'),
+        ]
+        for i, (category, tx, cond, status) in enumerate(specs):
+            db.session.add(Item(user_id=seller.id, title=f'Item {i}', description='d', category=category,
+                                condition=cond, transaction_type=tx, municipality_id=iba.id, status=status))
+        db.session.commit()
+        iba_id = iba.id
+
+    resp = client.get(f'/api/marketplace/items?municipality_id={iba_id}&category=electronics&facets=true')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['total'] == 2
+    # Facets reflect the municipality/status scope, not the category selection
+    assert data['facets'] == {
+        'category': {'electronics': 2, 'furniture': 1},
+        'transaction_type': {'sell': 1, 'lend': 1, 'donate': 1},
+        'condition': {'good': 2, 'new': 1},
+    }
+    assert 'facets' not in client.get('/api/marketplace/items').get_json()
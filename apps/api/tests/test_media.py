@@ -0,0 +1,93 @@
+import io
+import os
+
+from PIL import Image
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils.media_cache import MediaCache
+
+
+def _app(tmp_path, **overrides):
+    logos = tmp_path / 'logos'
+    attrs = dict(
+        UPLOAD_FOLDER=tmp_path / 'uploads',
+        WATERMARK_CACHE_DIR=tmp_path / 'watermarks',
+        MEDIA_CACHE_DIR=tmp_path / 'media-cache',
+        MEDIA_PUBLIC_DIRS={'logos': logos},
+        MEDIA_SIZES=(64, 128, 320),
+    )
+    attrs.update(overrides)
+    (tmp_path / 'uploads').mkdir(exist_ok=True)
+    logos.mkdir(exist_ok=True)
+    return create_app(type('MediaConfig', (TestingConfig,), attrs))
+
+
+def _derivatives(tmp_path):
+    return sorted(p for p in (tmp_path / 'media-cache').glob('*/*'))
+
+
+def test_resizes_converts_and_caches(tmp_path):
+    app = _app(tmp_path)
+    Image.new('RGBA', (1080, 540), (20, 80, 160, 255)).save(tmp_path / 'logos' / 'seal.png')
+    client = app.test_client()
+
+    resp = client.get('/media/logos/seal.png?w=128&fmt=webp')
+    assert resp.status_code == 200 and resp.mimetype == 'image/webp'
+    assert 'immutable' in resp.headers['Cache-Control'] and 'max-age=31536000' in resp.headers['Cache-Control']
+    with Image.open(io.BytesIO(resp.get_data())) as im:
+        assert im.format == 'WEBP' and im.size == (128, 64)
+    etag = resp.headers['ETag']
+    resp.close()
+    assert len(_derivatives(tmp_path)) == 1
+
+    # Same request: served from disk, revalidates with the ETag
+    resp = client.get('/media/logos/seal.png?w=128&fmt=webp', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert len(_derivatives(tmp_path)) == 1
+
+    # No fmt keeps the source format; h only bounds the height
+    resp = client.get('/media/logos/seal.png?h=64')
+    with Image.open(io.BytesIO(resp.get_data())) as im:
+        assert resp.mimetype == 'image/png' and im.size == (128, 64)
+    resp.close()
+
+    # A replaced source gets a new derivative
+    Image.new('RGB', (640, 640), (255, 255, 255)).save(tmp_path / 'logos' / 'seal.png')
+    os.utime(tmp_path / 'logos' / 'seal.png', ns=(1, 10**18))
+    resp = client.get('/media/logos/seal.png?w=128&fmt=webp')
+    assert resp.headers['ETag'] != etag
+    with Image.open(io.BytesIO(resp.get_data())) as im:
+        assert im.size == (128, 128)
+    resp.close()
+
+
+def test_rejects_unlisted_sizes_and_paths_outside_roots(tmp_path):
+    app = _app(tmp_path)
+    Image.new('RGB', (200, 100)).save(tmp_path / 'uploads' / 'photo.jpg')
+    (tmp_path / 'secret.png').write_bytes(b'x')
+    (tmp_path / 'uploads' / 'notes.txt').write_text('hello')
+    client = app.test_client()
+
+    assert client.get('/media/photo.jpg?w=100').status_code == 400
+    assert client.get('/media/photo.jpg?w=64&fmt=tiff').status_code == 400
+    assert client.get('/media/notes.txt?w=64').status_code == 400
+    assert client.get('/media/../secret.png?w=64').status_code == 404
+    assert client.get('/media/logos/../../secret.png?w=64').status_code == 404
+    assert client.get('/media/missing.jpg?w=64').status_code == 404
+    resp = client.get('/media/photo.jpg?w=320')  # never enlarged
+    with Image.open(io.BytesIO(resp.get_data())) as im:
+        assert im.size == (200, 100)
+    resp.close()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = MediaCache(tmp_path / 'cache', max_bytes=1000)
+    for i, key in enumerate(['aa' * 32, 'bb' * 32, 'cc' * 32]):
+        path = cache.put(key, 'png', b'x' * 300)
+        os.utime(path, (1000 + i, 1000 + i))
+    os.utime(cache.path('aa' * 32, 'png'), None)  # 'aa' used recently
+    cache.put('dd' * 32, 'png', b'x' * 300)  # 1200 bytes > 1000: evict down to 800
+
+    left = {p.stem[:2] for p in (tmp_path / 'cache').glob('*/*')}
+    assert left == {'aa', 'dd'}
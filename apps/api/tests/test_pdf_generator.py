@@ -11,6 +11,7 @@ def test_generate_document_pdf(tmp_path):
     # Override uploads to a temp dir for test isolation
     app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
     (app.config['UPLOAD_FOLDER']).mkdir(parents=True, exist_ok=True)
+    app.config['WATERMARK_CACHE_DIR'] = tmp_path / 'watermarks'
 
     # Build minimal fake objects
     municipality = SimpleNamespace(name='Iba', id=1)
@@ -35,3 +36,43 @@ def test_generate_document_pdf(tmp_path):
         assert isinstance(rel_path, str) and rel_path.endswith('.pdf')
 
 
+def test_watermark_cache_hit_and_miss(tmp_path, monkeypatch):
+    from PIL import Image
+    from apps.api.utils import pdf_generator
+
+    app = create_app()
+    app.config['WATERMARK_CACHE_DIR'] = tmp_path / 'watermarks'
+    logo = tmp_path / 'seal.png'
+    seal = Image.new('RGB', (2000, 1000), (255, 255, 255))
+    seal.paste((30, 60, 120), (500, 250, 1500, 750))
+    seal.save(logo)
+
+    with app.app_context():
+        pdf_generator.clear_watermark_cache(disk=True)
+        first = pdf_generator._watermark_reader(logo, 0.25)
+        # Miss: the faded seal is written once, downscaled and with a transparent background
+        cached, = (tmp_path / 'watermarks').glob('*.png')
+        with Image.open(cached) as im:
+            assert im.size == (800, 400)
+            assert im.getpixel((0, 0))[3] == 0 and im.getpixel((400, 200))[3] == round(255 * 0.25)
+        assert pdf_generator._watermark_reader(logo, 0.25) is first  # memory hit
+
+        # A fresh worker loads the PNG from disk instead of processing the seal again
+        pdf_generator.clear_watermark_cache()
+
+        def no_processing(*args):
+            raise AssertionError('seal processed again')
+        monkeypatch.setattr(pdf_generator, '_fade_watermark', no_processing)
+        from_disk = pdf_generator._watermark_reader(logo, 0.25)
+        assert from_disk is not first and pdf_generator._watermark_reader(logo, 0.25) is from_disk
+
+        # A new opacity or a replaced logo is a miss
+        monkeypatch.undo()
+        pdf_generator._watermark_reader(logo, 0.5)
+        stat = logo.stat()
+        os.utime(logo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert pdf_generator._watermark_reader(logo, 0.25) is not from_disk
+        assert len(list((tmp_path / 'watermarks').glob('*.png'))) == 3
+
+        pdf_generator.clear_watermark_cache(disk=True)
+        assert not list((tmp_path / 'watermarks').glob('*.png'))
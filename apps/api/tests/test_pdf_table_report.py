@@ -0,0 +1,55 @@
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils.text_metrics import font_metrics
+
+
+SAMPLES = ['', 'Juan Dela Cruz', 'REQ-1-2026-000042', 'Peñafrancia', 'ünïcödé ✓ ☃ Ω', 'x' * 120]
+
+
+def _fit_by_search(text, max_width, font_name, size):
+    """The previous stringWidth binary search, as the reference."""
+    if stringWidth(text, font_name, size) <= max_width:
+        return text
+    low, high, best = 0, len(text), ''
+    while low <= high:
+        mid = (low + high) // 2
+        if stringWidth(text[:mid] + '…', font_name, size) <= max_width:
+            best, low = text[:mid] + '…', mid + 1
+        else:
+            high = mid - 1
+    return best or '…'
+
+
+def test_widths_and_fit_match_reportlab():
+    for font_name in ('Helvetica', 'Helvetica-Bold', 'Times-Roman'):
+        metrics = font_metrics(font_name)
+        assert font_metrics(font_name) is metrics
+        for text in SAMPLES:
+            assert abs(metrics.width(text, 9) - stringWidth(text, font_name, 9)) < 1e-6
+            for max_width in (2, 20, 55, 300):
+                assert metrics.fit(text, max_width, 9) == _fit_by_search(text, max_width, font_name, 9)
+
+
+def test_generate_table_pdf_streams_rows(tmp_path):
+    from apps.api.utils.pdf_table_report import generate_table_pdf
+
+    class ReportConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+        WATERMARK_CACHE_DIR = tmp_path / 'watermarks'
+
+    consumed = []
+
+    def rows():
+        for i in range(200):
+            consumed.append(i)
+            yield [i, f'Resident {i}', 'Certificate of Indigency (for Scholarship and Medical Assistance)', 'ready']
+
+    app = create_app(ReportConfig)
+    with app.app_context():
+        out = generate_table_pdf(out_path=tmp_path / 'report.pdf', title='Requests', municipality_name='Iba',
+                                 headers=['ID', 'Name', 'Type', 'Status'], rows=rows())
+    data = out.read_bytes()
+    assert len(consumed) == 200
+    assert data.startswith(b'%PDF') and data.count(b'/Type /Page\n') + data.count(b'/Type /Page ') == 8
@@ -0,0 +1,144 @@
+import io
+import re
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.utils.pdf_merge import PdfConcatenator, PdfMergeError, _Source, _refs, concat_pdfs
+
+
+def _pdf(label, pages=1):
+    seal = ImageReader(Image.new('RGBA', (40, 40), (30, 60, 150, 128)))
+    out = io.BytesIO()
+    c = canvas.Canvas(out, pagesize=A4)
+    for page in range(pages):
+        c.setFont('Times-Roman', 12)
+        c.drawString(100, 700, f'{label} page {page} (not a ref: 1 0 R)')
+        c.drawImage(seal, 50, 50, mask='auto')
+        c.showPage()
+    c.save()
+    return out.getvalue()
+
+
+def _reachable(source):
+    seen, stack = set(), list(source.pages())
+    while stack:
+        num = stack.pop()
+        if num not in seen:
+            seen.add(num)
+            stack.extend(_refs(source.object(num)[0]))
+    return seen
+
+
+def test_concat_copies_pages_in_order_and_shares_identical_objects():
+    sources = [_pdf('first'), _pdf('second', pages=2), _pdf('third')]
+    merged = b''.join(concat_pdfs(sources))
+
+    out = _Source(merged)
+    pages = out.pages()
+    assert len(pages) == 4
+    contents = [int(re.search(rb'/Contents (\d+) 0 R', out.object(p)[0]).group(1)) for p in pages]
+    assert len(set(contents)) == 4 and all(out.object(n)[1] for n in contents)
+    assert _reachable(out) <= set(out.offsets)
+    # seal image + soft mask and the font are embedded once, not per document
+    assert merged.count(b'/Subtype /Image') == 2
+    assert merged.count(b'/BaseFont /Times-Roman') == 1
+    assert len(merged) < sum(len(s) for s in sources)
+
+
+def test_unreadable_source_leaves_output_unchanged():
+    out = PdfConcatenator()
+    first = out.append(_pdf('ok'))
+    try:
+        out.append(b'%PDF-1.5 not really a pdf')
+    except PdfMergeError:
+        pass
+    else:
+        raise AssertionError('expected PdfMergeError')
+    merged = first + out.append(_pdf('ok again')) + out.finish()
+    assert len(_Source(merged).pages()) == 2
+
+
+def _setup(app):
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+    from apps.api.models.document import DocumentType, DocumentRequest
+
+    with app.app_context():
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        dt = DocumentType(name='Certificate of Residency', code='residency', authority_level='municipal',
+                          supports_digital=True, fee=0)
+        db.session.add_all([iba, dt])
+        db.session.flush()
+        resident = User(username='res', email='r@example.com', password_hash='x', first_name='Juan',
+                        last_name='Dela Cruz', municipality_id=iba.id)
+        admin = User(username='admin', email='a@example.com', password_hash='x', first_name='A', last_name='D',
+                     role='municipal_admin', admin_municipality_id=iba.id)
+        db.session.add_all([resident, admin])
+        db.session.flush()
+        reqs = [
+            DocumentRequest(request_number=f'REQ-1-2026-00000{i}', user_id=resident.id, document_type_id=dt.id,
+                            municipality_id=iba.id, delivery_method=method, purpose='Scholarship',
+                            status=status, ready_at=datetime.utcnow(),
+                            qr_data={'token': 'tok', 'code_masked': 'AB**-**34'} if method == 'pickup' else None)
+            for i, (method, status) in enumerate([('digital', 'ready'), ('pickup', 'ready'), ('digital', 'processing')], 1)
+        ]
+        db.session.add_all(reqs)
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+        return [r.id for r in reqs], {'Authorization': f'Bearer {token}'}
+
+
+def test_print_batch_streams_documents_and_tickets(tmp_path, monkeypatch):
+    from apps.api.utils import pdf_generator, print_batch
+
+    class PrintConfig(TestingConfig):
+        UPLOAD_FOLDER = tmp_path / 'uploads'
+        WATERMARK_CACHE_DIR = tmp_path / 'watermarks'
+
+    app = create_app(PrintConfig)
+    client = app.test_client()
+    (digital, pickup, processing), headers = _setup(app)
+
+    # Generate the digital document first; the batch must copy it, not draw it again
+    assert client.post(f'/api/admin/documents/requests/{digital}/generate-pdf', headers=headers).status_code == 202
+    with app.app_context():
+        from apps.api.models.document import DocumentRequest
+        db.session.get(DocumentRequest, digital).status = 'ready'
+        db.session.commit()
+
+    rendered = []
+    real = pdf_generator.document_pdf_bytes
+
+    def tracking(req, *args, **kwargs):
+        rendered.append(req.id)
+        return real(req, *args, **kwargs)
+
+    monkeypatch.setattr(print_batch, 'document_pdf_bytes', tracking)
+    monkeypatch.setattr(print_batch, 'generate_document_pdf', None)  # nothing is missing or stale
+
+    resp = client.post('/api/admin/documents/requests/print-batch', headers=headers,
+                       json={'request_ids': [pickup, digital, processing, 999]})
+    assert resp.status_code == 200
+    assert resp.is_streamed and resp.mimetype == 'application/pdf'
+    assert resp.headers['X-Skipped-Requests'] == f'{processing},999'
+    merged = resp.get_data()
+    assert len(_Source(merged).pages()) == 4  # (document + ticket) x 2
+    assert rendered == [pickup]  # pickup documents are drawn in memory; the digital file was reused
+
+    resp = client.post('/api/admin/documents/requests/print-batch', headers=headers,
+                       json={'request_ids': [processing]})
+    assert resp.status_code == 400 and resp.get_json()['skipped'][0]['request_id'] == processing
+
+    # A string is not iterated digit by digit
+    resp = client.post('/api/admin/documents/requests/print-batch', headers=headers,
+                       json={'request_ids': str(digital)})
+    assert resp.status_code == 400 and 'list of integers' in resp.get_json()['error']
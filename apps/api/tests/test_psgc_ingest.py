@@ -0,0 +1,68 @@
+from openpyxl import Workbook
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _write_datafile(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'PSGC'
+    ws.append(['10-digit PSGC', 'Name', 'Correspondence Code', 'Geographic Level', 'Old names',
+               'City Class', 'Income', 'Urban / Rural', '2020 Population', None, 'Status'])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def test_psgc_ingest_dry_run_apply_and_rerun(tmp_path):
+    from apps.api.scripts.ingest_psgc_barangays import iter_province_barangays, build_plan, apply_plan
+
+    datafile = tmp_path / 'psgc.xlsx'
+    _write_datafile(datafile, [
+        ['0306900000', 'Tarlac', None, 'Prov', None, None, None, None, 1, None, None],
+        ['0306901001', 'Elsewhere', None, 'Bgy', None, None, None, None, 1, None, None],
+        ['0307100000', 'Zambales', None, 'Prov', None, None, None, None, 1, None, None],
+        ['0307105000', 'Iba ', None, 'Mun', None, None, None, None, 1, None, 'Capital'],
+        ['0307105001', 'Amungan', None, 'Bgy', None, None, None, 'R', 500, None, None],
+        ['0307105002', 'Zone 1 ', None, 'Bgy', None, None, None, 'U', 900, None, 'Pob.'],
+        ['0307105003', 'Bangantalinga', None, 'Bgy', None, None, None, 'R', 300, None, None],
+        ['0330000000', 'Next Province', None, 'Prov', None, None, None, None, 1, None, None],
+    ])
+
+    records = list(iter_province_barangays(str(datafile), 'Zambales'))
+    assert [(r.municipality, r.name) for r in records] == [
+        ('Iba', 'Amungan'), ('Iba', 'Zone 1 (Pob.)'), ('Iba', 'Bangantalinga'),
+    ]
+
+    app = create_app(TestingConfig)
+    with app.app_context():
+        from apps.api.models.municipality import Municipality, Barangay
+
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        db.session.add(iba)
+        db.session.flush()
+        db.session.add_all([
+            Barangay(name='Amungan', slug='amungan', municipality_id=iba.id, psgc_code='037107000001'),
+            Barangay(name='Zone 1 (Pob.)', slug='zone-1-pob', municipality_id=iba.id, psgc_code='037107000002'),
+            Barangay(name='Bano', slug='bano', municipality_id=iba.id, psgc_code='037107000003'),
+        ])
+        db.session.commit()
+
+        plan = build_plan(records, deactivate_missing=True)
+        assert len(plan.inserts) == 1 and plan.inserts[0]['name'] == 'Bangantalinga'
+        assert {u['psgc_code'] for u in plan.updates} == {'0307105001', '0307105002'}
+        assert len(plan.deactivations) == 1
+        # Dry run wrote nothing
+        assert Barangay.query.count() == 3
+
+        apply_plan(plan, batch_size=1)
+        assert Barangay.query.filter_by(psgc_code='0307105002').one().population == 900
+        assert Barangay.query.filter_by(name='Bano').one().is_active is False
+        assert Barangay.query.count() == 4
+
+        rerun = build_plan(records, deactivate_missing=True)
+        assert rerun.is_empty
+        assert rerun.unchanged == 3
@@ -0,0 +1,41 @@
+import io
+
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from apps.api.utils.qr_service import draw_qr, qr_data_uri, qr_matrix, qr_png_bytes, qr_png_io, qr_svg
+
+
+PAYLOAD = 'http://localhost:5173/verify/REQ-1-2026-000042'
+
+
+def test_outputs_share_one_cached_matrix():
+    qr_matrix.cache_clear()
+    matrix = qr_matrix(PAYLOAD, 'H', 4)
+    n = len(matrix)
+    assert n == len(matrix[0]) and matrix[4][4] and not matrix[0][0]  # finder corner inside the quiet zone
+
+    png = qr_png_bytes(PAYLOAD, box_size=10)
+    assert qr_png_bytes(PAYLOAD, box_size=10) is png
+    with Image.open(qr_png_io(PAYLOAD)) as img:
+        assert img.size == (n * 10, n * 10)
+        assert img.getpixel((45, 45)) == 0 and img.getpixel((5, 5)) == 255
+    assert qr_data_uri(PAYLOAD, 120).startswith('data:image/png;base64,')
+
+    svg = qr_svg(PAYLOAD)
+    assert svg.startswith('<svg') and f'viewBox="0 0 {n} {n}"' in svg
+    info = qr_matrix.cache_info()
+    assert info.misses == 1 and info.hits >= 2
+
+
+def test_draw_qr_on_canvas_is_vector():
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    c.setPageCompression(0)
+    draw_qr(c, PAYLOAD, 100, 100, 99)
+    c.showPage()
+    c.save()
+    pdf = buf.getvalue()
+    assert b'/Subtype /Image' not in pdf
+    assert pdf.count(b' re') > 20
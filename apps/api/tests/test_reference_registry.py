@@ -0,0 +1,58 @@
+import pytest
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def test_registry_indexes_and_invalidation():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        from apps.api.models.municipality import Municipality, Barangay
+        from apps.api.utils.reference_registry import get_registry
+
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        db.session.add(iba)
+        db.session.flush()
+        db.session.add(Barangay(name='Zone 1', slug='zone-1', municipality_id=iba.id, psgc_code='037107001'))
+        db.session.commit()
+
+        registry = get_registry()
+        muni = registry.municipality_by_slug('iba')
+        assert muni is registry.municipality(iba.id) is registry.municipality_by_psgc('037107000')
+        assert [b.name for b in registry.barangays_of(iba.id)] == ['Zone 1']
+        assert muni.to_dict() == Municipality.query.get(iba.id).to_dict()
+        with pytest.raises(AttributeError):
+            muni.name = 'Changed'
+
+        # Committing a reference edit bumps the version
+        iba.description = 'Capital'
+        db.session.commit()
+        refreshed = get_registry()
+        assert refreshed is not registry
+        assert refreshed.municipality(iba.id).description == 'Capital'
+
+
+def test_other_workers_see_issue_category_edits():
+    class NoTTLConfig(TestingConfig):
+        REFERENCE_REGISTRY_TTL = 0
+
+    app = create_app(NoTTLConfig)
+    with app.app_context():
+        from sqlalchemy import update
+        from apps.api.models.issue import IssueCategory
+        from apps.api.utils.reference_registry import get_registry
+
+        db.create_all()
+        db.session.add(IssueCategory(name='Roads', slug='roads'))
+        db.session.commit()
+        registry = get_registry()
+
+        # A Core update stands in for a commit made by another worker: no ORM
+        # event reaches this process, only the fingerprint can notice it
+        db.session.execute(update(IssueCategory).values(is_active=False))
+        db.session.commit()
+        refreshed = get_registry()
+        assert refreshed is not registry
+        assert refreshed.issue_category_by_slug('roads').is_active is False
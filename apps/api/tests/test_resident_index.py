@@ -0,0 +1,55 @@
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def test_resident_search_is_ranked_scoped_and_fresh():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        from apps.api.utils.resident_index import search_residents
+
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+        subic = Municipality(name='Subic', slug='subic', psgc_code='037114000')
+        db.session.add_all([iba, subic])
+        db.session.flush()
+
+        def resident(username, first, last, muni, **kw):
+            return User(username=username, email=f'{username}@example.com', password_hash='x',
+                        first_name=first, last_name=last, municipality_id=muni.id, role='resident', **kw)
+
+        ana = resident('ana.santos', 'Ana', 'Santos', iba, phone_number='+63 917 123 4567')
+        mariana = resident('mariana', 'Mariana', 'Reyes', iba)
+        other = resident('ana.subic', 'Ana', 'Santos', subic)
+        db.session.add_all([ana, mariana, other])
+        db.session.commit()
+
+        users, total = search_residents('ana', municipality_id=iba.id)
+        assert [u.id for u in users] == [ana.id, mariana.id]
+        assert total == 2
+
+        # Typo tolerance and phone lookup
+        assert search_residents('santso', municipality_id=iba.id)[0][0].id == ana.id
+        assert search_residents('09171234567', municipality_id=iba.id)[0][0].id == ana.id
+
+        # Extra filters apply on top of the index
+        assert search_residents('mariana', municipality_id=iba.id, filters=[User.admin_verified == True])[1] == 0
+
+        # ...before the candidate cap: inactive namesakes cannot crowd out the real match
+        from apps.api.utils import resident_index
+        db.session.add_all([resident(f'ana{i}', 'Ana', 'Santos', iba, is_active=False) for i in range(5)])
+        db.session.commit()
+        cap, resident_index.CANDIDATE_LIMIT = resident_index.CANDIDATE_LIMIT, 2
+        try:
+            users, total = search_residents('ana santos', municipality_id=iba.id, filters=[User.is_active == True])
+        finally:
+            resident_index.CANDIDATE_LIMIT = cap
+        assert [u.id for u in users] == [ana.id] and total == 1
+
+        # Profile updates re-index immediately
+        mariana.last_name = 'Dela Cruz'
+        db.session.commit()
+        assert search_residents('dela cruz', municipality_id=iba.id)[0][0].id == mariana.id
+        assert search_residents('reyes', municipality_id=iba.id)[1] == 0
@@ -0,0 +1,78 @@
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _make_app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _seed():
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+    from apps.api.models.announcement import Announcement
+    from apps.api.models.benefit import BenefitProgram
+
+    iba = Municipality(name='Iba', slug='iba', psgc_code='037107000')
+    db.session.add(iba)
+    db.session.flush()
+    user = User(username='staff', email='staff@example.com', password_hash='x', first_name='Ana', last_name='Cruz',
+                role='municipal_admin')
+    db.session.add(user)
+    db.session.flush()
+    ann = Announcement(title='Flood advisory', content='Roads near the river are closed.',
+                       municipality_id=iba.id, created_by=user.id)
+    hidden = Announcement(title='Old flood notice', content='Archived', municipality_id=iba.id,
+                          created_by=user.id, is_active=False)
+    program = BenefitProgram(name='Rice seed subsidy', code='RICE-1', description='Free seeds after the flood.',
+                             program_type='livelihood')
+    db.session.add_all([ann, hidden, program])
+    db.session.commit()
+    return iba, ann, program
+
+
+def test_search_ranks_filters_and_facets():
+    app = _make_app()
+    client = app.test_client()
+    with app.app_context():
+        iba, ann, program = _seed()
+        iba_id, ann_id = iba.id, ann.id
+
+    resp = client.get('/api/search?q=flood')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['total'] == 2
+    # Title match outranks body match
+    assert (data['results'][0]['type'], data['results'][0]['id']) == ('announcement', ann_id)
+    assert data['facets']['type'] == {'announcement': 1, 'benefit_program': 1}
+    assert data['facets']['municipality'] == {str(iba_id): 1, 'province': 1}
+
+    data = client.get(f'/api/search?q=flo&type=benefit_program&municipality_id={iba_id}').get_json()
+    assert [r['type'] for r in data['results']] == ['benefit_program']
+    # Type facet ignores the type filter
+    assert data['facets']['type'] == {'announcement': 1, 'benefit_program': 1}
+
+    assert client.get('/api/search?q=f').status_code == 400
+    assert client.get('/api/search?q=flood&type=users').status_code == 400
+
+
+def test_search_index_follows_model_changes():
+    app = _make_app()
+    with app.app_context():
+        from apps.api.utils.search_index import search, rebuild_search_index
+
+        _, ann, program = _seed()
+        ann.title = 'Road closure'
+        program.is_active = False
+        db.session.commit()
+        assert search('flood')['total'] == 0
+        assert search('closure')['results'][0]['id'] == ann.id
+
+        db.session.delete(ann)
+        db.session.commit()
+        assert search('closure')['total'] == 0
+
+        assert rebuild_search_index() == {'announcement': 0, 'item': 0, 'issue': 0, 'benefit_program': 0}
@@ -0,0 +1,88 @@
+import threading
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.utils.sequences import local_year, next_reference
+
+
+CREATORS = 64
+
+
+def _app(tmp_path, block_size):
+    class SequenceConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "sequences.db"}'
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+        REFERENCE_BLOCK_SIZE = block_size
+
+    app = create_app(SequenceConfig)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _allocate_concurrently(apps, municipality_ids):
+    barrier = threading.Barrier(len(municipality_ids))
+    numbers, errors = [], []
+
+    def creator(app, municipality_id):
+        with app.app_context():
+            try:
+                barrier.wait()
+                numbers.append(next_reference('ISS', municipality_id, year=2026))
+                db.session.commit()
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+
+    threads = [threading.Thread(target=creator, args=(apps[i % len(apps)], m)) for i, m in enumerate(municipality_ids)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    return numbers
+
+
+def test_reference_numbers_format_and_rollback(tmp_path):
+    app = _app(tmp_path, block_size=1)
+    with app.app_context():
+        assert next_reference('REQ', 3, year=2026) == 'REQ-3-2026-000001'
+        db.session.commit()
+        assert next_reference('REQ', 3, year=2026) == 'REQ-3-2026-000002'
+        db.session.rollback()  # the request failed: its number is handed out again
+        assert next_reference('REQ', 3, year=2026) == 'REQ-3-2026-000002'
+        assert next_reference('REQ', 4, year=2026) == 'REQ-4-2026-000001'
+        assert next_reference('APP', None, year=2027) == 'APP-0-2027-000001'
+        db.session.commit()
+
+
+def test_parallel_creators_get_unique_gapless_numbers(tmp_path):
+    app = _app(tmp_path, block_size=1)
+    numbers = _allocate_concurrently([app], [1 + i % 2 for i in range(CREATORS)])
+    assert len(set(numbers)) == CREATORS
+    for muni in (1, 2):
+        seqs = sorted(int(n.rsplit('-', 1)[1]) for n in numbers if n.startswith(f'ISS-{muni}-'))
+        assert seqs == list(range(1, CREATORS // 2 + 1))
+
+
+def test_parallel_creators_with_block_preallocation(tmp_path):
+    # Two app instances stand in for two workers, each with its own block cache
+    app = _app(tmp_path, block_size=8)
+    other_worker = _app(tmp_path, block_size=8)
+    numbers = _allocate_concurrently([app, other_worker], [1] * CREATORS)
+    assert len(set(numbers)) == CREATORS
+    with app.app_context():
+        from apps.api.models.sequence import SequenceCounter
+        assert db.session.get(SequenceCounter, ('ISS', 1, 2026)).value == CREATORS
+
+
+def test_year_follows_the_philippine_calendar(tmp_path):
+    from datetime import datetime, timezone
+
+    # 07:30 on 1 January in Manila is still 31 December in UTC
+    assert local_year(datetime(2026, 12, 31, 23, 30, tzinfo=timezone.utc)) == 2027
+    assert local_year(datetime(2026, 12, 31, 15, 59, tzinfo=timezone.utc)) == 2026
+
+    app = _app(tmp_path, block_size=1)
+    with app.app_context():
+        assert next_reference('REQ', 3).startswith(f'REQ-3-{local_year()}-')
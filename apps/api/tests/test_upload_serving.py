@@ -0,0 +1,67 @@
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils.upload_serving import is_immutable_upload
+
+
+def _app(tmp_path, **overrides):
+    attrs = dict(UPLOAD_FOLDER=tmp_path / 'uploads', WATERMARK_CACHE_DIR=tmp_path / 'watermarks')
+    attrs.update(overrides)
+    app = create_app(type('UploadConfig', (TestingConfig,), attrs))
+    photo = tmp_path / 'uploads' / 'marketplace' / 'residents' / 'iba' / 'item_1' / '20261019_101500_1a2b3c4d.jpg'
+    photo.parent.mkdir(parents=True, exist_ok=True)
+    photo.write_bytes(bytes(range(256)) * 40)
+    doc = tmp_path / 'uploads' / 'generated_docs' / 'iba' / '7.pdf'
+    doc.parent.mkdir(parents=True, exist_ok=True)
+    doc.write_bytes(b'%PDF-1.4 ' + b'0' * 1000)
+    return app
+
+
+PHOTO = '/uploads/marketplace/residents/iba/item_1/20261019_101500_1a2b3c4d.jpg'
+
+
+def test_immutable_names():
+    assert is_immutable_upload('marketplace/residents/iba/item_1/20261019_101500_1a2b3c4d.jpg')
+    assert is_immutable_upload('marketplace/residents/iba/item_1/20261019_101500_1a2b3c4d.thumb.webp')
+    assert is_immutable_upload('blobs/ab/' + 'ab' * 32 + '.pdf')
+    assert not is_immutable_upload('generated_docs/iba/7.pdf')
+    assert not is_immutable_upload('logo.png')
+
+
+def test_python_mode_ranges_validators_and_cache_policy(tmp_path):
+    client = _app(tmp_path).test_client()
+
+    resp = client.get(PHOTO)
+    assert resp.status_code == 200 and len(resp.get_data()) == 10240
+    assert resp.headers['Accept-Ranges'] == 'bytes'
+    assert {'public', 'immutable', 'max-age=31536000'} <= set(resp.headers['Cache-Control'].split(', '))
+    etag, modified = resp.headers['ETag'], resp.headers['Last-Modified']
+    resp.close()
+
+    resp = client.get(PHOTO, headers={'Range': 'bytes=256-511'})
+    assert resp.status_code == 206 and resp.get_data() == bytes(range(256))
+    assert resp.headers['Content-Range'] == 'bytes 256-511/10240'
+    resp.close()
+
+    assert client.get(PHOTO, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(PHOTO, headers={'If-Modified-Since': modified}).status_code == 304
+
+    resp = client.get('/uploads/generated_docs/iba/7.pdf')
+    assert resp.mimetype == 'application/pdf'
+    assert resp.headers['Cache-Control'] == 'public, max-age=300'
+    resp.close()
+
+    assert client.get('/uploads/../secret.txt').status_code == 404
+    assert client.get('/uploads/generated_docs/iba/missing.pdf').status_code == 404
+
+
+def test_proxy_offload_modes(tmp_path):
+    client = _app(tmp_path, UPLOAD_SERVE_MODE='x-accel', UPLOAD_ACCEL_PREFIX='/_uploads/').test_client()
+    resp = client.get(PHOTO)
+    assert resp.status_code == 200 and resp.get_data() == b''
+    assert resp.headers['X-Accel-Redirect'] == '/_uploads' + PHOTO[len('/uploads'):]
+    assert resp.mimetype == 'image/jpeg' and 'immutable' in resp.headers['Cache-Control']
+
+    client = _app(tmp_path, UPLOAD_SERVE_MODE='x-sendfile').test_client()
+    resp = client.get('/uploads/generated_docs/iba/7.pdf')
+    assert resp.headers['X-Sendfile'] == str((tmp_path / 'uploads' / 'generated_docs' / 'iba' / '7.pdf').resolve())
+    assert resp.get_data() == b'' and resp.headers['Cache-Control'] == 'max-age=300, public'
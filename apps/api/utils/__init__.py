@@ -60,6 +60,7 @@ from apps.api.utils.file_handler import (
     save_document_request_file,
     delete_file,
     get_file_url,
+    replace_file,
     cleanup_user_files,
     cleanup_item_files,
     FileUploadError,
@@ -126,6 +127,7 @@ __all__ = [
     'save_document_request_file',
     'delete_file',
     'get_file_url',
+    'replace_file',
     'cleanup_user_files',
     'cleanup_item_files',
     'FileUploadError',
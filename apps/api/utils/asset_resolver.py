@@ -0,0 +1,90 @@
+"""Memoized lookups of document-generation assets and JSON configs.
+
+The PDF generator, DOCX renderer and table reports resolve the same things
+for every document: seal/logo files under ``public/logos``, DOCX templates and
+``meta.json`` under ``public/digital_docs_template``, and the JSON configs in
+``apps/api/config`` (document types, officials). Each used to hit the
+filesystem with several ``exists()`` checks, ``glob`` scans and a JSON parse
+per call.
+
+``AssetResolver`` keeps the results per worker and validates them with a
+``stat`` of what they depend on:
+
+- ``json(path)``: parsed file, re-read when its mtime or size changes.
+- ``memo(key, watch, compute)``: any lookup, recomputed when the mtime of one
+  of the ``watch`` directories changes (adding, removing or renaming a file
+  updates its directory's mtime) or one of them appears/disappears.
+
+Returned values are shared between callers and must be treated as read-only.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+from flask import current_app
+
+
+_resolver_lock = threading.Lock()
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class AssetResolver:
+    def __init__(self):
+        self._json: Dict[Path, Tuple[Optional[Tuple[int, int]], Any]] = {}
+        self._memo: Dict[Hashable, Tuple[tuple, Any]] = {}
+
+    def json(self, path: Path, default: Any = None) -> Any:
+        """Parsed JSON at ``path``; ``default`` (``{}``) when missing or invalid."""
+        path = Path(path)
+        stamp = _stamp(path)
+        cached = self._json.get(path)
+        if cached is not None and cached[0] == stamp:
+            value = cached[1]
+        else:
+            value = None
+            if stamp is not None:
+                try:
+                    value = json.loads(path.read_text(encoding='utf-8'))
+                except (OSError, ValueError):
+                    value = None
+            self._json[path] = (stamp, value)
+        return ({} if default is None else default) if value is None else value
+
+    def memo(self, key: Hashable, watch: Sequence[Path], compute: Callable[[], Any]) -> Any:
+        stamps = tuple(_stamp(Path(p)) for p in watch)
+        cached = self._memo.get(key)
+        if cached is not None and cached[0] == stamps:
+            return cached[1]
+        value = compute()
+        self._memo[key] = (stamps, value)
+        return value
+
+    def first_existing(self, paths: Iterable[Path]) -> Optional[Path]:
+        """First path that exists, re-checked when a parent directory changes."""
+        paths = tuple(Path(p) for p in paths)
+        watch = tuple(dict.fromkeys(p.parent for p in paths))
+        return self.memo(('first_existing', paths), watch, lambda: next((p for p in paths if p.exists()), None))
+
+    def clear(self) -> None:
+        self._json.clear()
+        self._memo.clear()
+
+
+def get_asset_resolver(app=None) -> AssetResolver:
+    """Per-app (per-worker) ``AssetResolver``."""
+    app = app or current_app._get_current_object()
+    resolver = app.extensions.get('asset_resolver')
+    if resolver is None:
+        with _resolver_lock:
+            resolver = app.extensions.setdefault('asset_resolver', AssetResolver())
+    return resolver
@@ -0,0 +1,210 @@
+"""Content-addressed storage for uploads.
+
+``store_upload`` copies an upload in ``CHUNK_SIZE`` pieces to a temp file
+(under ``UPLOAD_FOLDER/blobs/tmp`` with local storage) while hashing it
+(SHA-256). It stops as soon as the size limit is passed or the first bytes do
+not match the file extension. The file is then moved, or streamed to the
+object store (``utils.storage``), at::
+
+    blobs/<h[0:2]>/<h[2:4]>/<sha256>.<ext>
+
+Identical bytes uploaded again (the same photo on two listings, an ID scan
+submitted twice) reuse that file. ``stored_blobs`` counts the references; the
+count changes in the caller's transaction. A row whose count reaches zero
+stays as a tombstone until that transaction commits; then the file and any
+image variants next to it are deleted in a transaction that first deletes
+the tombstone row, and only if the row still has no references. The row lock
+makes a concurrent upload of the same bytes either revive the row before the
+deletion (nothing is deleted) or wait for it and store the file again.
+
+Paths outside ``blobs/`` (uploads saved before this store) are not counted;
+``file_handler.delete_file`` removes those directly.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+try:
+    from apps.api import db
+    from apps.api.models.blob import StoredBlob
+    from apps.api.utils.storage import LocalStorage, get_storage
+    from apps.api.utils.validators import ValidationError
+except ImportError:
+    from __init__ import db
+    from models.blob import StoredBlob
+    from utils.storage import LocalStorage, get_storage
+    from utils.validators import ValidationError
+
+
+CHUNK_SIZE = 64 * 1024
+BLOB_DIR = 'blobs'
+_blobs = StoredBlob.__table__
+_BLOB_PATH = re.compile(r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z0-9]+$')
+
+# Leading bytes per extension; other extensions are not sniffed
+SIGNATURES = {
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'gif': (b'GIF87a', b'GIF89a'),
+    'pdf': (b'%PDF-',),
+    'doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    'docx': (b'PK\x03\x04',),
+}
+SNIFF_BYTES = 16
+
+
+def content_matches(ext: str, head: bytes) -> bool:
+    """True when ``head`` (the first bytes of a file) fits extension ``ext``."""
+    if ext == 'webp':
+        return head[:4] == b'RIFF' and head[8:12] == b'WEBP'
+    signatures = SIGNATURES.get(ext)
+    return signatures is None or head.startswith(signatures)
+
+
+def blob_path(sha256: str, ext: str) -> str:
+    """Relative path of the blob with digest ``sha256``."""
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}.{ext}'
+
+
+def blob_digest(rel_path: str) -> Optional[str]:
+    """SHA-256 of a blob path, or None for other upload paths."""
+    m = _BLOB_PATH.match((rel_path or '').replace('\\', '/'))
+    return m.group(1) if m else None
+
+
+def _spool(stream, ext: str, max_size_mb: float, tmp_dir: Optional[Path]):
+    """Copy ``stream`` to a temp file in ``tmp_dir``; returns (temp path, sha256, size)."""
+    max_bytes = int(max_size_mb * 1024 * 1024)
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                    if len(head) >= SNIFF_BYTES and not content_matches(ext, head):
+                        raise ValidationError('file', 'File content does not match its type')
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValidationError('file', f'File size must not exceed {max_size_mb}MB')
+                digest.update(chunk)
+                out.write(chunk)
+        if len(head) < SNIFF_BYTES and not content_matches(ext, head):
+            raise ValidationError('file', 'File content does not match its type')
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp, digest.hexdigest(), size
+
+
+def _acquire(sha256: str, rel_path: str, size: int) -> Tuple[str, bool]:
+    """Add a reference to the blob; returns (stored path, whether this call created the row)."""
+    conn = db.session.connection()
+    bumped = conn.execute(
+        update(_blobs).where(_blobs.c.sha256 == sha256).values(ref_count=_blobs.c.ref_count + 1)
+    )
+    if bumped.rowcount == 0:
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(_blobs).values(sha256=sha256, path=rel_path, size=size, ref_count=1))
+            return rel_path, True
+        except IntegrityError:
+            # Stored concurrently by another upload of the same bytes
+            conn.execute(
+                update(_blobs).where(_blobs.c.sha256 == sha256).values(ref_count=_blobs.c.ref_count + 1)
+            )
+    return conn.execute(select(_blobs.c.path).where(_blobs.c.sha256 == sha256)).scalar_one(), False
+
+
+def store_upload(file, ext: str, max_size_mb: float) -> str:
+    """Store an uploaded file by content; returns its path relative to ``UPLOAD_FOLDER``."""
+    storage = get_storage()
+    tmp_dir = None
+    if isinstance(storage, LocalStorage):
+        # Same filesystem as the blobs, so storing is a rename
+        tmp_dir = storage.root / BLOB_DIR / 'tmp'
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+    stream = getattr(file, 'stream', file)
+    try:
+        stream.seek(0)
+    except (AttributeError, OSError):
+        pass
+
+    tmp, sha256, size = _spool(stream, ext.lower(), max_size_mb, tmp_dir)
+    try:
+        rel_path, created = _acquire(sha256, blob_path(sha256, ext.lower()), size)
+        # A new row means no file can be relied on: an unlinker may just have
+        # removed it. An existing row is locked by our update, so its file stays.
+        if not created and storage.exists(rel_path):
+            os.unlink(tmp)
+        else:
+            storage.save(rel_path, tmp, content_sha256=sha256, move=True)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return rel_path
+
+
+def release(rel_path: str) -> bool:
+    """Drop one reference to a blob; False if ``rel_path`` is not a blob path.
+
+    The file is removed after commit when this was the last reference.
+    """
+    sha256 = blob_digest(rel_path)
+    if sha256 is None:
+        return False
+    conn = db.session.connection()
+    conn.execute(
+        update(_blobs)
+        .where(_blobs.c.sha256 == sha256, _blobs.c.ref_count > 0)
+        .values(ref_count=_blobs.c.ref_count - 1)
+    )
+    left = conn.execute(select(_blobs.c.ref_count).where(_blobs.c.sha256 == sha256)).scalar()
+    if left is not None and left <= 0:
+        db.session.info.setdefault('blob_unlinks', set()).add(sha256)
+    return True
+
+
+def _unlink_blob(sha256: str) -> None:
+    storage = get_storage()
+    with db.engine.begin() as conn:
+        # Referenced again since our commit: keep the file. Otherwise the row
+        # lock holds back a concurrent store of these bytes until the files are gone.
+        gone = conn.execute(delete(_blobs).where(_blobs.c.sha256 == sha256, _blobs.c.ref_count <= 0))
+        if not gone.rowcount:
+            return
+        for key in list(storage.list(f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}.')):  # the blob and its image variants
+            storage.delete(key)
+
+
+@event.listens_for(Session, 'after_commit')
+def _unlink_released(session):
+    pending = session.info.pop('blob_unlinks', None)
+    if pending and has_app_context():
+        for sha256 in pending:
+            try:
+                _unlink_blob(sha256)
+            except Exception as e:
+                current_app.logger.warning('Could not remove blob %s: %s', sha256, e)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _keep_on_rollback(session):
+    session.info.pop('blob_unlinks', None)
@@ -2,20 +2,37 @@
 
 Renders municipality-specific templates from public/digital_docs_template
 with fallbacks and embeds a QR code image for verification.
+
+Templates are compiled once per worker (``get_docx_template``): the file's
+bytes, its Jinja environment with the filters below, the XML after
+docxtpl's tag patching and the compiled Jinja template of each part are
+kept in an LRU keyed by path and revalidated by mtime/size. A render opens
+a fresh ``DocxTemplate`` from the cached bytes and skips patching and
+compilation.
 """
 from __future__ import annotations
 
+import hashlib
+import io
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, Tuple, Any, Dict
-import json
 
 from flask import current_app
+from jinja2 import Environment
 from docxtpl import DocxTemplate, InlineImage
 from docx.shared import Mm, Inches, Pt, RGBColor
 from docx import Document as WordDocument
-import qrcode
+
+try:
+    from apps.api.utils.asset_resolver import get_asset_resolver
+    from apps.api.utils.qr_service import qr_png_io
+except ImportError:
+    from utils.asset_resolver import get_asset_resolver
+    from utils.qr_service import qr_png_io
 
 
 def _slugify(name: str) -> str:
@@ -33,7 +50,20 @@ def _municipality_alias(name: str) -> str:
     return aliases.get(name, name)
 
 
+def _template_folders(base_dir: Path, municipality_name: str) -> list:
+    alias_name = _municipality_alias(municipality_name)
+    return [base_dir, base_dir / alias_name, base_dir / _slugify(alias_name), base_dir / "_default"]
+
+
 def _resolve_template_path(base_dir: Path, municipality_name: str, document_code: str) -> Optional[Path]:
+    return get_asset_resolver().memo(
+        ('docx_template', str(base_dir), municipality_name, document_code),
+        _template_folders(base_dir, municipality_name),
+        lambda: _scan_template_path(base_dir, municipality_name, document_code),
+    )
+
+
+def _scan_template_path(base_dir: Path, municipality_name: str, document_code: str) -> Optional[Path]:
     alias_name = _municipality_alias(municipality_name)
     slug = _slugify(alias_name)
 
@@ -81,29 +111,112 @@ def _resolve_template_path(base_dir: Path, municipality_name: str, document_code
     return None
 
 
-def _ensure_dir(path: Path) -> None:
-    path.mkdir(parents=True, exist_ok=True)
+def _date_long(s):
+    if isinstance(s, str):
+        return datetime.strptime(s, '%Y-%m-%d').strftime('%B %d, %Y')
+    return s.strftime('%B %d, %Y') if isinstance(s, datetime) else s
+
+
+class _CompilingEnvironment(Environment):
+    """Jinja environment that compiles each distinct template source once."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compiled: Dict[bytes, Any] = {}
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None or not isinstance(source, str):
+            return super().from_string(source, globals, template_class)
+        key = hashlib.sha1(source.encode('utf-8')).digest()
+        template = self.compiled.get(key)
+        if template is None:
+            template = self.compiled[key] = super().from_string(source)
+        return template
+
+
+class _CompiledTemplate:
+    """A template file's bytes plus everything derived from it that renders can share."""
+
+    def __init__(self, path: Path, stamp: Tuple[int, int], data: bytes):
+        self.path = path
+        self.stamp = stamp
+        self.data = data
+        self.patched: Dict[bytes, str] = {}
+        self.jinja_env = _CompilingEnvironment()
+        # Helpful filters
+        self.jinja_env.filters['date_long'] = _date_long
+        self.jinja_env.filters['currency'] = lambda n: f"₱{float(n):,.2f}" if n is not None else ''
+        self.jinja_env.filters['upper'] = lambda x: (x or '').upper()
+
+    def new_document(self) -> '_CachedDocxTemplate':
+        doc = _CachedDocxTemplate(io.BytesIO(self.data))
+        doc.compiled = self
+        return doc
+
+
+class _CachedDocxTemplate(DocxTemplate):
+    compiled: _CompiledTemplate
+
+    def patch_xml(self, src_xml):
+        # Same part XML -> same patched source; the regex pass runs once per template
+        key = hashlib.sha1(src_xml.encode('utf-8')).digest()
+        patched = self.compiled.patched.get(key)
+        if patched is None:
+            patched = self.compiled.patched[key] = super().patch_xml(src_xml)
+        return patched
+
+    def render(self, context, jinja_env=None, autoescape=False):
+        return super().render(context, jinja_env or self.compiled.jinja_env, autoescape)
+
+
+class _TemplateCache:
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[str, _CompiledTemplate]' = OrderedDict()
+
+    def get(self, path: Path) -> _CompiledTemplate:
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = str(path.resolve())
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self.entries.move_to_end(key)
+                return entry
+        entry = _CompiledTemplate(path, stamp, path.read_bytes())
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+def get_docx_template(template_path: Path) -> _CompiledTemplate:
+    """Compiled template for ``template_path`` from this worker's LRU."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('docx_templates')
+    if cache is None:
+        cache = app.extensions.setdefault(
+            'docx_templates', _TemplateCache(int(app.config.get('DOCX_TEMPLATE_CACHE_SIZE', 64)))
+        )
+    return cache.get(Path(template_path))
 
 
-def _build_qr_image(temp_dir: Path, qr_data: str) -> Path:
-    _ensure_dir(temp_dir)
-    img = qrcode.make(qr_data)
-    out = temp_dir / "qr.png"
-    img.save(out)
-    return out
+def _ensure_dir(path: Path) -> None:
+    path.mkdir(parents=True, exist_ok=True)
 
 
 def _load_municipal_meta(base_dir: Path, municipality_name: str) -> Dict[str, Any]:
-    alias_name = _municipality_alias(municipality_name)
-    slug = _slugify(alias_name)
-    for folder in [base_dir / alias_name, base_dir / slug, base_dir / "_default"]:
-        meta_path = folder / "meta.json"
-        if meta_path.exists():
-            try:
-                return json.loads(meta_path.read_text(encoding="utf-8"))
-            except Exception:
-                return {}
-    return {}
+    resolver = get_asset_resolver()
+    folders = _template_folders(base_dir, municipality_name)[1:]  # municipality folders, then _default
+    meta_path = resolver.first_existing(folder / "meta.json" for folder in folders)
+    return resolver.json(meta_path) if meta_path else {}
 
 
 def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
@@ -132,7 +245,6 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
     # QR data and image
     qr_base = current_app.config.get('QR_BASE_URL', 'http://localhost:3000/verify')
     qr_payload = f"{qr_base}?req={request.request_number}"
-    qr_img_path = _build_qr_image(out_dir, qr_payload)
 
     # Build context
     resident_full_name = ' '.join(filter(None, [getattr(user, 'first_name', None), getattr(user, 'last_name', None)])) or getattr(user, 'username', 'Resident')
@@ -163,18 +275,11 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
         'meta': meta,
     }
 
-    # Render
-    doc = DocxTemplate(str(template_path))
-    # Helpful filters
-    try:
-        doc.jinja_env.filters['date_long'] = lambda s: datetime.strptime(s, '%Y-%m-%d').strftime('%B %d, %Y') if isinstance(s, str) else (s.strftime('%B %d, %Y') if isinstance(s, datetime) else s)
-        doc.jinja_env.filters['currency'] = lambda n: f"₱{float(n):,.2f}" if n is not None else ''
-        doc.jinja_env.filters['upper'] = lambda x: (x or '').upper()
-    except Exception:
-        pass
+    # Render (filters live on the cached template's Jinja environment)
+    doc = get_docx_template(template_path).new_document()
     # Insert QR image as InlineImage if placeholder exists in template
     # We always provide it; template can ignore it if unused
-    qr_inline = InlineImage(doc, str(qr_img_path), width=Mm(30))
+    qr_inline = InlineImage(doc, qr_png_io(qr_payload), width=Mm(30))
     ctx['qr_image'] = qr_inline
     ctx['qr'] = qr_inline  # alias
     # Optional seal/signature from meta
@@ -189,20 +294,17 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
             logos_base / 'municipalities' / _slugify(municipality_name),
             logos_base / 'zambales',
         ]
+        resolver = get_asset_resolver()
         if seal_file:
-            for folder in search_folders:
-                fp = folder / seal_file
-                if fp.exists():
-                    ctx['seal_image'] = InlineImage(doc, str(fp), width=Mm(24))
-                    break
+            fp = resolver.first_existing(folder / seal_file for folder in search_folders)
+            if fp:
+                ctx['seal_image'] = InlineImage(doc, str(fp), width=Mm(24))
         if isinstance(meta, dict) and isinstance(meta.get('signatories'), list) and meta['signatories']:
             sig_file = meta['signatories'][0].get('signature')
             if sig_file:
-                for folder in search_folders:
-                    fp = folder / sig_file
-                    if fp.exists():
-                        ctx['signature_image'] = InlineImage(doc, str(fp), width=Mm(30))
-                        break
+                fp = resolver.first_existing(folder / sig_file for folder in search_folders)
+                if fp:
+                    ctx['signature_image'] = InlineImage(doc, str(fp), width=Mm(30))
     except Exception:
         pass
     doc.render(ctx)
@@ -272,7 +374,7 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
                         r.font.name = 'Calibri'
             try:
                 wd.add_paragraph('Scan to verify:')
-                wd.add_picture(str(qr_img_path), width=Inches(1.2))
+                wd.add_picture(qr_png_io(qr_payload), width=Inches(1.2))
             except Exception:
                 pass
             wd.save(str(docx_out))
@@ -1,33 +1,380 @@
 """DOCX to PDF conversion utilities.
 
 Prefers LibreOffice headless conversion; falls back to docx2pdf on Windows.
+
+LibreOffice conversions go through a per-process ``ConverterPool``: a queue
+served by ``SOFFICE_POOL_SIZE`` slots, each with its own office profile so
+slots never contend for a profile lock. A slot takes the next queued file
+plus whatever else is waiting (up to ``SOFFICE_BATCH_SIZE``) and converts
+them together:
+
+- with Python-UNO available (``import uno``; LibreOffice's bundled Python or
+  the ``python3-uno`` package), each slot keeps one long-lived
+  ``soffice --accept=socket`` process and converts over the UNO bridge; the
+  process is restarted after ``SOFFICE_MAX_CONVERSIONS`` conversions or when
+  a conversion exceeds its timeout;
+- otherwise a slot runs one ``soffice --convert-to pdf`` for the whole batch,
+  reusing its warm profile (first start of a fresh profile is the slow part).
+
+Every conversion has a timeout (``SOFFICE_TIMEOUT`` seconds); a batch that
+overruns is killed and its unconverted files are retried one at a time.
 """
 from __future__ import annotations
 
+import atexit
+import importlib.util
 import os
+import queue
 import shutil
+import signal
+import socket
 import subprocess
-import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from pathlib import Path
+from typing import List, Optional
+
+from flask import current_app, has_app_context
+
+
+DEFAULTS = {
+    'SOFFICE_POOL_SIZE': 2,
+    'SOFFICE_MAX_CONVERSIONS': 50,
+    'SOFFICE_BATCH_SIZE': 8,
+    'SOFFICE_TIMEOUT': 60,
+    'SOFFICE_STARTUP_TIMEOUT': 45,
+    'SOFFICE_PROFILE_DIR': None,
+}
 
 
 def _has_soffice() -> bool:
     return shutil.which('soffice') is not None or shutil.which('libreoffice') is not None
 
 
+def _soffice_binary() -> Optional[str]:
+    return shutil.which('soffice') or shutil.which('libreoffice')
+
+
+def _settings() -> dict:
+    settings = dict(DEFAULTS)
+    for key in DEFAULTS:
+        if has_app_context() and current_app.config.get(key) is not None:
+            settings[key] = current_app.config[key]
+        elif os.getenv(key):
+            settings[key] = os.getenv(key)
+    for key in ('SOFFICE_POOL_SIZE', 'SOFFICE_MAX_CONVERSIONS', 'SOFFICE_BATCH_SIZE'):
+        settings[key] = max(1, int(settings[key]))
+    for key in ('SOFFICE_TIMEOUT', 'SOFFICE_STARTUP_TIMEOUT'):
+        settings[key] = float(settings[key])
+    return settings
+
+
+def _kill_tree(proc: subprocess.Popen) -> None:
+    """Kill soffice and its soffice.bin child (started in their own session)."""
+    if proc.poll() is not None:
+        return
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+class _Conversion:
+    def __init__(self, input_docx: Path, output_pdf: Path):
+        self.input_docx = input_docx
+        self.output_pdf = output_pdf
+        self.future: Future = Future()
+
+    def finish(self, produced: Path) -> None:
+        self.output_pdf.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(produced), str(self.output_pdf))
+        self.future.set_result(self.output_pdf)
+
+
+class _CliSlot:
+    """One ``soffice --convert-to`` run per batch, on a persistent profile."""
+
+    def __init__(self, binary: str, profile: Path, settings: dict):
+        self.binary = binary
+        self.profile = profile
+        self.settings = settings
+
+    def convert(self, items: List[_Conversion]) -> List[_Conversion]:
+        """Convert ``items``; return the ones that did not finish in time."""
+        with tempfile.TemporaryDirectory(prefix='soffice-batch-') as tmp:
+            staging = Path(tmp)
+            # Stage under unique names: inputs from different folders may share a stem
+            inputs = []
+            for i, item in enumerate(items):
+                staged = staging / f'{i}.docx'
+                try:
+                    os.symlink(item.input_docx.resolve(), staged)
+                except OSError:
+                    shutil.copyfile(item.input_docx, staged)
+                inputs.append(str(staged))
+            out_dir = staging / 'out'
+            cmd = [
+                self.binary, '--headless', '--norestore', '--nologo', '--nolockcheck',
+                f'-env:UserInstallation={self.profile.as_uri()}',
+                '--convert-to', 'pdf', '--outdir', str(out_dir), *inputs,
+            ]
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                    start_new_session=True)
+            timed_out = False
+            try:
+                proc.wait(timeout=self.settings['SOFFICE_TIMEOUT'] * len(items))
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                _kill_tree(proc)
+            leftovers = []
+            for i, item in enumerate(items):
+                produced = out_dir / f'{i}.pdf'
+                if produced.exists() and produced.stat().st_size > 0:
+                    item.finish(produced)
+                elif timed_out:
+                    leftovers.append(item)
+                else:
+                    item.future.set_exception(RuntimeError(f'LibreOffice could not convert {item.input_docx}'))
+            return leftovers
+
+    def close(self) -> None:
+        pass
+
+
+class _UnoSlot:
+    """A long-lived ``soffice --accept`` process driven over the UNO bridge."""
+
+    def __init__(self, binary: str, profile: Path, settings: dict):
+        self.binary = binary
+        self.profile = profile
+        self.settings = settings
+        self.proc: Optional[subprocess.Popen] = None
+        self.desktop = None
+        self.conversions = 0
+
+    def _start(self) -> None:
+        import uno  # type: ignore
+
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        accept = f'socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext'
+        self.proc = subprocess.Popen(
+            [self.binary, '--headless', '--invisible', '--norestore', '--nologo', '--nodefault',
+             '--nolockcheck', f'--accept={accept}', f'-env:UserInstallation={self.profile.as_uri()}'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local)
+        deadline = time.monotonic() + self.settings['SOFFICE_STARTUP_TIMEOUT']
+        while True:
+            try:
+                ctx = resolver.resolve(f'uno:{accept}')
+                break
+            except Exception:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError('LibreOffice did not start')
+                time.sleep(0.25)
+        self.desktop = ctx.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', ctx)
+        self.conversions = 0
+
+    def _convert_one(self, item: _Conversion, out_file: Path) -> None:
+        import uno  # type: ignore
+
+        def prop(name, value):
+            p = uno.createUnoStruct('com.sun.star.beans.PropertyValue')
+            p.Name, p.Value = name, value
+            return p
+
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(item.input_docx.resolve())), '_blank', 0,
+            (prop('Hidden', True), prop('ReadOnly', True)),
+        )
+        try:
+            doc.storeToURL(uno.systemPathToFileUrl(str(out_file)), (prop('FilterName', 'writer_pdf_Export'),))
+        finally:
+            doc.close(True)
+        self.conversions += 1
+
+    def convert(self, items: List[_Conversion]) -> List[_Conversion]:
+        timeout = self.settings['SOFFICE_TIMEOUT']
+        with tempfile.TemporaryDirectory(prefix='soffice-uno-') as tmp:
+            for i, item in enumerate(items):
+                if self.proc is not None and self.conversions >= self.settings['SOFFICE_MAX_CONVERSIONS']:
+                    self.close()  # recycle to bound the office process's memory growth
+                out_file = Path(tmp) / f'{i}.pdf'
+                started = time.monotonic()
+                try:
+                    if self.proc is None or self.proc.poll() is not None:
+                        self._start()
+                    # The UNO call blocks; a hung conversion is ended by killing the office process
+                    watchdog = threading.Timer(timeout, _kill_tree, args=(self.proc,))
+                    watchdog.daemon = True
+                    watchdog.start()
+                    try:
+                        self._convert_one(item, out_file)
+                    finally:
+                        watchdog.cancel()
+                    item.finish(out_file)
+                except Exception as exc:
+                    self.close()
+                    if time.monotonic() - started >= timeout:
+                        exc = TimeoutError(f'LibreOffice conversion of {item.input_docx} timed out')
+                    item.future.set_exception(exc)
+        return []
+
+    def close(self) -> None:
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+        self.desktop = None
+        if self.proc is not None:
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            _kill_tree(self.proc)
+        self.proc = None
+
+
+def _uno_available() -> bool:
+    return importlib.util.find_spec('uno') is not None
+
+
+class ConverterPool:
+    """Queue of DOCX conversions served by persistent LibreOffice slots."""
+
+    def __init__(self, binary: str, settings: Optional[dict] = None):
+        self.settings = settings or _settings()
+        self.pid = os.getpid()
+        # Per process even under a configured root: gunicorn workers must not share slot profiles
+        profile_root = self.settings['SOFFICE_PROFILE_DIR'] or tempfile.gettempdir()
+        self.profile_root = Path(profile_root) / f'munlink-soffice-{self.pid}'
+        self.queue: queue.Queue = queue.Queue()
+        slot_cls = _UnoSlot if _uno_available() else _CliSlot
+        self.slots = [
+            slot_cls(binary, self.profile_root / f'slot-{i}', self.settings)
+            for i in range(self.settings['SOFFICE_POOL_SIZE'])
+        ]
+        self.threads = [
+            threading.Thread(target=self._serve, args=(slot,), name=f'soffice-slot-{i}', daemon=True)
+            for i, slot in enumerate(self.slots)
+        ]
+        for t in self.threads:
+            t.start()
+
+    def submit(self, input_docx: Path, output_pdf: Path) -> Future:
+        item = _Conversion(Path(input_docx), Path(output_pdf))
+        self.queue.put(item)
+        return item.future
+
+    def convert(self, input_docx: Path, output_pdf: Path) -> Path:
+        future = self.submit(input_docx, output_pdf)
+        # The slot enforces the per-conversion timeout; this only guards against a stuck slot
+        limit = self.settings['SOFFICE_TIMEOUT'] * (self.settings['SOFFICE_BATCH_SIZE'] + 2)
+        limit += self.settings['SOFFICE_STARTUP_TIMEOUT']
+        try:
+            return future.result(timeout=limit)
+        except FutureTimeoutError:
+            # Still queued: withdraw it so a caller that falls back is not converted twice
+            if future.cancel():
+                raise
+        # Already converting: the slot's own timeout bounds it
+        return future.result(timeout=limit)
+
+    def _take_batch(self, first: _Conversion) -> List[_Conversion]:
+        batch = [first]
+        while len(batch) < self.settings['SOFFICE_BATCH_SIZE']:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)  # leave the stop signal for this slot's next loop
+                break
+            batch.append(item)
+        return batch
+
+    def _serve(self, slot) -> None:
+        while True:
+            first = self.queue.get()
+            if first is None:
+                slot.close()
+                return
+            batch = [item for item in self._take_batch(first) if item.future.set_running_or_notify_cancel()]
+            try:
+                leftovers = slot.convert(batch) if batch else []
+                # A batch that overran is retried file by file so one bad document cannot fail the rest
+                for item in leftovers:
+                    if len(batch) > 1 and not slot.convert([item]):
+                        continue
+                    if not item.future.done():
+                        item.future.set_exception(TimeoutError(f'LibreOffice conversion of {item.input_docx} timed out'))
+            except Exception as exc:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(exc)
+
+    def shutdown(self) -> None:
+        for _ in self.threads:
+            self.queue.put(None)
+        for t in self.threads:
+            t.join(timeout=10)
+
+
+_pool: Optional[ConverterPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_converter_pool() -> Optional[ConverterPool]:
+    """This process's pool (``None`` without LibreOffice)."""
+    global _pool
+    binary = _soffice_binary()
+    if binary is None:
+        return None
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():  # not inherited across fork
+            _pool = ConverterPool(binary)
+        return _pool
+
+
+def shutdown_converter_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None and pool.pid == os.getpid():
+        pool.shutdown()
+
+
+atexit.register(shutdown_converter_pool)
+
+
 def _convert_with_soffice(input_docx: Path, output_pdf: Path) -> bool:
-    # Convert in the output directory to avoid temp scatter
-    out_dir = output_pdf.parent
-    out_dir.mkdir(parents=True, exist_ok=True)
-    cmd = [
-        shutil.which('soffice') or shutil.which('libreoffice'),
-        '--headless',
-        '--convert-to', 'pdf',
-        '--outdir', str(out_dir),
-        str(input_docx),
-    ]
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return proc.returncode == 0 and output_pdf.exists()
+    pool = get_converter_pool()
+    if pool is None:
+        return False
+    try:
+        pool.convert(input_docx, output_pdf)
+    except Exception as exc:
+        if has_app_context():
+            current_app.logger.warning('LibreOffice conversion failed for %s: %s', input_docx, exc)
+        return False
+    return output_pdf.exists()
 
 
 def _convert_with_docx2pdf(input_docx: Path, output_pdf: Path) -> bool:
@@ -58,5 +405,3 @@ def convert_docx_to_pdf(input_docx_path: Path, pdf_target_path: Path) -> Path:
         return output_pdf
 
     raise RuntimeError("Failed to convert DOCX to PDF (no converter available or conversion failed)")
-
-
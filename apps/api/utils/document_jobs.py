@@ -0,0 +1,611 @@
+"""Background document generation.
+
+Admin "generate" actions enqueue a ``DocumentJob`` row and return at once;
+the PDF is rendered by a bounded worker pool and the admin UI polls the job.
+
+Flow:
+1. ``enqueue_document_job()`` reuses an active job for the same request or
+   inserts a ``queued`` row, commits, and submits the job id to the pool.
+2. The worker (``_execute``) claims the row (``queued`` -> ``running`` with
+   a conditional UPDATE on the attempt count it was submitted for), renders
+   the PDF with ``generate_document_pdf`` and returns the relative file path
+   and hashes. A submission that loses the claim does nothing. A request
+   whose stored PDF matches its current input hash is completed at enqueue
+   time without rendering.
+3. ``_on_done`` runs back in the web process: on success it sets
+   ``DocumentRequest.document_file``/``status='ready'``, then writes the
+   audit entry (best effort); on failure the job is resubmitted after a
+   short delay until ``max_attempts`` is reached, then marked ``failed``.
+   Outcomes are applied only while the job is still on the attempt that
+   produced them, so a late result of a timed-out attempt is dropped.
+
+Executors (``DOCUMENT_JOB_EXECUTOR``):
+- ``process``: ``ProcessPoolExecutor`` with ``DOCUMENT_JOB_WORKERS`` spawned
+  children, each with its own app built from the parent's config. Rendering
+  (and any LibreOffice work) stays off the gunicorn worker.
+- ``thread``: same flow on a thread pool (SQLite dev setups, tests).
+- ``inline``: run during the enqueue call; the job is finished on return.
+
+Jobs live in the database, so a poll may reach any gunicorn worker. A job
+whose ``updated_at`` is older than ``DOCUMENT_JOB_TIMEOUT`` while
+``queued``/``running`` (its worker died or was recycled) is resubmitted by
+the one worker that wins the conditional UPDATE on it.
+
+Batches (``enqueue_document_batch``) fan one ``pdf`` job per request out to
+the same pool. When the last one finishes, the batch writes a JSON manifest
+and, if requested, queues a ``merge`` job that concatenates the generated
+PDFs (the files the manifest lists) into one print-ready PDF.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import update
+
+try:
+    from apps.api import db
+    from apps.api.models.document import DocumentBatch, DocumentJob, DocumentRequest
+    from apps.api.models.user import User
+    from apps.api.utils.audit import log_action
+    from apps.api.utils.pdf_generator import current_document_file, document_content_hash
+    from apps.api.utils.pdf_merge import PdfConcatenator
+    from apps.api.utils.reference_registry import get_registry
+    from apps.api.utils.storage import get_storage
+except ImportError:
+    from __init__ import db
+    from models.document import DocumentBatch, DocumentJob, DocumentRequest
+    from models.user import User
+    from utils.audit import log_action
+    from utils.pdf_generator import current_document_file, document_content_hash
+    from utils.pdf_merge import PdfConcatenator
+    from utils.reference_registry import get_registry
+    from utils.storage import get_storage
+
+
+_executor_lock = threading.Lock()
+_child_app = None  # app of a pool child process
+
+
+class _Superseded(Exception):
+    """Another submission of the job claimed it first (it was resubmitted after a timeout)."""
+
+
+# --- Work (runs in the pool) ---
+
+def _execute(job_id: int, attempts: int = 0) -> Tuple[str, Optional[str], Optional[str]]:
+    """Render the job's document; requires an app context. Returns (relative path, input hash, content hash).
+
+    ``attempts`` is the job's attempt count when it was submitted; the job
+    is only run if it is still queued at that count.
+    """
+    try:
+        from apps.api.utils.pdf_generator import generate_document_pdf
+    except ImportError:
+        from utils.pdf_generator import generate_document_pdf
+
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(DocumentJob)
+        .where(DocumentJob.id == job_id, DocumentJob.status == 'queued', DocumentJob.attempts == attempts)
+        .values(status='running', attempts=attempts + 1, started_at=now, updated_at=now)
+    ).rowcount
+    db.session.commit()
+    job = db.session.get(DocumentJob, job_id)
+    if job is None:
+        raise LookupError(f'Document job {job_id} not found')
+    if not claimed:
+        raise _Superseded(f'Document job {job_id} attempt {attempts + 1} already claimed')
+
+    if job.kind == 'merge':
+        return _execute_merge(job), None, None
+    req = db.session.get(DocumentRequest, job.request_id)
+    user = db.session.get(User, req.user_id) if req else None
+    doc_type = get_registry().document_type(req.document_type_id) if req else None
+    if req is None or doc_type is None:
+        raise LookupError('Request or document type not found')
+    admin_user = db.session.get(User, job.requested_by) if job.requested_by else None
+    _abs_path, rel_path = generate_document_pdf(req, doc_type, user, admin_user=admin_user)
+    return rel_path, req.document_input_hash, req.document_content_hash
+
+
+def _execute_merge(job: DocumentJob) -> str:
+    """Concatenate the batch's generated PDFs, in request order, into one file.
+
+    The pages are copied from each job's stored ``result_file`` (the file the
+    manifest lists), so nothing is drawn twice.
+    """
+    batch = db.session.get(DocumentBatch, job.batch_id)
+    if batch is None:
+        raise LookupError(f'Document batch {job.batch_id} not found')
+    files = {
+        j.request_id: j.result_file
+        for j in batch.jobs.filter(DocumentJob.kind == 'pdf', DocumentJob.status == 'succeeded')
+    }
+    storage = get_storage()
+    out = PdfConcatenator()
+    rel_path = _batch_file(batch, 'pdf')
+    with storage.writer(rel_path) as pdf_path:
+        with open(pdf_path, 'wb') as f:
+            for req in _batch_requests(batch, succeeded_only=True):
+                f.write(out.append(storage.read_bytes(files[req.id])))
+            f.write(out.finish())
+    return rel_path
+
+
+def _init_child(config_items: dict) -> None:
+    """Pool child initializer: build an app from the parent's picklable config."""
+    global _child_app
+    try:
+        from apps.api.app import create_app
+        from apps.api.config import Config
+        from apps.api.utils.pdf_generator import warm_document_assets
+    except ImportError:
+        from app import create_app
+        from config import Config
+        from utils.pdf_generator import warm_document_assets
+    config_items = dict(config_items, REFERENCE_REGISTRY_WARM=False)
+    _child_app = create_app(type('DocumentJobConfig', (Config,), config_items))
+    with _child_app.app_context():
+        try:
+            warm_document_assets()
+        except Exception:
+            pass
+
+
+def _run_in_child(job_id: int, attempts: int) -> Tuple[str, Optional[str], Optional[str]]:
+    return _run_in_app(_child_app, job_id, attempts)
+
+
+def _run_in_app(app, job_id: int, attempts: int) -> Tuple[str, Optional[str], Optional[str]]:
+    with app.app_context():
+        try:
+            return _execute(job_id, attempts)
+        finally:
+            db.session.remove()
+
+
+# --- Pool management (web process) ---
+
+class _JobState:
+    def __init__(self):
+        self.executor: Optional[Executor] = None
+        self.submitted = 0  # tasks given to the current process pool
+
+
+def _state(app) -> _JobState:
+    state = app.extensions.get('document_jobs')
+    if state is None:
+        state = app.extensions.setdefault('document_jobs', _JobState())
+    return state
+
+
+def _picklable_config(app) -> dict:
+    items = {}
+    for key, value in app.config.items():
+        if not key.isupper():
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        items[key] = value
+    return items
+
+
+def _executor(app) -> Executor:
+    state = _state(app)
+    with _executor_lock:
+        mode = app.config.get('DOCUMENT_JOB_EXECUTOR', 'process')
+        workers = max(1, int(app.config.get('DOCUMENT_JOB_WORKERS', 2)))
+        if mode == 'process' and state.executor is not None:
+            # Recycle the children periodically to bound Pillow/ReportLab memory
+            # growth. The old pool finishes what it was given, then exits.
+            # (Not max_tasks_per_child: replacing exited children can hang the
+            # pool on some Python versions.)
+            per_child = int(app.config.get('DOCUMENT_JOB_MAX_TASKS_PER_CHILD', 100))
+            if per_child > 0 and state.submitted >= per_child * workers:
+                state.executor.shutdown(wait=False)
+                state.executor = None
+        if state.executor is None:
+            state.submitted = 0
+            if mode == 'process':
+                state.executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_child,
+                    initargs=(_picklable_config(app),),
+                )
+            else:
+                state.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='document-job')
+        state.submitted += 1
+        return state.executor
+
+
+def _reset_executor(app) -> None:
+    state = _state(app)
+    with _executor_lock:
+        executor, state.executor = state.executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(app, job_id: int, attempts: int = 0) -> None:
+    """Run the job, currently at ``attempts``, on the configured executor."""
+    mode = app.config.get('DOCUMENT_JOB_EXECUTOR', 'process')
+    if mode == 'inline':
+        future: Future = Future()
+        try:
+            future.set_result(_execute(job_id, attempts))
+        except Exception as exc:
+            future.set_exception(exc)
+        _on_done(app, job_id, attempts + 1, future)
+        return
+    args = (_run_in_child, job_id, attempts) if mode == 'process' else (_run_in_app, app, job_id, attempts)
+    try:
+        future = _executor(app).submit(*args)
+    except (BrokenProcessPool, RuntimeError):
+        # A child died (OOM, killed) or the pool was shut down: start a fresh one
+        _reset_executor(app)
+        future = _executor(app).submit(*args)
+    future.add_done_callback(lambda f: _on_done(app, job_id, attempts + 1, f))
+
+
+def _transition(job: DocumentJob, attempt: int, **values) -> bool:
+    """Apply ``values`` to ``job`` only while it is running ``attempt`` (not committed)."""
+    return db.session.execute(
+        update(DocumentJob)
+        .where(DocumentJob.id == job.id, DocumentJob.status == 'running', DocumentJob.attempts == attempt)
+        .values(**values)
+    ).rowcount == 1
+
+
+def _on_done(app, job_id: int, attempt: int, future: Future) -> None:
+    """Completion callback: apply the result of ``attempt`` to the request or schedule a retry."""
+    # Inline jobs complete inside the caller's app context and session
+    ctx = app.app_context() if app.config.get('DOCUMENT_JOB_EXECUTOR', 'process') != 'inline' else None
+    if ctx is not None:
+        ctx.push()
+    try:
+        error = future.exception()
+        if isinstance(error, _Superseded):
+            return
+        job = db.session.get(DocumentJob, job_id)
+        if job is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            _reset_executor(app)
+        if error is None:
+            if _complete(job, future.result(), attempt=attempt):
+                _batch_progress(app, job)
+            return
+
+        now = datetime.utcnow()
+        message = f'{type(error).__name__}: {error}'
+        if isinstance(error, LookupError) or attempt >= (job.max_attempts or 1):
+            if not _transition(job, attempt, status='failed', error=message, finished_at=now, updated_at=now):
+                db.session.rollback()
+                return
+            db.session.commit()
+            app.logger.warning('Document job %s failed: %s', job_id, message)
+            _batch_progress(app, job)
+            return
+        if not _transition(job, attempt, status='queued', error=message, updated_at=now):
+            db.session.rollback()
+            return
+        db.session.commit()
+        delay = float(app.config.get('DOCUMENT_JOB_RETRY_DELAY', 2)) * attempt
+        if app.config.get('DOCUMENT_JOB_EXECUTOR', 'process') == 'inline' or delay <= 0:
+            _submit(app, job_id, attempt)
+        else:
+            timer = threading.Timer(delay, _submit, args=(app, job_id, attempt))
+            timer.daemon = True
+            timer.start()
+    except Exception:
+        db.session.rollback()
+        app.logger.exception('Document job %s completion failed', job_id)
+    finally:
+        if ctx is not None:
+            db.session.remove()
+            ctx.pop()
+
+
+def _complete(job: DocumentJob, result: Tuple[str, Optional[str], Optional[str]],
+              attempt: Optional[int] = None, reused: bool = False) -> bool:
+    """Record a finished document; False if ``attempt`` is no longer the job's current one."""
+    rel_path, input_hash, content_hash = result
+    now = datetime.utcnow()
+    values = dict(status='succeeded', result_file=rel_path, error=None, finished_at=now, updated_at=now)
+    if attempt is None:
+        for key, value in values.items():
+            setattr(job, key, value)
+    elif not _transition(job, attempt, **values):
+        db.session.rollback()
+        return False
+    if job.kind == 'merge':
+        job.batch.merged_file = rel_path
+        db.session.commit()
+        return True
+    req = db.session.get(DocumentRequest, job.request_id)
+    previous = req.document_file
+    req.document_file = rel_path
+    req.document_input_hash = input_hash
+    if content_hash:
+        req.document_content_hash = content_hash
+    # Retain existing behavior for digital requests: set ready after generation,
+    # but defer final completion to an explicit action.
+    req.status = 'ready'
+    req.ready_at = now
+    req.updated_at = now
+    db.session.commit()
+    # Audit is best-effort: a failed insert must not undo the completed job
+    try:
+        log_action(
+            user_id=job.requested_by,
+            municipality_id=req.municipality_id,
+            entity_type='document_request',
+            entity_id=req.id,
+            action='generate_pdf',
+            actor_role='admin',
+            old_values={'document_file': previous} if previous else None,
+            new_values={'document_file': rel_path, 'job_id': job.id, 'input_hash': input_hash, 'reused': reused},
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Audit entry for document job %s failed', job.id)
+    return True
+
+
+# --- Batches ---
+
+def _batch_requests(batch: DocumentBatch, succeeded_only: bool = False):
+    """The batch's requests in print order (optionally only those generated)."""
+    ids = [int(i) for i in batch.request_ids or []]
+    if succeeded_only:
+        done = {
+            rid for (rid,) in db.session.query(DocumentJob.request_id)
+            .filter(DocumentJob.batch_id == batch.id, DocumentJob.kind == 'pdf', DocumentJob.status == 'succeeded')
+        }
+        ids = [i for i in ids if i in done]
+    by_id = {r.id: r for r in DocumentRequest.query.filter(DocumentRequest.id.in_(ids))} if ids else {}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def _batch_file(batch: DocumentBatch, ext: str) -> str:
+    """Upload-relative path of the batch's merged PDF or manifest."""
+    return f'generated_docs/batches/{batch.municipality_id}/batch-{batch.id}.{ext}'
+
+
+def _batch_progress(app, job: DocumentJob) -> None:
+    """Advance the job's batch once its last document job has finished."""
+    batch = job.batch
+    if batch is None:
+        return
+    if job.kind == 'merge':
+        _finish_batch(app, batch, 'completed' if job.status == 'succeeded' else 'failed')
+        return
+    pending = batch.jobs.filter(DocumentJob.kind == 'pdf', DocumentJob.status.in_(('queued', 'running'))).count()
+    if pending:
+        return
+    produced = batch.jobs.filter(DocumentJob.kind == 'pdf', DocumentJob.status == 'succeeded').count()
+    target = 'merging' if batch.merge and produced else 'completed'
+    # Two documents can finish at once: only the caller that moves the batch on acts
+    moved = db.session.execute(
+        update(DocumentBatch)
+        .where(DocumentBatch.id == batch.id, DocumentBatch.status == 'running')
+        .values(status=target)
+    ).rowcount
+    db.session.commit()
+    if not moved:
+        return
+    db.session.refresh(batch)
+    if target == 'completed':
+        _finish_batch(app, batch, 'completed')
+        return
+    merge_job = DocumentJob(
+        batch_id=batch.id,
+        municipality_id=batch.municipality_id,
+        kind='merge',
+        requested_by=batch.requested_by,
+        status='queued',
+        max_attempts=int(app.config.get('DOCUMENT_JOB_MAX_ATTEMPTS', 3)),
+    )
+    db.session.add(merge_job)
+    db.session.commit()
+    _submit(app, merge_job.id)
+
+
+def _finish_batch(app, batch: DocumentBatch, status: str) -> None:
+    rel_path = _batch_file(batch, 'json')
+    batch.status = status
+    batch.finished_at = datetime.utcnow()
+    try:
+        get_storage(app).save(rel_path, json.dumps(batch_manifest(batch), indent=2).encode('utf-8'))
+        batch.manifest_file = rel_path
+    except OSError:
+        app.logger.exception('Could not write manifest for document batch %s', batch.id)
+    db.session.commit()
+
+
+def batch_manifest(batch: DocumentBatch) -> dict:
+    """Per-request outcome of a batch, in print order."""
+    jobs = {j.request_id: j for j in batch.jobs.filter(DocumentJob.kind == 'pdf')}
+    entries = []
+    page = 0
+    for req in _batch_requests(batch):
+        job = jobs.get(req.id)
+        entry = {
+            'request_id': req.id,
+            'request_number': req.request_number,
+            'document_type_id': req.document_type_id,
+            'job_id': job.id if job else None,
+            'status': job.status if job else 'missing',
+            'file': job.result_file if job else None,
+            'url': f"/uploads/{job.result_file}" if job and job.result_file else None,
+            'error': job.error if job and job.status == 'failed' else None,
+            'page': None,
+        }
+        if job and job.status == 'succeeded':
+            page += 1
+            entry['page'] = page
+        entries.append(entry)
+    counts = {}
+    for entry in entries:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    return {'batch': batch.to_dict(), 'counts': counts, 'documents': entries}
+
+
+def enqueue_document_batch(requests, municipality_id: int, requested_by: Optional[int] = None,
+                           merge: bool = False, skipped=None) -> DocumentBatch:
+    """Queue one ``pdf`` job per request (in the given order) as a batch."""
+    app = current_app._get_current_object()
+    batch = DocumentBatch(
+        municipality_id=municipality_id,
+        requested_by=int(requested_by) if requested_by else None,
+        request_ids=[r.id for r in requests],
+        skipped=list(skipped or []),
+        merge=bool(merge),
+        status='running',
+    )
+    db.session.add(batch)
+    db.session.flush()
+    max_attempts = int(app.config.get('DOCUMENT_JOB_MAX_ATTEMPTS', 3))
+    jobs = [
+        DocumentJob(request_id=r.id, batch_id=batch.id, municipality_id=r.municipality_id, kind='pdf',
+                    requested_by=batch.requested_by, status='queued', max_attempts=max_attempts)
+        for r in requests
+    ]
+    db.session.add_all(jobs)
+    db.session.commit()
+    # Every job row exists before the first can finish, so progress checks see the whole batch
+    job_ids = [j.id for j in jobs]
+    if not job_ids:
+        _finish_batch(app, batch, 'completed')
+    for job_id in job_ids:
+        _submit(app, job_id)
+    if app.config.get('DOCUMENT_JOB_EXECUTOR', 'process') == 'inline':
+        db.session.refresh(batch)
+    return batch
+
+
+def get_document_batch(batch_id: int) -> Optional[DocumentBatch]:
+    """Load a batch for polling, resubmitting any of its jobs whose worker has gone away."""
+    app = current_app._get_current_object()
+    batch = db.session.get(DocumentBatch, batch_id)
+    if batch is not None and batch.status in ('running', 'merging'):
+        for job in batch.jobs.filter(DocumentJob.status.in_(('queued', 'running'))).all():
+            _recover_if_stale(app, job)
+        db.session.refresh(batch)
+    return batch
+
+
+# --- Public API ---
+
+def enqueue_document_job(req: DocumentRequest, requested_by: Optional[int] = None, kind: str = 'pdf') -> DocumentJob:
+    """Queue generation for ``req`` (or return its job already in flight)."""
+    app = current_app._get_current_object()
+    active = (
+        DocumentJob.query
+        .filter(DocumentJob.request_id == req.id, DocumentJob.kind == kind,
+                DocumentJob.status.in_(('queued', 'running')))
+        .order_by(DocumentJob.id.desc())
+        .first()
+    )
+    if active is not None and not _is_stale(app, active):
+        return active
+
+    if kind == 'pdf' and req.document_file and req.document_input_hash:
+        # Unchanged since the last generation: hand back the stored PDF
+        doc_type = get_registry().document_type(req.document_type_id)
+        user = db.session.get(User, req.user_id)
+        if doc_type is not None and current_document_file(req, doc_type, user):
+            content_hash = req.document_content_hash or document_content_hash(req, doc_type, user)
+            job = DocumentJob(request_id=req.id, municipality_id=req.municipality_id, kind=kind,
+                              requested_by=int(requested_by) if requested_by else None,
+                              status='running', started_at=datetime.utcnow())
+            db.session.add(job)
+            _complete(job, (req.document_file, req.document_input_hash, content_hash), reused=True)
+            return job
+
+    job = DocumentJob(
+        request_id=req.id,
+        municipality_id=req.municipality_id,
+        kind=kind,
+        requested_by=int(requested_by) if requested_by else None,
+        status='queued',
+        max_attempts=int(app.config.get('DOCUMENT_JOB_MAX_ATTEMPTS', 3)),
+    )
+    if active is not None:
+        active.status = 'failed'
+        active.error = 'Superseded after timeout'
+        active.finished_at = datetime.utcnow()
+    db.session.add(job)
+    db.session.commit()
+    _submit(app, job.id)
+    if app.config.get('DOCUMENT_JOB_EXECUTOR', 'process') == 'inline':
+        db.session.refresh(job)
+    return job
+
+
+def _is_stale(app, job: DocumentJob) -> bool:
+    timeout = timedelta(seconds=float(app.config.get('DOCUMENT_JOB_TIMEOUT', 300)))
+    # updated_at moves on every transition (queued, claimed, requeued)
+    since = job.updated_at or job.created_at
+    return since is not None and datetime.utcnow() - since > timeout
+
+
+def get_document_job(job_id: int) -> Optional[DocumentJob]:
+    """Load a job for polling, resubmitting it when its worker has gone away."""
+    app = current_app._get_current_object()
+    job = db.session.get(DocumentJob, job_id)
+    if job is not None:
+        _recover_if_stale(app, job)
+    return job
+
+
+def _recover_if_stale(app, job: DocumentJob) -> None:
+    if not job.is_active or not _is_stale(app, job):
+        return
+    attempts = job.attempts or 0
+    now = datetime.utcnow()
+    exhausted = attempts >= (job.max_attempts or 1)
+    if exhausted:
+        values = dict(status='failed', error=job.error or 'Timed out', finished_at=now, updated_at=now)
+    else:
+        values = dict(status='queued', started_at=None, updated_at=now)
+    # Several workers may poll the same stale job: only the one whose UPDATE
+    # still sees the state it judged stale recovers it
+    claimed = db.session.execute(
+        update(DocumentJob)
+        .where(DocumentJob.id == job.id, DocumentJob.status == job.status,
+               DocumentJob.attempts == job.attempts, DocumentJob.updated_at == job.updated_at)
+        .values(**values)
+    ).rowcount
+    db.session.commit()
+    if claimed != 1:
+        db.session.refresh(job)
+        return
+    if exhausted:
+        _batch_progress(app, job)
+    else:
+        # If the earlier submission is merely waiting in a busy pool, whichever
+        # of the two runs first claims the job and the other does nothing
+        _submit(app, job.id, attempts)
+        db.session.refresh(job)
+
+
+def shutdown_document_jobs(app=None, wait: bool = True) -> None:
+    app = app or current_app._get_current_object()
+    state = _state(app)
+    with _executor_lock:
+        executor, state.executor = state.executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
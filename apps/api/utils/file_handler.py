@@ -1,12 +1,11 @@
 """File upload and storage utilities."""
-import os
-import uuid
-from datetime import datetime
 from werkzeug.utils import secure_filename
-from apps.api.utils.validators import validate_file_size, validate_file_extension, ALLOWED_IMAGE_EXTENSIONS, ALLOWED_DOCUMENT_EXTENSIONS
+from apps.api.utils.validators import validate_file_extension, ALLOWED_IMAGE_EXTENSIONS, ALLOWED_DOCUMENT_EXTENSIONS
+from apps.api.utils import blob_store
+from apps.api.utils.storage import get_storage
 
-# Base upload directory - will be set by Flask app
-UPLOAD_BASE_DIR = None
+# User columns holding upload paths
+USER_FILE_FIELDS = ('profile_picture', 'valid_id_front', 'valid_id_back', 'selfie_with_id')
 
 
 class FileUploadError(Exception):
@@ -14,69 +13,25 @@ class FileUploadError(Exception):
     pass
 
 
-def get_file_path(category, municipality_slug, subcategory=None, filename=None, user_type='residents'):
-    """
-    Generate hierarchical file path based on category, municipality, and user type.
-    
-    Structure: uploads/{category}/{user_type}/{municipality_slug}/{subcategory}/{filename}
-    
-    Categories:
-    - profiles (user profile pictures)
-    - verification (ID documents)
-    - marketplace (item images)
-    - documents (generated municipal documents)
-    - issues (issue attachments)
-    - benefits (benefit application documents)
-    
-    User Types:
-    - residents (regular users)
-    - admins (municipal administrators)
-    """
-    from flask import current_app
-    upload_base_dir = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-    parts = [upload_base_dir, category, user_type, municipality_slug]
-    
-    if subcategory:
-        parts.append(subcategory)
-    
-    if filename:
-        parts.append(filename)
-    
-    return os.path.join(*parts)
-
-
-def ensure_directory_exists(directory):
-    """Create directory if it doesn't exist."""
-    if not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-
-
-def generate_unique_filename(original_filename):
-    """Generate a unique filename while preserving extension."""
-    # Get file extension
-    _, ext = os.path.splitext(original_filename)
-    
-    # Generate unique name with timestamp and UUID
-    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-    unique_id = str(uuid.uuid4())[:8]
-    
-    return f"{timestamp}_{unique_id}{ext}"
-
-
 def save_uploaded_file(file, category, municipality_slug, subcategory=None, allowed_extensions=None, max_size_mb=10, user_type='residents'):
     """
     Save an uploaded file and return the file path.
     
+    Files are stored by content (see utils.blob_store): the upload is hashed
+    while it is copied, size and type are checked on the way, and identical
+    bytes share one file. Each call adds a reference in the current
+    transaction; release it with delete_file.
+    
     Args:
         file: FileStorage object from request.files
-        category: Category of upload (profiles, marketplace, etc.)
-        municipality_slug: Municipality slug for organization
-        subcategory: Optional subcategory
+        category, municipality_slug, subcategory, user_type: Unused; the
+            storage key depends only on the content. Kept so existing call
+            sites keep working.
         allowed_extensions: Set of allowed file extensions
         max_size_mb: Maximum file size in MB
     
     Returns:
-        Relative file path from uploads directory
+        Relative file path from uploads directory (blobs/ab/cd/<sha256>.<ext>)
     """
     if not file:
         raise FileUploadError('No file provided')
@@ -89,33 +44,10 @@ def save_uploaded_file(file, category, municipality_slug, subcategory=None, allo
     
     # Validate file extension
     validate_file_extension(original_filename, allowed_extensions)
+    extension = original_filename.rsplit('.', 1)[1].lower()
     
-    # Generate unique filename
-    unique_filename = generate_unique_filename(original_filename)
-    
-    # Build directory path
-    directory = get_file_path(category, municipality_slug, subcategory, user_type=user_type)
-    ensure_directory_exists(directory)
-    
-    # Full file path
-    file_path = os.path.join(directory, unique_filename)
-    
-    # Check file size (if we can get it)
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
-    
-    validate_file_size(file_size, max_size_mb)
-    
-    # Save the file
-    file.save(file_path)
-    
-    # Return relative path (from upload directory)
-    from flask import current_app
-    upload_base_dir = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-    relative_path = os.path.relpath(file_path, upload_base_dir)
-    
-    return relative_path
+    # Stream to storage; size and content type are enforced while copying
+    return blob_store.store_upload(file, extension, max_size_mb)
 
 
 def save_profile_picture(file, user_id, municipality_slug, user_type='residents'):
@@ -220,56 +152,79 @@ def save_document_request_file(file, request_id, municipality_slug):
 
 
 def delete_file(file_path):
-    """Delete a file if it exists."""
-    full_path = os.path.join(UPLOAD_BASE_DIR, file_path)
+    """Delete an upload (content-addressed files: drop one reference, removed after commit when unused)."""
+    if not file_path:
+        return False
     
-    if os.path.exists(full_path):
-        try:
-            os.remove(full_path)
-            return True
-        except OSError:
-            return False
+    if blob_store.release(file_path):
+        return True
     
-    return False
+    try:
+        return get_storage().delete(file_path)
+    except OSError:
+        return False
 
 
 def get_file_url(file_path, base_url=None):
-    """Generate public URL for a file."""
+    """Generate public URL for a file (a presigned link with object storage)."""
     if not file_path:
         return None
     
-    if base_url is None:
-        base_url = os.getenv('BASE_URL', 'http://localhost:5000')
-    
-    return f"{base_url}/uploads/{file_path}"
+    return get_storage().url(file_path, base_url)
 
 
-def cleanup_user_files(user_id, municipality_slug):
-    """Delete all files for a user (when deleting account)."""
-    import shutil
+def replace_file(old_path, new_path):
+    """Return ``new_path`` for a field that held ``old_path``, releasing the old upload.
     
-    categories = ['profiles', 'verification']
-    subcategory = f"user_{user_id}"
-    
-    for category in categories:
-        directory = get_file_path(category, municipality_slug, subcategory)
-        if os.path.exists(directory):
-            try:
-                shutil.rmtree(directory)
-            except OSError:
-                pass
-
-
-def cleanup_item_files(item_id, municipality_slug):
-    """Delete all files for a marketplace item."""
-    import shutil
-    
-    subcategory = f"item_{item_id}"
-    directory = get_file_path('marketplace', municipality_slug, subcategory)
+    Always releases: re-uploading identical bytes returns the same path with
+    one more reference.
+    """
+    if old_path:
+        delete_file(old_path)
+    return new_path
+
+
+def cleanup_user_files(user, municipality_slug=None):
+    """Release all files of a user (when deleting account).
     
-    if os.path.exists(directory):
-        try:
-            shutil.rmtree(directory)
-        except OSError:
-            pass
+    Drops the user's references to their profile picture and verification
+    documents and clears the fields; files are removed after commit when no
+    one else uses them. With ``municipality_slug``, also deletes the per-user
+    folders of uploads saved before content addressing.
+    """
+    for field in USER_FILE_FIELDS:
+        path = getattr(user, field, None)
+        if path:
+            delete_file(path)
+            setattr(user, field, None)
+    
+    if municipality_slug:
+        subcategory = f"user_{user.id}"
+        for category in ('profiles', 'verification'):
+            for user_type in ('residents', 'admins'):
+                _delete_prefix(f"{category}/{user_type}/{municipality_slug}/{subcategory}/")
+
+
+def cleanup_item_files(item, municipality_slug=None):
+    """Release all images of a marketplace item (see cleanup_user_files)."""
+    from apps.api.utils.image_variants import entry_path
+    
+    for entry in item.images or []:
+        path = entry_path(entry)
+        if path:
+            delete_file(path)
+    item.images = []
+    
+    if municipality_slug:
+        _delete_prefix(f"marketplace/residents/{municipality_slug}/item_{item.id}/")
+
+
+def _delete_prefix(prefix):
+    """Delete every stored file under a folder-like key prefix."""
+    storage = get_storage()
+    try:
+        for key in list(storage.list(prefix)):
+            storage.delete(key)
+    except OSError:
+        pass
 
@@ -0,0 +1,166 @@
+"""Geohash helpers for map queries.
+
+Issues store a 9-character geohash (~5 m cells) next to latitude/longitude.
+A bounding box is covered by a small set of geohash prefixes, each of which
+becomes an index range scan on the ``geohash`` column; the exact lat/lng
+bounds are then applied on the narrowed rows. Clustering groups rows by a
+shorter prefix chosen from the map zoom level.
+"""
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Tuple
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+STORED_PRECISION = 9
+# Upper bound sentinel for prefix range scans: sorts after every base32 char
+PREFIX_END = '~'
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 111320.0
+
+# Geohash length used for clusters at a given web-map zoom (cells a few
+# dozen pixels wide). At or above CLUSTER_MAX_ZOOM individual pins are sent.
+_ZOOM_PRECISION = ((5, 2), (7, 3), (10, 4), (12, 5), (14, 6))
+CLUSTER_MAX_ZOOM = 15
+
+
+def encode(lat: float, lng: float, precision: int = STORED_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars: List[str] = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                value = (value << 1) | 1
+                lng_lo = mid
+            else:
+                value <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def decode_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Return ``(south, west, north, east)`` of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for ch in geohash:
+        value = _DECODE[ch]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Return ``(lat_degrees, lng_degrees)`` of a cell at ``precision``."""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def encode_or_none(lat, lng, precision: int = STORED_PRECISION) -> Optional[str]:
+    """Geohash for valid coordinates, else ``None``."""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(lat) or math.isnan(lng) or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return encode(lat, lng, precision)
+
+
+def cover_bbox(south: float, west: float, north: float, east: float, max_cells: int = 32) -> List[str]:
+    """Geohash prefixes covering a bounding box.
+
+    Picks the longest precision whose covering has at most ``max_cells``
+    cells, so the query becomes a handful of index range scans.
+    """
+    best: List[str] = []
+    for precision in range(1, STORED_PRECISION + 1):
+        dlat, dlng = cell_size(precision)
+        rows = math.floor(north / dlat) - math.floor(south / dlat) + 1
+        cols = math.floor(east / dlng) - math.floor(west / dlng) + 1
+        if rows * cols > max_cells:
+            break
+        cells = []
+        for r in range(rows):
+            lat = min(north, (math.floor(south / dlat) + r) * dlat + dlat / 2)
+            for c in range(cols):
+                lng = min(east, (math.floor(west / dlng) + c) * dlng + dlng / 2)
+                cells.append(encode(max(-90.0, min(90.0, lat)), max(-180.0, min(180.0, lng)), precision))
+        best = sorted(set(cells))
+    return best or ['']
+
+
+def cluster_precision(zoom: int) -> Optional[int]:
+    """Geohash length to cluster by at ``zoom``; ``None`` means send pins."""
+    if zoom >= CLUSTER_MAX_ZOOM:
+        return None
+    for max_zoom, precision in _ZOOM_PRECISION:
+        if zoom <= max_zoom:
+            return precision
+    return 7
+
+
+def neighbors(geohash: str) -> List[str]:
+    """The cell itself and its (up to) eight neighbours at the same precision."""
+    south, west, north, east = decode_bounds(geohash)
+    dlat, dlng = north - south, east - west
+    lat_c, lng_c = (south + north) / 2, (west + east) / 2
+    cells = set()
+    for dy in (-1, 0, 1):
+        lat = lat_c + dy * dlat
+        if not -90 <= lat <= 90:
+            continue
+        for dx in (-1, 0, 1):
+            lng = (lng_c + dx * dlng + 180) % 360 - 180
+            cells.add(encode(lat, lng, len(geohash)))
+    return sorted(cells)
+
+
+def precision_for_radius(radius_m: float, lat: float) -> int:
+    """Longest geohash length whose cells are at least ``radius_m`` on each side.
+
+    A point's cell plus its neighbours then contains every point within
+    ``radius_m`` of it.
+    """
+    lng_scale = max(math.cos(math.radians(lat)), 0.01)
+    for precision in range(STORED_PRECISION, 0, -1):
+        dlat, dlng = cell_size(precision)
+        if dlat * METERS_PER_DEGREE >= radius_m and dlng * METERS_PER_DEGREE * lng_scale >= radius_m:
+            return precision
+    return 1
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,94 @@
+"""HTTP caching helpers for public read endpoints.
+
+Provides a ``conditional_get`` decorator that computes a cheap validator
+(row count, max ``updated_at`` or similar aggregate) *before* the full query
+runs. When the client's ``If-None-Match`` matches, the view is skipped and a
+``304 Not Modified`` is returned; otherwise the view runs and the response is
+tagged with an ``ETag`` and the endpoint's ``Cache-Control`` policy.
+"""
+from __future__ import annotations
+
+import hashlib
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from flask import request, make_response
+from sqlalchemy import func
+
+try:
+    from apps.api import db
+except ImportError:
+    from __init__ import db
+
+
+# Cache-Control policies shared by the public endpoints
+REFERENCE_CACHE_CONTROL = 'public, max-age=300, stale-while-revalidate=60'
+LISTING_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+
+def table_fingerprint(model, *criteria, column=None) -> tuple:
+    """Return ``(count, max(column))`` for ``model`` filtered by ``criteria``.
+
+    ``column`` defaults to ``model.updated_at``. This is a single aggregate
+    query and is far cheaper than loading and serializing the rows.
+    """
+    col = column if column is not None else model.updated_at
+    q = db.session.query(func.count(model.id), func.max(col))
+    if criteria:
+        q = q.filter(*criteria)
+    count, latest = q.one()
+    return int(count or 0), (latest.isoformat() if hasattr(latest, 'isoformat') else latest)
+
+
+def content_fingerprint(model) -> tuple:
+    """Return ``(count, sha1 of every row)`` for a small table without ``updated_at``.
+
+    Unlike ``table_fingerprint`` on the id, this changes on in-place edits
+    (renames, ``is_active`` toggles, seed re-runs). It reads the whole table,
+    so keep it to lookup tables of a few hundred rows.
+    """
+    rows = db.session.query(*model.__table__.columns).order_by(model.id).all()
+    return len(rows), hashlib.sha1(repr([tuple(r) for r in rows]).encode('utf-8')).hexdigest()
+
+
+def _make_etag(token: Any) -> str:
+    # Query string is part of the representation (filters, pagination)
+    raw = f"{request.path}?{request.query_string.decode('utf-8', 'ignore')}|{token!r}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def conditional_get(validator: Callable[..., Optional[Any]], cache_control: str = LISTING_CACHE_CONTROL):
+    """Decorate a GET view with ETag validation.
+
+    Args:
+        validator: Called with the view's arguments; returns any hashable/reprable
+            token describing the current state of the data, or ``None`` when the
+            response must not be served from a validator (always run the view).
+        cache_control: ``Cache-Control`` header value for 200 and 304 responses.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                token = validator(*args, **kwargs)
+            except Exception:
+                # Never let a validator failure break the endpoint
+                db.session.rollback()
+                token = None
+            if token is None:
+                return fn(*args, **kwargs)
+
+            etag = _make_etag(token)
+            if request.if_none_match and request.if_none_match.contains_weak(etag):
+                resp = make_response('', 304)
+                resp.set_etag(etag, weak=True)
+                resp.headers['Cache-Control'] = cache_control
+                return resp
+
+            resp = make_response(fn(*args, **kwargs))
+            if resp.status_code == 200:
+                resp.set_etag(etag, weak=True)
+                resp.headers['Cache-Control'] = cache_control
+            return resp
+        return wrapper
+    return decorator
@@ -0,0 +1,251 @@
+"""Resized, metadata-free variants of marketplace and announcement photos.
+
+Uploads keep the original (up to 5 MB, straight from a phone camera, EXIF and
+GPS included). After the upload commits, ``schedule_image_variants`` hands the
+row to a small background pool, which stores next to the original:
+
+    <name>.thumb.webp / .thumb.jpg    320 px long edge    list cards
+    <name>.card.webp  / .card.jpg     800 px              detail views
+    <name>.full.webp  / .full.jpg     1600 px             full screen
+
+EXIF orientation is applied to the pixels and the metadata is dropped. The
+entry in ``Item.images`` / ``Announcement.images`` then changes from the
+original's path to::
+
+    {"path": <original>, "width": .., "height": ..,
+     "variants": {"thumb": {"webp": .., "jpeg": .., "width": .., "height": ..}, ...}}
+
+Plain path entries (not processed yet, or uploaded before variants existed)
+stay valid everywhere; ``scripts/backfill_image_variants.py`` converts them.
+``image_fields`` builds the API fields: ``images`` stays a list of paths (the
+``full`` WebP once available), plus ``thumbnails`` and ``image_variants``.
+Public payloads only carry the variants; the original (and any entry not
+processed yet) is listed for the owner and admins only.
+
+``IMAGE_VARIANT_EXECUTOR``: ``thread`` (default) or ``inline`` (tests). Work
+lost to a restart is picked up by the backfill.
+"""
+from __future__ import annotations
+
+import io
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import current_app
+from PIL import Image, ImageOps
+
+try:
+    from apps.api import db
+    from apps.api.utils.storage import clean_key, get_storage
+except ImportError:
+    from __init__ import db
+    from utils.storage import clean_key, get_storage
+
+
+# (name, longest edge in px), largest first: each variant is scaled from the previous one
+VARIANTS = (('full', 1600), ('card', 800), ('thumb', 320))
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+_executor_lock = threading.Lock()
+
+
+def _models() -> Dict[str, Any]:
+    try:
+        from apps.api.models.announcement import Announcement
+        from apps.api.models.marketplace import Item
+    except ImportError:
+        from models.announcement import Announcement
+        from models.marketplace import Item
+    return {'item': Item, 'announcement': Announcement}
+
+
+def entry_path(entry) -> Optional[str]:
+    """Original upload path of an ``images`` entry (path string or variant dict)."""
+    if isinstance(entry, dict):
+        return entry.get('path')
+    return entry or None
+
+
+def variant_path(entry, variant: str = 'full', fmt: str = 'webp') -> Optional[str]:
+    """Path of one variant of an entry, falling back to the original."""
+    if isinstance(entry, dict):
+        v = (entry.get('variants') or {}).get(variant) or {}
+        return v.get(fmt) or v.get('jpeg') or entry.get('path')
+    return entry or None
+
+
+def _entry_paths(entry) -> List[str]:
+    paths = [entry_path(entry)]
+    if isinstance(entry, dict):
+        for v in (entry.get('variants') or {}).values():
+            paths += [v.get('webp'), v.get('jpeg')]
+    return [p for p in paths if p]
+
+
+def image_fields(images, include_originals: bool = False) -> Dict[str, list]:
+    """``images``, ``thumbnails`` and ``image_variants`` for API payloads.
+
+    Originals keep the camera's EXIF/GPS, so they are left out unless
+    ``include_originals`` (owner and admin views): entries without variants
+    are skipped and the variant entries lose their ``path``.
+    """
+    entries = [e for e in (images or []) if entry_path(e)]
+    if include_originals:
+        listed = [e if isinstance(e, dict) else {'path': e} for e in entries]
+    else:
+        entries = [e for e in entries if isinstance(e, dict) and e.get('variants')]
+        listed = [{k: v for k, v in e.items() if k != 'path'} for e in entries]
+    return {
+        'images': [variant_path(e, 'full') for e in entries],
+        'thumbnails': [variant_path(e, 'thumb') for e in entries],
+        'image_variants': listed,
+    }
+
+
+def retain_images(stored, requested: Iterable) -> list:
+    """Apply a client's edited image list to the stored entries.
+
+    Clients send back the paths they were given (any variant or the
+    original); matching entries are kept whole, in the requested order.
+    Edits should start from an ``include_originals`` payload, which lists
+    the entries that have no variants yet.
+    Paths that are not stored images are ignored: images are added through
+    the upload endpoints, which hold a storage reference for each one.
+    """
+    available = list(stored or [])
+    kept: list = []
+    for p in requested:
+        p = entry_path(p)
+        if not isinstance(p, str):
+            continue
+        for i, entry in enumerate(available):
+            if p in _entry_paths(entry):
+                kept.append(available.pop(i))
+                break
+    return kept
+
+
+def dropped_images(stored, kept) -> List[str]:
+    """Upload paths of ``stored`` entries that are not in ``kept`` (to release)."""
+    remaining = [entry_path(e) for e in kept or []]
+    dropped = []
+    for entry in stored or []:
+        path = entry_path(entry)
+        if path in remaining:
+            remaining.remove(path)
+        elif path:
+            dropped.append(path)
+    return dropped
+
+
+def flatten_rgb(im: Image.Image) -> Image.Image:
+    """``im`` flattened onto white, for JPEG."""
+    if im.mode == 'RGB':
+        return im
+    if im.mode in ('RGBA', 'LA'):
+        bg = Image.new('RGB', im.size, (255, 255, 255))
+        bg.paste(im, mask=im.getchannel('A'))
+        return bg
+    return im.convert('RGB')
+
+
+def build_variants(rel_path: str) -> Dict[str, Any]:
+    """Write the variants of the upload at ``rel_path``; returns its ``images`` entry."""
+    storage = get_storage()
+    try:
+        key = clean_key(rel_path)
+    except FileNotFoundError:
+        raise ValueError(f'Image path outside the upload folder: {rel_path}')
+    stem = posixpath.splitext(key)[0]
+    src = storage.local_path(key) or io.BytesIO(storage.read_bytes(key))
+
+    with Image.open(src) as im:
+        width, height = im.size
+        if im.getexif().get(0x0112) in (5, 6, 7, 8):  # stored rotated by 90 degrees
+            width, height = height, width
+        largest = VARIANTS[0][1]
+        # Let the JPEG decoder downscale by a power of two when the original is huge
+        im.draft('RGB', (largest, largest))
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ('RGB', 'RGBA'):
+            has_alpha = im.mode in ('LA', 'PA') or 'transparency' in im.info
+            im = im.convert('RGBA' if has_alpha else 'RGB')
+        im.info = {}  # no EXIF/XMP/comments in the variants
+
+        variants: Dict[str, Dict[str, Any]] = {}
+        current = im
+        for name, edge in VARIANTS:
+            current = current.copy()
+            current.thumbnail((edge, edge), Image.LANCZOS)
+            webp, jpeg = io.BytesIO(), io.BytesIO()
+            current.save(webp, 'WEBP', quality=WEBP_QUALITY, method=4)
+            flatten_rgb(current).save(jpeg, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+            variants[name] = {
+                'webp': storage.save(f'{stem}.{name}.webp', webp.getvalue()),
+                'jpeg': storage.save(f'{stem}.{name}.jpg', jpeg.getvalue()),
+                'width': current.width,
+                'height': current.height,
+            }
+
+    return {'path': rel_path, 'width': width, 'height': height, 'variants': variants}
+
+
+def process_images(kind: str, obj_id: int) -> int:
+    """Build variants for every plain entry of one row; returns how many were converted."""
+    model = _models()[kind]
+    obj = db.session.get(model, obj_id)
+    if obj is None:
+        return 0
+    built = {}
+    for entry in list(obj.images or []):
+        if isinstance(entry, str) and entry not in built:
+            try:
+                built[entry] = build_variants(entry)
+            except Exception as e:
+                current_app.logger.warning('Image variants for %s %s (%s) failed: %s', kind, obj_id, entry, e)
+    if not built:
+        return 0
+    # Apply to the latest list: the owner may have edited it meanwhile
+    db.session.refresh(obj)
+    obj.images = [built.get(e, e) if isinstance(e, str) else e for e in (obj.images or [])]
+    db.session.commit()
+    return len(built)
+
+
+def _run(app, kind: str, obj_id: int) -> None:
+    with app.app_context():
+        try:
+            process_images(kind, obj_id)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Image variants for %s %s failed', kind, obj_id)
+        finally:
+            db.session.remove()
+
+
+def _executor(app) -> ThreadPoolExecutor:
+    executor = app.extensions.get('image_variants')
+    if executor is None:
+        with _executor_lock:
+            executor = app.extensions.get('image_variants')
+            if executor is None:
+                workers = max(1, int(app.config.get('IMAGE_VARIANT_WORKERS', 1)))
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-variants')
+                app.extensions['image_variants'] = executor
+    return executor
+
+
+def schedule_image_variants(kind: str, obj_id: int) -> None:
+    """Build variants for a row's new uploads off the request path (``kind``: item, announcement)."""
+    app = current_app._get_current_object()
+    if app.config.get('IMAGE_VARIANT_EXECUTOR', 'thread') == 'inline':
+        try:
+            process_images(kind, obj_id)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Image variants for %s %s failed', kind, obj_id)
+        return
+    _executor(app).submit(_run, app, kind, obj_id)
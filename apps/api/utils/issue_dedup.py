@@ -0,0 +1,172 @@
+"""Near-duplicate detection for resident issue reports.
+
+Each issue carries a MinHash signature (``Issue.text_signature``) of the
+character 4-gram shingles of its normalized title + description; the share of
+equal slots between two signatures estimates the Jaccard similarity of their
+shingle sets, so "pothole sa may Rizal St." and "Malaking pothole Rizal street"
+compare without a full text diff.
+
+Candidates are bounded before any text is compared: same municipality and
+category, still open, reported recently, and located in the reporter's
+geohash cell or one of its eight neighbours, with the cell length chosen so
+the 3x3 block covers ``radius_m``. Those are prefix range scans on
+``idx_issue_geohash``, so the work grows with the reports near the pin, not
+with the table. Reports without coordinates fall back to the same barangay.
+
+A match links the new report to the canonical issue (``duplicate_of_id``);
+chains are flattened so every duplicate points at the root report.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+try:
+    from apps.api.models.issue import Issue
+    from apps.api.utils.geo import encode_or_none, haversine_m, neighbors, precision_for_radius, PREFIX_END
+    from apps.api.utils.location_index import normalize_name
+except ImportError:
+    from models.issue import Issue
+    from utils.geo import encode_or_none, haversine_m, neighbors, precision_for_radius, PREFIX_END
+    from utils.location_index import normalize_name
+
+
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 4
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Deterministic permutation coefficients; changing them invalidates stored signatures
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(f'a{i}'.encode(), digest_size=8).digest(), 'big') % (_PRIME - 1) + 1,
+        int.from_bytes(hashlib.blake2b(f'b{i}'.encode(), digest_size=8).digest(), 'big') % _PRIME,
+    )
+    for i in range(NUM_PERMUTATIONS)
+]
+
+OPEN_STATUSES = ('submitted', 'under_review', 'in_progress')
+DEFAULT_RADIUS_M = 100
+DEFAULT_THRESHOLD = 0.35
+DEFAULT_WINDOW_DAYS = 30
+MAX_CANDIDATES = 200
+
+
+def shingles(text: str) -> set:
+    """Character shingles of the normalized, whitespace-collapsed text."""
+    words = re.findall(r'[a-z0-9]+', normalize_name(text or ''))
+    joined = ' '.join(words)
+    if not joined:
+        return set()
+    if len(joined) <= SHINGLE_SIZE:
+        return {joined}
+    return {joined[i:i + SHINGLE_SIZE] for i in range(len(joined) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> Optional[List[int]]:
+    """MinHash signature of ``text`` (``None`` when it has no words)."""
+    grams = shingles(text)
+    if not grams:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), 'big') for g in grams]
+    return [min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in _PERMUTATIONS]
+
+
+def issue_signature(issue) -> Optional[List[int]]:
+    return signature(f'{issue.title or ""} {issue.description or ""}')
+
+
+def estimate_jaccard(sig_a: Optional[Sequence[int]], sig_b: Optional[Sequence[int]]) -> float:
+    if not sig_a or not sig_b or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def _settings(radius_m, threshold, window_days) -> Tuple[float, float, int]:
+    config = current_app.config
+    return (
+        float(radius_m if radius_m is not None else config.get('ISSUE_DUPLICATE_RADIUS_M', DEFAULT_RADIUS_M)),
+        float(threshold if threshold is not None else config.get('ISSUE_DUPLICATE_THRESHOLD', DEFAULT_THRESHOLD)),
+        int(window_days if window_days is not None else config.get('ISSUE_DUPLICATE_WINDOW_DAYS', DEFAULT_WINDOW_DAYS)),
+    )
+
+
+def _candidate_query(issue, radius_m: float, window_days: int):
+    query = Issue.query.filter(
+        Issue.municipality_id == issue.municipality_id,
+        Issue.category_id == issue.category_id,
+        Issue.status.in_(OPEN_STATUSES),
+        Issue.created_at >= datetime.utcnow() - timedelta(days=window_days),
+    )
+    if issue.id is not None:
+        query = query.filter(Issue.id != issue.id)
+
+    point = encode_or_none(issue.latitude, issue.longitude)
+    if point:
+        cells = neighbors(point[:precision_for_radius(radius_m, float(issue.latitude))])
+        return query.filter(or_(*[
+            and_(Issue.geohash >= cell, Issue.geohash < cell + PREFIX_END) for cell in cells
+        ]))
+    if issue.barangay_id:
+        return query.filter(Issue.barangay_id == issue.barangay_id)
+    return None
+
+
+def find_duplicates(issue, radius_m: Optional[float] = None, threshold: Optional[float] = None,
+                    window_days: Optional[int] = None) -> List[Tuple[Issue, float, Optional[float]]]:
+    """Open issues that look like the same report as ``issue``.
+
+    Returns ``(candidate, similarity, distance_m)`` tuples, best first.
+    ``distance_m`` is ``None`` for barangay-only matches.
+    """
+    radius_m, threshold, window_days = _settings(radius_m, threshold, window_days)
+    if issue.text_signature is None:
+        issue.text_signature = issue_signature(issue)
+    sig = issue.text_signature
+    if not sig:
+        return []
+    query = _candidate_query(issue, radius_m, window_days)
+    if query is None:
+        return []
+
+    matches = []
+    for candidate in query.order_by(Issue.created_at.desc()).limit(MAX_CANDIDATES):
+        distance = None
+        if issue.latitude is not None and issue.longitude is not None:
+            if candidate.latitude is None or candidate.longitude is None:
+                continue
+            distance = haversine_m(float(issue.latitude), float(issue.longitude),
+                                   candidate.latitude, candidate.longitude)
+            if distance > radius_m:
+                continue
+        similarity = estimate_jaccard(sig, candidate.text_signature or issue_signature(candidate))
+        if similarity >= threshold:
+            matches.append((candidate, similarity, distance))
+    matches.sort(key=lambda m: (-m[1], m[2] if m[2] is not None else radius_m))
+    return matches
+
+
+def canonical_of(issue) -> Issue:
+    return issue.duplicate_of if issue.duplicate_of_id else issue
+
+
+def link_duplicate(issue, **kwargs) -> Optional[Issue]:
+    """Point ``issue`` at the canonical report of its best match, if any.
+
+    Returns the canonical issue (caller commits).
+    """
+    if not current_app.config.get('ISSUE_DUPLICATE_DETECTION', True):
+        return None
+    matches = find_duplicates(issue, **kwargs)
+    if not matches:
+        return None
+    canonical = canonical_of(matches[0][0])
+    if canonical is issue:
+        return None
+    issue.duplicate_of = canonical
+    return canonical
@@ -0,0 +1,285 @@
+"""Indexed, read-only lookup over the Philippine location dataset.
+
+``Config.LOCATION_DATA_FILE`` is a ~900 KB JSON document shaped
+``{province: {municipality: [barangay, ...]}}``. Parsing it in every worker
+costs tens of MB of Python objects. Instead, the JSON is compiled once into a
+small SQLite file (``Config.LOCATION_INDEX_FILE``) with B-tree indexes on a
+normalized name key. Workers open it read-only with ``mmap_size`` set, so the
+pages live in the OS page cache and are shared between gunicorn workers.
+
+The index is rebuilt automatically when the source JSON changes (size/mtime
+recorded in a ``meta`` table); the write goes to a temp file and is renamed
+into place so concurrent workers never see a partial file.
+
+Usage::
+
+    from apps.api.utils.location_index import get_location_index
+    idx = get_location_index()
+    idx.municipalities('Zambales')
+    idx.barangays('Zambales', 'Iba')
+    idx.autocomplete('san m', kind='municipality', province='Zambales')
+
+Served by ``routes/locations.py`` (``/api/locations``).
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from flask import current_app
+
+
+SCHEMA_VERSION = '1'
+MMAP_SIZE = 64 * 1024 * 1024  # upper bound; the compiled file is far smaller
+KINDS = ('province', 'municipality', 'barangay')
+
+
+def normalize_name(value: str) -> str:
+    """Case- and accent-insensitive key (``'Bañacao'`` -> ``'banacao'``)."""
+    text = unicodedata.normalize('NFKD', value or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+
+def _prefix_bounds(prefix: str):
+    key = normalize_name(prefix)
+    return key, key + '\U0010ffff'
+
+
+def _source_stamp(source: Path) -> str:
+    st = source.stat()
+    return f'{SCHEMA_VERSION}:{st.st_size}:{int(st.st_mtime)}'
+
+
+def compile_location_index(source, target) -> Path:
+    """Compile ``source`` JSON into a SQLite index at ``target`` (atomic replace)."""
+    source, target = Path(source), Path(target)
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.locations-', suffix='.sqlite', dir=str(target.parent))
+    os.close(fd)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(
+            """
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE province (
+                id INTEGER PRIMARY KEY, name TEXT NOT NULL, name_key TEXT NOT NULL
+            );
+            CREATE TABLE municipality (
+                id INTEGER PRIMARY KEY, province_id INTEGER NOT NULL,
+                name TEXT NOT NULL, name_key TEXT NOT NULL
+            );
+            CREATE TABLE barangay (
+                id INTEGER PRIMARY KEY, municipality_id INTEGER NOT NULL,
+                name TEXT NOT NULL, name_key TEXT NOT NULL
+            );
+            """
+        )
+        provinces, municipalities, barangays = [], [], []
+        mun_id = brgy_id = 0
+        for prov_id, (prov_name, towns) in enumerate(sorted(data.items()), start=1):
+            provinces.append((prov_id, prov_name, normalize_name(prov_name)))
+            for mun_name, brgys in sorted((towns or {}).items()):
+                mun_id += 1
+                municipalities.append((mun_id, prov_id, mun_name, normalize_name(mun_name)))
+                for brgy_name in sorted(brgys or []):
+                    brgy_id += 1
+                    barangays.append((brgy_id, mun_id, brgy_name, normalize_name(brgy_name)))
+
+        conn.executemany('INSERT INTO province VALUES (?, ?, ?)', provinces)
+        conn.executemany('INSERT INTO municipality VALUES (?, ?, ?, ?)', municipalities)
+        conn.executemany('INSERT INTO barangay VALUES (?, ?, ?, ?)', barangays)
+        conn.executescript(
+            """
+            CREATE UNIQUE INDEX ix_province_key ON province (name_key);
+            CREATE INDEX ix_municipality_parent ON municipality (province_id, name_key);
+            CREATE INDEX ix_municipality_key ON municipality (name_key);
+            CREATE INDEX ix_barangay_parent ON barangay (municipality_id, name_key);
+            CREATE INDEX ix_barangay_key ON barangay (name_key);
+            """
+        )
+        conn.execute('INSERT INTO meta VALUES (?, ?)', ('source_stamp', _source_stamp(source)))
+        conn.commit()
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+    os.replace(tmp_path, target)
+    return target
+
+
+def _index_is_current(source: Path, target: Path) -> bool:
+    if not target.exists():
+        return False
+    try:
+        conn = sqlite3.connect(f'file:{target}?mode=ro', uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source_stamp'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return bool(row) and row[0] == _source_stamp(source)
+
+
+class LocationIndex:
+    """Read-only province -> municipality -> barangay lookups.
+
+    One SQLite connection per thread; all connections map the same file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f'file:{self.path}?mode=ro&immutable=1', uri=True, check_same_thread=False)
+            conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+            conn.execute('PRAGMA query_only = 1')
+            self._local.conn = conn
+        return conn
+
+    def _province_id(self, province: str) -> Optional[int]:
+        row = self._conn().execute(
+            'SELECT id FROM province WHERE name_key = ?', (normalize_name(province),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _municipality_id(self, province: str, municipality: str) -> Optional[int]:
+        row = self._conn().execute(
+            'SELECT m.id FROM municipality m JOIN province p ON p.id = m.province_id '
+            'WHERE p.name_key = ? AND m.name_key = ?',
+            (normalize_name(province), normalize_name(municipality)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def source_stamp(self) -> Optional[str]:
+        """Stamp of the JSON the index was compiled from (changes with its contents)."""
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'source_stamp'").fetchone()
+        return row[0] if row else None
+
+    def provinces(self) -> List[str]:
+        return [r[0] for r in self._conn().execute('SELECT name FROM province ORDER BY name_key')]
+
+    def municipalities(self, province: str) -> List[str]:
+        pid = self._province_id(province)
+        if pid is None:
+            return []
+        rows = self._conn().execute(
+            'SELECT name FROM municipality WHERE province_id = ? ORDER BY name_key', (pid,)
+        )
+        return [r[0] for r in rows]
+
+    def barangays(self, province: str, municipality: str) -> List[str]:
+        mid = self._municipality_id(province, municipality)
+        if mid is None:
+            return []
+        rows = self._conn().execute(
+            'SELECT name FROM barangay WHERE municipality_id = ? ORDER BY name_key', (mid,)
+        )
+        return [r[0] for r in rows]
+
+    def has_barangay(self, province: str, municipality: str, barangay: str) -> bool:
+        mid = self._municipality_id(province, municipality)
+        if mid is None:
+            return False
+        row = self._conn().execute(
+            'SELECT 1 FROM barangay WHERE municipality_id = ? AND name_key = ?',
+            (mid, normalize_name(barangay)),
+        ).fetchone()
+        return row is not None
+
+    def autocomplete(self, prefix: str, kind: Optional[str] = None, province: Optional[str] = None,
+                     municipality: Optional[str] = None, limit: int = 10) -> List[Dict[str, Optional[str]]]:
+        """Prefix search over names using an index range scan.
+
+        Args:
+            prefix: Typed text; matched case/accent-insensitively.
+            kind: Restrict to ``'province'``, ``'municipality'`` or ``'barangay'``.
+            province / municipality: Optional parent scope.
+            limit: Max results per call.
+        """
+        lo, hi = _prefix_bounds(prefix)
+        if not lo:
+            return []
+        kinds = (kind,) if kind else KINDS
+        conn = self._conn()
+        results: List[Dict[str, Optional[str]]] = []
+
+        if 'province' in kinds and not province and not municipality:
+            rows = conn.execute(
+                'SELECT name FROM province WHERE name_key >= ? AND name_key < ? ORDER BY name_key LIMIT ?',
+                (lo, hi, limit),
+            )
+            results.extend({'type': 'province', 'name': r[0], 'province': None, 'municipality': None} for r in rows)
+
+        if 'municipality' in kinds and not municipality and len(results) < limit:
+            sql = ('SELECT m.name, p.name FROM municipality m JOIN province p ON p.id = m.province_id '
+                   'WHERE m.name_key >= ? AND m.name_key < ?')
+            params: list = [lo, hi]
+            if province:
+                sql += ' AND p.name_key = ?'
+                params.append(normalize_name(province))
+            sql += ' ORDER BY m.name_key LIMIT ?'
+            params.append(limit - len(results))
+            results.extend(
+                {'type': 'municipality', 'name': r[0], 'province': r[1], 'municipality': None}
+                for r in conn.execute(sql, params)
+            )
+
+        if 'barangay' in kinds and len(results) < limit:
+            sql = ('SELECT b.name, m.name, p.name FROM barangay b '
+                   'JOIN municipality m ON m.id = b.municipality_id '
+                   'JOIN province p ON p.id = m.province_id '
+                   'WHERE b.name_key >= ? AND b.name_key < ?')
+            params = [lo, hi]
+            if province:
+                sql += ' AND p.name_key = ?'
+                params.append(normalize_name(province))
+            if municipality:
+                sql += ' AND m.name_key = ?'
+                params.append(normalize_name(municipality))
+            sql += ' ORDER BY b.name_key LIMIT ?'
+            params.append(limit - len(results))
+            results.extend(
+                {'type': 'barangay', 'name': r[0], 'province': r[2], 'municipality': r[1]}
+                for r in conn.execute(sql, params)
+            )
+
+        return results[:limit]
+
+
+def open_location_index(source, target) -> LocationIndex:
+    """Compile ``source`` into ``target`` if missing/outdated and open it."""
+    source, target = Path(source), Path(target)
+    if not _index_is_current(source, target):
+        compile_location_index(source, target)
+    return LocationIndex(target)
+
+
+_index_lock = threading.Lock()
+
+
+def get_location_index(app=None) -> LocationIndex:
+    """Per-app (per-worker) ``LocationIndex`` built from the configured paths."""
+    app = app or current_app._get_current_object()
+    idx = app.extensions.get('location_index')
+    if idx is None:
+        with _index_lock:
+            idx = app.extensions.get('location_index')
+            if idx is None:
+                idx = open_location_index(app.config['LOCATION_DATA_FILE'], app.config['LOCATION_INDEX_FILE'])
+                app.extensions['location_index'] = idx
+    return idx
@@ -0,0 +1,270 @@
+"""Resized images on demand: ``/media/<path>?w=&h=&fmt=``.
+
+Uploads (profile pictures, ID scans, item photos) and the public logo and
+landmark folders hold full-resolution files, some 1080 px+ PNGs, that pages
+show at a fraction of that size. ``/media`` serves them scaled to fit ``w`` x
+``h`` (never enlarged), optionally converted to ``webp``, ``jpeg`` or ``png``,
+with EXIF orientation applied and metadata dropped.
+
+- ``w`` and ``h`` must be in ``MEDIA_SIZES`` so clients cannot fill the cache
+  with arbitrary sizes.
+- Derivatives are written to ``MEDIA_CACHE_DIR`` under a hash of the source
+  path, its mtime and size, and the parameters, so a replaced source gets new
+  derivatives. When the directory grows past ``MEDIA_CACHE_MAX_BYTES`` the
+  least recently used files are deleted (use refreshes the file mtime, at
+  most once per ``TOUCH_INTERVAL``).
+- Responses are ``public, max-age=<1 year>, immutable`` with an ETag from
+  the cache key. Upload names are unique and never rewritten; for a replaced
+  logo, clients should add a version parameter (``&v=``), which is ignored here.
+
+Paths starting with a ``MEDIA_PUBLIC_DIRS`` name (``logos/``, ``landmarks/``)
+are read from that folder, everything else from upload storage
+(``utils.storage``).
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+from flask import current_app, send_file
+from PIL import Image, ImageOps
+
+try:
+    from apps.api.utils.image_variants import flatten_rgb
+    from apps.api.utils.storage import clean_key, get_storage
+except ImportError:
+    from utils.image_variants import flatten_rgb
+    from utils.storage import clean_key, get_storage
+
+
+FORMATS = {  # fmt parameter -> (Pillow format, extension, mimetype)
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+    'jpg': ('JPEG', 'jpg', 'image/jpeg'),
+    'png': ('PNG', 'png', 'image/png'),
+}
+SOURCE_FORMATS = {'JPEG': 'jpeg', 'PNG': 'png', 'WEBP': 'webp'}  # kept when no fmt is given; others -> png
+EXTENSION_FORMATS = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png', '.webp': 'webp'}
+QUALITY = {'WEBP': 80, 'JPEG': 82}
+MAX_AGE = 365 * 24 * 3600
+TOUCH_INTERVAL = 3600  # seconds
+EVICT_TO = 0.8  # of MEDIA_CACHE_MAX_BYTES after an eviction pass
+
+
+class MediaRequestError(ValueError):
+    """Bad ``/media`` parameters (answered with 400)."""
+
+
+class MediaCache:
+    """Size-bounded directory of derivatives, evicted least recently used first."""
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._usage: Optional[int] = None  # bytes on disk, counted on first write
+        self._key_locks = [threading.Lock() for _ in range(16)]
+
+    def path(self, key: str, ext: str) -> Path:
+        return self.directory / key[:2] / f'{key}.{ext}'
+
+    def key_lock(self, key: str) -> threading.Lock:
+        """Lock for one key, so concurrent requests render a derivative once."""
+        return self._key_locks[int(key[:4], 16) % len(self._key_locks)]
+
+    def get(self, key: str, ext: str) -> Optional[Path]:
+        path = self.path(key, ext)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        if time.time() - mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+    def put(self, key: str, ext: str, data: bytes) -> Path:
+        path = self.path(key, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._usage is None:
+                self._usage = self._scan_size()
+            else:
+                self._usage += len(data)
+            over = self._usage > self.max_bytes
+        if over:
+            self.evict()
+        return path
+
+    def _files(self):
+        if not self.directory.exists():
+            return []
+        files = []
+        for f in self.directory.glob('*/*'):
+            if f.suffix == '.tmp':
+                continue
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, f))
+        return files
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def evict(self) -> int:
+        """Delete the least recently used files until usage is under ``EVICT_TO`` of the limit."""
+        with self._lock:
+            files = sorted(self._files(), key=lambda t: t[0])
+            usage = sum(size for _, size, _ in files)
+            target = self.max_bytes * EVICT_TO
+            removed = 0
+            for _, size, f in files:
+                if usage <= target:
+                    break
+                try:
+                    f.unlink()
+                except OSError:
+                    continue
+                usage -= size
+                removed += 1
+            self._usage = usage
+            return removed
+
+
+def media_cache(app=None) -> MediaCache:
+    """The app's ``MediaCache`` (created on first use)."""
+    app = app or current_app._get_current_object()
+    cache = app.extensions.get('media_cache')
+    if cache is None:
+        directory = app.config.get('MEDIA_CACHE_DIR') or Path(app.config.get('UPLOAD_FOLDER', 'uploads')) / 'cache' / 'media'
+        cache = app.extensions.setdefault('media_cache', MediaCache(directory, app.config.get('MEDIA_CACHE_MAX_BYTES', 512 * 1024 * 1024)))
+    return cache
+
+
+def _resolve(filename: str) -> Tuple[str, Tuple[int, int], Optional[Path], Callable[[], Any]]:
+    """Source of a ``/media`` path, confined to its root folder.
+
+    Returns ``(identity, (size, mtime_ns), local path or None, load)``; ``load()``
+    gives Pillow a path or, for object storage, the downloaded bytes.
+    """
+    head, _, rest = filename.replace('\\', '/').lstrip('/').partition('/')
+    public = current_app.config.get('MEDIA_PUBLIC_DIRS') or {}
+    if head in public and rest:
+        base = Path(public[head]).resolve()
+        path = (base / rest).resolve()
+        if base not in path.parents:
+            raise FileNotFoundError(filename)
+    else:
+        storage = get_storage()
+        key = clean_key(filename)
+        path = storage.local_path(key)
+        if path is None:
+            stat = storage.stat(key)
+            if stat is None:
+                raise FileNotFoundError(filename)
+            return f'storage:{key}', stat, None, lambda: io.BytesIO(storage.read_bytes(key))
+    if not path.is_file():
+        raise FileNotFoundError(filename)
+    st = path.stat()
+    return str(path), (st.st_size, st.st_mtime_ns), path, lambda: path
+
+
+def _size_param(args: Mapping, name: str) -> Optional[int]:
+    raw = args.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise MediaRequestError(f'{name} must be an integer')
+    allowed = current_app.config.get('MEDIA_SIZES') or ()
+    if value not in allowed:
+        raise MediaRequestError(f'{name} must be one of {", ".join(str(s) for s in sorted(allowed))}')
+    return value
+
+
+def parse_media_params(args: Mapping) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """``(w, h, fmt)`` from query parameters; raises ``MediaRequestError``."""
+    fmt = (args.get('fmt') or '').lower() or None
+    if fmt is not None and fmt not in FORMATS:
+        raise MediaRequestError(f'fmt must be one of {", ".join(sorted(FORMATS))}')
+    return _size_param(args, 'w'), _size_param(args, 'h'), fmt
+
+
+def fit_size(size: Tuple[int, int], w: Optional[int], h: Optional[int]) -> Tuple[int, int]:
+    """``size`` scaled down to fit ``w`` x ``h`` (either may be None), keeping the aspect ratio."""
+    width, height = size
+    scale = min(1.0, (w / width) if w else 1.0, (h / height) if h else 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def render_derivative(source, w: Optional[int], h: Optional[int], pil_format: str) -> bytes:
+    """``source`` scaled to fit ``w`` x ``h`` and encoded as ``pil_format``, without metadata."""
+    with Image.open(source) as im:
+        rotated = im.getexif().get(0x0112) in (5, 6, 7, 8)
+        width, height = im.size[::-1] if rotated else im.size
+        target = fit_size((width, height), w, h)
+        # Let the JPEG decoder downscale by a power of two first
+        im.draft('RGB', target[::-1] if rotated else target)
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ('RGB', 'RGBA'):
+            has_alpha = im.mode in ('LA', 'PA') or 'transparency' in im.info
+            im = im.convert('RGBA' if has_alpha else 'RGB')
+        if im.size != target:
+            im = im.resize(target, Image.LANCZOS)
+        if pil_format == 'JPEG':
+            im = flatten_rgb(im)
+        out = io.BytesIO()
+        options = {'quality': QUALITY[pil_format]} if pil_format in QUALITY else {'optimize': True}
+        if pil_format == 'JPEG':
+            options.update(optimize=True, progressive=True)
+        im.save(out, pil_format, **options)
+        return out.getvalue()
+
+
+def media_response(filename: str, args: Mapping):
+    """Response for ``/media/<filename>`` with the query parameters in ``args``."""
+    w, h, fmt = parse_media_params(args)
+    identity, (size, mtime_ns), path, load = _resolve(filename)
+
+    if fmt is None and path is None:
+        # Uploads are sniffed when stored, so the extension is reliable; saves a download
+        fmt = EXTENSION_FORMATS.get(os.path.splitext(filename)[1].lower())
+    if fmt is None:
+        try:
+            with Image.open(load()) as im:
+                fmt = SOURCE_FORMATS.get(im.format, 'png')
+        except Exception:
+            raise MediaRequestError('Not an image')
+    pil_format, ext, mimetype = FORMATS[fmt]
+
+    key = hashlib.sha256(f'{identity}|{mtime_ns}|{size}|{w}|{h}|{pil_format}'.encode()).hexdigest()
+    cache = media_cache()
+    path = cache.get(key, ext)
+    if path is None:
+        with cache.key_lock(key):
+            path = cache.get(key, ext)
+            if path is None:
+                try:
+                    data = render_derivative(load(), w, h, pil_format)
+                except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+                    raise MediaRequestError(f'Not an image: {e}')
+                path = cache.put(key, ext, data)
+
+    resp = send_file(path, mimetype=mimetype, etag=key[:32], conditional=True, max_age=MAX_AGE)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
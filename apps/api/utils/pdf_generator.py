@@ -8,15 +8,21 @@ Uses reportlab to render an official-looking document with:
 - Border, watermark (seal/logo if available), and optional QR code
 
 Entry point: generate_document_pdf(request, document_type, user) -> (abs_path, rel_path)
+Print batches: document_pdf_bytes() and claim_ticket_pdf() render in memory.
 
-The file is saved under the Flask UPLOAD_FOLDER at:
+The file is saved in upload storage (utils.storage) at:
   generated_docs/{municipality_slug}/{request_id}.pdf
 
-Returns absolute path and relative path (from UPLOAD_FOLDER) for storage in DB and public URL building.
+Returns the local path (None with object storage) and the storage key, which is
+stored in the DB and used for public URL building.
 """
 from __future__ import annotations
 
+import hashlib
+import io
+import json
 import os
+import threading
 from pathlib import Path
 from typing import Dict, Tuple, Optional
 from datetime import datetime
@@ -29,6 +35,17 @@ from reportlab.lib.utils import ImageReader
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 
+try:
+    from apps.api.utils.asset_resolver import get_asset_resolver
+    from apps.api.utils.storage import get_storage
+except ImportError:
+    from utils.asset_resolver import get_asset_resolver
+    from utils.storage import get_storage
+
+# Bump when the drawing code changes what a document looks like, so stored
+# PDFs stop matching document_input_hash() and are rendered again.
+PDF_LAYOUT_VERSION = 2  # 2: vector QR code
+
 
 def _slugify(name: str) -> str:
     return (
@@ -45,31 +62,19 @@ def _ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
+def _config_path(name: str) -> Path:
+    # apps/api is current_app.root_path
+    return Path(current_app.root_path) / "config" / name
+
+
 def _load_document_types() -> Dict[str, Dict]:
     # Load JSON config with type definitions
-    try:
-        # apps/api is current_app.root_path
-        cfg_path = Path(current_app.root_path) / "config" / "documentTypes.json"
-        if not cfg_path.exists():
-            return {}
-        import json
-
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    return get_asset_resolver().json(_config_path("documentTypes.json"))
 
 
 def _load_municipality_officials() -> Dict[str, Dict]:
     # Load JSON config with mayor/vice mayor info
-    try:
-        cfg_path = Path(current_app.root_path) / "config" / "municipalityOfficials.json"
-        if not cfg_path.exists():
-            return {}
-        import json
-
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    return get_asset_resolver().json(_config_path("municipalityOfficials.json"))
 
 
 def _load_barangay_officials() -> Dict[str, Dict[str, str]]:
@@ -77,15 +82,8 @@ def _load_barangay_officials() -> Dict[str, Dict[str, str]]:
 
     File format: { "Municipality": { "Barangay Name": "Punong Barangay Name" } }
     """
-    try:
-        cfg_path = Path(current_app.root_path) / "config" / "barangayOfficials.json"
-        if not cfg_path.exists():
-            return {}
-        import json
+    return get_asset_resolver().json(_config_path("barangayOfficials.json"))
 
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
 
 def _resolve_logo_paths(municipality_name: str) -> Tuple[Path | None, Path | None]:
     """Return (municipal_logo, province_logo) if available."""
@@ -93,7 +91,17 @@ def _resolve_logo_paths(municipality_name: str) -> Tuple[Path | None, Path | Non
     repo_root = Path(current_app.root_path).parents[1]
     mun_dir = repo_root / "public" / "logos" / "municipalities"
     prov_dir = repo_root / "public" / "logos" / "zambales"
+    slug = _slugify(municipality_name)
+    watch = [mun_dir, prov_dir] + [
+        mun_dir / variant for variant in (municipality_name, slug, municipality_name.replace(' ', ''))
+    ]
+    return get_asset_resolver().memo(
+        ('logos', str(mun_dir), municipality_name), watch,
+        lambda: _scan_logo_paths(mun_dir, prov_dir, municipality_name),
+    )
+
 
+def _scan_logo_paths(mun_dir: Path, prov_dir: Path, municipality_name: str) -> Tuple[Path | None, Path | None]:
     slug = _slugify(municipality_name)
     # Try flat structure first (files directly in municipalities/)
     candidates = [
@@ -205,44 +213,104 @@ def _draw_header(c: canvas.Canvas, municipality_name: str, mun_logo: Path | None
         c.drawRightString(width - 20 * mm, top_y - 18 * mm, "Office of the Municipal Mayor")
 
 
+# Watermarks are identical for every PDF of a municipality: the processed seal
+# is kept as a pre-faded PNG on disk (shared by workers, survives restarts) and
+# as a ready ImageReader in memory, keyed by logo path + mtime + opacity.
+WATERMARK_WHITE_THRESHOLD = 245
+WATERMARK_MAX_PX = 800  # ~90 dpi at the largest (220 mm) watermark; plenty for a faded seal
+_watermark_lock = threading.Lock()
+_watermark_readers: Dict[Tuple[str, float], Tuple[int, ImageReader]] = {}
+
+
+def _fade_watermark(im, opacity: float):
+    """Drop the near-white background and fade the alpha channel of ``im``.
+
+    ``Image.point`` applies each 256-entry lookup table in C, so the cost is
+    a few passes over the pixels regardless of how the tables are built.
+    """
+    from PIL import ImageChops
+
+    im = im.convert('RGBA')
+    if max(im.size) > WATERMARK_MAX_PX:
+        im.thumbnail((WATERMARK_MAX_PX, WATERMARK_MAX_PX))
+    keep = im.convert('L').point([0 if x >= WATERMARK_WHITE_THRESHOLD else 255 for x in range(256)])
+    fade = int(max(0, min(255, round(opacity * 255))))
+    alpha = ImageChops.multiply(im.getchannel('A'), keep)
+    im.putalpha(alpha.point([int(px * (fade / 255.0)) for px in range(256)]))
+    return im
+
+
+def _watermark_cache_dir() -> Path:
+    configured = current_app.config.get('WATERMARK_CACHE_DIR')
+    if configured:
+        return Path(configured)
+    return Path(current_app.config.get('UPLOAD_FOLDER', 'uploads')) / 'cache' / 'watermarks'
+
+
+def _watermark_reader(mun_logo: Path, opacity: float) -> ImageReader:
+    """Prepared watermark for ``mun_logo`` at ``opacity`` (memory, then disk, then Pillow)."""
+    from PIL import Image
+
+    mtime_ns = mun_logo.stat().st_mtime_ns
+    key = (str(mun_logo.resolve()), round(float(opacity), 4))
+    cached = _watermark_readers.get(key)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+
+    with _watermark_lock:
+        cached = _watermark_readers.get(key)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        digest = hashlib.sha1(f'{key[0]}|{mtime_ns}|{key[1]}|{WATERMARK_MAX_PX}'.encode()).hexdigest()[:20]
+        cache_file = _watermark_cache_dir() / f'{digest}.png'
+        im = None
+        if cache_file.exists():
+            try:
+                with Image.open(cache_file) as stored:
+                    im = stored.convert('RGBA')
+            except Exception:
+                im = None
+        if im is None:
+            with Image.open(str(mun_logo)) as source:
+                im = _fade_watermark(source, opacity)
+            try:
+                _ensure_dir(cache_file.parent)
+                tmp = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+                im.save(tmp, format='PNG')
+                os.replace(tmp, cache_file)
+            except OSError:
+                pass  # memory cache still applies
+        reader = ImageReader(im)
+        _watermark_readers[key] = (mtime_ns, reader)
+        return reader
+
+
+def clear_watermark_cache(disk: bool = False) -> None:
+    """Drop prepared watermarks (and the on-disk PNGs when ``disk``)."""
+    with _watermark_lock:
+        _watermark_readers.clear()
+        if disk:
+            cache_dir = _watermark_cache_dir()
+            for f in cache_dir.glob('*.png') if cache_dir.exists() else ():
+                try:
+                    f.unlink()
+                except OSError:
+                    pass
+
+
 def _draw_watermark(c: canvas.Canvas, mun_logo: Path | None, opacity: float = 0.25, size_mm: float = 150.0):
     """Draw a semi-transparent watermark centered on the page.
 
-    Uses Pillow to pre-apply opacity so it works even if setFillAlpha is unavailable
-    or not honored for images on some ReportLab backends.
+    Opacity is pre-applied to the image so it works even if setFillAlpha is
+    unavailable or not honored for images on some ReportLab backends.
     """
     if not mun_logo or not mun_logo.exists():
         return
     width, height = A4
     try:
         logger = getattr(current_app, 'logger', None)
-        # Prefer Pillow processing for reliable opacity and background removal
         try:
-            from PIL import Image
-
-            with Image.open(str(mun_logo)).convert('RGBA') as im:
-                # Remove near-white backgrounds to reveal seal edges on white paper
-                r, g, b, a = im.split()
-                # Compute a mask of near-white pixels
-                # Threshold: values > 245 (almost white)
-                white_threshold = 245
-                bg_mask = Image.eval(r, lambda x: 255 if x >= white_threshold else 0)
-                bg_mask = Image.eval(Image.merge('RGB', (r, g, b)).convert('L'), lambda x: 255 if x >= white_threshold else 0)
-                # Invert mask to keep non-white content
-                keep_mask = Image.eval(bg_mask, lambda x: 0 if x > 0 else 255)
-                # Combine with existing alpha if present
-                if im.mode != 'RGBA':
-                    a = Image.new('L', im.size, color=255)
-                # Remove background
-                a = Image.eval(a, lambda px: px)  # copy
-                a.paste(0, mask=bg_mask)
-                # Apply global fade
-                fade = int(max(0, min(255, round(opacity * 255))))
-                a = Image.eval(a, lambda px: int(px * (fade / 255.0)))
-                im.putalpha(a)
-                img = ImageReader(im)
-                if logger:
-                    logger.debug(f"Watermark prepared via Pillow: {mun_logo}")
+            img = _watermark_reader(mun_logo, opacity)
         except Exception as pil_err:
             if logger:
                 logger.debug(f"Watermark Pillow processing failed: {pil_err}")
@@ -260,6 +328,8 @@ def _draw_watermark(c: canvas.Canvas, mun_logo: Path | None, opacity: float = 0.
     except Exception:
         # Silently ignore watermark failures to avoid blocking PDF generation
         pass
+
+
 def _set_font(c: canvas.Canvas, name: str, size: int):
     """Set font with fallback to Helvetica family if Times is unavailable."""
     try:
@@ -275,37 +345,31 @@ def _set_font(c: canvas.Canvas, name: str, size: int):
 
 
 
-def generate_document_pdf(request, document_type, user, admin_user: Optional[object] = None) -> Tuple[Path, str]:
-    """
-    Generate a PDF for a document request and return (absolute_path, relative_path_from_upload_folder).
-    """
-    # Resolve basics
-    municipality_name = getattr(getattr(request, 'municipality', None), 'name', '') or str(request.municipality_id)
-    municipality_slug = _slugify(municipality_name)
-
-    upload_base = Path(current_app.config.get('UPLOAD_FOLDER'))
-    out_dir = upload_base / 'generated_docs' / municipality_slug
-    _ensure_dir(out_dir)
+def _municipality_name(request) -> str:
+    return getattr(getattr(request, 'municipality', None), 'name', '') or str(request.municipality_id)
 
-    pdf_path = out_dir / f"{request.id}.pdf"
 
-    # Resolve logos
-    mun_logo, prov_logo = _resolve_logo_paths(municipality_name)
-    # Debug logging to verify logo resolution
-    try:
-        if getattr(current_app, 'logger', None):
-            current_app.logger.debug(f"PDF: municipality={municipality_name} mun_logo={mun_logo} prov_logo={prov_logo}")
-    except Exception:
-        pass
+def warm_document_assets(municipality_names=()) -> None:
+    """Load configs, logo paths and prepared watermarks ahead of a batch.
 
-    # Prepare data context from request
-    resident_full_name = ' '.join(
-        filter(None, [getattr(user, 'first_name', None), getattr(user, 'last_name', None)])
-    ) or getattr(user, 'username', 'Resident')
+    Pool children call this on start and the batch endpoint calls it before
+    fanning out, so the watermark PNG is on disk once instead of being built
+    by every child.
+    """
+    _load_document_types()
+    _load_municipality_officials()
+    _load_barangay_officials()
+    for name in municipality_names:
+        mun_logo, _prov_logo = _resolve_logo_paths(name)
+        if mun_logo and mun_logo.exists():
+            try:
+                _watermark_reader(mun_logo, 0.25)
+            except Exception:
+                pass
 
-    issue_date = datetime.utcnow()
 
-    # Load document type definitions
+def _document_spec(document_type) -> Tuple[str, list, Dict]:
+    """(code, code variants tried, spec) from documentTypes.json for ``document_type``."""
     doc_types = _load_document_types()
     code = (getattr(document_type, 'code', None) or getattr(document_type, 'name', 'generic')).lower()
     
@@ -325,6 +389,263 @@ def generate_document_pdf(request, document_type, user, admin_user: Optional[obj
     
     if not spec:
         spec = doc_types.get('generic') or {}
+    return code, code_variants, spec
+
+
+def _file_digest(path: Path | None) -> str | None:
+    """Content digest of an asset (memoized until the file changes)."""
+    if not path:
+        return None
+    return get_asset_resolver().memo(
+        ('file_digest', str(path)), [path],
+        lambda: hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else None,
+    )
+
+
+def _document_content(request, user) -> dict:
+    """What a document says about the request and resident (no layout or assets)."""
+    created_at = getattr(request, 'created_at', None)
+    return {
+        'request': {
+            'id': request.id,
+            'request_number': getattr(request, 'request_number', None),
+            'municipality': _municipality_name(request),
+            'barangay': getattr(getattr(request, 'barangay', None), 'name', ''),
+            'delivery_address': getattr(request, 'delivery_address', None),
+            'purpose': getattr(request, 'purpose', None),
+            'additional_notes': getattr(request, 'additional_notes', None),
+            'resident_input': getattr(request, 'resident_input', None),
+            'admin_edited_content': getattr(request, 'admin_edited_content', None),
+            'created': created_at.strftime('%Y-%m-%d') if created_at else None,
+        },
+        'resident': [getattr(user, k, None) for k in ('first_name', 'last_name', 'username')],
+    }
+
+
+def _sha256_json(payload) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def document_content_hash(request, document_type, user) -> str:
+    """Hash of the request and resident fields a document was issued with.
+
+    Public verification compares against this. Unlike
+    ``document_input_hash`` it leaves out the layout version, officials and
+    seal files, so a redeploy, a new mayor or a new seal does not make issued
+    documents look tampered with.
+    """
+    return _sha256_json({**_document_content(request, user), 'document_type': getattr(document_type, 'code', None)})
+
+
+def document_input_hash(request, document_type, user) -> str:
+    """Canonical hash of everything that shapes a request's document.
+
+    Covers the request and resident fields, ``admin_edited_content``, the
+    document type's template spec, the officials named on the page, the
+    seal/logo file contents, the QR payload and ``PDF_LAYOUT_VERSION``. The
+    issue date and the generating admin are left out, so a regenerate with
+    unchanged content returns the document already issued. Used for render
+    reuse only; see ``document_content_hash`` for verification.
+    """
+    try:
+        from apps.api.utils.qr_generator import generate_qr_code_data
+    except ImportError:
+        from utils.qr_generator import generate_qr_code_data
+
+    municipality_name = _municipality_name(request)
+    mun_logo, prov_logo = _resolve_logo_paths(municipality_name)
+    _code, _variants, spec = _document_spec(document_type)
+    try:
+        qr_payload = generate_qr_code_data(request)
+    except Exception:
+        qr_payload = None  # the page is drawn without a QR code too
+    payload = {
+        'layout': PDF_LAYOUT_VERSION,
+        **_document_content(request, user),
+        'document_type': [getattr(document_type, 'code', None), getattr(document_type, 'name', None)],
+        'spec': spec,
+        'officials': _load_municipality_officials().get(municipality_name),
+        'barangay_officials': _load_barangay_officials().get(municipality_name),
+        'assets': [_file_digest(mun_logo), _file_digest(prov_logo)],
+        'qr': qr_payload,
+    }
+    return _sha256_json(payload)
+
+
+def _document_paths(request) -> Tuple[Optional[Path], str]:
+    rel_path = f"generated_docs/{_slugify(_municipality_name(request))}/{request.id}.pdf"
+    return get_storage().local_path(rel_path), rel_path
+
+
+def current_document_file(request, document_type, user, input_hash: Optional[str] = None) -> Optional[str]:
+    """The request's stored PDF if it was rendered from the current inputs, else ``None``."""
+    stored_hash = getattr(request, 'document_input_hash', None)
+    stored_file = getattr(request, 'document_file', None)
+    if not stored_hash or not stored_file:
+        return None
+    _pdf_path, rel_path = _document_paths(request)
+    if stored_file != rel_path or not get_storage().exists(rel_path):
+        return None
+    if (input_hash or document_input_hash(request, document_type, user)) != stored_hash:
+        return None
+    return rel_path
+
+
+def generate_document_pdf(request, document_type, user, admin_user: Optional[object] = None,
+                          force: bool = False) -> Tuple[Optional[Path], str]:
+    """
+    Generate a PDF for a document request and return (local_path or None, storage_key).
+
+    Sets ``request.document_input_hash`` and ``request.document_content_hash``.
+    Unless ``force``, a stored PDF rendered from the same inputs is returned
+    without rendering again.
+    """
+    pdf_path, rel_posix = _document_paths(request)
+    input_hash = document_input_hash(request, document_type, user)
+    content_hash = document_content_hash(request, document_type, user)
+    if not force and current_document_file(request, document_type, user, input_hash=input_hash):
+        request.document_content_hash = content_hash
+        return pdf_path, rel_posix
+
+    # Write then store: readers never see a half-written file
+    with get_storage().writer(rel_posix) as tmp_path:
+        c = canvas.Canvas(str(tmp_path), pagesize=A4)
+        _draw_document(c, request, document_type, user, admin_user=admin_user)
+        c.save()
+    request.document_input_hash = input_hash
+    request.document_content_hash = content_hash
+    return pdf_path, rel_posix
+
+
+def document_pdf_bytes(request, document_type, user, admin_user: Optional[object] = None) -> bytes:
+    """Render a request's document in memory, without storing it."""
+    out = io.BytesIO()
+    c = canvas.Canvas(out, pagesize=A4)
+    _draw_document(c, request, document_type, user, admin_user=admin_user)
+    c.save()
+    return out.getvalue()
+
+
+def claim_ticket_pdf(request, document_type, user, notice: Optional[str] = None) -> bytes:
+    """One-page claim ticket for a ready request, rendered in memory.
+
+    Pickup requests with a claim token carry its QR link and masked code;
+    others carry the document verification QR. ``notice`` is printed in red,
+    e.g. when the document page itself could not be produced.
+    """
+    out = io.BytesIO()
+    c = canvas.Canvas(out, pagesize=A4)
+    _draw_claim_ticket(c, request, document_type, user, notice=notice)
+    c.save()
+    return out.getvalue()
+
+
+def _draw_claim_ticket(c: canvas.Canvas, request, document_type, user, notice: Optional[str] = None) -> None:
+    try:
+        from apps.api.utils.qr_generator import generate_qr_code_data
+        from apps.api.utils.qr_service import draw_qr
+        from apps.api.utils.qr_utils import claim_ticket_link
+    except ImportError:
+        from utils.qr_generator import generate_qr_code_data
+        from utils.qr_service import draw_qr
+        from utils.qr_utils import claim_ticket_link
+
+    width, height = A4
+    claim = getattr(request, 'qr_data', None) or {}
+    if not isinstance(claim, dict):
+        claim = {}
+    municipality_name = _municipality_name(request)
+    resident_name = ' '.join(
+        filter(None, [getattr(user, 'first_name', None), getattr(user, 'last_name', None)])
+    ) or getattr(user, 'username', '') or 'Resident'
+    ready_at = getattr(request, 'ready_at', None)
+    window = ' - '.join(str(claim[k]) for k in ('window_start', 'window_end') if claim.get(k))
+
+    left, top = 20 * mm, height - 20 * mm
+    box_height = 110 * mm
+    c.setStrokeColor(colors.HexColor('#1f3a93'))
+    c.setLineWidth(1.5)
+    c.rect(left - 5 * mm, top - box_height, width - 2 * (left - 5 * mm), box_height + 5 * mm, stroke=1, fill=0)
+
+    _set_font(c, 'Times-Bold', 18)
+    c.drawString(left, top - 8 * mm, 'CLAIM TICKET')
+    _set_font(c, 'Times-Roman', 11)
+    c.drawString(left, top - 14 * mm, f"Municipality of {municipality_name}, Province of Zambales")
+
+    rows = [
+        ('Request No.', getattr(request, 'request_number', None) or str(request.id)),
+        ('Resident', resident_name),
+        ('Document', getattr(document_type, 'name', '') or ''),
+        ('Purpose', getattr(request, 'purpose', '') or ''),
+        ('Delivery', (getattr(request, 'delivery_method', '') or '').capitalize()),
+        ('Ready since', ready_at.strftime('%B %d, %Y') if ready_at else ''),
+        ('Pickup window', window),
+        ('Claim code', claim.get('code_masked') or ''),
+    ]
+    y = top - 26 * mm
+    for label, value in rows:
+        if not value:
+            continue
+        _set_font(c, 'Times-Bold', 11)
+        c.drawString(left, y, f"{label}:")
+        _set_font(c, 'Times-Roman', 11)
+        c.drawString(left + 30 * mm, y, str(value)[:60])
+        y -= 7 * mm
+
+    if notice:
+        c.setFillColor(colors.red)
+        _set_font(c, 'Times-Italic', 10)
+        c.drawString(left, y - 2 * mm, notice[:110])
+        c.setFillColor(colors.black)
+
+    token = claim.get('token')
+    try:
+        qr_payload = claim_ticket_link(token) if token else generate_qr_code_data(request)
+    except Exception:
+        qr_payload = None
+    qr_size = 45 * mm
+    if qr_payload:
+        qr_x, qr_y = width - left - qr_size, top - 12 * mm - qr_size
+        draw_qr(c, qr_payload, qr_x, qr_y, qr_size)
+        _set_font(c, 'Times-Italic', 9)
+        c.drawCentredString(qr_x + qr_size / 2, qr_y - 4 * mm,
+                            'Scan to verify claim' if token else 'Scan to verify document')
+
+    _set_font(c, 'Times-Italic', 9)
+    c.drawString(left, top - box_height + 5 * mm,
+                 'Present this ticket and a valid ID when claiming the document.')
+    c.setDash(4, 3)
+    c.setLineWidth(0.5)
+    c.line(10 * mm, top - box_height - 10 * mm, width - 10 * mm, top - box_height - 10 * mm)
+    c.setDash()
+    c.showPage()
+
+
+def _draw_document(c: canvas.Canvas, request, document_type, user, admin_user: Optional[object] = None) -> None:
+    """Draw one document request as a page of ``c``."""
+    # Resolve basics
+    municipality_name = _municipality_name(request)
+
+    # Resolve logos
+    mun_logo, prov_logo = _resolve_logo_paths(municipality_name)
+    # Debug logging to verify logo resolution
+    try:
+        if getattr(current_app, 'logger', None):
+            current_app.logger.debug(f"PDF: municipality={municipality_name} mun_logo={mun_logo} prov_logo={prov_logo}")
+    except Exception:
+        pass
+
+    # Prepare data context from request
+    resident_full_name = ' '.join(
+        filter(None, [getattr(user, 'first_name', None), getattr(user, 'last_name', None)])
+    ) or getattr(user, 'username', 'Resident')
+
+    issue_date = datetime.utcnow()
+
+    # Load document type definitions
+    doc_types = _load_document_types()
+    code, code_variants, spec = _document_spec(document_type)
     
     level = (spec.get('level') or 'municipal').lower()
     
@@ -422,8 +743,6 @@ def generate_document_pdf(request, document_type, user, admin_user: Optional[obj
     signatory = (spec.get('signatory') or {})
 
     # Render
-    c = canvas.Canvas(str(pdf_path), pagesize=A4)
-
     # Border and watermark
     _draw_border(c)
     barangay_name = getattr(getattr(request, 'barangay', None), 'name', '')
@@ -560,31 +879,24 @@ def generate_document_pdf(request, document_type, user, admin_user: Optional[obj
     footer_text = footer or "This is a digitally issued document. No physical signature required. Generated via Munlink Zambales System."
     c.drawString(25 * mm, 20 * mm, footer_text)
 
-    # Optional QR code (simple URL based on request number)
+    # Optional QR code (simple URL based on request number), drawn as vector modules
     try:
-        from apps.api.utils.qr_generator import save_qr_code_file, generate_qr_code_data
+        try:
+            from apps.api.utils.qr_generator import generate_qr_code_data
+            from apps.api.utils.qr_service import draw_qr
+        except ImportError:
+            from utils.qr_generator import generate_qr_code_data
+            from utils.qr_service import draw_qr
 
-        qr_dir = out_dir / "qr"
-        _ensure_dir(qr_dir)
         qr_data = generate_qr_code_data(request)
-        qr_file = qr_dir / f"{request.id}.png"
-        save_qr_code_file(qr_data, str(qr_file))
-        img = ImageReader(str(qr_file))
         # Increased QR size from 20mm to 35mm for better scannability
         qr_size = 35 * mm
         # Position QR at bottom-right, but shifted left to avoid overlapping blue border
         # Increased left margin from 10mm to 20mm to accommodate larger QR size
-        c.drawImage(img, width - (qr_size + 20 * mm), 20 * mm, width=qr_size, height=qr_size, preserveAspectRatio=True, mask='auto')
+        draw_qr(c, qr_data, width - (qr_size + 20 * mm), 20 * mm, qr_size)
     except Exception:
         pass
 
     c.showPage()
-    c.save()
-
-    # Build relative path from UPLOAD_FOLDER for public URL
-    rel_path = os.path.relpath(pdf_path, upload_base)
-    # Normalize to POSIX-style for URLs
-    rel_posix = rel_path.replace("\\", "/")
-    return pdf_path, rel_posix
 
 
@@ -0,0 +1,362 @@
+"""Streaming concatenation of PDFs written by ReportLab.
+
+The API has no PDF library beyond ReportLab, which can draw pages but not
+import them. Print batches need to combine documents already stored on disk
+instead of drawing them again, so ``PdfConcatenator`` copies the pages of each
+source PDF into one output and returns the bytes to send as it goes:
+
+- only the source being appended is held in memory; the writer itself keeps
+  the offset of every object written (for the final xref table), the page
+  object numbers and one digest per distinct object, so memory stays flat
+  however many documents are appended;
+- objects that are byte-identical after renumbering (fonts, and the seal and
+  watermark images every document of a municipality embeds) are written once
+  and shared by every page that uses them.
+
+Sources must use classic cross-reference tables, which is what ReportLab
+writes. Anything else raises ``PdfMergeError`` and leaves the output
+untouched, so the caller can fall back to drawing the page itself.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class PdfMergeError(ValueError):
+    """A source PDF could not be read."""
+
+
+_DELIMS = rb'\s\[\]<>(){}'
+_REF = re.compile(rb'(?:^|(?<=[' + _DELIMS + rb']))(\d+)\s+(\d+)\s+R(?![^' + _DELIMS + rb'/%])')
+_STRING_OR_COMMENT = re.compile(rb'[(%]')
+_DICT_TOKEN = re.compile(rb'<<|>>|[<(%]')
+_PARENT = re.compile(rb'/Parent\s+\d+\s+\d+\s+R')
+_OBJ = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj\b\s*')
+_STREAM = re.compile(rb'\s*stream(?:\r\n|\n|\r)')
+_XREF = re.compile(rb'\s*xref\s*')
+_XREF_SECTION = re.compile(rb'(\d+)\s+(\d+)\s*?(?:\r\n|\n|\r)')
+_XREF_ENTRY = re.compile(rb'(\d{10})\s(\d{5})\s([nf])\s*')
+_TRAILER = re.compile(rb'\s*trailer\s*')
+_STARTXREF = re.compile(rb'startxref\s+(\d+)')
+
+_PAGES_ID = 1
+_CATALOG_ID = 2
+_PENDING = -1
+
+
+def _skip_string(data: bytes, i: int) -> int:
+    """Index after the literal string starting at ``data[i] == '('``."""
+    depth = 0
+    n = len(data)
+    while i < n:
+        ch = data[i]
+        if ch == 0x5C:  # backslash escapes the next byte
+            i += 2
+            continue
+        if ch == 0x28:
+            depth += 1
+        elif ch == 0x29:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise PdfMergeError('Unterminated string')
+
+
+def _skip_special(data: bytes, i: int) -> int:
+    if data[i] == 0x28:
+        return _skip_string(data, i)
+    end = data.find(b'\n', i)  # comment
+    return len(data) if end < 0 else end
+
+
+def _dict_end(data: bytes, i: int) -> int:
+    """Index after the dictionary starting at ``data[i:i+2] == '<<'``."""
+    depth = 0
+    while True:
+        m = _DICT_TOKEN.search(data, i)
+        if m is None:
+            raise PdfMergeError('Unterminated dictionary')
+        token = m.group()
+        if token == b'<<':
+            depth += 1
+            i = m.end()
+        elif token == b'>>':
+            depth -= 1
+            i = m.end()
+            if depth == 0:
+                return i
+        elif token == b'<':
+            end = data.find(b'>', m.end())  # hex string
+            if end < 0:
+                raise PdfMergeError('Unterminated hex string')
+            i = end + 1
+        else:
+            i = _skip_special(data, m.start())
+
+
+def _code_spans(data: bytes) -> Iterator[Tuple[bool, bytes]]:
+    """Split ``data`` into (is_code, chunk): strings and comments are not code."""
+    i = 0
+    while True:
+        m = _STRING_OR_COMMENT.search(data, i)
+        if m is None:
+            yield True, data[i:]
+            return
+        yield True, data[i:m.start()]
+        end = _skip_special(data, m.start())
+        yield False, data[m.start():end]
+        i = end
+
+
+def _code(data: bytes) -> bytes:
+    """``data`` with strings and comments blanked, for key lookups."""
+    return b' '.join(chunk for is_code, chunk in _code_spans(data) if is_code)
+
+
+def _refs(head: bytes) -> List[int]:
+    return [int(m.group(1)) for m in _REF.finditer(_code(head))]
+
+
+def _rewrite(head: bytes, mapping: Dict[int, int]) -> bytes:
+    def sub(m):
+        return b'%d 0 R' % mapping[int(m.group(1))]
+    return b''.join(_REF.sub(sub, chunk) if is_code else chunk for is_code, chunk in _code_spans(head))
+
+
+class _Source:
+    """Random access to the objects of one PDF held in memory."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offsets: Dict[int, int] = {}
+        self.trailer = b''
+        self._read_xref()
+
+    def _read_xref(self) -> None:
+        data = self.data
+        tail = data.rfind(b'startxref')
+        m = _STARTXREF.match(data, tail) if tail >= 0 else None
+        if m is None:
+            raise PdfMergeError('No startxref')
+        pos: Optional[int] = int(m.group(1))
+        seen = set()
+        while pos is not None and pos not in seen:
+            seen.add(pos)
+            m = _XREF.match(data, pos)
+            if m is None:
+                raise PdfMergeError('Cross-reference streams are not supported')
+            i = m.end()
+            while True:
+                section = _XREF_SECTION.match(data, i)
+                if section is None:
+                    break
+                first, count = int(section.group(1)), int(section.group(2))
+                i = section.end()
+                for k in range(count):
+                    entry = _XREF_ENTRY.match(data, i)
+                    if entry is None:
+                        raise PdfMergeError('Malformed xref entry')
+                    i = entry.end()
+                    if entry.group(3) == b'n':
+                        # Newer sections are read first and win
+                        self.offsets.setdefault(first + k, int(entry.group(1)))
+            m = _TRAILER.match(data, i)
+            if m is None or not data.startswith(b'<<', m.end()):
+                raise PdfMergeError('No trailer')
+            trailer = data[m.end():_dict_end(data, m.end())]
+            self.trailer = self.trailer or trailer
+            prev = re.search(rb'/Prev\s+(\d+)', _code(trailer))
+            pos = int(prev.group(1)) if prev else None
+
+    def object(self, num: int) -> Tuple[bytes, Optional[bytes]]:
+        """(value, stream data or None) of object ``num``."""
+        offset = self.offsets.get(num)
+        m = _OBJ.match(self.data, offset) if offset is not None else None
+        if m is None or int(m.group(1)) != num:
+            raise PdfMergeError(f'Object {num} not found')
+        start = m.end()
+        if self.data.startswith(b'<<', start):
+            end = _dict_end(self.data, start)
+            head = self.data[start:end]
+            s = _STREAM.match(self.data, end)
+            if s is None:
+                return head, None
+            length = self._length(head)
+            stream = self.data[s.end():s.end() + length]
+            if len(stream) != length:
+                raise PdfMergeError(f'Object {num} stream is truncated')
+            return head, stream
+        end = self.data.find(b'endobj', start)
+        if end < 0:
+            raise PdfMergeError(f'Object {num} is not terminated')
+        return self.data[start:end].rstrip(), None
+
+    def _length(self, head: bytes) -> int:
+        code = _code(head)
+        m = re.search(rb'/Length\s+(\d+)\s+(\d+)\s+R', code)
+        if m:
+            return int(self.object(int(m.group(1)))[0])
+        m = re.search(rb'/Length\s+(\d+)', code)
+        if m is None:
+            raise PdfMergeError('Stream without /Length')
+        return int(m.group(1))
+
+    def _ref(self, head: bytes, key: bytes) -> int:
+        m = re.search(rb'/' + key + rb'\s+(\d+)\s+\d+\s+R', _code(head))
+        if m is None:
+            raise PdfMergeError(f'No /{key.decode()} reference')
+        return int(m.group(1))
+
+    def pages(self) -> List[int]:
+        """Page object numbers in document order."""
+        catalog, _ = self.object(self._ref(self.trailer, b'Root'))
+        pages: List[int] = []
+        seen = set()
+
+        def walk(num: int) -> None:
+            if num in seen:
+                raise PdfMergeError('Page tree has a cycle')
+            seen.add(num)
+            head, _ = self.object(num)
+            code = _code(head)
+            if re.search(rb'/Type\s*/Pages(?![A-Za-z])', code):
+                kids = re.search(rb'/Kids\s*\[([^\]]*)\]', code)
+                if kids is None:
+                    raise PdfMergeError('Page tree node without /Kids')
+                for m in _REF.finditer(kids.group(1)):
+                    walk(int(m.group(1)))
+            else:
+                pages.append(num)
+
+        walk(self._ref(catalog, b'Pages'))
+        return pages
+
+
+class PdfConcatenator:
+    """Builds one PDF from the pages of many; see the module docstring.
+
+    Call ``append`` for each source and send what it returns, then send
+    ``finish()``.
+    """
+
+    def __init__(self):
+        self._offsets: List[Optional[int]] = [None, None, None]  # 0 (free), pages, catalog
+        self._pos = 0
+        self._kids: List[int] = []
+        self._shared: Dict[bytes, int] = {}
+
+    @property
+    def page_count(self) -> int:
+        return len(self._kids)
+
+    def _allocate(self) -> int:
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write(self, chunks: List[bytes], data: bytes) -> None:
+        chunks.append(data)
+        self._pos += len(data)
+
+    def _emit(self, chunks: List[bytes], num: int, head: bytes, stream: Optional[bytes] = None) -> None:
+        self._offsets[num] = self._pos
+        parts = [b'%d 0 obj\n' % num, head]
+        if stream is not None:
+            parts += [b'\nstream\n', stream, b'\nendstream']
+        parts.append(b'\nendobj\n')
+        self._write(chunks, b''.join(parts))
+
+    def _begin(self, chunks: List[bytes]) -> None:
+        if self._pos == 0:
+            self._write(chunks, b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def append(self, pdf: bytes) -> bytes:
+        """Copy every page of ``pdf``; returns the bytes to write next.
+
+        On ``PdfMergeError`` nothing is written and the output is unchanged.
+        """
+        mark = (self._pos, len(self._offsets), len(self._kids))
+        added: List[bytes] = []
+        chunks: List[bytes] = []
+        try:
+            self._begin(chunks)
+            source = _Source(pdf)
+            for page in source.pages():
+                self._copy_page(source, page, {}, chunks, added)
+        except Exception as e:
+            self._pos = mark[0]
+            del self._offsets[mark[1]:]
+            del self._kids[mark[2]:]
+            for key in added:
+                self._shared.pop(key, None)
+            if isinstance(e, PdfMergeError):
+                raise
+            raise PdfMergeError(str(e)) from e
+        return b''.join(chunks)
+
+    def _copy_page(self, source: _Source, num: int, mapping: Dict[int, int],
+                   chunks: List[bytes], added: List[bytes]) -> None:
+        page_id = self._allocate()
+        mapping[num] = page_id  # annotations may point back at their page
+        head, _ = source.object(num)
+        if not head.startswith(b'<<'):
+            raise PdfMergeError(f'Page {num} is not a dictionary')
+        head = _PARENT.sub(b'', head)
+        for child in _refs(head):
+            self._copy(source, child, mapping, chunks, added)
+        head = _rewrite(head, mapping)
+        self._emit(chunks, page_id, b'<< /Parent %d 0 R ' % _PAGES_ID + head[2:])
+        self._kids.append(page_id)
+
+    def _copy(self, source: _Source, num: int, mapping: Dict[int, int],
+              chunks: List[bytes], added: List[bytes]) -> None:
+        """Write object ``num`` and everything it references (children first)."""
+        if num in mapping:
+            if mapping[num] == _PENDING:
+                # Reference back to an object still being copied: fix its number now
+                mapping[num] = self._allocate()
+            return
+        mapping[num] = _PENDING
+        head, stream = source.object(num)
+        for child in _refs(head):
+            self._copy(source, child, mapping, chunks, added)
+        head = _rewrite(head, mapping)
+        if mapping[num] != _PENDING:
+            self._emit(chunks, mapping[num], head, stream)
+            return
+        key = hashlib.sha256(head + (b'\0S' + stream if stream is not None else b'\0N')).digest()
+        shared = self._shared.get(key)
+        if shared is None:
+            shared = self._allocate()
+            self._shared[key] = shared
+            added.append(key)
+            self._emit(chunks, shared, head, stream)
+        mapping[num] = shared
+
+    def finish(self) -> bytes:
+        """Page tree, catalog, xref table and trailer; the last bytes of the output."""
+        chunks: List[bytes] = []
+        self._begin(chunks)
+        kids = b' '.join(b'%d 0 R' % k for k in self._kids)
+        self._emit(chunks, _PAGES_ID, b'<< /Type /Pages /Count %d /Kids [ %s ] >>' % (len(self._kids), kids))
+        self._emit(chunks, _CATALOG_ID, b'<< /Type /Catalog /Pages %d 0 R >>' % _PAGES_ID)
+        xref_at = self._pos
+        entries = [b'xref\n0 %d\n' % len(self._offsets), b'0000000000 65535 f \n']
+        entries += [
+            b'%010d 00000 n \n' % offset if offset is not None else b'0000000000 65535 f \n'
+            for offset in self._offsets[1:]
+        ]
+        entries.append(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                       % (len(self._offsets), _CATALOG_ID, xref_at))
+        self._write(chunks, b''.join(entries))
+        return b''.join(chunks)
+
+
+def concat_pdfs(sources: Iterable[bytes]) -> Iterator[bytes]:
+    """Stream the pages of ``sources`` as one PDF."""
+    out = PdfConcatenator()
+    for pdf in sources:
+        yield out.append(pdf)
+    yield out.finish()
@@ -1,15 +1,19 @@
 """PDF table report utilities using reportlab.
 
 Generates simple, branded PDF reports with header/footer and zebra table.
+Text is measured with cached font metrics (utils/text_metrics.py) and rows
+are streamed, so large exports are bound by drawing rather than measuring.
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import Any, Dict, Iterable, List, Sequence
 from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
-import os
 
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
+from reportlab.pdfgen.textobject import PDFTextObject
+from reportlab.lib.rl_accel import fp_str
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 try:
@@ -20,6 +24,13 @@ except Exception:  # pragma: no cover
     _draw_header = None
     _draw_watermark = None
     _draw_border = None
+try:
+    from apps.api.utils.text_metrics import font_metrics
+except ImportError:
+    from utils.text_metrics import font_metrics
+
+SAMPLE_ROWS = 50  # rows measured to size the columns
+FIT_MEMO_SIZE = 4096  # distinct cell values remembered per column
 
 
 def _draw_header_footer(c: canvas.Canvas, title: str, municipality_name: str, page_w: int, page_h: int):
@@ -38,40 +49,40 @@ def _draw_header_footer(c: canvas.Canvas, title: str, municipality_name: str, pa
     c.drawCentredString(page_w/2, 16*mm, f"Generated by MunLink Zambales • {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}")
 
 
-def _fit_text(c: canvas.Canvas, text: str, max_width: float, font_name: str = 'Helvetica', font_size: int = 9) -> str:
+class _CellText(PDFTextObject):
+    """Text object for table cells.
+
+    ``textOut`` measures every string again to move the cursor, and both it
+    and ``setTextOrigin`` format numbers per call. Cells only need a position
+    and a string, so ``cell`` appends a preformatted ``Tm`` and ``Tj``.
+    """
+
+    def cell_op(self, text: str) -> str:
+        """The show-text operator(s) for ``text`` in the current font."""
+        return self._formatText(text)
+
+    def cell(self, origin: str, op: str):
+        self._code.append(origin)
+        self._code.append(op)
+
+
+def _fit_text(text: str, max_width: float, font_name: str = 'Helvetica', font_size: int = 9) -> str:
     """Truncate text with ellipsis to fit within max_width."""
-    c.setFont(font_name, font_size)
-    if c.stringWidth(text, font_name, font_size) <= max_width:
-        return text
-    # Reserve width for ellipsis
-    ell = '…'
-    ell_w = c.stringWidth(ell, font_name, font_size)
-    # Binary trim
-    low, high = 0, len(text)
-    best = ''
-    while low <= high:
-        mid = (low + high) // 2
-        candidate = text[:mid] + ell
-        if c.stringWidth(candidate, font_name, font_size) <= max_width:
-            best = candidate
-            low = mid + 1
-        else:
-            high = mid - 1
-    return best or ell
-
-
-def _compute_col_widths(c: canvas.Canvas, headers: List[str], rows: List[List[Any]], total_width: float, font_name: str='Helvetica', font_size: int=9) -> List[float]:
+    return font_metrics(font_name).fit(text, max_width, font_size)
+
+
+def _compute_col_widths(headers: List[str], rows: List[Sequence[Any]], total_width: float, font_name: str='Helvetica', font_size: int=9) -> List[float]:
     """Compute proportional column widths based on content, with sane min/max caps.
-    We sample headers and first N rows to estimate width, then normalize to total_width.
+    We sample headers and the first rows to estimate width, then normalize to total_width.
     """
-    sample_rows = rows[:50]  # limit for speed
-    c.setFont(font_name, font_size)
+    metrics = font_metrics(font_name)
+    pad = 6*mm
     estimates: List[float] = []
     for ci, h in enumerate(headers):
-        max_w = c.stringWidth(str(h), font_name, font_size) + 6*mm
-        for r in sample_rows:
+        max_w = metrics.width(str(h), font_size) + pad
+        for r in rows:
             if ci < len(r):
-                w = c.stringWidth(str(r[ci]), font_name, font_size) + 6*mm
+                w = metrics.width(str(r[ci]), font_size) + pad
                 if w > max_w:
                     max_w = w
         # Clamp each column between 18mm and 70mm
@@ -82,14 +93,31 @@ def _compute_col_widths(c: canvas.Canvas, headers: List[str], rows: List[List[An
     return [total_width * (w / s) for w in estimates]
 
 
+def _draw_table_header(c: canvas.Canvas, x: float, y: float, headers: List[str], col_widths: List[float], row_h: float):
+    c.setFillColor(colors.lightgrey)
+    c.rect(x, y, sum(col_widths), row_h, stroke=0, fill=1)
+    c.setFillColor(colors.black)
+    c.setFont('Helvetica-Bold', 9)
+    cx = x
+    for h, w in zip(headers, col_widths):
+        c.drawString(cx + 2*mm, y + 2*mm, _fit_text(str(h), w - 4*mm, 'Helvetica-Bold', 9))
+        cx += w
+
+
 def generate_table_pdf(
     *,
     out_path: Path,
     title: str,
     municipality_name: str,
     headers: List[str],
-    rows: List[List[Any]],
+    rows: Iterable[Sequence[Any]],
 ) -> Path:
+    """Write a branded table report to ``out_path``.
+
+    ``rows`` may be any iterable (a list, a generator, a query with
+    ``yield_per``); it is consumed once and each page is drawn as its rows
+    arrive. Only the first ``SAMPLE_ROWS`` are held back, to size the columns.
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
     page_w, page_h = A4
     c = canvas.Canvas(str(out_path), pagesize=A4)
@@ -125,58 +153,60 @@ def generate_table_pdf(
     # Drop the table lower to clear header & watermark title
     y = page_h - 72*mm
     table_width = (page_w - 40*mm)
-    # Compute adaptive column widths
-    col_widths = _compute_col_widths(c, headers, rows, table_width)
+    # Compute adaptive column widths from the first rows
+    rows = iter(rows)
+    sample = list(islice(rows, SAMPLE_ROWS))
+    col_widths = _compute_col_widths(headers, sample, table_width)
+    row_w = sum(col_widths)
     row_h = 8*mm
-
-    # Header row
-    c.setFillColor(colors.lightgrey)
-    c.rect(x, y, sum(col_widths), row_h, stroke=0, fill=1)
-    c.setFillColor(colors.black)
-    c.setFont('Helvetica-Bold', 9)
-    cx = x
-    for i, h in enumerate(headers):
-        w = col_widths[i]
-        txt = _fit_text(c, str(h), w - 4*mm, 'Helvetica-Bold', 9)
-        c.drawString(cx + 2*mm, y + 2*mm, txt)
-        cx += w
+    col_x = [fp_str(x + 2*mm + sum(col_widths[:i])) for i in range(len(col_widths))]
+    fit_w = [w - 4*mm for w in col_widths]
+    cols = range(len(col_widths))
+    body = font_metrics('Helvetica')
+    # Cell text repeats a lot (statuses, types, names): fit and encode each
+    # distinct value once per column
+    cell_ops: List[Dict[str, str]] = [{} for _ in col_widths]
+
+    def begin_page_text():
+        # One text object per page: a Tm + Tj per cell instead of a BT/ET block,
+        # font and colour per drawString
+        t = _CellText(c)
+        t.setFont('Helvetica', 9)
+        t.setFillColor(colors.black)
+        return t
+
+    _draw_table_header(c, x, y, headers, col_widths, row_h)
     y -= row_h
+    text = begin_page_text()
 
-    c.setFont('Helvetica', 9)
     # Rows (paginate if needed)
-    for r_idx, r in enumerate(rows):
+    for r_idx, r in enumerate(chain(sample, rows)):
         if y < 20*mm:
+            c.drawText(text)
             c.showPage()
             _draw_header_footer(c, title, municipality_name, page_w, page_h)
             y = page_h - 40*mm
             # redraw header
-            c.setFillColor(colors.lightgrey)
-            c.rect(x, y, sum(col_widths), row_h, stroke=0, fill=1)
-            c.setFillColor(colors.black)
-            c.setFont('Helvetica-Bold', 9)
-            cx = x
-            for i, h in enumerate(headers):
-                w = col_widths[i]
-                txt = _fit_text(c, str(h), w - 4*mm, 'Helvetica-Bold', 9)
-                c.drawString(cx + 2*mm, y + 2*mm, txt)
-                cx += w
+            _draw_table_header(c, x, y, headers, col_widths, row_h)
             y -= row_h
-            c.setFont('Helvetica', 9)
+            text = begin_page_text()
 
         if r_idx % 2 == 1:
             c.setFillColor(colors.whitesmoke)
-            c.rect(x, y, sum(col_widths), row_h, stroke=0, fill=1)
-        c.setFillColor(colors.black)
-        cx = x
-        for i, cell in enumerate(r):
-            w = col_widths[i]
-            txt = _fit_text(c, str(cell), w - 4*mm, 'Helvetica', 9)
-            c.drawString(cx + 2*mm, y + 2*mm, txt)
-            cx += w
+            c.rect(x, y, row_w, row_h, stroke=0, fill=1)
+        baseline = fp_str(y + 2*mm)
+        for i, cell in zip(cols, r):
+            s = str(cell)
+            memo = cell_ops[i]
+            op = memo.get(s)
+            if op is None:
+                if len(memo) >= FIT_MEMO_SIZE:
+                    memo.clear()
+                op = memo[s] = text.cell_op(body.fit(s, fit_w[i], 9))
+            text.cell(f'1 0 0 1 {col_x[i]} {baseline} Tm', op)
         y -= row_h
 
+    c.drawText(text)
     c.showPage()
     c.save()
     return out_path
-
-
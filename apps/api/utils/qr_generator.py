@@ -1,11 +1,12 @@
 """QR code generation utilities for document validation."""
-import qrcode
 import json
 import os
-from datetime import datetime
 from flask import current_app
-from io import BytesIO
-import base64
+
+try:
+    from apps.api.utils.qr_service import qr_data_uri, qr_png_bytes
+except ImportError:
+    from utils.qr_service import qr_data_uri, qr_png_bytes
 
 
 def generate_qr_code_data(document_request):
@@ -34,34 +35,9 @@ def generate_qr_code_image(qr_data, size=300):
         size: Size of QR code in pixels
     
     Returns:
-        Base64 encoded PNG image
+        Base64 encoded PNG image (memoized per payload and size)
     """
-    # qr_data is now a simple string URL
-    qr_string = str(qr_data)
-    
-    # Create QR code instance
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=10,
-        border=4,
-    )
-    
-    qr.add_data(qr_string)
-    qr.make(fit=True)
-    
-    # Create image
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Resize to specified size
-    img = img.resize((size, size))
-    
-    # Convert to base64
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    
-    return f"data:image/png;base64,{img_str}"
+    return qr_data_uri(str(qr_data), size)
 
 
 def save_qr_code_file(qr_data, file_path):
@@ -72,29 +48,9 @@ def save_qr_code_file(qr_data, file_path):
         qr_data: String URL to encode (simple verification URL)
         file_path: Path where to save the file
     """
-    # qr_data is now a simple string URL
-    qr_string = str(qr_data)
-    
-    # Create QR code instance
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=10,
-        border=4,
-    )
-    
-    qr.add_data(qr_string)
-    qr.make(fit=True)
-    
-    # Create image
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Ensure directory exists
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    
-    # Save image
-    img.save(file_path)
-    
+    with open(file_path, 'wb') as fh:
+        fh.write(qr_png_bytes(str(qr_data)))
     return file_path
 
 
@@ -0,0 +1,129 @@
+"""QR code rendering shared by documents, claim tickets and the API.
+
+Every output is built from one module matrix, memoized by payload (LRU), so a
+payload is encoded once per worker however many forms it is needed in:
+
+- ``qr_png_bytes`` / ``qr_png_io``: PNG in memory (no temporary files), for
+  DOCX templates and saved claim ticket images.
+- ``qr_data_uri``: base64 PNG data URI at a fixed pixel size.
+- ``qr_svg``: compact SVG (one path) for the web claim ticket.
+- ``draw_qr``: vector rectangles on a ReportLab canvas, sharp at any print
+  size and smaller than an embedded bitmap.
+
+Returned values are cached and shared; ``qr_png_io`` hands out a fresh
+``BytesIO`` over the cached bytes.
+"""
+from __future__ import annotations
+
+import base64
+from functools import lru_cache
+from io import BytesIO
+from typing import List, Tuple
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q
+
+
+QR_CACHE_SIZE = 256
+
+_ERROR_LEVELS = {'L': ERROR_CORRECT_L, 'M': ERROR_CORRECT_M, 'Q': ERROR_CORRECT_Q, 'H': ERROR_CORRECT_H}
+
+Matrix = Tuple[Tuple[bool, ...], ...]
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_matrix(data: str, error_correction: str = 'H', border: int = 4) -> Matrix:
+    """Module matrix for ``data`` including the ``border`` quiet zone (True = dark)."""
+    qr = qrcode.QRCode(version=None, error_correction=_ERROR_LEVELS[error_correction], border=border)
+    qr.add_data(str(data))
+    qr.make(fit=True)
+    return tuple(tuple(bool(cell) for cell in row) for row in qr.get_matrix())
+
+
+def _runs(row) -> List[Tuple[int, int]]:
+    """(start, length) of each horizontal run of dark modules in ``row``."""
+    runs = []
+    start = None
+    for x, dark in enumerate(row):
+        if dark and start is None:
+            start = x
+        elif not dark and start is not None:
+            runs.append((start, x - start))
+            start = None
+    if start is not None:
+        runs.append((start, len(row) - start))
+    return runs
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_png_bytes(data: str, box_size: int = 10, border: int = 4, error_correction: str = 'H') -> bytes:
+    """PNG (1-bit) with ``box_size`` pixels per module."""
+    from PIL import Image
+
+    matrix = qr_matrix(data, error_correction, border)
+    n = len(matrix)
+    img = Image.new('1', (n, n), 1)
+    img.putdata([0 if dark else 1 for row in matrix for dark in row])
+    if box_size > 1:
+        img = img.resize((n * box_size, n * box_size), Image.NEAREST)
+    out = BytesIO()
+    img.save(out, format='PNG', optimize=True)
+    return out.getvalue()
+
+
+def qr_png_io(data: str, box_size: int = 10, border: int = 4, error_correction: str = 'H') -> BytesIO:
+    """``qr_png_bytes`` as a fresh stream (python-docx, ReportLab and Flask accept it)."""
+    return BytesIO(qr_png_bytes(data, box_size, border, error_correction))
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_data_uri(data: str, size: int = 300) -> str:
+    """``data:image/png;base64,...`` at ``size`` x ``size`` pixels."""
+    from PIL import Image
+
+    with Image.open(BytesIO(qr_png_bytes(data))) as img:
+        img = img.resize((size, size), Image.NEAREST)
+        out = BytesIO()
+        img.save(out, format='PNG')
+    return f"data:image/png;base64,{base64.b64encode(out.getvalue()).decode()}"
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_svg(data: str, border: int = 4, error_correction: str = 'H') -> str:
+    """Standalone SVG; one unit per module, scales to whatever size it is shown at."""
+    matrix = qr_matrix(data, error_correction, border)
+    n = len(matrix)
+    path = ''.join(
+        f'M{x} {y}h{length}v1h-{length}z'
+        for y, row in enumerate(matrix)
+        for x, length in _runs(row)
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="#fff"/>'
+        f'<path d="{path}" fill="#000"/></svg>'
+    )
+
+
+def draw_qr(c, data: str, x: float, y: float, size: float, border: int = 4, error_correction: str = 'H') -> None:
+    """Draw ``data`` as vector modules in the ``size`` square whose lower-left corner is (x, y)."""
+    matrix = qr_matrix(data, error_correction, border)
+    n = len(matrix)
+    module = size / n
+    c.saveState()
+    c.setFillColorRGB(1, 1, 1)
+    c.rect(x, y, size, size, stroke=0, fill=1)
+    c.setFillColorRGB(0, 0, 0)
+    p = c.beginPath()
+    for row_index, row in enumerate(matrix):
+        # PDF y grows upwards; matrix rows run top to bottom
+        top = y + size - (row_index + 1) * module
+        for start, length in _runs(row):
+            p.rect(x + start * module, top, length * module, module)
+    c.drawPath(p, stroke=0, fill=1)
+    c.restoreState()
+
+
+def clear_qr_cache() -> None:
+    for fn in (qr_matrix, qr_png_bytes, qr_data_uri, qr_svg):
+        fn.cache_clear()
@@ -8,23 +8,24 @@ import os
 import uuid
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 import base64
 import hashlib
 
 import bcrypt
-import qrcode
 import jwt
 from flask import current_app
 from cryptography.fernet import Fernet, InvalidToken
 
-
-ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # no O/0/I/1
+try:
+    from apps.api.utils.qr_service import qr_png_bytes
+    from apps.api.utils.storage import get_storage
+except ImportError:
+    from utils.qr_service import qr_png_bytes
+    from utils.storage import get_storage
 
 
-def _uploads_base() -> Path:
-    up = current_app.config.get("UPLOAD_FOLDER")
-    return Path(up)
+ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # no O/0/I/1
 
 
 def generate_pickup_code(length: int = 8) -> str:
@@ -77,24 +78,24 @@ def sign_claim_token(request_obj) -> Dict[str, Any]:
     return {"token": token, "jti": jti, "exp": payload["exp"]}
 
 
-def build_qr_png(data: str, request_id: int, municipality_slug: str) -> Tuple[Path, str]:
-    """Render a QR PNG file under uploads/claims/{municipality_slug}/{request_id}.png.
+def claim_ticket_link(token: str) -> str:
+    """Admin portal deep link encoded in a claim ticket's QR."""
+    base = (
+        current_app.config.get("ADMIN_WEB_BASE_URL")
+        or os.getenv("ADMIN_WEB_BASE_URL")
+        or "http://localhost:3001"
+    )
+    return f"{base}/verify-ticket?token={token}"
+
+
+def build_qr_png(data: str, request_id: int, municipality_slug: str) -> Tuple[Optional[Path], str]:
+    """Store a QR PNG at claims/{municipality_slug}/{request_id}.png in upload storage.
 
-    Returns absolute path and relative path from UPLOAD_FOLDER.
+    Returns the local path (None with object storage) and the storage key.
     """
-    base = _uploads_base()
-    out_dir = base / "claims" / municipality_slug
-    out_dir.mkdir(parents=True, exist_ok=True)
-    png_path = out_dir / f"{request_id}.png"
-
-    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=4)
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    img.save(str(png_path))
-
-    rel = os.path.relpath(png_path, base)
-    return png_path, rel.replace("\\", "/")
+    storage = get_storage()
+    rel = storage.save(f"claims/{municipality_slug}/{request_id}.png", qr_png_bytes(data))
+    return storage.local_path(rel), rel
 
 
 def masked(code: str) -> str:
@@ -0,0 +1,311 @@
+"""In-process registry of reference data.
+
+Municipalities, barangays, document types and issue categories change rarely
+but are looked up on almost every request. This module keeps an immutable,
+compact snapshot of those tables per worker with dict indexes by id, slug,
+code and PSGC code so routes can resolve them without a DB round-trip.
+
+The snapshot lives in ``app.extensions`` so each app instance (and therefore
+each gunicorn worker) owns its own copy.
+
+Freshness:
+- Commits touching a reference model in this process mark the snapshot stale
+  immediately (see ``_track_reference_writes``).
+- Other workers notice edits by comparing a cheap table fingerprint at most
+  every ``REFERENCE_REGISTRY_TTL`` seconds.
+
+Entry points: ``get_registry()``, ``bump_version()``, ``warm_registry()``.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    from apps.api import db
+    from apps.api.models.municipality import Municipality, Barangay
+    from apps.api.models.document import DocumentType
+    from apps.api.models.issue import IssueCategory
+    from apps.api.utils.http_cache import content_fingerprint, table_fingerprint
+except ImportError:
+    from __init__ import db
+    from models.municipality import Municipality, Barangay
+    from models.document import DocumentType
+    from models.issue import IssueCategory
+    from utils.http_cache import content_fingerprint, table_fingerprint
+
+
+REFERENCE_MODELS = (Municipality, Barangay, DocumentType, IssueCategory)
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+class _Record:
+    """Immutable slotted record; subclasses declare ``__slots__`` = field names."""
+
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {getattr(self, "id", None)}>'
+
+    @classmethod
+    def from_model(cls, obj):
+        return cls(**{name: getattr(obj, name, None) for name in cls.__slots__})
+
+
+class MunicipalityRecord(_Record):
+    __slots__ = (
+        'id', 'name', 'slug', 'psgc_code', 'contact_email', 'contact_phone', 'address',
+        'logo_url', 'flag_url', 'trademark_image_url', 'description', 'population',
+        'land_area', 'is_active', 'created_at',
+    )
+
+    def to_dict(self, include_barangays=False):
+        """Same shape as ``Municipality.to_dict``."""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['created_at'] = _iso(self.created_at)
+        if include_barangays:
+            data['barangays'] = [b.to_dict() for b in get_registry().barangays_of(self.id, active_only=False)]
+        return data
+
+
+class BarangayRecord(_Record):
+    __slots__ = (
+        'id', 'name', 'slug', 'municipality_id', 'psgc_code', 'contact_email',
+        'contact_phone', 'address', 'population', 'is_active', 'created_at',
+    )
+
+    @property
+    def municipality(self):
+        return get_registry().municipality(self.municipality_id)
+
+    def to_dict(self):
+        """Same shape as ``Barangay.to_dict``."""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['created_at'] = _iso(self.created_at)
+        return data
+
+
+class DocumentTypeRecord(_Record):
+    __slots__ = (
+        'id', 'name', 'code', 'description', 'authority_level', 'requirements', 'fee',
+        'processing_days', 'supports_physical', 'supports_digital', 'is_active',
+    )
+
+    def to_dict(self):
+        """Same shape as ``DocumentType.to_dict``."""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['fee'] = float(self.fee) if self.fee else 0.00
+        return data
+
+
+class IssueCategoryRecord(_Record):
+    __slots__ = ('id', 'name', 'slug', 'description', 'icon', 'is_active')
+
+    def to_dict(self):
+        """Same shape as ``IssueCategory.to_dict``."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ReferenceRegistry:
+    """Immutable snapshot of reference tables with lookup indexes."""
+
+    __slots__ = (
+        'version',
+        '_municipalities', '_municipality_by_id', '_municipality_by_slug', '_municipality_by_psgc',
+        '_barangay_by_id', '_barangay_by_psgc', '_barangays_by_municipality',
+        '_document_type_by_id', '_document_type_by_code',
+        '_issue_category_by_id', '_issue_category_by_slug',
+    )
+
+    def __init__(self, version: str, municipalities, barangays, document_types, issue_categories):
+        self.version = version
+        self._municipalities = tuple(municipalities)
+        self._municipality_by_id = _index(self._municipalities, 'id')
+        self._municipality_by_slug = _index(self._municipalities, 'slug')
+        self._municipality_by_psgc = _index(self._municipalities, 'psgc_code')
+
+        barangays = tuple(barangays)
+        self._barangay_by_id = _index(barangays, 'id')
+        self._barangay_by_psgc = _index(barangays, 'psgc_code')
+        grouped: Dict[int, list] = {}
+        for b in barangays:
+            grouped.setdefault(b.municipality_id, []).append(b)
+        self._barangays_by_municipality = MappingProxyType({k: tuple(v) for k, v in grouped.items()})
+
+        document_types = tuple(document_types)
+        self._document_type_by_id = _index(document_types, 'id')
+        self._document_type_by_code = _index(document_types, 'code')
+
+        issue_categories = tuple(issue_categories)
+        self._issue_category_by_id = _index(issue_categories, 'id')
+        self._issue_category_by_slug = _index(issue_categories, 'slug')
+
+    # Municipalities
+    def municipalities(self, active_only: bool = True) -> Tuple[MunicipalityRecord, ...]:
+        if not active_only:
+            return self._municipalities
+        return tuple(m for m in self._municipalities if m.is_active)
+
+    def municipality(self, municipality_id) -> Optional[MunicipalityRecord]:
+        return self._municipality_by_id.get(_as_int(municipality_id))
+
+    def municipality_by_slug(self, slug: str) -> Optional[MunicipalityRecord]:
+        return self._municipality_by_slug.get(slug)
+
+    def municipality_by_psgc(self, psgc_code: str) -> Optional[MunicipalityRecord]:
+        return self._municipality_by_psgc.get(psgc_code)
+
+    # Barangays
+    def barangay(self, barangay_id) -> Optional[BarangayRecord]:
+        return self._barangay_by_id.get(_as_int(barangay_id))
+
+    def barangay_by_psgc(self, psgc_code: str) -> Optional[BarangayRecord]:
+        return self._barangay_by_psgc.get(psgc_code)
+
+    def barangays_of(self, municipality_id, active_only: bool = True) -> Tuple[BarangayRecord, ...]:
+        rows = self._barangays_by_municipality.get(_as_int(municipality_id), ())
+        if not active_only:
+            return rows
+        return tuple(b for b in rows if b.is_active)
+
+    # Document types
+    def document_type(self, document_type_id) -> Optional[DocumentTypeRecord]:
+        return self._document_type_by_id.get(_as_int(document_type_id))
+
+    def document_type_by_code(self, code: str) -> Optional[DocumentTypeRecord]:
+        return self._document_type_by_code.get(code)
+
+    # Issue categories
+    def issue_category(self, category_id) -> Optional[IssueCategoryRecord]:
+        return self._issue_category_by_id.get(_as_int(category_id))
+
+    def issue_category_by_slug(self, slug: str) -> Optional[IssueCategoryRecord]:
+        return self._issue_category_by_slug.get(slug)
+
+
+def _index(records, attr) -> Mapping:
+    return MappingProxyType({getattr(r, attr): r for r in records if getattr(r, attr) is not None})
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Per-app (per-worker) snapshot management ---
+
+class _RegistryState:
+    __slots__ = ('lock', 'registry', 'fingerprint', 'checked_at', 'stale')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.registry: Optional[ReferenceRegistry] = None
+        self.fingerprint = None
+        self.checked_at = 0.0
+        self.stale = False
+
+
+def _state(app=None) -> _RegistryState:
+    app = app or current_app._get_current_object()
+    state = app.extensions.get('reference_registry')
+    if state is None:
+        state = app.extensions.setdefault('reference_registry', _RegistryState())
+    return state
+
+
+def _current_fingerprint():
+    return (
+        table_fingerprint(Municipality),
+        table_fingerprint(Barangay),
+        table_fingerprint(DocumentType),
+        content_fingerprint(IssueCategory),  # no updated_at column
+    )
+
+
+def _load(state: _RegistryState) -> ReferenceRegistry:
+    fingerprint = _current_fingerprint()
+    registry = ReferenceRegistry(
+        version=hashlib.sha1(repr(fingerprint).encode('utf-8')).hexdigest()[:12],
+        municipalities=[MunicipalityRecord.from_model(m) for m in Municipality.query.order_by(Municipality.id).all()],
+        barangays=[BarangayRecord.from_model(b) for b in Barangay.query.order_by(Barangay.id).all()],
+        document_types=[DocumentTypeRecord.from_model(t) for t in DocumentType.query.order_by(DocumentType.id).all()],
+        issue_categories=[IssueCategoryRecord.from_model(c) for c in IssueCategory.query.order_by(IssueCategory.id).all()],
+    )
+    state.registry, state.fingerprint, state.checked_at, state.stale = registry, fingerprint, time.monotonic(), False
+    return registry
+
+
+def get_registry() -> ReferenceRegistry:
+    """Return the current snapshot, reloading it when stale. Requires an app context."""
+    state = _state()
+    ttl = float(current_app.config.get('REFERENCE_REGISTRY_TTL', 30))
+    registry = state.registry
+    if registry is not None and not state.stale and time.monotonic() - state.checked_at < ttl:
+        return registry
+    with state.lock:
+        if state.registry is None or state.stale:
+            return _load(state)
+        if time.monotonic() - state.checked_at >= ttl:
+            if _current_fingerprint() != state.fingerprint:
+                return _load(state)
+            state.checked_at = time.monotonic()
+        return state.registry
+
+
+def bump_version(app=None) -> None:
+    """Mark the snapshot stale so the next ``get_registry()`` reloads it."""
+    _state(app).stale = True
+
+
+def warm_registry(app) -> None:
+    """Load the snapshot eagerly (worker start). Failures are non-fatal."""
+    try:
+        with app.app_context():
+            state = _state(app)
+            with state.lock:
+                _load(state)
+    except Exception as e:
+        try:
+            with app.app_context():
+                db.session.rollback()
+        except Exception:
+            pass
+        app.logger.warning(f'Reference registry warm-up skipped: {e}')
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_reference_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, REFERENCE_MODELS):
+            session.info['reference_dirty'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_on_commit(session):
+    if session.info.pop('reference_dirty', False) and has_app_context():
+        bump_version()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop('reference_dirty', None)
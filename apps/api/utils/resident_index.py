@@ -0,0 +1,198 @@
+"""Trigram index for the admin resident directory.
+
+Each user gets one ``resident_search_tokens`` row per distinct trigram of
+their first/last name, username, email local part and phone digits, tagged
+with ``municipality_id``. A query is split into the same trigrams; candidates
+are users sharing enough of them, found with one grouped index-only scan on
+``(municipality_id, token, user_id)`` (``(token, user_id)`` when unscoped). Counting shared trigrams makes the
+match typo tolerant (``'santso'`` still finds ``'santos'``) and padding the
+start of each word gives prefix matches a head start.
+
+The index is portable (SQLite and PostgreSQL); it is kept current from ORM
+flushes of ``User`` (``register``, ``update_profile``, admin edits) and can be
+rebuilt with ``rebuild_resident_index()``.
+"""
+from __future__ import annotations
+
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect as sa_inspect, select
+from sqlalchemy.orm import Session
+
+try:
+    from apps.api import db
+    from apps.api.models.search import ResidentSearchToken
+    from apps.api.models.user import User
+    from apps.api.utils.location_index import normalize_name
+except ImportError:
+    from __init__ import db
+    from models.search import ResidentSearchToken
+    from models.user import User
+    from utils.location_index import normalize_name
+
+
+INDEXED_FIELDS = ('first_name', 'last_name', 'username', 'email', 'phone_number', 'municipality_id')
+MIN_SIMILARITY = 0.5  # share of query trigrams a candidate must contain
+CANDIDATE_LIMIT = 500
+
+_token_table = ResidentSearchToken.__table__
+_table_present: Dict[str, bool] = {}
+
+
+def _words(value: Optional[str]) -> List[str]:
+    return re.findall(r'[a-z0-9]+', normalize_name(value or ''))
+
+
+def trigrams(words: Iterable[str]) -> Set[str]:
+    """Trigrams of each word padded like pg_trgm (two leading spaces, one trailing)."""
+    grams: Set[str] = set()
+    for word in words:
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def user_tokens(user) -> Set[str]:
+    words = _words(user.first_name) + _words(user.last_name) + _words(user.username)
+    if user.email:
+        words += _words(user.email.split('@', 1)[0])
+    digits = re.sub(r'\D', '', user.phone_number or '')
+    if digits:
+        # Local numbers are typed as 09xx or +639xx; index the 10 significant digits
+        words.append(digits[-10:])
+    return trigrams(words)
+
+
+def query_tokens(q: str) -> Set[str]:
+    words = _words(q)
+    digits = re.sub(r'\D', '', q or '')
+    if len(digits) >= 4 and len(digits) == len(re.sub(r'\s|-|\+', '', q or '')):
+        # Phone-number query: match on digits only, ignore the 0/+63 prefix
+        words = [digits[-10:] if len(digits) > 10 else digits.lstrip('0')]
+        return {g for g in trigrams(words) if not g.startswith(' ')}
+    return trigrams(words)
+
+
+def _rows_for(user) -> List[dict]:
+    return [{'user_id': user.id, 'token': t, 'municipality_id': user.municipality_id} for t in user_tokens(user)]
+
+
+def _index_available(conn) -> bool:
+    key = str(conn.engine.url)
+    present = _table_present.get(key)
+    if present is None:
+        present = sa_inspect(conn).has_table(_token_table.name)
+        if present:
+            _table_present[key] = True
+    return present
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_resident_tokens(session, flush_context):
+    changed, removed = [], []
+    for obj in session.new:
+        if isinstance(obj, User):
+            changed.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = sa_inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in INDEXED_FIELDS):
+                changed.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            removed.append(obj.id)
+    if not changed and not removed:
+        return
+
+    conn = session.connection()
+    if not _index_available(conn):
+        return
+    ids = [u.id for u in changed] + removed
+    conn.execute(delete(_token_table).where(_token_table.c.user_id.in_(ids)))
+    rows = [row for u in changed for row in _rows_for(u)]
+    if rows:
+        conn.execute(insert(_token_table), rows)
+
+
+def rebuild_resident_index(batch_size: int = 1000) -> int:
+    """Recreate all resident tokens. Returns the number of users indexed."""
+    db.session.execute(delete(_token_table))
+    count = 0
+    rows: List[dict] = []
+    # Plain column rows are much cheaper than ORM instances at 100k+ users
+    columns = select(User.id, User.municipality_id, User.first_name, User.last_name,
+                     User.username, User.email, User.phone_number).order_by(User.id)
+    for user in db.session.execute(columns.execution_options(yield_per=batch_size)):
+        rows.extend(_rows_for(user))
+        count += 1
+        if len(rows) >= batch_size * 20:
+            db.session.execute(insert(_token_table), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(_token_table), rows)
+    db.session.commit()
+    return count
+
+
+def _field_bonus(user, q_words: List[str]) -> float:
+    """Small boost for exact/prefix hits so "ana" ranks Ana above Mariana."""
+    fields = _words(user.first_name) + _words(user.last_name) + _words(user.username)
+    if user.email:
+        fields += _words(user.email.split('@', 1)[0])
+    bonus = 0.0
+    for w in q_words:
+        if w in fields:
+            bonus += 0.5
+        elif any(f.startswith(w) for f in fields):
+            bonus += 0.25
+    return bonus
+
+
+def search_residents(q: str, municipality_id: Optional[int] = None, filters: Iterable = (),
+                     limit: int = 20, offset: int = 0) -> Tuple[List[User], int]:
+    """Ranked, typo-tolerant resident lookup.
+
+    Args:
+        q: Free text (name, username, email, phone).
+        municipality_id: Scope; ``None`` searches every municipality.
+        filters: Extra SQLAlchemy criteria on ``User`` (role, verification, ...).
+        limit / offset: Page of the ranked list.
+
+    Returns:
+        ``(users, total)`` where ``total`` counts every match passing
+        ``filters``. Filters are applied in the candidate query, so inactive
+        or unverified namesakes never crowd out real matches. The best
+        ``CANDIDATE_LIMIT`` candidates (more for deep pages) by shared
+        trigrams are then ranked with the exact/prefix bonus.
+    """
+    grams = query_tokens(q)
+    if not grams:
+        return [], 0
+    needed = max(1, math.ceil(len(grams) * MIN_SIMILARITY))
+    hits = func.count().label('hits')
+    matches = (
+        select(_token_table.c.user_id, hits)
+        .join(User, User.id == _token_table.c.user_id)
+        .where(_token_table.c.token.in_(sorted(grams)), *filters)
+        .group_by(_token_table.c.user_id)
+        .having(func.count() >= needed)
+    )
+    if municipality_id:
+        matches = matches.where(_token_table.c.municipality_id == municipality_id)
+    total = db.session.execute(select(func.count()).select_from(matches.subquery())).scalar_one()
+    if not total or offset >= total:
+        return [], total
+
+    window = max(CANDIDATE_LIMIT, offset + limit)
+    candidates = dict(db.session.execute(
+        matches.order_by(hits.desc(), _token_table.c.user_id).limit(window)
+    ).all())
+    users = User.query.filter(User.id.in_(list(candidates))).all()
+    q_words = _words(q)
+    ranked = sorted(
+        users,
+        key=lambda u: (-(candidates[u.id] / len(grams) + _field_bonus(u, q_words)), u.last_name or '', u.id),
+    )
+    return ranked[offset:offset + limit], total
@@ -0,0 +1,269 @@
+"""Full-text search over public content.
+
+Announcements, marketplace items, public issues and benefit programs are
+mirrored into ``search_documents`` (see ``models.search``), which carries the
+dialect specific text index: FTS5 on SQLite, a GIN ``tsvector`` index on
+PostgreSQL.
+
+Sync:
+- ORM flushes touching a source model upsert/delete the matching search row
+  in the same transaction (``_sync_search_documents``), so a rollback undoes
+  both. Bulk/Core writes bypass this; run ``rebuild_search_index()`` (or
+  ``scripts/rebuild_search_index.py``) after them.
+
+Query:
+- ``search()`` returns ranked hits (BM25 on SQLite, ``ts_rank_cd`` on
+  PostgreSQL) plus ``type`` and ``municipality`` facet counts.
+"""
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import bindparam, delete, event, insert, inspect as sa_inspect, text
+from sqlalchemy.orm import Session
+
+try:
+    from apps.api import db
+    from apps.api.models.search import SearchDocument, SEARCH_TSVECTOR_SQL
+    from apps.api.models.announcement import Announcement
+    from apps.api.models.marketplace import Item
+    from apps.api.models.issue import Issue
+    from apps.api.models.benefit import BenefitProgram
+except ImportError:
+    from __init__ import db
+    from models.search import SearchDocument, SEARCH_TSVECTOR_SQL
+    from models.announcement import Announcement
+    from models.marketplace import Item
+    from models.issue import Issue
+    from models.benefit import BenefitProgram
+
+
+class SearchSource(NamedTuple):
+    entity_type: str
+    model: type
+    fields: tuple  # attributes whose change requires re-indexing
+    is_visible: Callable
+    to_document: Callable  # obj -> (title, body, municipality_id)
+
+
+SOURCES = (
+    SearchSource(
+        'announcement', Announcement,
+        ('title', 'content', 'municipality_id', 'is_active'),
+        lambda a: bool(a.is_active),
+        lambda a: (a.title, a.content, a.municipality_id),
+    ),
+    SearchSource(
+        'item', Item,
+        ('title', 'description', 'municipality_id', 'is_active', 'status'),
+        lambda i: bool(i.is_active) and i.status == 'available',
+        lambda i: (i.title, i.description, i.municipality_id),
+    ),
+    SearchSource(
+        'issue', Issue,
+        ('title', 'description', 'municipality_id', 'is_public'),
+        lambda i: bool(i.is_public),
+        lambda i: (i.title, i.description, i.municipality_id),
+    ),
+    SearchSource(
+        'benefit_program', BenefitProgram,
+        ('name', 'description', 'benefit_description', 'municipality_id', 'is_active'),
+        lambda p: bool(p.is_active),
+        lambda p: (p.name, '\n'.join(filter(None, [p.description, p.benefit_description])), p.municipality_id),
+    ),
+)
+SOURCE_BY_MODEL = {s.model: s for s in SOURCES}
+SOURCE_BY_TYPE = {s.entity_type: s for s in SOURCES}
+ENTITY_TYPES = tuple(SOURCE_BY_TYPE)
+
+MAX_QUERY_TERMS = 8
+_search_table = SearchDocument.__table__
+_table_present: Dict[str, bool] = {}
+
+
+def _document_row(source: SearchSource, obj) -> dict:
+    title, body, municipality_id = source.to_document(obj)
+    return {
+        'entity_type': source.entity_type,
+        'entity_id': obj.id,
+        'municipality_id': municipality_id,
+        'title': (title or '')[:200],
+        'body': body or '',
+        'updated_at': datetime.utcnow(),
+    }
+
+
+def _index_available(conn) -> bool:
+    """True when ``search_documents`` exists (cached per engine URL)."""
+    key = str(conn.engine.url)
+    present = _table_present.get(key)
+    if present is None:
+        present = sa_inspect(conn).has_table(_search_table.name)
+        if present:
+            _table_present[key] = True  # only cache the positive answer; migrations may add it later
+    return present
+
+
+def _needs_reindex(source: SearchSource, obj) -> bool:
+    state = sa_inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in source.fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_search_documents(session, flush_context):
+    upserts, removals = [], []
+    for obj in session.new:
+        source = SOURCE_BY_MODEL.get(type(obj))
+        if source is not None:
+            (upserts if source.is_visible(obj) else removals).append((source, obj))
+    for obj in session.dirty:
+        source = SOURCE_BY_MODEL.get(type(obj))
+        if source is not None and _needs_reindex(source, obj):
+            (upserts if source.is_visible(obj) else removals).append((source, obj))
+    for obj in session.deleted:
+        source = SOURCE_BY_MODEL.get(type(obj))
+        if source is not None:
+            removals.append((source, obj))
+    if not upserts and not removals:
+        return
+
+    conn = session.connection()
+    if not _index_available(conn):
+        return
+    for source, obj in upserts + removals:
+        conn.execute(delete(_search_table).where(
+            _search_table.c.entity_type == source.entity_type,
+            _search_table.c.entity_id == obj.id,
+        ))
+    if upserts:
+        conn.execute(insert(_search_table), [_document_row(source, obj) for source, obj in upserts])
+
+
+def rebuild_search_index(batch_size: int = 1000) -> Dict[str, int]:
+    """Recreate every search document from the source tables. Returns counts per type."""
+    counts: Dict[str, int] = {}
+    db.session.execute(delete(_search_table))
+    for source in SOURCES:
+        counts[source.entity_type] = 0
+        batch: List[dict] = []
+        for obj in source.model.query.order_by(source.model.id).yield_per(batch_size):
+            if not source.is_visible(obj):
+                continue
+            batch.append(_document_row(source, obj))
+            if len(batch) >= batch_size:
+                db.session.execute(insert(_search_table), batch)
+                counts[source.entity_type] += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(_search_table), batch)
+            counts[source.entity_type] += len(batch)
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text("INSERT INTO search_fts(search_fts) VALUES ('optimize')"))
+    db.session.commit()
+    return counts
+
+
+# --- Querying ---
+
+def _query_terms(q: str) -> List[str]:
+    return re.findall(r'\w+', (q or '').lower(), flags=re.UNICODE)[:MAX_QUERY_TERMS]
+
+
+def _backend_sql(dialect: str, terms: List[str]):
+    """Return (FROM clause, match condition, score expr, ORDER BY, snippet expr, match param).
+
+    Column references are unqualified on PostgreSQL so the tsvector expression
+    matches the GIN index definition.
+    """
+    if dialect == 'postgresql':
+        match = f"({SEARCH_TSVECTOR_SQL}) @@ to_tsquery('simple', :match)"
+        score = f"ts_rank_cd({SEARCH_TSVECTOR_SQL}, to_tsquery('simple', :match))"
+        snippet = ("ts_headline('simple', coalesce(body, ''), to_tsquery('simple', :match), "
+                   "'StartSel=<b>, StopSel=</b>, MaxFragments=1, MaxWords=24, MinWords=8')")
+        return ('search_documents d', match, score, 'score DESC', snippet,
+                ' & '.join(f'{t}:*' for t in terms))
+    # SQLite FTS5: bm25() is lower-is-better; title weighted above body
+    match = 'search_fts MATCH :match'
+    score = 'bm25(search_fts, 4.0, 1.0)'
+    snippet = "snippet(search_fts, 1, '<b>', '</b>', '…', 16)"
+    # CROSS JOIN pins the join order so the FTS cursor drives the scan; otherwise
+    # SQLite may walk search_documents by a filter index and re-run MATCH per row.
+    return ('search_fts CROSS JOIN search_documents d ON d.id = search_fts.rowid', match, score, 'score', snippet,
+            ' '.join(f'"{t}"*' for t in terms))
+
+
+def _filters(types: Optional[Iterable[str]], municipality_id: Optional[int]):
+    clauses, params = [], {}
+    if types:
+        clauses.append('d.entity_type IN :types')
+        params['types'] = list(types)
+    if municipality_id:
+        # Province-wide documents (NULL municipality) are visible everywhere
+        clauses.append('(d.municipality_id = :municipality_id OR d.municipality_id IS NULL)')
+        params['municipality_id'] = municipality_id
+    return clauses, params
+
+
+def search(q: str, types: Optional[Iterable[str]] = None, municipality_id: Optional[int] = None,
+           page: int = 1, per_page: int = 20) -> dict:
+    """Ranked search with facets.
+
+    Facets are disjunctive: type counts honour the municipality filter but not
+    the type filter, and vice versa, so the UI can show counts for every option.
+    """
+    terms = _query_terms(q)
+    types = [t for t in (types or []) if t in SOURCE_BY_TYPE]
+    page = max(1, page)
+    per_page = max(1, min(per_page, 100))
+    if not terms:
+        return {'results': [], 'total': 0, 'facets': {'type': {}, 'municipality': {}}}
+
+    source_sql, match, score, order_by, snippet, match_param = _backend_sql(db.engine.dialect.name, terms)
+    clauses, params = _filters(types, municipality_id)
+    stmt = text(
+        f'SELECT d.entity_type, d.entity_id, d.municipality_id, d.title, {snippet} AS snippet, {score} AS score '
+        f"FROM {source_sql} WHERE {' AND '.join([match] + clauses)} ORDER BY {order_by} LIMIT :limit OFFSET :offset"
+    )
+    if 'types' in params:
+        stmt = stmt.bindparams(bindparam('types', expanding=True))
+    rows = db.session.execute(
+        stmt, {'match': match_param, 'limit': per_page, 'offset': (page - 1) * per_page, **params},
+    ).mappings().all()
+
+    # One grouped scan of the match set yields the total and both facets
+    cells = db.session.execute(
+        text(f'SELECT d.entity_type, d.municipality_id, count(*) FROM {source_sql} '
+             f'WHERE {match} GROUP BY d.entity_type, d.municipality_id'),
+        {'match': match_param},
+    ).all()
+    total = 0
+    type_facet: Dict[str, int] = {}
+    muni_facet: Dict[str, int] = {}
+    for entity_type, muni_id, count in cells:
+        type_ok = not types or entity_type in types
+        muni_ok = not municipality_id or muni_id is None or muni_id == municipality_id
+        if muni_ok:
+            type_facet[entity_type] = type_facet.get(entity_type, 0) + count
+        if type_ok:
+            key = 'province' if muni_id is None else str(muni_id)
+            muni_facet[key] = muni_facet.get(key, 0) + count
+        if type_ok and muni_ok:
+            total += count
+
+    return {
+        'results': [
+            {
+                'type': r['entity_type'],
+                'id': r['entity_id'],
+                'municipality_id': r['municipality_id'],
+                'title': r['title'],
+                'snippet': r['snippet'],
+                'score': round(abs(float(r['score'] or 0)), 4),
+            }
+            for r in rows
+        ],
+        'total': int(total),
+        'facets': {'type': type_facet, 'municipality': muni_facet},
+    }
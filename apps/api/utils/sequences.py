@@ -0,0 +1,124 @@
+"""Reference number allocation (``REQ-3-2026-000042``).
+
+Numbers come from ``sequence_counters`` (one row per prefix, municipality and
+year) instead of ``COUNT(*)`` over the target table, so allocation is O(1)
+and two concurrent creators can never receive the same number.
+
+Two modes, chosen by ``REFERENCE_BLOCK_SIZE``:
+
+- ``1`` (default): the counter row is advanced inside the caller's
+  transaction. The ``UPDATE`` takes the row lock, concurrent creators for the
+  same municipality queue behind it until commit, and a rolled back request
+  gives its number back, so numbers stay gapless.
+- ``> 1``: each worker process reserves a block of numbers in its own short
+  transaction and hands them out from memory. Nobody waits on the row lock
+  for longer than one ``UPDATE``, at the cost of gaps (unused block tails
+  when a worker exits) and numbers that are not strictly in creation order
+  across workers.
+
+The year is the Philippine calendar year (``local_year``), so a request
+filed at 07:00 on 1 January in Iba is numbered in the new year.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+try:
+    from apps.api import db
+    from apps.api.models.sequence import SequenceCounter
+except ImportError:
+    from __init__ import db
+    from models.sequence import SequenceCounter
+
+
+_counters = SequenceCounter.__table__
+PROVINCE_WIDE = 0
+# Asia/Manila has no daylight saving time
+MANILA = timezone(timedelta(hours=8), 'Asia/Manila')
+
+Key = Tuple[str, int, int]
+
+
+def _key_clause(key: Key):
+    prefix, municipality_id, year = key
+    return (
+        _counters.c.prefix == prefix,
+        _counters.c.municipality_id == municipality_id,
+        _counters.c.year == year,
+    )
+
+
+def _reserve(conn, key: Key, count: int) -> int:
+    """Advance the counter row by ``count``; return the new (last reserved) value."""
+    bumped = conn.execute(
+        update(_counters).where(*_key_clause(key)).values(value=_counters.c.value + count)
+    )
+    if bumped.rowcount == 0:
+        prefix, municipality_id, year = key
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(_counters).values(
+                    prefix=prefix, municipality_id=municipality_id, year=year, value=count,
+                ))
+            return count
+        except IntegrityError:
+            # Another creator inserted the row first; its lock is ours after this UPDATE
+            conn.execute(
+                update(_counters).where(*_key_clause(key)).values(value=_counters.c.value + count)
+            )
+    return conn.execute(select(_counters.c.value).where(*_key_clause(key))).scalar_one()
+
+
+class _BlockCache:
+    """Per-process ranges ``[next, end]`` reserved ahead of use."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.blocks: Dict[Key, list] = {}
+
+    def take(self, key: Key, block_size: int) -> int:
+        with self.lock:
+            block = self.blocks.get(key)
+            if block is None or block[0] > block[1]:
+                # Own transaction: the reservation must survive a rollback of the request
+                with db.engine.begin() as conn:
+                    end = _reserve(conn, key, block_size)
+                block = self.blocks[key] = [end - block_size + 1, end]
+            value = block[0]
+            block[0] += 1
+            return value
+
+
+def _block_cache(app) -> _BlockCache:
+    cache = app.extensions.get('sequence_blocks')
+    if cache is None:
+        cache = app.extensions.setdefault('sequence_blocks', _BlockCache())
+    return cache
+
+
+def local_year(now: Optional[datetime] = None) -> int:
+    """Calendar year in the Philippines at ``now`` (aware; default: the current time)."""
+    return (now or datetime.now(timezone.utc)).astimezone(MANILA).year
+
+
+def next_value(prefix: str, municipality_id: Optional[int], year: Optional[int] = None) -> int:
+    """Allocate the next number for ``prefix`` in ``municipality_id`` and ``year``."""
+    key = (prefix, int(municipality_id or PROVINCE_WIDE), year or local_year())
+    app = current_app._get_current_object()
+    block_size = max(1, int(app.config.get('REFERENCE_BLOCK_SIZE', 1)))
+    if block_size == 1:
+        return _reserve(db.session.connection(), key, 1)
+    return _block_cache(app).take(key, block_size)
+
+
+def next_reference(prefix: str, municipality_id: Optional[int], year: Optional[int] = None) -> str:
+    """Formatted reference number, e.g. ``ISS-3-2026-000042``."""
+    year = year or local_year()
+    value = next_value(prefix, municipality_id, year)
+    return f'{prefix}-{int(municipality_id or PROVINCE_WIDE)}-{year}-{value:06d}'
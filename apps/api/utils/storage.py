@@ -0,0 +1,448 @@
+"""Where uploaded and generated files live: local disk or an S3-compatible bucket.
+
+Everything that reads or writes under the upload tree (uploads, image
+variants, generated PDFs, batch files, claim QR codes, exports) goes through
+``get_storage()`` with a key relative to the tree, e.g.
+``blobs/ab/cd/<sha256>.jpg`` or ``generated_docs/iba/42.pdf``.
+
+``STORAGE_BACKEND``:
+
+- ``local`` (default): files under ``UPLOAD_FOLDER``, served by ``/uploads``.
+- ``s3``: objects in ``S3_BUCKET`` at ``S3_ENDPOINT_URL`` (AWS, MinIO, Ceph,
+  R2...), keys prefixed with ``S3_PREFIX``. Requests are signed with AWS
+  Signature V4 using only the standard library. Uploads stream from the open
+  file, and downloads are handed to the bucket with presigned GET URLs
+  (``S3_PRESIGN_EXPIRES``), so no API node proxies the bytes and any node can
+  serve any file.
+
+Code that needs a real file on disk (ReportLab, openpyxl) writes through
+``storage.writer(key)``, which yields a local temp path and stores it on exit.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import http.client
+import io
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+from urllib.parse import quote, urlsplit
+
+from flask import current_app
+
+Source = Union[bytes, str, Path, BinaryIO]
+CHUNK_SIZE = 64 * 1024
+
+
+class StorageError(OSError):
+    """A storage backend request failed."""
+
+
+def clean_key(key) -> str:
+    """Normalize a storage key; rejects absolute paths and ``..`` segments."""
+    parts = [p for p in str(key or '').replace('\\', '/').split('/') if p not in ('', '.')]
+    if not parts or '..' in parts:
+        raise FileNotFoundError(key)
+    return '/'.join(parts)
+
+
+class Storage(ABC):
+    """Interface shared by the backends."""
+
+    @abstractmethod
+    def save(self, key: str, source: Source, content_sha256: Optional[str] = None, move: bool = False) -> str:
+        """Store ``source`` (bytes, a local path or a binary file) at ``key``; ``move`` consumes a path."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Binary stream of the file at ``key``; raises ``FileNotFoundError``."""
+
+    def read_bytes(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[Tuple[int, int]]:
+        """``(size, mtime_ns)`` of ``key``, or None when missing."""
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove ``key``; False when it did not exist."""
+
+    @abstractmethod
+    def list(self, prefix: str) -> Iterator[str]:
+        """Keys starting with ``prefix``."""
+
+    @abstractmethod
+    def url(self, key: str, base_url: Optional[str] = None, expires: Optional[int] = None) -> str:
+        """URL a browser can fetch ``key`` from."""
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Path on this node's disk, for backends that have one."""
+        return None
+
+    @contextmanager
+    def writer(self, key: str):
+        """Local temp path to write ``key`` to; stored when the block exits without error."""
+        fd, tmp = tempfile.mkstemp(suffix=Path(key).suffix)
+        os.close(fd)
+        try:
+            yield Path(tmp)
+            self.save(key, tmp, move=True)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+class LocalStorage(Storage):
+    """Files under one directory (``UPLOAD_FOLDER``)."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        base = self.root.resolve()
+        path = (base / clean_key(key)).resolve()
+        if base not in path.parents:
+            raise FileNotFoundError(key)
+        return path
+
+    def _tmp(self, path: Path) -> Path:
+        return path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    def save(self, key, source, content_sha256=None, move=False):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if move and isinstance(source, (str, Path)):
+            try:
+                os.replace(source, path)
+                return clean_key(key)
+            except OSError:
+                pass  # other filesystem: copy below
+        tmp = self._tmp(path)
+        try:
+            if isinstance(source, (bytes, bytearray)):
+                tmp.write_bytes(source)
+            elif isinstance(source, (str, Path)):
+                shutil.copyfile(source, tmp)
+            else:
+                with open(tmp, 'wb') as out:
+                    shutil.copyfileobj(source, out, CHUNK_SIZE)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        if move and isinstance(source, (str, Path)) and os.path.exists(source):
+            os.unlink(source)
+        return clean_key(key)
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def stat(self, key):
+        try:
+            st = self._path(key).stat()
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def delete(self, key):
+        try:
+            self._path(key).unlink()
+            return True
+        except OSError:
+            return False
+
+    def list(self, prefix):
+        prefix = str(prefix).replace('\\', '/').lstrip('/')
+        directory = prefix.rpartition('/')[0]
+        folder = self.root / directory if directory else self.root
+        if not folder.is_dir():
+            return
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+            rel_dir = Path(dirpath).relative_to(self.root).as_posix()
+            for name in sorted(filenames):
+                key = name if rel_dir == '.' else f'{rel_dir}/{name}'
+                if key.startswith(prefix) and not name.endswith('.tmp'):
+                    yield key
+
+    def url(self, key, base_url=None, expires=None):
+        if base_url is None:
+            base_url = os.getenv('BASE_URL', 'http://localhost:5000')
+        return f"{base_url}/uploads/{clean_key(key)}"
+
+    def local_path(self, key):
+        return self._path(key)
+
+    @contextmanager
+    def writer(self, key):
+        # Same directory, so the final rename is atomic: readers never see a partial file
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp(path)
+        try:
+            yield tmp
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+
+def _sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _uri_encode(value: str, safe: str = '-_.~') -> str:
+    return quote(value, safe=safe)
+
+
+class _ObjectBody(io.RawIOBase):
+    """Streaming GET body; closing it closes the connection."""
+
+    def __init__(self, conn, resp):
+        self._conn, self._resp = conn, resp
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self._resp.readinto(b)
+
+    def close(self):
+        if not self.closed:
+            self._resp.close()
+            self._conn.close()
+        super().close()
+
+
+class S3Storage(Storage):
+    """Objects in an S3-compatible bucket (path-style or virtual-hosted addressing)."""
+
+    def __init__(self, endpoint_url: str, bucket: str, access_key: str, secret_key: str,
+                 region: str = 'us-east-1', prefix: str = '', presign_expires: int = 3600,
+                 addressing_style: str = 'path', timeout: float = 30):
+        parts = urlsplit(endpoint_url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f'Invalid S3 endpoint: {endpoint_url!r}')
+        self.secure = parts.scheme == 'https'
+        self.bucket = bucket
+        self.access_key, self.secret_key = access_key, secret_key
+        self.region = region
+        self.prefix = clean_key(prefix) + '/' if prefix else ''
+        self.presign_expires = int(presign_expires)
+        self.timeout = timeout
+        default_port = 443 if self.secure else 80
+        self.port = parts.port or default_port
+        netloc = parts.hostname if self.port == default_port else f'{parts.hostname}:{self.port}'
+        if addressing_style == 'virtual':
+            self.host, self.connect_host, self.base_path = f'{bucket}.{netloc}', f'{bucket}.{parts.hostname}', ''
+        else:
+            self.host, self.connect_host, self.base_path = netloc, parts.hostname, f'/{bucket}'
+        self.scheme = parts.scheme
+
+    # --- signing (AWS Signature Version 4) ---
+
+    def _scope(self, now: datetime) -> Tuple[str, str, str]:
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        datestamp = amz_date[:8]
+        return amz_date, datestamp, f'{datestamp}/{self.region}/s3/aws4_request'
+
+    def _signature(self, datestamp: str, string_to_sign: str) -> str:
+        k = _hmac(('AWS4' + self.secret_key).encode('utf-8'), datestamp)
+        for part in (self.region, 's3', 'aws4_request'):
+            k = _hmac(k, part)
+        return hmac.new(k, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _canonical_query(params: dict) -> str:
+        return '&'.join(f'{_uri_encode(k)}={_uri_encode(str(v))}' for k, v in sorted(params.items()))
+
+    def _string_to_sign(self, method, path, query, headers, payload_hash, amz_date, scope):
+        signed = sorted(h.lower() for h in headers)
+        canonical_headers = ''.join(f'{h}:{str(headers[h]).strip()}\n' for h in signed)
+        canonical = '\n'.join([method, path, query, canonical_headers, ';'.join(signed), payload_hash])
+        return ';'.join(signed), '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope, _sha256_hex(canonical.encode('utf-8'))])
+
+    def _object_path(self, key: str) -> str:
+        return _uri_encode(f'{self.base_path}/{self.prefix}{clean_key(key)}', safe='/-_.~')
+
+    def presign(self, key: str, expires: Optional[int] = None, method: str = 'GET', now: Optional[datetime] = None) -> str:
+        """Presigned URL for ``key``, valid for ``expires`` seconds."""
+        amz_date, datestamp, scope = self._scope(now or datetime.now(timezone.utc))
+        path = self._object_path(key)
+        params = {
+            'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+            'X-Amz-Credential': f'{self.access_key}/{scope}',
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(int(expires or self.presign_expires)),
+            'X-Amz-SignedHeaders': 'host',
+        }
+        query = self._canonical_query(params)
+        _signed, to_sign = self._string_to_sign(method, path, query, {'host': self.host}, 'UNSIGNED-PAYLOAD', amz_date, scope)
+        return f'{self.scheme}://{self.host}{path}?{query}&X-Amz-Signature={self._signature(datestamp, to_sign)}'
+
+    # --- requests ---
+
+    def _connection(self):
+        cls = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+        return cls(self.connect_host, self.port, timeout=self.timeout, blocksize=CHUNK_SIZE)
+
+    def _request(self, method: str, path: str, params: Optional[dict] = None, body=None,
+                 headers: Optional[dict] = None, payload_hash: Optional[str] = None):
+        """Send a signed request; returns ``(connection, response)``, the body unread."""
+        amz_date, datestamp, scope = self._scope(datetime.now(timezone.utc))
+        query = self._canonical_query(params or {})
+        payload_hash = payload_hash or _sha256_hex(body if isinstance(body, bytes) else b'')
+        signed_headers = {'host': self.host, 'x-amz-content-sha256': payload_hash, 'x-amz-date': amz_date}
+        signed, to_sign = self._string_to_sign(method, path, query, signed_headers, payload_hash, amz_date, scope)
+        send_headers = dict(headers or {})
+        send_headers.update({
+            'Host': self.host,
+            'x-amz-content-sha256': payload_hash,
+            'x-amz-date': amz_date,
+            'Authorization': (f'AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, '
+                              f'SignedHeaders={signed}, Signature={self._signature(datestamp, to_sign)}'),
+        })
+        conn = self._connection()
+        try:
+            conn.request(method, f'{path}?{query}' if query else path, body=body, headers=send_headers)
+            return conn, conn.getresponse()
+        except Exception as e:
+            conn.close()
+            raise StorageError(f'S3 {method} {path} failed: {e}') from e
+
+    def _call(self, method, key_or_path, ok=(200,), **kwargs):
+        path = key_or_path if key_or_path.startswith('/') else self._object_path(key_or_path)
+        conn, resp = self._request(method, path, **kwargs)
+        try:
+            data = resp.read()
+        finally:
+            conn.close()
+        if resp.status == 404:
+            raise FileNotFoundError(key_or_path)
+        if resp.status not in ok:
+            raise StorageError(f'S3 {method} {key_or_path}: HTTP {resp.status} {data[:200]!r}')
+        return resp, data
+
+    def save(self, key, source, content_sha256=None, move=False):
+        key = clean_key(key)
+        headers = {'Content-Type': mimetypes.guess_type(key)[0] or 'application/octet-stream'}
+        try:
+            from apps.api.utils.upload_serving import is_immutable_upload
+        except ImportError:
+            from utils.upload_serving import is_immutable_upload
+        if is_immutable_upload(key):
+            headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        if isinstance(source, (bytes, bytearray)):
+            body = bytes(source)
+            headers['Content-Length'] = str(len(body))
+            self._call('PUT', key, body=body, headers=headers, payload_hash=content_sha256 or _sha256_hex(body))
+        else:
+            f = open(source, 'rb') if isinstance(source, (str, Path)) else source
+            try:
+                size = os.fstat(f.fileno()).st_size - f.tell() if hasattr(f, 'fileno') else None
+            except (OSError, io.UnsupportedOperation):
+                size = None
+            try:
+                if size is None:  # unsized stream: buffer it (uploads are size-limited)
+                    body = f.read()
+                    headers['Content-Length'] = str(len(body))
+                    self._call('PUT', key, body=body, headers=headers, payload_hash=_sha256_hex(body))
+                else:
+                    headers['Content-Length'] = str(size)
+                    self._call('PUT', key, body=f, headers=headers, payload_hash=content_sha256 or 'UNSIGNED-PAYLOAD')
+            finally:
+                if f is not source:
+                    f.close()
+        if move and isinstance(source, (str, Path)) and os.path.exists(source):
+            os.unlink(source)
+        return key
+
+    def open(self, key):
+        conn, resp = self._request('GET', self._object_path(key))
+        if resp.status != 200:
+            data = resp.read()
+            conn.close()
+            if resp.status == 404:
+                raise FileNotFoundError(key)
+            raise StorageError(f'S3 GET {key}: HTTP {resp.status} {data[:200]!r}')
+        return io.BufferedReader(_ObjectBody(conn, resp), CHUNK_SIZE)
+
+    def stat(self, key):
+        try:
+            resp, _ = self._call('HEAD', key)
+        except FileNotFoundError:
+            return None
+        modified = resp.getheader('Last-Modified')
+        mtime_ns = int(parsedate_to_datetime(modified).timestamp() * 1e9) if modified else 0
+        return int(resp.getheader('Content-Length') or 0), mtime_ns
+
+    def delete(self, key):
+        try:
+            self._call('DELETE', key, ok=(200, 204))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list(self, prefix):
+        ns = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+        params = {'list-type': '2', 'prefix': self.prefix + str(prefix).lstrip('/')}
+        while True:
+            _resp, data = self._call('GET', _uri_encode(self.base_path or '/', safe='/-_.~'), params=params)
+            root = ET.fromstring(data)
+            for node in root.iter(f'{ns}Key'):
+                yield node.text[len(self.prefix):]
+            token = root.findtext(f'{ns}NextContinuationToken')
+            if root.findtext(f'{ns}IsTruncated') != 'true' or not token:
+                return
+            params['continuation-token'] = token
+
+    def url(self, key, base_url=None, expires=None):
+        return self.presign(key, expires)
+
+
+def create_storage(config) -> Storage:
+    """Backend described by a Flask config mapping."""
+    backend = (config.get('STORAGE_BACKEND') or 'local').lower()
+    if backend == 's3':
+        return S3Storage(
+            endpoint_url=config.get('S3_ENDPOINT_URL') or f"https://s3.{config.get('S3_REGION') or 'us-east-1'}.amazonaws.com",
+            bucket=config['S3_BUCKET'],
+            access_key=config.get('S3_ACCESS_KEY_ID') or '',
+            secret_key=config.get('S3_SECRET_ACCESS_KEY') or '',
+            region=config.get('S3_REGION') or 'us-east-1',
+            prefix=config.get('S3_PREFIX') or '',
+            presign_expires=int(config.get('S3_PRESIGN_EXPIRES', 3600)),
+            addressing_style=config.get('S3_ADDRESSING_STYLE') or 'path',
+            timeout=float(config.get('S3_TIMEOUT', 30)),
+        )
+    if backend != 'local':
+        raise ValueError(f'Unknown STORAGE_BACKEND: {backend}')
+    return LocalStorage(config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def get_storage(app=None) -> Storage:
+    """The app's storage backend (created on first use)."""
+    app = app or current_app._get_current_object()
+    storage = app.extensions.get('storage')
+    if storage is None:
+        storage = app.extensions.setdefault('storage', create_storage(app.config))
+    return storage
@@ -0,0 +1,68 @@
+"""Cached glyph metrics for laying out text on ReportLab canvases.
+
+``canvas.stringWidth`` encodes the string and looks up every glyph in the
+font on each call, and table reports used to call it several times per cell
+(a binary search to truncate with an ellipsis). ``FontMetrics`` keeps each
+font's advance widths in a table built once per worker, so a width is a sum
+of list lookups and ``fit`` truncates in one pass over prefix sums.
+
+Widths equal ``pdfmetrics.stringWidth`` (ReportLab applies no kerning).
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import List
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+ELLIPSIS = '…'
+
+
+class FontMetrics:
+    """Advance widths of one font, in 1/1000 em."""
+
+    def __init__(self, font_name: str):
+        self.font_name = font_name
+        # Latin-1 in a list (indexed by the encoded byte); anything else on first use
+        self._latin1 = [stringWidth(chr(i), font_name, 1000) for i in range(256)]
+        self._other = {}
+
+    def _char(self, ch: str) -> float:
+        w = self._other.get(ch)
+        if w is None:
+            w = self._other[ch] = stringWidth(ch, self.font_name, 1000)
+        return w
+
+    def _units(self, text: str) -> List[float]:
+        table = self._latin1
+        try:
+            return list(map(table.__getitem__, text.encode('latin-1')))
+        except UnicodeEncodeError:
+            return [table[ord(ch)] if ord(ch) < 256 else self._char(ch) for ch in text]
+
+    def width(self, text: str, size: float) -> float:
+        """Width of ``text`` at ``size`` points."""
+        try:
+            units = sum(map(self._latin1.__getitem__, text.encode('latin-1')))
+        except UnicodeEncodeError:
+            units = sum(self._units(text))
+        return units * size / 1000.0
+
+    def fit(self, text: str, max_width: float, size: float, ellipsis: str = ELLIPSIS) -> str:
+        """``text`` if it fits in ``max_width``, else its longest prefix that fits with ``ellipsis``."""
+        limit = max_width * 1000.0 / size
+        units = self._units(text)
+        if sum(units) <= limit:
+            return text
+        room = limit - sum(self._units(ellipsis))
+        if room < 0:
+            return ellipsis
+        return text[:bisect_right(list(accumulate(units)), room)] + ellipsis
+
+
+@lru_cache(maxsize=32)
+def font_metrics(font_name: str) -> FontMetrics:
+    """Shared ``FontMetrics`` for ``font_name`` (per worker)."""
+    return FontMetrics(font_name)
@@ -0,0 +1,103 @@
+"""Responses for ``/uploads/<path>``.
+
+``UPLOAD_SERVE_MODE`` picks who moves the bytes:
+
+- ``python`` (default): ``send_file`` with ``Range``, ``ETag`` and
+  ``Last-Modified`` handling. Full-body responses go through the server's
+  ``wsgi.file_wrapper`` (gunicorn uses ``sendfile``); range responses are
+  read from the open file.
+- ``x-accel``: an empty response with ``X-Accel-Redirect`` to
+  ``UPLOAD_ACCEL_PREFIX`` + path, for nginx with::
+
+      location /_uploads/ { internal; alias /srv/munlink/uploads/; }
+
+- ``x-sendfile``: an empty response with ``X-Sendfile: <absolute path>``
+  (Apache mod_xsendfile, lighttpd).
+
+With a front proxy the worker is free as soon as the headers are sent, and
+the proxy answers ranges and conditional requests itself.
+
+With object storage (``STORAGE_BACKEND=s3``) there is no local file: the
+response is a ``302`` to a presigned URL, and the bucket answers ranges and
+conditional requests. The redirect itself is cached privately for a fraction
+of the link lifetime.
+
+Cache policy, in every mode: uploads are saved under unique generated names
+(``20261019_101500_1a2b3c4d.jpg`` and its ``.thumb.webp``-style variants) or
+content hashes, and never rewritten, so those are ``public, max-age=<1 year>,
+immutable``. Other files (generated PDFs are rewritten in place) get
+``UPLOAD_CACHE_MAX_AGE`` and revalidate with the ETag.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from flask import current_app, redirect, send_file
+from werkzeug.security import safe_join
+
+try:
+    from apps.api.utils.storage import clean_key, get_storage
+except ImportError:
+    from utils.storage import clean_key, get_storage
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# <timestamp>_<uuid8> (uploads saved before content addressing) or a hex digest, plus optional variant suffixes
+_IMMUTABLE_NAME = re.compile(r'^(?:\d{8}_\d{6}_[0-9a-f]{8}|[0-9a-f]{32,})(?:\.[a-z0-9]+)+$')
+
+
+def is_immutable_upload(filename: str) -> bool:
+    """True for upload names that are never reused for different content."""
+    return bool(_IMMUTABLE_NAME.match(os.path.basename(filename)))
+
+
+def _offload(path: Path, filename: str, mode: str):
+    resp = current_app.response_class(status=200)
+    resp.mimetype = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+    if mode == 'x-accel':
+        prefix = current_app.config.get('UPLOAD_ACCEL_PREFIX', '/_uploads/').rstrip('/')
+        resp.headers['X-Accel-Redirect'] = f"{prefix}/{quote(filename.replace(os.sep, '/'))}"
+    else:
+        resp.headers['X-Sendfile'] = str(path)
+    return resp
+
+
+def _redirect(storage, filename: str):
+    key = clean_key(filename)
+    if not storage.exists(key):
+        raise FileNotFoundError(filename)
+    expires = int(current_app.config.get('S3_PRESIGN_EXPIRES', 3600))
+    resp = redirect(storage.url(key, expires=expires), code=302)
+    resp.cache_control.private = True
+    resp.cache_control.max_age = max(expires // 10, 0)  # well inside the link lifetime
+    return resp
+
+
+def upload_response(filename: str):
+    """Response serving ``filename`` from upload storage; raises ``FileNotFoundError``."""
+    storage = get_storage()
+    if storage.local_path(clean_key(filename)) is None:
+        return _redirect(storage, filename)
+
+    base = os.path.abspath(str(current_app.config.get('UPLOAD_FOLDER', 'uploads')))
+    joined = safe_join(base, filename)
+    if joined is None or not os.path.isfile(joined):
+        raise FileNotFoundError(filename)
+    path = Path(joined)
+
+    immutable = is_immutable_upload(filename)
+    max_age = IMMUTABLE_MAX_AGE if immutable else int(current_app.config.get('UPLOAD_CACHE_MAX_AGE', 300))
+    mode = (current_app.config.get('UPLOAD_SERVE_MODE') or 'python').lower()
+    if mode in ('x-accel', 'x-sendfile'):
+        resp = _offload(path, filename, mode)
+        resp.cache_control.max_age = max_age
+    else:
+        resp = send_file(path, conditional=True, etag=True, last_modified=path.stat().st_mtime, max_age=max_age)
+        resp.accept_ranges = 'bytes'  # advertised up front so players and PDF viewers fetch in parts
+    resp.cache_control.public = True
+    if immutable:
+        resp.cache_control.immutable = True
+    return resp
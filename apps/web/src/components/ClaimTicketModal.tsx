@@ -28,7 +28,10 @@ export default function ClaimTicketModal({ requestId, isOpen, onClose }: Props)
     return () => { mounted = false }
   }, [isOpen, requestId])
 
-  const qr = data?.qr_url ? mediaUrl(data.qr_url) : undefined
+  // Prefer the inline SVG (sharp when printed, no extra request); fall back to the stored PNG
+  const qr = data?.qr_svg
+    ? `data:image/svg+xml;charset=utf-8,${encodeURIComponent(data.qr_svg)}`
+    : (data?.qr_url ? mediaUrl(data.qr_url) : undefined)
   const code = showPlain && data?.code_plain ? data.code_plain : data?.code_masked
   const muni = data?.muni_name
   const doc = data?.doc_name
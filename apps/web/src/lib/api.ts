@@ -265,6 +265,9 @@ export const documentsApi = {
 
 export const issuesApi = {
   getAll: (params?: any) => api.get('/api/issues', { params }),
+  // bbox = map.getBounds().toBBoxString(); clusters below zoom 15, pins above
+  getMap: (params: { bbox: string; zoom: number; municipality_id?: number; status?: string; category_id?: number }) =>
+    api.get('/api/issues/map', { params }),
   getById: (id: number) => api.get(`/api/issues/${id}`),
   create: (data: any) => api.post('/api/issues', data),
   getMine: () => api.get('/api/issues/my'),
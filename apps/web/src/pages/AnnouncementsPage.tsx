@@ -12,6 +12,7 @@ type Announcement = {
   priority: 'high' | 'medium' | 'low'
   created_at?: string
   images?: string[]
+  thumbnails?: string[]
   pinned?: boolean
 }
 
@@ -105,7 +106,7 @@ export default function AnnouncementsPage() {
                 municipality={a.municipality_name || 'Province-wide'}
                 priority={a.priority}
                 createdAt={a.created_at}
-                images={a.images}
+                images={a.thumbnails ?? a.images}
                 pinned={(a as any).pinned}
                 href={`/announcements/${a.id}`}
               />
@@ -14,7 +14,7 @@ export default function HomePage() {
   const [featuredItems, setFeaturedItems] = useState<any[]>([])
   // Removed mock announcements; show nothing if none.
   // Keep marketplace fallback minimal to maintain layout without empty collapse.
-  const fallbackItems: Array<{ id?: number; title: string; price?: number; transaction_type: string; images?: string[] }> = []
+  const fallbackItems: Array<{ id?: number; title: string; price?: number; transaction_type: string; images?: string[]; thumbnails?: string[] }> = []
 
   useEffect(() => {
     let cancelled = false
@@ -111,7 +111,7 @@ export default function HomePage() {
                     municipality={a.municipality_name || 'Province-wide'}
                     priority={a.priority}
                     createdAt={a.created_at}
-                    images={a.images}
+                    images={a.thumbnails ?? a.images}
                     pinned={(a as any).pinned}
                     href={'/announcements'}
                   />
@@ -146,7 +146,7 @@ export default function HomePage() {
                 {(featuredItems.length ? featuredItems : fallbackItems).map((it: any) => (
                   <motion.div key={it.id} initial={{opacity:0,y:8}} whileInView={{opacity:1,y:0}} viewport={{once:true}}>
                     <MarketplaceCard
-                      imageUrl={it.images?.[0] ? mediaUrl(it.images[0]) : undefined}
+                      imageUrl={(it.thumbnails ?? it.images)?.[0] ? mediaUrl((it.thumbnails ?? it.images)[0]) : undefined}
                       title={it.title}
                       price={it.transaction_type==='sell' && it.price ? `₱${Number(it.price).toLocaleString()}` : undefined}
                       municipality={(it as any).municipality_name || selectedMunicipality?.name || 'Province-wide'}
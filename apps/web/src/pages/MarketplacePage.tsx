@@ -12,6 +12,7 @@ type Item = {
   transaction_type: 'donate' | 'lend' | 'sell'
   price?: number
   images?: string[]
+  thumbnails?: string[]
   municipality_id?: number
 }
 
@@ -133,7 +134,7 @@ export default function MarketplacePage() {
               <div className="w-full aspect-[4/3] bg-gray-200 rounded-lg mb-4 overflow-hidden relative">
                 <Link to={`/marketplace/${item.id}`} aria-label={`View ${item.title}`} className="absolute inset-0">
                   {item.images?.[0] ? (
-                    <img src={mediaUrl(item.images[0])} alt={item.title} loading="lazy" className="responsive-img h-full" />
+                    <img src={mediaUrl(item.thumbnails?.[0] || item.images[0])} alt={item.title} loading="lazy" className="responsive-img h-full" />
                   ) : (
                     <div className="w-full h-full" />
                   )}
@@ -10,6 +10,7 @@ type MyItem = {
   title: string
   status: string
   images?: string[]
+  thumbnails?: string[]
   transaction_type: 'donate' | 'lend' | 'sell'
   price?: number
   created_at?: string
@@ -126,7 +127,7 @@ export default function MyMarketplacePage() {
             <div key={it.id} className="card">
               <div className="w-full aspect-[4/3] bg-gray-100 rounded-lg mb-3 overflow-hidden">
                 {it.images?.[0] && (
-                  <img src={mediaUrl(it.images[0])} alt={it.title} loading="lazy" className="w-full h-full object-cover" />
+                  <img src={mediaUrl(it.thumbnails?.[0] || it.images[0])} alt={it.title} loading="lazy" className="w-full h-full object-cover" />
                 )}
               </div>
               <h3 className="font-semibold mb-1 truncate">{it.title}</h3>